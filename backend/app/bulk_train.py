@@ -0,0 +1,81 @@
+"""
+CLI d'entraînement hors ligne sur un dump complet d'historiques
+
+Génère un dump synthétique, ou entraîne l'ensemble sur un dump JSONL/Parquet
+avec des processus de calcul des features et une matrice d'entraînement en
+fichiers ``.npy`` mappés (voir ``services/bulk_training.py``). Le modèle est
+publié dans le registre : l'API le charge au démarrage ou à chaud.
+
+Usage (depuis backend/) :
+    python app/bulk_train.py generate /data/dump.jsonl --users 20000 --sets-per-user 500
+    python app/bulk_train.py train /data/dump.jsonl --workdir /data/matrix \\
+        --registry ./models/registry --workers 4 --max-train-rows 1000000
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from services import bulk_training
+from utils.synthetic_data import iter_user_documents
+
+logger = logging.getLogger("bulk_train")
+
+def generate(args) -> dict:
+    documents = iter_user_documents(
+        args.users, args.sets_per_user, exercises_per_user=args.exercises_per_user, seed=args.seed
+    )
+    start = time.perf_counter()
+    result = bulk_training.write_workout_dump(args.output, documents)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def train(args) -> dict:
+    matrix = bulk_training.build_training_matrix(
+        bulk_training.iter_dump_users(args.dump), args.workdir, workers=args.workers, chunk_users=args.chunk_users
+    )
+    result = {"matrix": matrix}
+    
+    if not args.features_only:
+        training = bulk_training.train_from_matrix(
+            matrix["features_path"], matrix["targets_path"], registry_path=args.registry,
+            max_train_rows=args.max_train_rows, seed=args.seed
+        )
+        training.pop("model")
+        result["training"] = training
+    
+    result["peak_rss_mb"] = bulk_training.peak_rss_mb()
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    generate_parser = commands.add_parser("generate", help="Écrit un dump synthétique (.jsonl ou .parquet)")
+    generate_parser.add_argument("output")
+    generate_parser.add_argument("--users", type=int, default=20000)
+    generate_parser.add_argument("--sets-per-user", type=int, default=500)
+    generate_parser.add_argument("--exercises-per-user", type=int, default=3)
+    generate_parser.add_argument("--seed", type=int, default=42)
+    
+    train_parser = commands.add_parser("train", help="Entraîne l'ensemble sur un dump")
+    train_parser.add_argument("dump")
+    train_parser.add_argument("--workdir", required=True, help="Dossier des fichiers features.npy / targets.npy")
+    train_parser.add_argument("--registry", help="Registre où publier le modèle (sinon non sauvegardé)")
+    train_parser.add_argument("--workers", type=int, default=2, help="Processus de calcul des features (0 : aucun)")
+    train_parser.add_argument("--chunk-users", type=int, default=256)
+    train_parser.add_argument("--max-train-rows", type=int, default=None,
+                              help="Échantillon uniforme au-delà de ce nombre de lignes pour le fit")
+    train_parser.add_argument("--features-only", action="store_true", help="Construit la matrice sans entraîner")
+    train_parser.add_argument("--seed", type=int, default=42)
+    
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    
+    result = generate(args) if args.command == "generate" else train(args)
+    print(json.dumps(result, default=str))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
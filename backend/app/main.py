@@ -1,11 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 import uvicorn
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
+import asyncio
 import logging
+import os
+import time
 from contextlib import asynccontextmanager
 
+try:
+    from utils import metrics
+    from utils.executor import ExecutorOverloadedError
+    from utils.serialization import NumpyJSONResponse
+except ImportError:
+    # Lancé en tant que package (uvicorn app.main:app)
+    from app.utils import metrics
+    from app.utils.executor import ExecutorOverloadedError
+    from app.utils.serialization import NumpyJSONResponse
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,33 +28,132 @@ logger = logging.getLogger(__name__)
 ml_pipeline = None
 ensemble_model = None
 
+# Readiness : fausse tant que le démarrage et le préchauffage ne sont pas terminés
+readiness = {"ready": False, "warmup": None}
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application"""
     global ml_pipeline, ensemble_model
+    boot_start = time.perf_counter()
+    readiness.update(ready=False, warmup=None)
     try:
         # Import des services ML
         logger.info("Initialisation des services ML...")
+        # pandas, scipy.stats et mlflow ne sont importés qu'au premier usage (utils.lazy_imports)
         from services.ml_pipeline import MLPipeline
         from models.ensemble_model import AdvancedEnsembleModel
+        imports_ms = round((time.perf_counter() - boot_start) * 1000, 3)
         
-        ml_pipeline = MLPipeline()
+        ml_pipeline = MLPipeline(pipeline_config())
         ensemble_model = AdvancedEnsembleModel()
-        logger.info("✅ Services ML initialisés avec succès")
+        pipeline_init_ms = round((time.perf_counter() - boot_start) * 1000 - imports_ms, 3)
+        
+        # Démarrage à chaud : dernier modèle du registre, sans attendre un /api/ml/train
+        if await ml_pipeline.warm_start():
+            logger.info(f"Modèle v{ml_pipeline.model_version} chargé au démarrage")
+        ml_pipeline.startup_report.update({
+            "imports_ms": imports_ms,
+            "pipeline_init_ms": pipeline_init_ms,
+            "boot_ms": round((time.perf_counter() - boot_start) * 1000, 3)
+        })
+        logger.info(f"✅ Services ML initialisés avec succès ({ml_pipeline.startup_report['boot_ms']} ms)")
+        logger.info(f"Rapport de démarrage: {ml_pipeline.get_startup_report()}")
     except Exception as e:
         logger.error(f"❌ Erreur lors de l'initialisation des services ML: {e}")
         logger.info("🔄 Mode fallback activé")
     
+    warmup_task = None
+    if ml_pipeline is not None and ml_pipeline.config.get("warmup", {}).get("enabled", False):
+        # Préchauffage en tâche de fond : /health/live répond déjà, /health/ready attend sa fin
+        warmup_task = asyncio.create_task(warm_up_pipeline(ml_pipeline))
+    else:
+        readiness.update(ready=True, warmup="disabled")
+    
     yield  # L'application s'exécute ici
     
     # Nettoyage lors de l'arrêt
     logger.info("Arrêt de l'application")
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if ml_pipeline is not None:
+        ml_pipeline.shutdown()
+
+async def warm_up_pipeline(pipeline):
+    """Préchauffe le pipeline puis déclare l'instance prête, même si le préchauffage échoue"""
+    readiness["warmup"] = "running"
+    try:
+        report = await pipeline.warmup()
+        readiness["warmup"] = "done"
+        logger.info(f"Préchauffage terminé en {report['warmup_ms']} ms: {report['stages']}")
+    except Exception as e:
+        logger.warning(f"Préchauffage interrompu: {e}")
+        readiness["warmup"] = "failed"
+    readiness["ready"] = True
+
+def pipeline_config() -> Dict:
+    """Configuration du pipeline ML depuis l'environnement"""
+    config = {}
+    env_keys = {
+        "ML_INFERENCE_WORKERS": "inference_workers",
+        "ML_INFERENCE_MAX_PENDING": "inference_max_pending",
+        "ML_TRAINING_WORKERS": "training_workers",
+        "ML_TRAINING_MAX_PENDING": "training_max_pending"
+    }
+    for env_key, config_key in env_keys.items():
+        if os.getenv(env_key):
+            config[config_key] = int(os.getenv(env_key))
+    if os.getenv("ML_TRAINING_BACKEND"):
+        config["training_backend"] = os.getenv("ML_TRAINING_BACKEND")
+    
+    return {
+        "executor": config,
+        "model_registry_path": os.path.join(os.getenv("ML_MODEL_PATH", "./models/"), "registry"),
+        "registry_poll_interval": float(os.getenv("ML_MODEL_RELOAD_INTERVAL", "5")),
+        "analysis_depth": os.getenv("ML_ANALYSIS_DEPTH", "exercise"),
+        "incremental_features": os.getenv("ML_INCREMENTAL_FEATURES", "false").lower() == "true",
+        "incremental_plateau": os.getenv("ML_INCREMENTAL_PLATEAU", "false").lower() == "true",
+        "prediction_cache": {
+            "enabled": os.getenv("ML_PREDICTION_CACHE", "true").lower() == "true",
+            "max_entries": int(os.getenv("ML_PREDICTION_CACHE_SIZE", "1024")),
+            "ttl_seconds": float(os.getenv("ML_PREDICTION_CACHE_TTL", "300"))
+        },
+        "single_flight": {
+            "enabled": os.getenv("ML_SINGLE_FLIGHT", "true").lower() == "true",
+            "timeout_seconds": float(os.getenv("ML_SINGLE_FLIGHT_TIMEOUT", "10"))
+        },
+        "micro_batching": {
+            "enabled": os.getenv("ML_MICRO_BATCHING", "false").lower() == "true",
+            "max_batch_size": int(os.getenv("ML_BATCH_MAX_SIZE", "32")),
+            "max_delay_ms": float(os.getenv("ML_BATCH_MAX_DELAY_MS", "2"))
+        },
+        "compiled_inference": {
+            "enabled": os.getenv("ML_COMPILED_INFERENCE", "true").lower() == "true"
+        },
+        "model_partitions": {
+            "enabled": os.getenv("ML_MODEL_PARTITIONS", "false").lower() == "true",
+            "path": os.path.join(os.getenv("ML_MODEL_PATH", "./models/"), "partitions"),
+            "max_resident_bytes": int(float(os.getenv("ML_PARTITION_MEMORY_MB", "256")) * 1024 * 1024),
+            "min_samples": int(os.getenv("ML_PARTITION_MIN_SAMPLES", "30")),
+            "cohort_field": os.getenv("ML_PARTITION_COHORT_FIELD") or None
+        },
+        "warmup": {
+            "enabled": os.getenv("ML_WARMUP", "true").lower() == "true",
+            "rounds": int(os.getenv("ML_WARMUP_ROUNDS", "2"))
+        },
+        "online_training": {
+            "enabled": os.getenv("ML_TRAINING_MODE", "full").lower() == "incremental",
+            "full_refit_every": int(os.getenv("ML_FULL_REFIT_EVERY", "20")),
+            "buffer_size": int(os.getenv("ML_ONLINE_BUFFER_SIZE", "20000"))
+        }
+    }
 
 app = FastAPI(
     title="Ici Ça Pousse ML API", 
     version="2.0.0", 
     description="API ML avancée pour la prédiction de poids en musculation",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=NumpyJSONResponse
 )
 
 # CORS pour React frontend
@@ -52,120 +165,350 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profondeur d'analyse d'une prédiction (None : celle du pipeline, "exercise" par défaut)
+AnalysisDepth = Literal["weight", "exercise", "full"]
+
 # Modèles Pydantic pour les requêtes
 class PredictionRequest(BaseModel):
     exercise_name: str
     user_data: Dict
     workout_history: List[Dict]
+    analysis_depth: Optional[AnalysisDepth] = None
+
+class BatchPredictionItem(BaseModel):
+    exercise_name: str
+    user_data: Dict = {}
+    workout_history: List[Dict] = []
+    user_id: Optional[str] = None
+    analysis_depth: Optional[AnalysisDepth] = None
+
+class BatchPredictionRequest(BaseModel):
+    items: List[BatchPredictionItem] = Field(..., min_length=1, max_length=200)
 
 class TrainingRequest(BaseModel):
     user_id: str
     new_data: List[Dict]
     retrain: bool = False
+    user_profile: Dict = {}
+
+# En-têtes (première ligne) des endpoints NDJSON : les séances suivent, une par ligne
+class StreamPredictionHeader(BaseModel):
+    exercise_name: str
+    user_data: Dict = {}
+    analysis_depth: Optional[AnalysisDepth] = None
+
+class StreamTrainingHeader(BaseModel):
+    user_id: str
+    retrain: bool = False
+    user_profile: Dict = {}
+
+# Modèles Pydantic pour les réponses (schéma OpenAPI ; les endpoints
+# retournent directement une NumpyJSONResponse, sans revalidation)
+class PlateauAnalysis(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    
+    exercise_plateaus: Dict[str, Dict[str, Any]] = {}
+    global_analysis: Dict[str, Any] = {}
+    recommendations: List[str] = []
+    severity_score: float = 0.0
+
+class Prediction(BaseModel):
+    model_config = ConfigDict(extra="allow", protected_namespaces=())
+    
+    exercise_name: str
+    predicted_weight: float
+    confidence: Optional[float] = None
+    model_used: str
+    recommendations: List[str] = []
+    plateau_analysis: Optional[PlateauAnalysis] = None
+    model_partition: Optional[str] = None
+    features_used: Optional[int] = None
+    analysis_depth: Optional[AnalysisDepth] = None
+    error: Optional[str] = None
+
+class PredictionResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    success: bool
+    prediction: Prediction
+    model_info: Dict[str, Any]
+    confidence: Optional[float] = None
+
+class BatchPredictionResult(BaseModel):
+    prediction: Prediction
+    confidence: Optional[float] = None
+
+class BatchPredictionResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    success: bool
+    count: int
+    results: List[BatchPredictionResult]
+    model_info: Dict[str, Any]
+
+class TrainingResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    success: bool
+    training_result: Dict[str, Any]
+    model_performance: Dict[str, Any]
 
 class AnalyticsResponse(BaseModel):
-    model_performance: Dict
-    feature_importance: Dict
-    training_history: Dict
-    prediction_accuracy: Dict
+    model_config = ConfigDict(extra="allow", protected_namespaces=())
+    
+    model_performance: Dict[str, Any] = {}
+    feature_importance: Dict[str, Any] = {}
+    training_history: Dict[str, Any] = {}
+    prediction_accuracy: Dict[str, Any] = {}
 
 @app.get("/health")
 async def health_check():
-    """Health check pour Docker et monitoring"""
+    """Health check pour Docker et monitoring (vivant dès que l'API répond ; ``ready`` après le préchauffage)"""
     return {
         "status": "healthy", 
         "service": "ici-ca-pousse-ml-api",
+        "ready": readiness["ready"],
+        "warmup": readiness["warmup"],
         "ml_services": {
             "pipeline": ml_pipeline is not None,
             "ensemble": ensemble_model is not None
         }
     }
 
-@app.post("/api/ml/predict")
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness : le processus répond (ne pas router selon cette sonde)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness : 503 tant que le démarrage et le préchauffage ne sont pas terminés"""
+    body = {
+        "status": "ready" if readiness["ready"] else "warming_up",
+        "warmup": readiness["warmup"],
+        "warmup_ms": ml_pipeline.startup_report.get("warmup", {}).get("warmup_ms") if ml_pipeline is not None else None
+    }
+    return NumpyJSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+@app.post("/api/ml/predict", response_model=PredictionResponse)
+@metrics.instrument_endpoint("predict")
 async def predict_weight(request: PredictionRequest):
     """Prédiction de poids avec pipeline ML avancé"""
+    return await serve_prediction(request)
+
+@app.post("/api/ml/predict/stream", response_model=PredictionResponse)
+@metrics.instrument_endpoint("predict_stream")
+async def predict_weight_stream(request: Request):
+    """Prédiction sur un historique envoyé en NDJSON (``application/x-ndjson``).
+    
+    Première ligne : ``{"exercise_name", "user_data"}`` ; puis une séance
+    par ligne. Les séances sont intégrées au fil de la réception, sans
+    construire la liste complète en mémoire.
+    """
+    header, workout_frame = await read_stream_request(request, StreamPredictionHeader)
+    return await serve_prediction(
+        PredictionRequest(exercise_name=header.exercise_name, user_data=header.user_data, workout_history=[],
+                          analysis_depth=header.analysis_depth),
+        workout_frame
+    )
+
+async def serve_prediction(request: PredictionRequest, workout_frame=None):
+    """Prédiction du pipeline, ou fallback simple ; ``workout_frame`` remplace l'historique de la requête s'il est fourni"""
     try:
         if ml_pipeline is None:
             # Fallback vers prédiction simple
-            return await simple_prediction_fallback(request)
+            return NumpyJSONResponse(await simple_prediction_fallback(request, workout_frame))
+        
+        if workout_frame is None:
+            # Historique parsé une seule fois pour toute la requête
+            workout_frame = ml_pipeline.build_workout_frame(request.workout_history)
         
         prediction = await ml_pipeline.predict(
             exercise_name=request.exercise_name,
             user_data=request.user_data,
-            workout_history=request.workout_history
+            workout_history=workout_frame,
+            analysis_depth=request.analysis_depth
         )
+        metrics.count_prediction(prediction.get("model_used"))
         
-        return {
+        return NumpyJSONResponse({
             "success": True,
             "prediction": prediction,
             "model_info": ml_pipeline.get_model_info() if hasattr(ml_pipeline, 'get_model_info') else {},
             "confidence": prediction.get("confidence", 0.5)
-        }
+        })
     except Exception as e:
         logger.error(f"Erreur lors de la prédiction: {e}")
         # Fallback vers prédiction simple en cas d'erreur
-        return await simple_prediction_fallback(request)
+        return NumpyJSONResponse(await simple_prediction_fallback(request, workout_frame))
+
+async def read_stream_request(request: Request, header_model):
+    """En-tête validé et ``WorkoutFrame`` d'un corps NDJSON, lu au fil de la réception"""
+    try:
+        from services.workout_stream import WorkoutStreamError, read_workout_stream
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Lecture en flux non disponible")
+    
+    try:
+        header, workout_frame = await read_workout_stream(request.stream())
+    except WorkoutStreamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        return header_model.model_validate(header), workout_frame
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
 
-@app.post("/api/ml/train")
+@app.post("/api/ml/predict/batch", response_model=BatchPredictionResponse)
+@metrics.instrument_endpoint("predict_batch")
+async def predict_weight_batch(request: BatchPredictionRequest):
+    """Prédictions groupées : plusieurs exercices/utilisateurs en une requête"""
+    try:
+        if ml_pipeline is None:
+            # Fallback simple pour chaque élément
+            predictions = []
+            for item in request.items:
+                fallback = await simple_prediction_fallback(PredictionRequest(
+                    exercise_name=item.exercise_name,
+                    user_data=item.user_data,
+                    workout_history=item.workout_history
+                ))
+                predictions.append(fallback["prediction"])
+            model_info = {"type": "fallback", "description": "Algorithme de prédiction simple"}
+        else:
+            predictions = await ml_pipeline.predict_batch([
+                {
+                    "exercise_name": item.exercise_name,
+                    "user_data": {**item.user_data, "user_id": item.user_id} if item.user_id else item.user_data,
+                    "workout_history": item.workout_history,
+                    "analysis_depth": item.analysis_depth
+                }
+                for item in request.items
+            ])
+            for prediction in predictions:
+                metrics.count_prediction(prediction.get("model_used"))
+            model_info = ml_pipeline.get_model_info() if hasattr(ml_pipeline, 'get_model_info') else {}
+        
+        return NumpyJSONResponse({
+            "success": True,
+            "count": len(predictions),
+            "results": [
+                {"prediction": prediction, "confidence": prediction.get("confidence", 0.5)}
+                for prediction in predictions
+            ],
+            "model_info": model_info
+        })
+    except Exception as e:
+        logger.error(f"Erreur lors de la prédiction groupée: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/ml/train", response_model=TrainingResponse)
+@metrics.instrument_endpoint("train")
 async def train_models(request: TrainingRequest):
     """Entraînement des modèles avec nouvelles données"""
+    return await serve_training(request.user_id, request.new_data, request.retrain, request.user_profile)
+
+@app.post("/api/ml/train/stream", response_model=TrainingResponse)
+@metrics.instrument_endpoint("train_stream")
+async def train_models_stream(request: Request):
+    """Entraînement sur des séances envoyées en NDJSON.
+    
+    Première ligne : ``{"user_id", "retrain", "user_profile"}`` ; puis une
+    séance par ligne, réduite aux colonnes des features dès sa réception.
+    """
+    if ml_pipeline is None:
+        raise HTTPException(status_code=503, detail="Service ML non disponible")
+    
+    header, workout_frame = await read_stream_request(request, StreamTrainingHeader)
+    return await serve_training(header.user_id, workout_frame, header.retrain, header.user_profile)
+
+def training_queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="File d'entraînement pleine, réessayer plus tard",
+        headers={"Retry-After": "5"}
+    )
+
+async def serve_training(user_id: str, new_data, retrain: bool, user_profile: Dict):
+    """Entraînement par le pipeline ; ``new_data`` est une liste de séances ou un ``WorkoutFrame``"""
     try:
         if ml_pipeline is None:
             raise HTTPException(status_code=503, detail="Service ML non disponible")
         
-        training_result = await ml_pipeline.train(
-            user_id=request.user_id,
-            new_data=request.new_data,
-            retrain=request.retrain
-        )
+        # Backpressure : file d'entraînement pleine, le client réessaiera
+        if ml_pipeline.executor.is_saturated("training"):
+            raise training_queue_full()
         
-        return {
+        try:
+            training_result = await ml_pipeline.train(
+                user_id=user_id,
+                new_data=new_data,
+                retrain=retrain,
+                user_profile=user_profile
+            )
+        except ExecutorOverloadedError:
+            # File remplie entre la vérification et la soumission (requêtes concurrentes)
+            raise training_queue_full()
+        
+        return NumpyJSONResponse({
             "success": True,
             "training_result": training_result,
             "model_performance": ml_pipeline.get_performance_metrics() if hasattr(ml_pipeline, 'get_performance_metrics') else {}
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de l'entraînement: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/ml/analytics")
+@app.get("/api/ml/analytics", response_model=AnalyticsResponse)
 async def get_analytics():
     """Métriques et analytics du pipeline ML"""
     try:
         if ml_pipeline is None:
-            return {
+            return NumpyJSONResponse({
                 "error": "Service ML non disponible",
                 "fallback_available": True
-            }
+            })
         
-        return {
+        return NumpyJSONResponse({
             "model_performance": ml_pipeline.get_performance_metrics() if hasattr(ml_pipeline, 'get_performance_metrics') else {},
             "feature_importance": ml_pipeline.get_feature_importance() if hasattr(ml_pipeline, 'get_feature_importance') else {},
             "training_history": ml_pipeline.get_training_history() if hasattr(ml_pipeline, 'get_training_history') else {},
-            "prediction_accuracy": ml_pipeline.get_prediction_accuracy() if hasattr(ml_pipeline, 'get_prediction_accuracy') else {}
-        }
+            "prediction_accuracy": ml_pipeline.get_prediction_accuracy() if hasattr(ml_pipeline, 'get_prediction_accuracy') else {},
+            "prediction_cache": ml_pipeline.get_cache_stats() if hasattr(ml_pipeline, 'get_cache_stats') else {},
+            "model_partitions": ml_pipeline.get_partition_stats() if hasattr(ml_pipeline, 'get_partition_stats') else {},
+            "single_flight": ml_pipeline.get_single_flight_stats() if hasattr(ml_pipeline, 'get_single_flight_stats') else {},
+            "micro_batching": ml_pipeline.get_micro_batching_stats() if hasattr(ml_pipeline, 'get_micro_batching_stats') else {},
+            "compiled_inference": ml_pipeline.get_compiled_inference_stats() if hasattr(ml_pipeline, 'get_compiled_inference_stats') else {}
+        })
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def simple_prediction_fallback(request: PredictionRequest):
+async def simple_prediction_fallback(request: PredictionRequest, workout_frame=None):
     """Prédiction de fallback simple sans ML complexe"""
     try:
         # Logique de prédiction simple
         current_weight = request.user_data.get('current_weight', 0)
         
         # Analyse simple de l'historique
-        if not request.workout_history:
+        if not (request.workout_history if workout_frame is None else len(workout_frame)):
             increment = 2.5  # Incrément par défaut
         else:
             # Calculer la progression moyenne des dernières séances
-            weights = []
-            for workout in request.workout_history[-5:]:  # 5 dernières séances
-                for exercise in workout.get('exercises', []):
-                    if exercise.get('name') == request.exercise_name:
-                        for set_data in exercise.get('sets', []):
-                            if set_data.get('weight'):
-                                weights.append(float(set_data['weight']))
+            if workout_frame is not None:
+                # Historique déjà parsé par le pipeline
+                weights = workout_frame.recent_exercise_weights(request.exercise_name, last_workouts=5).tolist()
+            else:
+                # Sans services ML, on ne parcourt que les 5 dernières séances
+                weights = []
+                for workout in request.workout_history[-5:]:
+                    for exercise in workout.get('exercises', []):
+                        if exercise.get('name') == request.exercise_name:
+                            for set_data in exercise.get('sets', []):
+                                if set_data.get('weight'):
+                                    weights.append(float(set_data['weight']))
             
             if len(weights) >= 2:
                 # Progression moyenne
@@ -175,6 +518,7 @@ async def simple_prediction_fallback(request: PredictionRequest):
                 increment = 2.5
         
         predicted_weight = current_weight + increment
+        metrics.count_prediction("simple_fallback")
         
         return {
             "success": True,
@@ -198,6 +542,12 @@ async def simple_prediction_fallback(request: PredictionRequest):
         logger.error(f"Erreur dans le fallback: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Exposition Prometheus : durées par étape, prédictions par modèle/fallback, requêtes en cours"""
+    content, content_type = metrics.render_latest()
+    return Response(content=content, media_type=content_type)
+
 @app.get("/api/ml/status")
 async def get_ml_status():
     """Statut des services ML"""
@@ -206,6 +556,7 @@ async def get_ml_status():
         "ensemble_model_available": ensemble_model is not None,
         "fallback_mode": ml_pipeline is None,
         "version": "2.0.0",
+        "startup": ml_pipeline.get_startup_report() if ml_pipeline is not None else None,
         "features": {
             "prediction": True,
             "training": ml_pipeline is not None,
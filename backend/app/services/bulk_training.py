@@ -0,0 +1,371 @@
+"""
+Entraînement hors ligne sur des dumps complets d'historiques (JSONL ou Parquet).
+
+Les utilisateurs sont lus par paquets, leurs features calculées dans des
+processus séparés puis ajoutées au fil de l'eau à deux fichiers ``.npy``
+(features et targets) : seule une poignée de paquets est en mémoire à un
+instant donné, quelle que soit la taille du dump. L'ensemble est ensuite
+entraîné sur ces fichiers, ouverts en mémoire mappée, et publié dans le
+registre de modèles.
+
+Formats d'entrée :
+
+- JSONL : une ligne par utilisateur, ``{"user_id", "user_profile",
+  "workout_history"}`` (historique au format de l'API)
+- Parquet : une ligne par série (colonnes ``FLAT_COLUMNS``), triée par
+  utilisateur puis par date ; nécessite ``pyarrow``
+"""
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from services.simple_feature_engineering import SimpleFeatureEngineer
+from services.workout_frame import WorkoutFrame
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Colonnes du format Parquet à plat (une ligne par série)
+FLAT_COLUMNS = ("user_id", "user_weight", "level", "date", "exercise", "weight", "reps")
+
+# Nombre maximal de paquets en cours de calcul par processus
+_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+UserDocument = Dict
+ChunkRows = Tuple[np.ndarray, np.ndarray, int]
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow n'est pas installé : lecture/écriture Parquet indisponible")
+
+def iter_jsonl_users(path: str) -> Iterator[UserDocument]:
+    """Utilisateurs d'un dump JSONL, une ligne à la fois"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Ligne {line_number} ignorée (JSON invalide): {e}")
+
+def iter_parquet_users(path: str, batch_rows: int = 65536) -> Iterator[UserDocument]:
+    """Utilisateurs d'un dump Parquet à plat, reconstruits par lots de lignes.
+    
+    Les séries consécutives d'un même utilisateur sont regroupées en séances
+    (même date) puis en blocs d'exercice ; un utilisateur à cheval sur deux
+    lots est complété avec le lot suivant.
+    """
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(path)
+    columns = [name for name in FLAT_COLUMNS if name in parquet_file.schema_arrow.names]
+    
+    current = None
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+        data = batch.to_pydict()
+        n_rows = batch.num_rows
+        for i in range(n_rows):
+            user_id = data["user_id"][i]
+            if current is None or current["user_id"] != user_id:
+                if current is not None:
+                    yield current
+                profile = {}
+                if data.get("user_weight") and data["user_weight"][i] is not None:
+                    profile["weight"] = data["user_weight"][i]
+                if data.get("level") and data["level"][i] is not None:
+                    profile["level"] = data["level"][i]
+                current = {"user_id": user_id, "user_profile": profile, "workout_history": []}
+            
+            history = current["workout_history"]
+            date = data["date"][i] if "date" in data else None
+            if not history or history[-1]["date"] != date:
+                history.append({"date": date, "exercises": []})
+            exercises = history[-1]["exercises"]
+            name = data["exercise"][i]
+            if not exercises or exercises[-1]["name"] != name:
+                exercises.append({"name": name, "sets": []})
+            exercises[-1]["sets"].append({"weight": data["weight"][i], "reps": data["reps"][i]})
+    
+    if current is not None:
+        yield current
+
+def iter_dump_users(path: str) -> Iterator[UserDocument]:
+    """Utilisateurs d'un dump, selon l'extension (``.parquet`` ou JSONL)"""
+    if path.endswith(".parquet"):
+        return iter_parquet_users(path)
+    return iter_jsonl_users(path)
+
+def flatten_user_document(document: UserDocument) -> Iterator[Tuple]:
+    """Lignes à plat (``FLAT_COLUMNS``) d'un utilisateur, pour l'export Parquet"""
+    profile = document.get("user_profile", {})
+    for workout in document.get("workout_history", []):
+        for exercise in workout.get("exercises", []):
+            for set_data in exercise.get("sets", []):
+                yield (
+                    document["user_id"], profile.get("weight"), profile.get("level"), workout.get("date"),
+                    exercise.get("name"), set_data.get("weight"), set_data.get("reps")
+                )
+
+def write_workout_dump(path: str, documents: Iterable[UserDocument], batch_rows: int = 65536) -> Dict:
+    """Écrit un dump JSONL ou Parquet (selon l'extension) en flux ; retourne des compteurs"""
+    n_users = n_sets = 0
+    if path.endswith(".parquet"):
+        _require_pyarrow()
+        schema = pa.schema([
+            ("user_id", pa.string()), ("user_weight", pa.float64()), ("level", pa.string()), ("date", pa.string()),
+            ("exercise", pa.string()), ("weight", pa.float64()), ("reps", pa.int64())
+        ])
+        buffer = []
+        with pq.ParquetWriter(path, schema) as writer:
+            for document in documents:
+                n_users += 1
+                buffer.extend(flatten_user_document(document))
+                if len(buffer) >= batch_rows:
+                    n_sets += len(buffer)
+                    writer.write_table(pa.Table.from_pylist([dict(zip(FLAT_COLUMNS, row)) for row in buffer], schema))
+                    buffer = []
+            if buffer:
+                n_sets += len(buffer)
+                writer.write_table(pa.Table.from_pylist([dict(zip(FLAT_COLUMNS, row)) for row in buffer], schema))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            for document in documents:
+                n_users += 1
+                n_sets += sum(len(exercise.get("sets", [])) for workout in document.get("workout_history", [])
+                              for exercise in workout.get("exercises", []))
+                f.write(json.dumps(document, ensure_ascii=False))
+                f.write("\n")
+    
+    return {"path": path, "users": n_users, "sets": n_sets, "bytes": os.path.getsize(path)}
+
+_worker_engineer = None
+
+def user_training_rows(feature_engineer: SimpleFeatureEngineer, document: UserDocument) -> Tuple[np.ndarray, np.ndarray]:
+    """Features et targets d'un utilisateur, comme ``MLPipeline._prepare_training_data``.
+    
+    La target d'une ligne est le poids de la série complète suivante, ce qui
+    garantit autant de targets que de lignes (``_prepare_targets`` donne la
+    même chose quand toutes les séries ont un poids positif et des répétitions).
+    """
+    frame = WorkoutFrame.ensure(document.get("workout_history") or [])
+    features = feature_engineer.extract_features(frame, document.get("user_profile") or {})
+    if features.empty:
+        return np.empty((0, len(feature_engineer.feature_names))), np.empty(0)
+    
+    weights, _ = frame.complete_sets()
+    return features.to_numpy(dtype=np.float64), weights[1:].astype(np.float64)
+
+def chunk_training_rows(documents: List[UserDocument]) -> ChunkRows:
+    """Features et targets d'un paquet d'utilisateurs (exécuté dans un processus du pool)"""
+    global _worker_engineer
+    if _worker_engineer is None:
+        _worker_engineer = SimpleFeatureEngineer()
+        # Une ligne de log par utilisateur noierait la sortie de la CLI
+        logging.getLogger("services.simple_feature_engineering").setLevel(logging.ERROR)
+    
+    features, targets, skipped = [], [], 0
+    for document in documents:
+        X, y = user_training_rows(_worker_engineer, document)
+        if len(y) == 0:
+            skipped += 1
+            continue
+        features.append(X)
+        targets.append(y)
+    
+    if not features:
+        return np.empty((0, len(_worker_engineer.feature_names))), np.empty(0), skipped
+    return np.concatenate(features), np.concatenate(targets), skipped
+
+def _chunks(documents: Iterable[UserDocument], chunk_users: int) -> Iterator[List[UserDocument]]:
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= chunk_users:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class NpyAppender:
+    """Fichier ``.npy`` 2D (ou 1D) rempli par ajouts successifs de lignes.
+    
+    L'en-tête est réservé à l'ouverture avec un nombre de lignes maximal puis
+    réécrit à la fermeture avec le nombre réel ; les données sont écrites
+    directement dans le fichier, sans rester en mémoire. Le résultat se relit
+    avec ``np.load(path, mmap_mode='r')``.
+    """
+    
+    _RESERVED_ROWS = 10 ** 15
+    
+    def __init__(self, path: str, n_columns: Optional[int] = None, dtype=np.float64):
+        self.path = path
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+        self.n_rows = 0
+        self._file = open(path, "wb")
+        self._write_header(self._RESERVED_ROWS)
+        self._data_offset = self._file.tell()
+    
+    def _shape(self, n_rows: int) -> Tuple[int, ...]:
+        return (n_rows,) if self.n_columns is None else (n_rows, self.n_columns)
+    
+    def _write_header(self, n_rows: int):
+        header = {"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": self._shape(n_rows)}
+        np.lib.format.write_array_header_1_0(self._file, header)
+    
+    def append(self, rows: np.ndarray):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[1:] != self._shape(0)[1:]:
+            raise ValueError(f"Lignes de forme {rows.shape} incompatibles avec {self._shape(0)}")
+        self._file.write(rows.tobytes())
+        self.n_rows += len(rows)
+    
+    def close(self) -> int:
+        """Écrit l'en-tête définitif et retourne le nombre de lignes"""
+        if self._file.closed:
+            return self.n_rows
+        self._file.seek(0)
+        self._write_header(self.n_rows)
+        if self._file.tell() != self._data_offset:
+            raise RuntimeError("En-tête .npy de longueur inattendue")
+        self._file.close()
+        return self.n_rows
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+def peak_rss_mb() -> Dict[str, float]:
+    """RSS maximal du processus principal et du plus gros processus fils (Mo)"""
+    return {
+        "main": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+def build_training_matrix(documents: Iterable[UserDocument], output_dir: str, workers: int = 2,
+                          chunk_users: int = 256) -> Dict:
+    """Calcule les features de tous les utilisateurs dans ``features.npy`` / ``targets.npy``.
+    
+    Au plus ``2 * workers`` paquets de ``chunk_users`` utilisateurs sont en
+    vol : la lecture attend que le plus ancien soit écrit avant d'en lancer
+    un autre, ce qui borne la mémoire quelle que soit la taille du dump.
+    ``workers=0`` calcule tout dans le processus courant.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    n_features = len(SimpleFeatureEngineer().feature_names)
+    features_path = os.path.join(output_dir, "features.npy")
+    targets_path = os.path.join(output_dir, "targets.npy")
+    stats = {"users": 0, "skipped_users": 0, "chunks": 0}
+    
+    start = time.perf_counter()
+    with NpyAppender(features_path, n_features) as features_file, NpyAppender(targets_path) as targets_file:
+        def write(result: ChunkRows):
+            X, y, skipped = result
+            features_file.append(X)
+            targets_file.append(y)
+            stats["skipped_users"] += skipped
+            stats["chunks"] += 1
+        
+        chunks = _chunks(documents, chunk_users)
+        if workers <= 0:
+            for chunk in chunks:
+                stats["users"] += len(chunk)
+                write(chunk_training_rows(chunk))
+        else:
+            # Résultats écrits dans l'ordre de lecture : matrice déterministe
+            max_in_flight = workers * _CHUNKS_IN_FLIGHT_PER_WORKER
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                in_flight = collections.deque()
+                for chunk in chunks:
+                    stats["users"] += len(chunk)
+                    in_flight.append(pool.submit(chunk_training_rows, chunk))
+                    if len(in_flight) >= max_in_flight:
+                        write(in_flight.popleft().result())
+                while in_flight:
+                    write(in_flight.popleft().result())
+        
+        stats["rows"] = features_file.close()
+        targets_file.close()
+    
+    stats.update({
+        "features_path": features_path,
+        "targets_path": targets_path,
+        "n_features": n_features,
+        "feature_seconds": round(time.perf_counter() - start, 3)
+    })
+    logger.info(f"Matrice d'entraînement: {stats['rows']} lignes pour {stats['users']} utilisateurs")
+    return stats
+
+def load_training_rows(features_path: str, targets_path: str, max_rows: Optional[int] = None,
+                       seed: int = 42, block_rows: int = 1_000_000) -> Tuple[np.ndarray, np.ndarray]:
+    """Jeu d'entraînement lu depuis les fichiers mappés.
+    
+    Sans limite (ou sous la limite), les tableaux mappés sont retournés tels
+    quels. Au-delà de ``max_rows``, un échantillon uniforme est lu bloc par
+    bloc, chaque bloc avec son propre mapping libéré aussitôt : la mémoire
+    reste celle de l'échantillon.
+    """
+    features = np.load(features_path, mmap_mode="r")
+    targets = np.load(targets_path, mmap_mode="r")
+    n_rows = len(targets)
+    if max_rows is None or n_rows <= max_rows:
+        return features, targets
+    
+    n_features = features.shape[1]
+    del features, targets
+    
+    rng = np.random.default_rng(seed)
+    selected = np.sort(rng.choice(n_rows, size=max_rows, replace=False))
+    X = np.empty((max_rows, n_features), dtype=np.float64)
+    y = np.empty(max_rows, dtype=np.float64)
+    
+    bounds = np.searchsorted(selected, np.arange(0, n_rows + block_rows, block_rows))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if lo == hi:
+            continue
+        block_features = np.load(features_path, mmap_mode="r")
+        block_targets = np.load(targets_path, mmap_mode="r")
+        X[lo:hi] = block_features[selected[lo:hi]]
+        y[lo:hi] = block_targets[selected[lo:hi]]
+        del block_features, block_targets
+    
+    return X, y
+
+def train_from_matrix(features_path: str, targets_path: str, registry_path: Optional[str] = None,
+                      max_train_rows: Optional[int] = None, seed: int = 42) -> Dict:
+    """Entraîne un ``AdvancedEnsembleModel`` sur la matrice et le publie dans le registre"""
+    # Import tardif : la construction de la matrice n'a pas besoin des modèles
+    from models.ensemble_model import AdvancedEnsembleModel
+    from services.ml_pipeline import _fit_ensemble
+    from services.model_registry import ModelRegistry
+    
+    X, y = load_training_rows(features_path, targets_path, max_train_rows, seed)
+    if len(y) < 2:
+        raise ValueError("Pas assez de données pour l'entraînement")
+    
+    feature_names = list(SimpleFeatureEngineer().feature_names)
+    registry = ModelRegistry(registry_path) if registry_path else None
+    
+    start = time.perf_counter()
+    model, training_result, version = _fit_ensemble(AdvancedEnsembleModel(), X, y, feature_names, registry)
+    return {
+        "model": model,
+        "training_result": training_result,
+        "version": version,
+        "train_rows": int(len(y)),
+        "fit_seconds": round(time.perf_counter() - start, 3)
+    }
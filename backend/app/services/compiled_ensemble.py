@@ -0,0 +1,266 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class UnsupportedModelError(ValueError):
+    """Membre ou combinaison de l'ensemble sans équivalent compilé"""
+
+class CompiledEnsemble:
+    """Ensemble entraîné réduit à des tableaux NumPy plats, pour l'inférence.
+    
+    - Membres linéaires : coefficients du scaler et du modèle repliés, puis
+      sommés avec leur poids d'ensemble en un seul vecteur et une constante.
+    - Arbres (forêts, gradient boosting, arbre seul) : nœuds de tous les
+      arbres concaténés (feature, seuil, enfants, valeur). Les valeurs des
+      feuilles sont pré-multipliées par le poids de l'arbre (poids du membre,
+      divisé par le nombre d'arbres d'une forêt ou multiplié par le
+      learning rate du boosting) : la prédiction est la somme des feuilles
+      atteintes. Tous les arbres sont parcourus ensemble, un niveau par
+      itération ; une feuille boucle sur elle-même.
+    
+    Les arbres reçoivent, comme avec scikit-learn, les features passées par
+    le scaler de leur membre puis converties en float32, si bien que les
+    mêmes branches sont suivies. Un membre linéaire mal conditionné (features
+    colinéaires, coefficients énormes qui se compensent) n'est pas replié :
+    les arrondis du repli changeraient sa prédiction. Il garde la forme
+    ``((x - centre) / échelle) . coef + intercept`` de scikit-learn.
+    """
+    
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.coef = np.zeros(n_features)
+        self.intercept = 0.0
+        self.n_linear = 0
+        # Membres linéaires non repliés : (centre, échelle, coef, intercept, poids)
+        self.exact_linear: List[Tuple[np.ndarray, np.ndarray, np.ndarray, float, float]] = []
+        # Scalers des membres à arbres : (centre, échelle) par groupe
+        self.input_center = np.zeros((0, n_features))
+        self.input_scale = np.ones((0, n_features))
+        self.roots = np.zeros(0, dtype=np.intp)
+        self.feature = np.zeros(0, dtype=np.intp)
+        self.threshold = np.zeros(0)
+        self.children = np.zeros((0, 2), dtype=np.intp)
+        self.value = np.zeros(0)
+        self.depth = 0
+        self.members: List[str] = []
+        self.compile_ms: Optional[float] = None
+        self.max_error: Optional[float] = None
+    
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"{X.shape[1]} features reçues, {self.n_features} attendues")
+        
+        predictions = X @ self.coef + self.intercept
+        for center, scale, coef, intercept, weight in self.exact_linear:
+            predictions += weight * (((X - center) / scale) @ coef + intercept)
+        if len(self.roots):
+            # Une ligne par groupe de scaler, à plat : ligne i, groupe g, feature f -> i * G * F + g * F + f
+            inputs = ((X[:, None, :] - self.input_center) / self.input_scale).astype(np.float32).ravel()
+            row_offsets = (np.arange(len(X)) * (len(self.input_center) * self.n_features))[:, None]
+            nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+            for _ in range(self.depth):
+                # NaN : ni <= ni >, à droite comme dans scikit-learn
+                go_right = ~(inputs[row_offsets + self.feature[nodes]] <= self.threshold[nodes])
+                nodes = self.children[nodes, go_right.view(np.int8)]
+            predictions += self.value[nodes].sum(axis=1)
+        return predictions
+    
+    def get_stats(self) -> Dict:
+        return {
+            "members": list(self.members),
+            "n_features": self.n_features,
+            "linear_members": self.n_linear,
+            "exact_linear_members": len(self.exact_linear),
+            "trees": len(self.roots),
+            "nodes": len(self.threshold),
+            "depth": self.depth,
+            "nbytes": int(sum(array.nbytes for array in (
+                self.coef, self.input_center, self.input_scale, self.roots, self.feature,
+                self.threshold, self.children, self.value
+            ))),
+            "compile_ms": self.compile_ms,
+            "max_error": self.max_error
+        }
+
+def _scaler_transform(scaler, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(centre, échelle) tels que ``scaler.transform(X) == (X - centre) / échelle``"""
+    if scaler is None:
+        return np.zeros(n_features), np.ones(n_features)
+    if hasattr(scaler, "with_mean") and hasattr(scaler, "mean_") and hasattr(scaler, "scale_"):
+        # StandardScaler : mêmes opérations que son ``transform``
+        center = scaler.mean_ if scaler.with_mean and scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones(n_features)
+        return np.asarray(center, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+    
+    # Autre scaler affine par feature (MinMaxScaler, RobustScaler...) : lu sur deux points
+    offset = np.asarray(scaler.transform(np.zeros((1, n_features))), dtype=np.float64)[0]
+    slope = np.asarray(scaler.transform(np.ones((1, n_features))), dtype=np.float64)[0] - offset
+    if np.any(slope == 0):
+        raise UnsupportedModelError(f"Scaler {type(scaler).__name__} non inversible")
+    return -offset / slope, 1.0 / slope
+
+def _member_trees(estimator) -> Optional[Tuple[List[Any], float, float]]:
+    """(arbres, poids de chaque arbre, constante) d'un membre à arbres, None sinon"""
+    if hasattr(estimator, "tree_"):
+        return [estimator], 1.0, 0.0
+    
+    trees = getattr(estimator, "estimators_", None)
+    if trees is None:
+        return None
+    if hasattr(estimator, "estimators_features_"):
+        # Bagging sur des sous-ensembles de features
+        raise UnsupportedModelError(f"{type(estimator).__name__} : arbres sur sous-ensembles de features")
+    
+    if hasattr(estimator, "learning_rate") and isinstance(trees, np.ndarray):
+        # Gradient boosting : constante initiale + learning_rate * somme des arbres
+        if trees.ndim != 2 or trees.shape[1] != 1:
+            raise UnsupportedModelError(f"{type(estimator).__name__} : plusieurs sorties")
+        init = getattr(estimator, "init_", None)
+        if isinstance(init, str) and init == "zero":
+            constant = 0.0
+        elif hasattr(init, "constant_"):
+            constant = float(np.ravel(init.constant_)[0])
+        else:
+            raise UnsupportedModelError(f"{type(estimator).__name__} : estimateur initial {type(init).__name__}")
+        return list(trees[:, 0]), float(estimator.learning_rate), constant
+    
+    # Forêt : moyenne des arbres
+    trees = list(trees)
+    if not trees or not all(hasattr(tree, "tree_") for tree in trees):
+        raise UnsupportedModelError(f"{type(estimator).__name__} : membres qui ne sont pas des arbres")
+    return trees, 1.0 / len(trees), 0.0
+
+def _output_transform(model) -> Tuple[float, float]:
+    """(échelle, décalage) appliqués à la somme pondérée des membres"""
+    if hasattr(model, "target_transform"):
+        return model.target_transform()
+    return 1.0, 0.0
+
+def _member_scaler(model, name: str):
+    scalers = getattr(model, "scalers", None) or {}
+    return scalers.get(name, getattr(model, "scaler", None))
+
+def _n_features(model) -> int:
+    for name in model.ensemble_weights:
+        n_features = getattr(model.models[name], "n_features_in_", None)
+        if n_features is not None:
+            return int(n_features)
+    if getattr(model, "feature_names", None):
+        return len(model.feature_names)
+    raise UnsupportedModelError("Nombre de features inconnu")
+
+def _within(values: np.ndarray, expected: np.ndarray, tolerance: float) -> bool:
+    """Écart au plus ``tolerance``, relatif (absolu sous 1)"""
+    return bool(np.all(np.abs(values - expected) <= tolerance * np.maximum(np.abs(expected), 1.0)))
+
+def _compile(model, probe: np.ndarray, tolerance: float) -> CompiledEnsemble:
+    n_features = _n_features(model)
+    output_scale, output_offset = _output_transform(model)
+    compiled = CompiledEnsemble(n_features)
+    compiled.intercept = output_offset
+    groups: Dict[bytes, int] = {}
+    centers, scales = [], []
+    roots, features, thresholds, children, values = [], [], [], [], []
+    n_nodes = 0
+    
+    for name, weight in model.ensemble_weights.items():
+        estimator = model.models[name]
+        weight = float(weight) * output_scale
+        center, scale = _scaler_transform(_member_scaler(model, name), n_features)
+        compiled.members.append(name)
+        
+        member_trees = _member_trees(estimator)
+        if member_trees is None:
+            coef = np.ravel(getattr(estimator, "coef_", None))
+            intercept = getattr(estimator, "intercept_", None)
+            if coef.dtype == object or len(coef) != n_features or intercept is None:
+                raise UnsupportedModelError(f"Membre {name} ({type(estimator).__name__}) ni linéaire ni à arbres")
+            # coef . (x - centre) / échelle + intercept, replié en (coef / échelle) . x + constante
+            intercept = float(np.ravel(intercept)[0])
+            folded = coef / scale
+            constant = intercept - float(np.dot(folded, center))
+            if _within(probe @ folded + constant, ((probe - center) / scale) @ coef + intercept, tolerance):
+                compiled.coef += weight * folded
+                compiled.intercept += weight * constant
+                compiled.n_linear += 1
+            else:
+                compiled.exact_linear.append((center, scale, coef, intercept, weight))
+            continue
+        
+        trees, tree_weight, constant = member_trees
+        compiled.intercept += weight * constant
+        group_key = center.tobytes() + scale.tobytes()
+        if group_key not in groups:
+            groups[group_key] = len(centers)
+            centers.append(center)
+            scales.append(scale)
+        feature_offset = groups[group_key] * n_features
+        
+        for tree in trees:
+            tree_ = tree.tree_
+            if tree_.n_outputs != 1:
+                raise UnsupportedModelError(f"Membre {name} : arbre à plusieurs sorties")
+            index = np.arange(tree_.node_count) + n_nodes
+            leaf = tree_.children_left == -1
+            roots.append(n_nodes)
+            features.append(np.where(leaf, 0, tree_.feature) + feature_offset)
+            thresholds.append(np.where(leaf, np.inf, tree_.threshold))
+            children.append(np.column_stack([
+                np.where(leaf, index, tree_.children_left + n_nodes),
+                np.where(leaf, index, tree_.children_right + n_nodes)
+            ]))
+            values.append(tree_.value[:, 0, 0] * (weight * tree_weight))
+            compiled.depth = max(compiled.depth, int(tree_.max_depth))
+            n_nodes += tree_.node_count
+    
+    if roots:
+        compiled.input_center = np.vstack(centers)
+        compiled.input_scale = np.vstack(scales)
+        compiled.roots = np.asarray(roots, dtype=np.intp)
+        compiled.feature = np.concatenate(features).astype(np.intp)
+        compiled.threshold = np.concatenate(thresholds).astype(np.float64)
+        compiled.children = np.vstack(children).astype(np.intp)
+        compiled.value = np.concatenate(values)
+    return compiled
+
+def probe_rows(model, n_rows: int = 64, seed: int = 0) -> np.ndarray:
+    """Lignes de vérification sans données d'entraînement : autour des
+    moyennes et échelles des scalers de l'ensemble s'il en a"""
+    n_features = _n_features(model)
+    center, scale = np.zeros(n_features), np.ones(n_features)
+    for name in model.ensemble_weights:
+        scaler = _member_scaler(model, name)
+        if scaler is not None:
+            center, scale = _scaler_transform(scaler, n_features)
+            break
+    return center + scale * np.random.default_rng(seed).standard_normal((n_rows, n_features))
+
+def compile_ensemble(model, probe: Optional[np.ndarray] = None, tolerance: float = 1e-6) -> CompiledEnsemble:
+    """Compile ``model`` puis vérifie ses prédictions contre ``model.predict``.
+    
+    ``probe`` : lignes de vérification (par exemple un échantillon des
+    données d'entraînement), sinon ``probe_rows``. Lève
+    ``UnsupportedModelError`` si un membre n'a pas d'équivalent compilé ou
+    si un écart dépasse ``tolerance`` (relative, au moins absolue).
+    """
+    start = time.perf_counter()
+    if not getattr(model, "is_trained", False) or not getattr(model, "ensemble_weights", None):
+        raise UnsupportedModelError("Ensemble non entraîné")
+    
+    probe = probe_rows(model) if probe is None or len(probe) == 0 else np.asarray(probe, dtype=np.float64)
+    compiled = _compile(model, probe, tolerance)
+    expected = np.asarray(model.predict(probe), dtype=np.float64)
+    predictions = compiled.predict(probe)
+    compiled.max_error = float(np.max(np.abs(predictions - expected)))
+    if not _within(predictions, expected, tolerance):
+        raise UnsupportedModelError(f"Prédictions compilées divergentes (écart max {compiled.max_error:.3g})")
+    
+    compiled.compile_ms = round((time.perf_counter() - start) * 1000, 3)
+    return compiled
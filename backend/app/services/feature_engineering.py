@@ -1,11 +1,137 @@
+from __future__ import annotations
+import re
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Tuple
-from scipy import stats
-from scipy.signal import savgol_filter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 import warnings
+from services import window_stats
+from utils.lazy_imports import lazy_import
+
+# pandas et scipy ne sont importés qu'à la première extraction
+pd = lazy_import("pandas")
+stats = lazy_import("scipy.stats")
 warnings.filterwarnings('ignore')
 
+class FeatureSpec(NamedTuple):
+    """Groupe de features : clé de ``feature_config``, colonnes (dans l'ordre) et extracteurs"""
+    config_key: Optional[str]  # None : groupe toujours actif
+    columns: Tuple[str, ...]
+    extractor: str  # une valeur par colonne pour tout l'historique
+    session_extractor: str  # une série par colonne, valeur i = historique jusqu'à la séance i
+
+EXERCISE_TYPES = ('compound', 'isolation', 'cardio', 'strength')
+MUSCLE_GROUPS = ('chest', 'back', 'legs', 'shoulders', 'arms', 'core')
+EQUIPMENT = ('barbell', 'dumbbell', 'machine', 'bodyweight', 'cable')
+PROGRESSION_PERIODS = (7, 14, 30, 90)
+
+# Registre des features : l'ordre des groupes et des colonnes est celui du vecteur
+FEATURE_SPECS = (
+    FeatureSpec(None, (
+        'current_weight', 'total_volume', 'avg_intensity', 'total_sessions', 'training_frequency'
+    ), '_basic_values', '_basic_session_values'),
+    FeatureSpec('temporal_features', tuple(
+        [f'progression_{period}d' for period in PROGRESSION_PERIODS] + ['momentum_score', 'consistency_score']
+    ), '_temporal_values', '_temporal_session_values'),
+    FeatureSpec('statistical_features', (
+        'weight_mean', 'weight_std', 'weight_skew', 'weight_kurtosis',
+        'weight_p25', 'weight_p75', 'weight_iqr', 'weight_cv', 'smoothing_residual'
+    ), '_statistical_values', '_statistical_session_values'),
+    FeatureSpec('trend_features', (
+        'trend_slope', 'trend_r_squared', 'trend_p_value', 'trend_changes', 'trend_stability'
+    ), '_trend_values', '_trend_session_values'),
+    FeatureSpec('behavioral_features', (
+        'preferred_hour', 'day_regularity', 'avg_session_duration', 'experience_level',
+        'goal_strength', 'goal_hypertrophy', 'goal_endurance'
+    ), '_behavioral_values', '_behavioral_session_values'),
+    FeatureSpec('contextual_features', tuple(
+        [f'exercise_{ex_type}' for ex_type in EXERCISE_TYPES]
+        + [f'muscle_{muscle}' for muscle in MUSCLE_GROUPS]
+        + [f'equipment_{equip}' for equip in EQUIPMENT]
+        + ['seasonal_factor']
+    ), '_contextual_values', '_contextual_session_values'),
+    FeatureSpec('interaction_features', (
+        'weight_frequency_interaction', 'momentum_consistency_interaction', 'trend_experience_interaction'
+    ), '_interaction_values', '_interaction_values'),
+)
+
+# Au-delà de 60 lignes, str(Series) n'affichait que les 5 premières et 5 dernières :
+# les features contextuelles ne regardaient que celles-là
+_REPR_MAX_ROWS = 60
+_REPR_EDGE_ROWS = 5
+
+# Dates ISO sans fuseau, toutes au même format : parsées directement par NumPy
+_NAIVE_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?")
+
+class _WorkoutRecords:
+    """Colonnes d'un historique à plat (une ligne par séance), extraites une seule fois"""
+    
+    def __init__(self, workout_data: List[Dict]):
+        self.records = [record if isinstance(record, dict) else {} for record in workout_data]
+        self.n = len(self.records)
+        self.columns = set().union(*self.records) if self.records else set()
+        self._numeric = {}
+        self._first_seen = {}
+        self._dates = None
+        self._dates_parsed = False
+    
+    def has(self, *columns: str) -> bool:
+        return all(column in self.columns for column in columns)
+    
+    def numeric(self, column: str) -> np.ndarray:
+        """Colonne en float64, NaN pour les valeurs absentes ou non numériques"""
+        values = self._numeric.get(column)
+        if values is None:
+            raw = [record.get(column) for record in self.records]
+            try:
+                values = np.array(raw, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = pd.to_numeric(pd.Series(raw, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+            self._numeric[column] = values
+        return values
+    
+    def values(self, column: str) -> list:
+        return [record.get(column) for record in self.records]
+    
+    def first_seen(self, *columns: str) -> int:
+        """Première séance à partir de laquelle toutes les colonnes existent (n si jamais)"""
+        first = 0
+        for column in columns:
+            if column not in self._first_seen:
+                self._first_seen[column] = next(
+                    (i for i, record in enumerate(self.records) if column in record), self.n
+                )
+            first = max(first, self._first_seen[column])
+        return first
+    
+    @property
+    def dates(self) -> Optional[pd.DatetimeIndex]:
+        """Dates parsées une fois ; None si la colonne est illisible"""
+        if not self._dates_parsed:
+            self._dates_parsed = True
+            raw = self.values('date')
+            try:
+                if self._is_uniform_naive_iso(raw):
+                    self._dates = pd.DatetimeIndex(np.array(raw, dtype='datetime64[ns]'))
+                else:
+                    self._dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(raw)))
+            except Exception:
+                self._dates = None
+        return self._dates
+    
+    @staticmethod
+    def _is_uniform_naive_iso(raw: list) -> bool:
+        """Vrai si les dates sont des chaînes ISO sans fuseau de même format (ou absentes)"""
+        length = None
+        for value in raw:
+            if value is None:
+                continue
+            if not isinstance(value, str) or not _NAIVE_ISO_DATE.fullmatch(value):
+                return False
+            if length is None:
+                length = len(value)
+            elif len(value) != length:
+                return False
+        return length is not None
+
 class AdvancedFeatureEngineer:
     def __init__(self):
         self.feature_config = {
@@ -16,311 +142,536 @@ class AdvancedFeatureEngineer:
             "contextual_features": True,
             "interaction_features": True
         }
-        
+        self._layout_cache = None
+    
+    def _layout(self) -> Tuple[List[Tuple[FeatureSpec, slice]], Dict[str, int]]:
+        """Groupes actifs avec leur tranche du vecteur, et position de chaque colonne"""
+        config_key = tuple(sorted(self.feature_config.items()))
+        if self._layout_cache is None or self._layout_cache[0] != config_key:
+            groups, index, start = [], {}, 0
+            for spec in FEATURE_SPECS:
+                if spec.config_key is not None and not self.feature_config.get(spec.config_key, False):
+                    continue
+                groups.append((spec, slice(start, start + len(spec.columns))))
+                for column in spec.columns:
+                    index[column] = start
+                    start += 1
+            self._layout_cache = (config_key, groups, index)
+        return self._layout_cache[1], self._layout_cache[2]
+    
+    @property
+    def feature_names(self) -> List[str]:
+        """Noms des features actives, dans l'ordre du vecteur"""
+        groups, _ = self._layout()
+        return [column for spec, _ in groups for column in spec.columns]
+    
     def extract_features(self, workout_data: List[Dict], user_profile: Dict) -> pd.DataFrame:
         """Extrait toutes les features avancées"""
-        if not workout_data:
+        vector = self.extract_feature_vector(workout_data, user_profile)
+        if vector is None:
             return pd.DataFrame()
-            
-        df = pd.DataFrame(workout_data)
         
-        # Features de base
-        features = self._extract_basic_features(df)
+        # Le DataFrame n'est construit qu'ici, en une fois
+        return pd.DataFrame(vector.reshape(1, -1), columns=self.feature_names)
+    
+    def extract_feature_vector(self, workout_data: List[Dict], user_profile: Dict) -> Optional[np.ndarray]:
+        """Features avancées en un vecteur float64 (ordre de ``feature_names``), None sans données"""
+        if not workout_data:
+            return None
         
-        # Features temporelles
-        if self.feature_config["temporal_features"]:
-            temporal_features = self._extract_temporal_features(df)
-            features = pd.concat([features, temporal_features], axis=1)
+        history = _WorkoutRecords(workout_data)
+        groups, index = self._layout()
+        vector = np.empty(len(index), dtype=np.float64)
         
-        # Features statistiques
-        if self.feature_config["statistical_features"]:
-            statistical_features = self._extract_statistical_features(df)
-            features = pd.concat([features, statistical_features], axis=1)
+        for spec, columns in groups:
+            if spec.extractor == '_interaction_values':
+                lookup = lambda name: vector[index[name]] if name in index else None
+                vector[columns] = self._interaction_values(lookup)
+            else:
+                vector[columns] = getattr(self, spec.extractor)(history, user_profile)
         
-        # Features de tendance
-        if self.feature_config["trend_features"]:
-            trend_features = self._extract_trend_features(df)
-            features = pd.concat([features, trend_features], axis=1)
+        vector[np.isnan(vector)] = 0  # Remplacer les NaN par 0
+        return vector
+    
+    def extract_session_features(self, workout_data: List[Dict], user_profile: Dict) -> pd.DataFrame:
+        """Une ligne de features par séance, calculée uniquement sur les séances jusqu'à celle-ci"""
+        matrix = self.extract_session_matrix(workout_data, user_profile)
+        if matrix is None:
+            return pd.DataFrame()
+        return pd.DataFrame(matrix, columns=self.feature_names)
+    
+    def extract_session_matrix(self, workout_data: List[Dict], user_profile: Dict) -> Optional[np.ndarray]:
+        """Matrice (séances x features) : la ligne i vaut ``extract_feature_vector(workout_data[:i + 1])``.
         
-        # Features comportementales
-        if self.feature_config["behavioral_features"]:
-            behavioral_features = self._extract_behavioral_features(df, user_profile)
-            features = pd.concat([features, behavioral_features], axis=1)
+        Les groupes sont calculés en une passe avec des fenêtres cumulées ou
+        glissantes (O(n·w)) au lieu de n extractions successives (O(n²)).
+        Les dates sont parsées une seule fois sur tout l'historique.
+        """
+        if not workout_data:
+            return None
         
-        # Features contextuelles
-        if self.feature_config["contextual_features"]:
-            contextual_features = self._extract_contextual_features(df, user_profile)
-            features = pd.concat([features, contextual_features], axis=1)
+        history = _WorkoutRecords(workout_data)
+        groups, index = self._layout()
+        matrix = np.empty((history.n, len(index)), dtype=np.float64)
         
-        # Features d'interaction
-        if self.feature_config["interaction_features"]:
-            interaction_features = self._extract_interaction_features(features)
-            features = pd.concat([features, interaction_features], axis=1)
+        for spec, columns in groups:
+            if spec.extractor == '_interaction_values':
+                lookup = lambda name: matrix[:, index[name]] if name in index else None
+                values = self._interaction_values(lookup)
+            else:
+                values = getattr(self, spec.session_extractor)(history, user_profile)
+            for offset, column_values in enumerate(values):
+                matrix[:, columns.start + offset] = column_values
         
-        return features.fillna(0)  # Remplacer les NaN par 0
+        matrix[np.isnan(matrix)] = 0
+        return matrix
+    
+    def _group_frame(self, extractor: str, df: pd.DataFrame, user_profile: Dict = None) -> pd.DataFrame:
+        """Un seul groupe de features en DataFrame d'une ligne (inspection et tests)"""
+        spec = next(spec for spec in FEATURE_SPECS if spec.extractor == extractor)
+        history = _WorkoutRecords(df.to_dict('records'))
+        values = getattr(self, extractor)(history, user_profile or {})
+        return pd.DataFrame([values], columns=spec.columns)
     
     def _extract_basic_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Features de base"""
-        features = pd.DataFrame(index=[0])  # Une seule ligne pour l'agrégation
+        return self._group_frame('_basic_values', df)
+    
+    def _extract_temporal_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Features temporelles avancées"""
+        return self._group_frame('_temporal_values', df)
+    
+    def _extract_statistical_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Features statistiques avancées"""
+        return self._group_frame('_statistical_values', df)
+    
+    def _extract_trend_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Features de tendance"""
+        return self._group_frame('_trend_values', df)
+    
+    def _extract_behavioral_features(self, df: pd.DataFrame, user_profile: Dict) -> pd.DataFrame:
+        """Features comportementales"""
+        return self._group_frame('_behavioral_values', df, user_profile)
+    
+    def _extract_contextual_features(self, df: pd.DataFrame, user_profile: Dict) -> pd.DataFrame:
+        """Features contextuelles"""
+        return self._group_frame('_contextual_values', df, user_profile)
+    
+    def _extract_interaction_features(self, features: pd.DataFrame) -> pd.DataFrame:
+        """Features d'interaction entre variables"""
+        lookup = lambda name: features[name].iloc[0] if name in features.columns else None
+        return pd.DataFrame([self._interaction_values(lookup)], columns=FEATURE_SPECS[-1].columns)
+    
+    def _basic_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[float]:
+        """Features de base"""
+        n = history.n
+        has_weight = history.has('weight')
+        weights = history.numeric('weight') if has_weight else None
         
         # Poids actuel (si disponible)
-        if 'weight' in df.columns and len(df) > 0:
-            features['current_weight'] = df['weight'].iloc[-1]
-        else:
-            features['current_weight'] = 0
+        current_weight = weights[-1] if has_weight else 0
         
         # Volume total
-        if all(col in df.columns for col in ['weight', 'reps', 'sets']):
-            features['total_volume'] = (df['weight'] * df['reps'] * df['sets']).sum()
+        if history.has('weight', 'reps', 'sets'):
+            total_volume = np.nansum(weights * history.numeric('reps') * history.numeric('sets'))
         else:
-            features['total_volume'] = 0
+            total_volume = 0
         
         # Intensité moyenne
-        if 'weight' in df.columns and len(df) > 0:
-            features['avg_intensity'] = df['weight'].mean()
-        else:
-            features['avg_intensity'] = 0
-        
-        # Nombre de séances
-        features['total_sessions'] = len(df)
+        avg_intensity = np.nanmean(weights) if has_weight else 0
         
         # Fréquence d'entraînement
-        if len(df) > 1 and 'date' in df.columns:
-            try:
-                dates = pd.to_datetime(df['date'])
-                date_range = (dates.iloc[-1] - dates.iloc[0]).days
-                features['training_frequency'] = len(df) / max(1, date_range / 7)
-            except:
-                features['training_frequency'] = 0
-        else:
-            features['training_frequency'] = 0
-        
-        return features
+        training_frequency = 0
+        if n > 1 and history.has('date'):
+            dates = history.dates
+            if dates is not None:
+                date_range = (dates[-1] - dates[0]).days
+                training_frequency = n / max(1, date_range / 7)
+        
+        return current_weight, total_volume, avg_intensity, n, training_frequency
     
-    def _extract_temporal_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _temporal_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[float]:
         """Features temporelles avancées"""
-        features = pd.DataFrame(index=[0])
-        
-        if 'weight' not in df.columns or len(df) < 2:
+        n = history.n
+        if not history.has('weight') or n < 2:
             # Valeurs par défaut si pas assez de données
-            for period in [7, 14, 30, 90]:
-                features[f'progression_{period}d'] = 0
-            features['momentum_score'] = 0
-            features['consistency_score'] = 0
-            return features
+            return (0,) * (len(PROGRESSION_PERIODS) + 2)
         
-        weights = df['weight'].values
+        weights = history.numeric('weight')
         
         # Progression sur différentes périodes
-        for period in [7, 14, 30, 90]:
-            recent_data = df.tail(min(len(df), period))
-            if len(recent_data) >= 2:
-                progression = (recent_data['weight'].iloc[-1] - recent_data['weight'].iloc[0]) / max(1, len(recent_data))
-                features[f'progression_{period}d'] = progression
-            else:
-                features[f'progression_{period}d'] = 0
+        progressions = []
+        for period in PROGRESSION_PERIODS:
+            window = min(n, period)
+            progressions.append((weights[-1] - weights[n - window]) / max(1, window))
         
         # Momentum (vitesse de progression)
-        if len(weights) >= 3:
+        if n >= 3:
             momentum = np.gradient(weights)
-            features['momentum_score'] = np.mean(momentum[-5:]) if len(momentum) >= 5 else np.mean(momentum)
+            momentum_score = np.mean(momentum[-5:]) if len(momentum) >= 5 else np.mean(momentum)
         else:
-            features['momentum_score'] = 0
+            momentum_score = 0
         
         # Consistance temporelle
-        if len(df) >= 3 and 'date' in df.columns:
-            try:
-                dates = pd.to_datetime(df['date'])
-                intervals = dates.diff().dt.days.dropna()
+        consistency_score = 0
+        if n >= 3 and history.has('date'):
+            dates = history.dates
+            if dates is not None:
+                intervals = self._interval_days(dates)
                 if len(intervals) > 0:
-                    features['consistency_score'] = 1 / (1 + intervals.std())
-                else:
-                    features['consistency_score'] = 0
-            except:
-                features['consistency_score'] = 0
-        else:
-            features['consistency_score'] = 0
+                    consistency_score = 1 / (1 + (np.std(intervals, ddof=1) if len(intervals) > 1 else np.nan))
         
-        return features
+        return (*progressions, momentum_score, consistency_score)
     
-    def _extract_statistical_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _interval_days(dates: pd.DatetimeIndex) -> np.ndarray:
+        """Jours entiers entre séances consécutives (comme ``diff().dt.days``), sans NaT"""
+        nanoseconds = np.diff(dates.asi8)
+        valid = ~(dates.isna()[1:] | dates.isna()[:-1])
+        return np.floor_divide(nanoseconds[valid], 86_400 * 10**9).astype(np.float64)
+    
+    def _statistical_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[float]:
         """Features statistiques avancées"""
-        features = pd.DataFrame(index=[0])
-        
-        if 'weight' not in df.columns or len(df) < 3:
-            # Valeurs par défaut
-            stat_cols = ['weight_mean', 'weight_std', 'weight_skew', 'weight_kurtosis', 
-                        'weight_p25', 'weight_p75', 'weight_iqr', 'weight_cv', 'smoothing_residual']
-            for col in stat_cols:
-                features[col] = 0
-            return features
+        if not history.has('weight') or history.n < 3:
+            return (0,) * 9
         
-        weights = df['weight'].values
+        weights = history.numeric('weight')
         
         # Statistiques descriptives
-        features['weight_mean'] = np.mean(weights)
-        features['weight_std'] = np.std(weights)
-        features['weight_skew'] = stats.skew(weights)
-        features['weight_kurtosis'] = stats.kurtosis(weights)
+        weight_mean = np.mean(weights)
+        weight_std = np.std(weights)
+        weight_skew, weight_kurtosis = window_stats.skew_kurtosis(weights, weight_mean)
         
         # Percentiles
-        features['weight_p25'] = np.percentile(weights, 25)
-        features['weight_p75'] = np.percentile(weights, 75)
-        features['weight_iqr'] = features['weight_p75'] - features['weight_p25']
+        weight_p25, weight_p75 = np.percentile(weights, [25, 75])
         
         # Coefficient de variation
-        features['weight_cv'] = features['weight_std'] / max(1, features['weight_mean'])
+        weight_cv = weight_std / max(1, weight_mean)
         
         # Lissage avec Savitzky-Golay
-        if len(weights) >= 5:
-            try:
-                smoothed = savgol_filter(weights, min(5, len(weights)), 2)
-                features['smoothing_residual'] = np.mean(np.abs(weights - smoothed))
-            except:
-                features['smoothing_residual'] = 0
-        else:
-            features['smoothing_residual'] = 0
-        
-        return features
+        smoothing_residual = 0
+        if len(weights) >= window_stats.SAVGOL_WINDOW:
+            smoothing_residual = np.mean(np.abs(weights - window_stats.savgol_smooth(weights)))
+        
+        return (
+            weight_mean, weight_std, weight_skew, weight_kurtosis,
+            weight_p25, weight_p75, weight_p75 - weight_p25, weight_cv, smoothing_residual
+        )
     
-    def _extract_trend_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _trend_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[float]:
         """Features de tendance"""
-        features = pd.DataFrame(index=[0])
+        if not history.has('weight') or history.n < 3:
+            return (0,) * 5
         
-        if 'weight' not in df.columns or len(df) < 3:
-            trend_cols = ['trend_slope', 'trend_r_squared', 'trend_p_value', 'trend_changes', 'trend_stability']
-            for col in trend_cols:
-                features[col] = 0
-            return features
-        
-        weights = df['weight'].values
+        weights = history.numeric('weight')
         
         # Régression linéaire pour tendance
         x = np.arange(len(weights))
         try:
             slope, intercept, r_value, p_value, std_err = stats.linregress(x, weights)
-            features['trend_slope'] = slope
-            features['trend_r_squared'] = r_value ** 2
-            features['trend_p_value'] = p_value
-        except:
-            features['trend_slope'] = 0
-            features['trend_r_squared'] = 0
-            features['trend_p_value'] = 1
+            trend = (slope, r_value ** 2, p_value)
+        except Exception:
+            trend = (0, 0, 1)
         
         # Détection de changements de tendance
         if len(weights) >= 5:
             # Différences de premier ordre
             diff1 = np.diff(weights)
             # Changements de signe
-            sign_changes = np.sum(np.diff(np.sign(diff1)) != 0)
-            features['trend_changes'] = sign_changes
-            
+            trend_changes = np.sum(np.diff(np.sign(diff1)) != 0)
             # Stabilité de la tendance
-            features['trend_stability'] = 1 / (1 + np.std(diff1))
+            trend_stability = 1 / (1 + np.std(diff1))
         else:
-            features['trend_changes'] = 0
-            features['trend_stability'] = 0
+            trend_changes = 0
+            trend_stability = 0
         
-        return features
+        return (*trend, trend_changes, trend_stability)
     
-    def _extract_behavioral_features(self, df: pd.DataFrame, user_profile: Dict) -> pd.DataFrame:
+    def _behavioral_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[float]:
         """Features comportementales"""
-        features = pd.DataFrame(index=[0])
+        preferred_hour, day_regularity, avg_session_duration = 12, 0, 60
         
         # Patterns d'entraînement
-        if len(df) >= 3 and 'date' in df.columns:
-            try:
-                # Préférence horaire
-                df_copy = df.copy()
-                df_copy['hour'] = pd.to_datetime(df_copy['date']).dt.hour
-                features['preferred_hour'] = df_copy['hour'].mode().iloc[0] if len(df_copy['hour'].mode()) > 0 else 12
-                
-                # Régularité des jours
-                df_copy['day_of_week'] = pd.to_datetime(df_copy['date']).dt.dayofweek
-                day_counts = df_copy['day_of_week'].value_counts()
-                features['day_regularity'] = day_counts.max() / max(1, day_counts.sum())
-            except:
-                features['preferred_hour'] = 12
-                features['day_regularity'] = 0
+        if history.n >= 3 and history.has('date'):
+            dates = history.dates
+            if dates is not None:
+                valid = dates[~dates.isna()]
+                if len(valid) > 0:
+                    # Préférence horaire (la plus petite heure en cas d'égalité, comme ``mode``)
+                    preferred_hour = np.bincount(valid.hour, minlength=24).argmax()
+                    
+                    # Régularité des jours
+                    day_counts = np.bincount(valid.dayofweek, minlength=7)
+                    day_regularity = day_counts.max() / max(1, day_counts.sum())
+                else:
+                    day_regularity = np.nan
             
             # Durée moyenne des sessions
-            if 'duration' in df.columns:
-                features['avg_session_duration'] = df['duration'].mean()
-            else:
-                features['avg_session_duration'] = 60  # Valeur par défaut
-        else:
-            features['preferred_hour'] = 12
-            features['day_regularity'] = 0
-            features['avg_session_duration'] = 60
+            if history.has('duration'):
+                avg_session_duration = np.nanmean(history.numeric('duration'))
         
-        # Niveau d'expérience
+        return (preferred_hour, day_regularity, avg_session_duration, *self._profile_values(user_profile))
+    
+    @staticmethod
+    def _profile_values(user_profile: Dict) -> Tuple[int, int, int, int]:
+        """Niveau d'expérience et objectifs du profil"""
         experience_levels = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
-        features['experience_level'] = experience_levels.get(user_profile.get('level', 'beginner'), 1)
+        experience_level = experience_levels.get(user_profile.get('level', 'beginner'), 1)
         
-        # Objectifs
         goals = user_profile.get('goals', [])
-        features['goal_strength'] = 1 if 'strength' in goals else 0
-        features['goal_hypertrophy'] = 1 if 'hypertrophy' in goals else 0
-        features['goal_endurance'] = 1 if 'endurance' in goals else 0
-        
-        return features
+        return (
+            experience_level,
+            1 if 'strength' in goals else 0,
+            1 if 'hypertrophy' in goals else 0,
+            1 if 'endurance' in goals else 0
+        )
     
-    def _extract_contextual_features(self, df: pd.DataFrame, user_profile: Dict) -> pd.DataFrame:
+    def _contextual_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[float]:
         """Features contextuelles"""
-        features = pd.DataFrame(index=[0])
-        
-        # Type d'exercice
-        exercise_types = ['compound', 'isolation', 'cardio', 'strength']
-        for ex_type in exercise_types:
-            features[f'exercise_{ex_type}'] = 1 if ex_type in str(df.get('exercise_type', '')).lower() else 0
-        
-        # Groupe musculaire
-        muscle_groups = ['chest', 'back', 'legs', 'shoulders', 'arms', 'core']
-        for muscle in muscle_groups:
-            features[f'muscle_{muscle}'] = 1 if muscle in str(df.get('muscle_group', '')).lower() else 0
-        
-        # Équipement
-        equipment = ['barbell', 'dumbbell', 'machine', 'bodyweight', 'cable']
-        for equip in equipment:
-            features[f'equipment_{equip}'] = 1 if equip in str(df.get('equipment', '')).lower() else 0
+        values = []
+        for column, categories in (('exercise_type', EXERCISE_TYPES), ('muscle_group', MUSCLE_GROUPS), ('equipment', EQUIPMENT)):
+            text = self._column_text(history, column)
+            values.extend(1 if category in text else 0 for category in categories)
         
         # Saisonnalité
-        if len(df) > 0 and 'date' in df.columns:
-            try:
-                df_copy = df.copy()
-                df_copy['month'] = pd.to_datetime(df_copy['date']).dt.month
-                features['seasonal_factor'] = np.sin(2 * np.pi * df_copy['month'].iloc[-1] / 12)
-            except:
-                features['seasonal_factor'] = 0
-        else:
-            features['seasonal_factor'] = 0
-        
-        return features
+        seasonal_factor = 0
+        if history.n > 0 and history.has('date'):
+            dates = history.dates
+            if dates is not None:
+                seasonal_factor = np.sin(2 * np.pi * dates[-1].month / 12) if not pd.isna(dates[-1]) else np.nan
+        values.append(seasonal_factor)
+        
+        return values
     
-    def _extract_interaction_features(self, features: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _column_text(history: _WorkoutRecords, column: str) -> str:
+        """Texte (en minuscules) des valeurs d'une colonne catégorielle"""
+        if not history.has(column):
+            return ''
+        values = history.values(column)
+        if len(values) > _REPR_MAX_ROWS:
+            values = values[:_REPR_EDGE_ROWS] + values[-_REPR_EDGE_ROWS:]
+        return '\n'.join(str(value) for value in values).lower()
+    
+    def _interaction_values(self, lookup: Callable[[str], Optional[float]]) -> Sequence[float]:
         """Features d'interaction entre variables"""
-        interaction_features = pd.DataFrame(index=[0])
-        
-        # Interactions importantes
-        if 'current_weight' in features.columns and 'training_frequency' in features.columns:
-            interaction_features['weight_frequency_interaction'] = (
-                features['current_weight'] * features['training_frequency']
+        pairs = (
+            ('current_weight', 'training_frequency'),
+            ('momentum_score', 'consistency_score'),
+            ('trend_slope', 'experience_level')
+        )
+        values = []
+        for left, right in pairs:
+            a, b = lookup(left), lookup(right)
+            values.append(a * b if a is not None and b is not None else 0)
+        return values
+    
+    # Features par séance : chaque extracteur renvoie une série par colonne, dont
+    # la valeur i est celle de l'extracteur vectoriel sur les séances 0..i
+    
+    @staticmethod
+    def _sessions(history: _WorkoutRecords) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices des séances et nombre de séances de chaque préfixe"""
+        rows = np.arange(history.n)
+        return rows, rows + 1.0
+    
+    def _session_dates(self, history: _WorkoutRecords, rows: np.ndarray) -> Tuple[Optional[pd.DatetimeIndex], np.ndarray]:
+        """Dates de l'historique et préfixes où la colonne date existe et est lisible"""
+        dates = history.dates if history.has('date') else None
+        if dates is None:
+            return None, np.zeros(history.n, dtype=bool)
+        return dates, rows >= history.first_seen('date')
+    
+    def _basic_session_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[np.ndarray]:
+        """Features de base par séance"""
+        rows, counts = self._sessions(history)
+        has_weight = rows >= history.first_seen('weight')
+        weights = history.numeric('weight') if history.has('weight') else np.full(history.n, np.nan)
+        
+        total_volume = 0
+        if history.has('weight', 'reps', 'sets'):
+            volumes = weights * history.numeric('reps') * history.numeric('sets')
+            total_volume = np.where(
+                rows >= history.first_seen('weight', 'reps', 'sets'),
+                np.cumsum(np.where(np.isnan(volumes), 0.0, volumes)), 0
             )
-        else:
-            interaction_features['weight_frequency_interaction'] = 0
         
-        if 'momentum_score' in features.columns and 'consistency_score' in features.columns:
-            interaction_features['momentum_consistency_interaction'] = (
-                features['momentum_score'] * features['consistency_score']
+        training_frequency = 0
+        dates, has_dates = self._session_dates(history, rows)
+        if dates is not None:
+            weeks = self._days_since_first(dates) / 7
+            # max(1, semaines), y compris quand la date est manquante (NaN)
+            training_frequency = np.where(has_dates & (rows > 0), counts / np.where(weeks > 1, weeks, 1), 0)
+        
+        return (
+            np.where(has_weight, weights, 0),
+            total_volume,
+            np.where(has_weight, window_stats.expanding_nanmean(weights), 0),
+            counts,
+            training_frequency
+        )
+    
+    @staticmethod
+    def _days_since_first(dates: pd.DatetimeIndex) -> np.ndarray:
+        """Jours entiers entre la première séance et chaque séance, NaN si l'une des dates manque"""
+        if pd.isna(dates[0]):
+            return np.full(len(dates), np.nan)
+        days = np.floor_divide(dates.asi8 - dates.asi8[0], 86_400 * 10**9).astype(np.float64)
+        days[dates.isna()] = np.nan
+        return days
+    
+    def _temporal_session_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[np.ndarray]:
+        """Features temporelles par séance (fenêtres de progression, momentum et intervalles)"""
+        rows, counts = self._sessions(history)
+        if not history.has('weight') or history.n < 2:
+            return (0,) * (len(PROGRESSION_PERIODS) + 2)
+        
+        active = (rows >= history.first_seen('weight')) & (counts >= 2)
+        weights = history.numeric('weight')
+        
+        values = []
+        for period in PROGRESSION_PERIODS:
+            windows = np.minimum(rows + 1, period)
+            values.append(np.where(active, (weights - weights[rows + 1 - windows]) / windows, 0))
+        
+        values.append(np.where(active & (counts >= 3), self._session_momentum(weights), 0))
+        
+        consistency = 0
+        dates, has_dates = self._session_dates(history, rows)
+        if dates is not None and history.n >= 3:
+            # Intervalle k : entre les séances k et k + 1 ; le préfixe i en contient i
+            valid = ~(dates.isna()[1:] | dates.isna()[:-1])
+            intervals = np.floor_divide(np.diff(dates.asi8), 86_400 * 10**9).astype(np.float64)
+            std, interval_counts = window_stats.expanding_sample_std(intervals, valid)
+            std = np.concatenate(([np.nan], std))
+            interval_counts = np.concatenate(([0.0], interval_counts))
+            consistency = np.where(active & has_dates & (counts >= 3) & (interval_counts > 0), 1 / (1 + std), 0)
+        values.append(consistency)
+        
+        return values
+    
+    @staticmethod
+    def _session_momentum(weights: np.ndarray) -> np.ndarray:
+        """Moyenne des 5 derniers ``np.gradient`` de chaque préfixe (de tous s'il en a moins)"""
+        n = len(weights)
+        momentum = np.full(n, np.nan)
+        for end in range(3, min(n, 4) + 1):
+            momentum[end - 1] = np.mean(np.gradient(weights[:end]))
+        if n >= 5:
+            # Gradients intérieurs du préfixe (différence centrée, unilatérale en 0)
+            # et gradient unilatéral de sa dernière séance
+            interior = np.empty(n - 1)
+            interior[0] = weights[1] - weights[0]
+            interior[1:] = (weights[2:] - weights[:-2]) / 2.0
+            last = weights[4:] - weights[3:-1]
+            momentum[4:] = (np.convolve(interior, np.ones(4), mode='valid') + last) / 5
+        return momentum
+    
+    def _statistical_session_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[np.ndarray]:
+        """Features statistiques par séance (moments, quantiles et résidu de lissage cumulés)"""
+        rows, counts = self._sessions(history)
+        if not history.has('weight') or history.n < 3:
+            return (0,) * 9
+        
+        active = (rows >= history.first_seen('weight')) & (counts >= 3)
+        weights = history.numeric('weight')
+        moments = window_stats.expanding_moments(weights)
+        quantiles = window_stats.expanding_quantiles(weights, (0.25, 0.75))
+        mean, std = moments['mean'], moments['std']
+        
+        values = (
+            mean, std, moments['skew'], moments['kurtosis'],
+            quantiles[:, 0], quantiles[:, 1], quantiles[:, 1] - quantiles[:, 0],
+            std / np.where(mean > 1, mean, 1)
+        )
+        values = [np.where(active, column, 0) for column in values]
+        
+        residual = window_stats.expanding_savgol_residual(weights)
+        values.append(np.where(active & (counts >= window_stats.SAVGOL_WINDOW), residual, 0))
+        return values
+    
+    def _trend_session_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[np.ndarray]:
+        """Features de tendance par séance (régression et changements de signe cumulés)"""
+        rows, counts = self._sessions(history)
+        if not history.has('weight') or history.n < 3:
+            return (0,) * 5
+        
+        active = (rows >= history.first_seen('weight')) & (counts >= 3)
+        weights = history.numeric('weight')
+        trend = window_stats.expanding_linregress(weights)
+        
+        trend_changes = trend_stability = 0
+        long_enough = active & (counts >= 5)
+        if history.n >= 5:
+            diff1 = np.diff(weights)
+            # Changement k : entre les différences k et k + 1 ; le préfixe i en contient i - 1
+            changes = np.cumsum(np.diff(np.sign(diff1)) != 0)
+            trend_changes = np.where(long_enough, np.concatenate(([0, 0], changes)), 0)
+            diff_std = window_stats.expanding_moments(diff1)['std']
+            trend_stability = np.where(long_enough, 1 / (1 + np.concatenate(([np.nan], diff_std))), 0)
+        
+        return (
+            np.where(active, trend['slope'], 0),
+            np.where(active, trend['r_squared'], 0),
+            np.where(active, trend['p_value'], 0),
+            trend_changes,
+            trend_stability
+        )
+    
+    def _behavioral_session_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[np.ndarray]:
+        """Features comportementales par séance (comptages cumulés des heures et des jours)"""
+        rows, counts = self._sessions(history)
+        preferred_hour, day_regularity, avg_session_duration = 12, 0, 60
+        
+        active = (counts >= 3) & (rows >= history.first_seen('date'))
+        dates, has_dates = self._session_dates(history, rows)
+        if dates is not None:
+            valid = ~dates.isna()
+            seen = np.cumsum(valid)
+            hour_counts = self._cumulative_counts(dates.hour, valid, 24)
+            day_counts = self._cumulative_counts(dates.dayofweek, valid, 7)
+            # argmax : la plus petite heure en cas d'égalité, comme l'extracteur vectoriel
+            preferred_hour = np.where(active & (seen > 0), hour_counts.argmax(axis=1), 12)
+            day_regularity = np.where(
+                active, np.where(seen > 0, day_counts.max(axis=1) / np.maximum(1, seen), np.nan), 0
             )
-        else:
-            interaction_features['momentum_consistency_interaction'] = 0
         
-        if 'trend_slope' in features.columns and 'experience_level' in features.columns:
-            interaction_features['trend_experience_interaction'] = (
-                features['trend_slope'] * features['experience_level']
-            )
-        else:
-            interaction_features['trend_experience_interaction'] = 0
+        if history.has('date', 'duration'):
+            durations = window_stats.expanding_nanmean(history.numeric('duration'))
+            avg_session_duration = np.where(active & (rows >= history.first_seen('duration')), durations, 60)
         
-        return interaction_features
\ No newline at end of file
+        return (preferred_hour, day_regularity, avg_session_duration, *self._profile_values(user_profile))
+    
+    @staticmethod
+    def _cumulative_counts(values: np.ndarray, valid: np.ndarray, size: int) -> np.ndarray:
+        """Comptage cumulé (séances x modalités) des valeurs valides"""
+        one_hot = np.zeros((len(valid), size), dtype=np.int64)
+        positions = np.flatnonzero(valid)
+        one_hot[positions, np.asarray(values)[positions].astype(np.int64)] = 1
+        return np.cumsum(one_hot, axis=0)
+    
+    def _contextual_session_values(self, history: _WorkoutRecords, user_profile: Dict) -> Sequence[np.ndarray]:
+        """Features contextuelles par séance"""
+        rows, counts = self._sessions(history)
+        short = counts <= _REPR_MAX_ROWS
+        
+        values = []
+        for column, categories in (('exercise_type', EXERCISE_TYPES), ('muscle_group', MUSCLE_GROUPS), ('equipment', EQUIPMENT)):
+            texts = [str(value).lower() for value in history.values(column)] if history.has(column) else None
+            for category in categories:
+                if texts is None:
+                    values.append(0)
+                    continue
+                found = np.array([category in text for text in texts], dtype=bool)
+                # Au-delà de 60 séances, seules les 5 premières et 5 dernières comptent
+                seen = np.logical_or.accumulate(found)
+                edges = found[:_REPR_EDGE_ROWS].any() | window_stats.rolling_any(found, _REPR_EDGE_ROWS)
+                values.append(np.where(short, seen, edges).astype(np.float64))
+        
+        seasonal_factor = 0
+        dates, has_dates = self._session_dates(history, rows)
+        if dates is not None:
+            seasonal_factor = np.where(has_dates, np.sin(2 * np.pi * dates.month.to_numpy(dtype=np.float64) / 12), 0)
+        values.append(seasonal_factor)
+        
+        return values
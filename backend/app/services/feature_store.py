@@ -0,0 +1,205 @@
+import numpy as np
+import hashlib
+import json
+import logging
+import marshal
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from services.workout_frame import WorkoutFrame
+
+logger = logging.getLogger(__name__)
+
+class ExerciseFeatureState:
+    """Agrégats courants d'un couple (utilisateur, exercice).
+    
+    Contient tout ce qu'il faut pour produire la dernière ligne de
+    ``SimpleFeatureEngineer`` sans relire l'historique : somme des
+    répétitions (moyenne cumulée), max/min courants, deux derniers poids,
+    nombre de séries et de séances.
+    """
+    
+    __slots__ = (
+        'n_sets', 'reps_sum', 'max_weight', 'min_weight', 'last_weight',
+        'previous_weight', 'last_reps', 'session_count',
+        'workouts_consumed', 'history_digest'
+    )
+    
+    def __init__(self):
+        self.n_sets = 0
+        self.reps_sum = 0
+        self.max_weight = -np.inf
+        self.min_weight = np.inf
+        self.last_weight = 0.0
+        self.previous_weight = 0.0
+        self.last_reps = 0
+        self.session_count = 0
+        self.workouts_consumed = 0
+        self.history_digest = None
+    
+    def update(self, weights: np.ndarray, reps: np.ndarray, n_sessions: int):
+        """Intègre de nouvelles séries en O(len(weights))"""
+        if len(weights) == 0:
+            return
+        
+        if len(weights) >= 2:
+            self.previous_weight = float(weights[-2])
+        elif self.n_sets > 0:
+            self.previous_weight = self.last_weight
+        else:
+            self.previous_weight = float(weights[0])
+        
+        self.n_sets += len(weights)
+        self.reps_sum += int(reps.sum())
+        self.max_weight = max(self.max_weight, float(weights.max()))
+        self.min_weight = min(self.min_weight, float(weights.min()))
+        self.last_weight = float(weights[-1])
+        self.last_reps = int(reps[-1])
+        self.session_count += n_sessions
+    
+    def feature_row(self, user_weight) -> np.ndarray:
+        """Ligne de features de la dernière série, dans l'ordre de ``SimpleFeatureEngineer``"""
+        current_weight = self.last_weight
+        
+        if self.n_sets > 1:
+            previous_weight = self.previous_weight
+            weight_progression = current_weight - previous_weight
+            progression_rate = weight_progression / previous_weight if previous_weight > 0 else 0.0
+        else:
+            previous_weight = current_weight
+            weight_progression = 0.0
+            progression_rate = 0.0
+        
+        return np.array([
+            current_weight,
+            previous_weight,
+            weight_progression,
+            self.reps_sum / self.n_sets,
+            self.max_weight,
+            self.min_weight,
+            current_weight * self.last_reps,
+            progression_rate,
+            current_weight / user_weight if user_weight > 0 else 0.0,
+            self.n_sets
+        ], dtype=np.float64)
+
+class IncrementalFeatureStore:
+    """Features incrémentales par (utilisateur, exercice).
+    
+    Le client renvoie tout l'historique à chaque prédiction. Le store retient
+    combien de séances ont déjà été intégrées et une empreinte chaînée de
+    toutes ces séances (``_chain``) : si elle est inchangée, seules les
+    séances ajoutées depuis sont agrégées. Sinon (séance modifiée ou
+    supprimée, même au milieu, historique tronqué) l'état est recalculé
+    depuis le début.
+    
+    Vérifier l'empreinte relit toutes les séances déjà intégrées : le coût
+    d'une requête reste linéaire en la longueur de l'historique, du même
+    ordre que le recalcul complet vectorisé (``extract_latest_features``).
+    Le store est donc désactivé par défaut (``incremental_features``).
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._states: "OrderedDict[Tuple[str, str], ExerciseFeatureState]" = OrderedDict()
+        self.stats = {"incremental_updates": 0, "full_rebuilds": 0, "evictions": 0}
+        # Les prédictions s'exécutent dans un pool de threads
+        self._lock = threading.Lock()
+    
+    def update(self, user_id: str, exercise_name: str,
+               workout_history: Union[List[Dict], WorkoutFrame]) -> ExerciseFeatureState:
+        """Met à jour et retourne l'état de (user_id, exercise_name)"""
+        with self._lock:
+            return self._update(user_id, exercise_name, workout_history)
+    
+    def _update(self, user_id: str, exercise_name: str,
+                workout_history: Union[List[Dict], WorkoutFrame]) -> ExerciseFeatureState:
+        frame = WorkoutFrame.ensure(workout_history)
+        history = frame.source
+        key = (str(user_id), exercise_name)
+        
+        state = self._states.get(key)
+        start = 0
+        prefix = self._consumed_prefix(state, history) if state is not None else None
+        if prefix is not None:
+            start = state.workouts_consumed
+            self.stats["incremental_updates"] += 1
+        else:
+            state = ExerciseFeatureState()
+            self.stats["full_rebuilds"] += 1
+        
+        if start < len(history):
+            weights, reps, n_sessions = self._new_sets(frame, exercise_name, start)
+            state.update(weights, reps, n_sessions)
+            self._mark_consumed(state, history, prefix)
+        
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+            self.stats["evictions"] += 1
+        
+        return state
+    
+    @staticmethod
+    def _chain(history: List[Dict], start: int, stop: int, hasher=None):
+        """Prolonge l'empreinte chaînée ``hasher`` (blake2b) des séances ``start`` à ``stop``.
+        
+        Chaque séance modifie l'empreinte de toutes les suivantes : deux
+        historiques n'ont la même empreinte que si toutes leurs séances
+        sont identiques, dans le même ordre.
+        """
+        hasher = hasher.copy() if hasher is not None else hashlib.blake2b(digest_size=16)
+        for i in range(start, stop):
+            # marshal (format 2, comme la clé du cache de prédictions) : ~5x plus rapide que JSON,
+            # avec repli JSON pour les types qu'il ne connaît pas
+            try:
+                payload = marshal.dumps(history[i], 2)
+            except ValueError:
+                payload = json.dumps(history[i], sort_keys=True, default=str).encode('utf-8')
+            hasher.update(len(payload).to_bytes(8, 'little'))
+            hasher.update(payload)
+        return hasher
+    
+    def _consumed_prefix(self, state, history: List[Dict]):
+        """Empreinte des séances déjà intégrées si elles sont toujours en tête de l'historique, sinon None"""
+        consumed = state.workouts_consumed
+        if consumed == 0 or consumed > len(history) or state.history_digest is None:
+            return None
+        prefix = self._chain(history, 0, consumed)
+        return prefix if prefix.digest() == state.history_digest else None
+    
+    def _mark_consumed(self, state, history: List[Dict], prefix=None):
+        """Enregistre tout ``history`` comme intégré, en prolongeant l'empreinte ``prefix``"""
+        start = state.workouts_consumed if prefix is not None else 0
+        state.history_digest = self._chain(history, start, len(history), prefix).digest()
+        state.workouts_consumed = len(history)
+    
+    @staticmethod
+    def _new_sets(frame: WorkoutFrame, exercise_name: str, start: int):
+        """Séries complètes de l'exercice dans les séances ``start`` et suivantes"""
+        if not frame.is_materialized and start > 0:
+            # Seule la fin de l'historique est parsée
+            frame = WorkoutFrame.from_history(frame.source[start:])
+            start = 0
+        
+        indices = frame.exercise_set_indices(exercise_name)
+        indices = indices[frame.workout_index[indices] >= start]
+        weights, reps = frame.complete_sets(indices)
+        n_sessions = len(np.unique(frame.workout_index[indices]))
+        return weights, reps, n_sessions
+    
+    def get(self, user_id: str, exercise_name: str) -> Optional[ExerciseFeatureState]:
+        return self._states.get((str(user_id), exercise_name))
+    
+    def invalidate(self, user_id: Optional[str] = None):
+        """Oublie l'état d'un utilisateur, ou de tous"""
+        with self._lock:
+            if user_id is None:
+                self._states.clear()
+                return
+            for key in [k for k in self._states if k[0] == str(user_id)]:
+                del self._states[key]
+    
+    def __len__(self) -> int:
+        return len(self._states)
\ No newline at end of file
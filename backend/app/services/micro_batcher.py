@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Regroupe les inférences concurrentes d'un même modèle en un seul ``predict``.
+    
+    Chaque appel dépose sa ligne de features dans le lot en attente de son
+    modèle (global ou partition) et attend son futur. Le lot part dès qu'il
+    atteint ``max_batch_size`` lignes, sinon ``max_delay_ms`` après l'arrivée
+    de sa première ligne : les lignes sont empilées, ``run_batch(model, X)``
+    est appelé une fois et chaque futur reçoit sa prédiction (ou l'exception
+    du lot). Avec ``max_delay_ms=0``, seuls les appels arrivés dans le même
+    tour de boucle sont regroupés.
+    
+    Un appelant peut s'annoncer avec ``expect()`` avant de préparer sa ligne
+    (features), puis appeler ``predict(..., expected=True)`` ou ``withdraw()``
+    s'il n'a finalement rien à inférer. Quand plus aucun appelant annoncé
+    n'est en route, les lots en attente partent sans attendre leur délai :
+    une requête isolée ne paie pas ``max_delay_ms``.
+    """
+    
+    def __init__(self, run_batch: Callable[[Any, np.ndarray], Awaitable[np.ndarray]],
+                 max_batch_size: int = 32, max_delay_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être >= 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+        self._pending: Dict[int, Tuple[Any, List[Tuple[np.ndarray, asyncio.Future, float]], asyncio.Handle]] = {}
+        self._running = set()
+        self._expected = 0
+        self.stats = {
+            "batches": 0, "items": 0, "flush_size": 0, "flush_delay": 0, "flush_idle": 0, "errors": 0, "wait_ms_total": 0.0
+        }
+        self.batch_sizes: Dict[int, int] = {}
+    
+    def expect(self):
+        """Annonce une ligne en préparation : les lots l'attendent (au plus ``max_delay_ms``)"""
+        self._expected += 1
+    
+    def withdraw(self):
+        """Retire une ligne annoncée qui ne sera pas inférée (fallback, cache, erreur)"""
+        self._expected = max(self._expected - 1, 0)
+        if self._expected == 0:
+            self._flush_idle()
+    
+    async def predict(self, model: Any, feature_row: np.ndarray, expected: bool = False) -> float:
+        """Prédiction de ``feature_row`` par ``model``, calculée avec le lot en cours.
+        
+        ``expected`` : l'appel a été annoncé par ``expect()``.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = id(model)
+        batch = self._pending.get(key)
+        if batch is None:
+            timer = loop.call_later(self.max_delay_ms / 1000, self._flush, key, "flush_delay")
+            batch = self._pending[key] = (model, [], timer)
+        batch[1].append((feature_row, future, time.perf_counter()))
+        if len(batch[1]) >= self.max_batch_size:
+            self._flush(key, "flush_size")
+        if expected:
+            self.withdraw()
+        return await future
+    
+    def _flush_idle(self):
+        for key in list(self._pending):
+            self._flush(key, "flush_idle")
+    
+    def _flush(self, key: int, reason: str):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        model, items, timer = batch
+        timer.cancel()
+        self.stats[reason] += 1
+        task = asyncio.ensure_future(self._run(model, items))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    async def _run(self, model: Any, items: List[Tuple[np.ndarray, asyncio.Future, float]]):
+        size = len(items)
+        flushed_at = time.perf_counter()
+        self.stats["batches"] += 1
+        self.stats["items"] += size
+        self.stats["wait_ms_total"] += sum(flushed_at - enqueued for _, _, enqueued in items) * 1000
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        metrics.observe_batch_size(size)
+        
+        try:
+            predictions = await self.run_batch(model, np.vstack([row for row, _, _ in items]))
+            if len(predictions) != size:
+                raise ValueError(f"{len(predictions)} prédictions pour un lot de {size} lignes")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Erreur lors de l'inférence d'un lot de {size} lignes: {e}")
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future, _), prediction in zip(items, predictions):
+            # Appelant annulé entre-temps : sa prédiction est simplement ignorée
+            if not future.done():
+                future.set_result(prediction)
+    
+    def get_stats(self) -> Dict:
+        batches = self.stats["batches"]
+        items = self.stats["items"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_delay_ms": self.max_delay_ms,
+            "batches": batches,
+            "items": items,
+            "flush_size": self.stats["flush_size"],
+            "flush_delay": self.stats["flush_delay"],
+            "flush_idle": self.stats["flush_idle"],
+            "errors": self.stats["errors"],
+            "mean_batch_size": items / batches if batches else 0.0,
+            "mean_wait_ms": self.stats["wait_ms_total"] / items if items else 0.0,
+            "pending": sum(len(rows) for _, rows, _ in self._pending.values()),
+            "expected": self._expected,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())}
+        }
@@ -1,23 +1,130 @@
+from __future__ import annotations
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Optional
+import asyncio
+import contextlib
+import copy
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 from models.ensemble_model import AdvancedEnsembleModel
 from services.simple_feature_engineering import SimpleFeatureEngineer
+from services.workout_frame import WorkoutFrame
+from services.feature_store import IncrementalFeatureStore
 from services.plateau_detection import AdvancedPlateauDetector
+from services.plateau_store import IncrementalPlateauStore
+from services.model_registry import ModelRegistry
+from services.prediction_cache import PredictionCache
+from services.model_partitions import PartitionedModelStore, partition_key
+from services.micro_batcher import MicroBatcher
+from services.compiled_ensemble import UnsupportedModelError, compile_ensemble
+from services.single_flight import SingleFlight
 from utils.mlflow_tracker import MLflowTracker
+from utils.metrics import observe_stage
+from utils.executor import ExecutorOverloadedError, MLExecutor
+from utils.lazy_imports import get_import_timings, lazy_import
+from utils.synthetic_data import DEFAULT_EXERCISES, generate_workout_history
+
+# pandas n'est importé qu'au premier entraînement (annotations seulement ici)
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
+# Profondeur d'analyse d'une prédiction :
+# - "weight" : poids prédit seul (ni plateau, ni confiance, ni recommandations)
+# - "exercise" : plus plateau de l'exercice demandé, confiance et recommandations
+# - "full" : plateau de tous les exercices de l'historique
+ANALYSIS_DEPTHS = ("weight", "exercise", "full")
+
+def _fit_ensemble(model: AdvancedEnsembleModel, X: np.ndarray, y: np.ndarray, feature_names: List[str],
+                  registry: Optional[ModelRegistry] = None):
+    """Entraîne ``model``, le publie dans le registre s'il y en a un, et le
+    retourne avec ses scores et son numéro de version.
+    
+    Fonction de module pour pouvoir s'exécuter dans un processus de
+    l'exécuteur d'entraînement (le modèle revient alors par pickle).
+    """
+    training_result = model.train(X, y, feature_names=feature_names)
+    version = registry.save(model, feature_names, training_result, len(X)) if registry is not None else None
+    return model, training_result, version
+
+def _update_ensemble(model: OnlineEnsembleModel, X: np.ndarray, y: np.ndarray, feature_names: List[str],
+                     registry: Optional[ModelRegistry] = None, full_refit: bool = False):
+    """Comme ``_fit_ensemble``, mais en mise à jour incrémentale : ``partial_fit``
+    sur les nouveaux échantillons, puis si ``full_refit`` un réentraînement
+    complet sur la fenêtre des derniers échantillons du modèle.
+    """
+    was_trained = model.is_trained
+    training_result = model.partial_fit(X, y, feature_names=feature_names)
+    if full_refit and was_trained:
+        training_result = model.refit()
+    version = registry.save(model, feature_names, training_result, len(X)) if registry is not None else None
+    return model, training_result, version
+
+def _fit_copy(fit, model, *args):
+    """Exécute ``fit`` sur une copie de ``model`` : l'ensemble en service n'est
+    jamais modifié, et la copie est faite dans l'exécuteur, pas sur la boucle.
+    """
+    return fit(copy.deepcopy(model), *args)
+
 class MLPipeline:
     def __init__(self, config: Dict = None):
         self.config = config or {}
         
         try:
             self.feature_engineer = SimpleFeatureEngineer()
-            self.ensemble_model = AdvancedEnsembleModel()
+            online_config = self.config.get("online_training", {})
+            self.online_training = dict(online_config) if online_config.get("enabled", False) else None
+            self.ensemble_model = self._new_online_model() if self.online_training else AdvancedEnsembleModel()
             self.plateau_detector = AdvancedPlateauDetector()
-            self.mlflow_tracker = MLflowTracker("ici-ca-pousse-ml")
+            self.mlflow_tracker = MLflowTracker(
+                "ici-ca-pousse-ml",
+                buffered=self.config.get("mlflow_buffered", True),
+                sink_config=self.config.get("mlflow_sink")
+            )
+            self.feature_store = IncrementalFeatureStore(
+                max_entries=self.config.get("feature_store_max_entries", 10000)
+            ) if self.config.get("incremental_features", False) else None
+            self.plateau_store = IncrementalPlateauStore(
+                max_entries=self.config.get("plateau_store_max_entries", 10000),
+                progression_tolerance=self.plateau_detector.config["progression_tolerance"]
+            ) if self.config.get("incremental_plateau", False) else None
+            self.executor = MLExecutor(self.config.get("executor"))
+            registry_path = self.config.get("model_registry_path")
+            self.model_registry = ModelRegistry(
+                registry_path, keep_versions=self.config.get("registry_keep_versions", 5)
+            ) if registry_path else None
+            cache_config = self.config.get("prediction_cache", {})
+            self.prediction_cache = PredictionCache(
+                max_entries=cache_config.get("max_entries", 1024),
+                ttl_seconds=cache_config.get("ttl_seconds", 300.0),
+                max_bytes=cache_config.get("max_bytes", 32 * 1024 * 1024)
+            ) if cache_config.get("enabled", True) else None
+            single_flight_config = self.config.get("single_flight", {})
+            self.single_flight = SingleFlight(
+                timeout_seconds=single_flight_config.get("timeout_seconds", 10.0)
+            ) if single_flight_config.get("enabled", True) else None
+            batching_config = self.config.get("micro_batching", {})
+            self.micro_batcher = MicroBatcher(
+                self._run_inference_batch,
+                max_batch_size=batching_config.get("max_batch_size", 32),
+                max_delay_ms=batching_config.get("max_delay_ms", 2.0)
+            ) if batching_config.get("enabled", False) else None
+            # Formes compilées (NumPy) des ensembles en service, par objet modèle
+            compiled_config = self.config.get("compiled_inference", {})
+            self._compiled_models = weakref.WeakKeyDictionary() if compiled_config.get("enabled", True) else None
+            self._compile_lock = threading.Lock()
+            self.compile_stats = {"compiled": 0, "unsupported": 0, "last_error": None}
+            partition_config = self.config.get("model_partitions", {})
+            self.model_partitions = PartitionedModelStore(
+                partition_config["path"],
+                max_resident_bytes=partition_config.get("max_resident_bytes", 256 * 1024 * 1024),
+                min_samples=partition_config.get("min_samples", 30),
+                recheck_seconds=partition_config.get("recheck_seconds", 30.0)
+            ) if partition_config.get("enabled", False) and partition_config.get("path") else None
+            self.partition_cohort_field = partition_config.get("cohort_field")
+            self.analysis_depth = self._analysis_depth(self.config.get("analysis_depth", "exercise"))
             logger.info("Pipeline ML initialisé avec succès")
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation du pipeline: {e}")
@@ -25,7 +132,162 @@ class MLPipeline:
         
         self.is_initialized = False
         self.is_trained = False
+        self.model_version = None
+        self.feature_names = None
+        self._updates_since_refit = 0
+        self.last_training = None
+        # Un entraînement à la fois, de la copie du modèle à sa mise en service
+        self._training_lock = asyncio.Lock()
+        self._trainings_queued = 0
+        
+        # Rechargement à chaud : le registre est consulté au plus toutes les N secondes
+        self.registry_poll_interval = self.config.get("registry_poll_interval", 5.0)
+        self._registry_checked_at = time.monotonic()
+        self._reloading = False
+        
+        self._created_at = time.perf_counter()
+        self.startup_report = {"model_source": None, "model_load_ms": None, "first_prediction_ms": None}
+    
+    @staticmethod
+    def _analysis_depth(analysis_depth: str) -> str:
+        if analysis_depth not in ANALYSIS_DEPTHS:
+            raise ValueError(f"Profondeur d'analyse inconnue: {analysis_depth} (attendu: {', '.join(ANALYSIS_DEPTHS)})")
+        return analysis_depth
+    
+    def _new_online_model(self) -> OnlineEnsembleModel:
+        # sklearn.linear_model n'est importé qu'en mode incrémental
+        from services.online_model import OnlineEnsembleModel
+        return OnlineEnsembleModel(
+            buffer_size=self.online_training.get("buffer_size", 20000),
+            epochs=self.online_training.get("epochs", 5)
+        )
+    
+    def _training_mode(self, retrain: bool) -> str:
+        """``full`` (ensemble complet), ``incremental`` (partial_fit) ou ``full_refit``.
+        
+        En mode incrémental, un réentraînement complet est fait au premier
+        entraînement, sur demande (``retrain``) et toutes les
+        ``full_refit_every`` mises à jour.
+        """
+        if self.online_training is None:
+            return "full"
+        if retrain or not self.is_trained or not hasattr(self.ensemble_model, "partial_fit"):
+            return "full_refit"
+        if self._updates_since_refit + 1 >= self.online_training.get("full_refit_every", 20):
+            return "full_refit"
+        return "incremental"
+    
+    async def warm_start(self) -> bool:
+        """Charge la dernière version du registre (démarrage de l'API)"""
+        if self.model_registry is None or self.model_registry.latest_version() is None:
+            logger.info("Aucun modèle dans le registre - démarrage sans modèle entraîné")
+            return False
+        
+        try:
+            model, manifest = await self.executor.run_inference(
+                self.model_registry.load, None, self.config.get("registry_mmap", True)
+            )
+            await self.executor.run_inference(self._compile_model, model)
+            self._install_model(model, manifest)
+            self.startup_report.update({"model_source": "registry", "model_load_ms": manifest["load_ms"]})
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du modèle depuis le registre: {e}")
+            return False
+    
+    async def warmup(self) -> Dict:
+        """Préchauffe le chemin de prédiction avant que l'API ne se déclare prête.
+        
+        Des historiques synthétiques passent par l'extraction de features,
+        l'ensemble (s'il est entraîné) et la détection de plateau, dans le
+        pool d'inférence : imports différés, caches de validation de sklearn
+        et threads de l'exécuteur sont payés ici plutôt que par la première
+        requête. MLflow (base SQLite, expérience) est configuré au passage.
+        Ni le cache de prédictions, ni les stores incrémentaux, ni MLflow ne
+        reçoivent de données de préchauffage.
+        """
+        warmup_config = self.config.get("warmup", {})
+        start = time.perf_counter()
+        report = await self.executor.run_inference(
+            self._warmup_sync, warmup_config.get("sessions", [10, 40, 120]), warmup_config.get("rounds", 2)
+        )
+        report["mlflow_ready"] = await self.executor.run_inference(self.mlflow_tracker.prepare)
+        report["warmup_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        self.startup_report["warmup"] = report
+        return report
+    
+    def _warmup_sync(self, sessions: List[int], rounds: int) -> Dict:
+        """Corps synchrone de ``warmup`` : durée (ms) de chaque étape au premier et au dernier passage"""
+        model, _, _ = self._select_model(DEFAULT_EXERCISES[0], {})
+        user_data = {"current_weight": 80}
+        stages = {"feature_extraction": [0.0] * rounds, "plateau_detection": [0.0] * rounds}
+        if model is not None:
+            stages["inference"] = [0.0] * rounds
+        
+        for round_index in range(rounds):
+            for n_sessions in sessions:
+                history = WorkoutFrame.ensure(generate_workout_history(n_sessions, seed=round_index))
+                
+                step = time.perf_counter()
+                feature_row = self.feature_engineer.extract_latest_features(history, user_data, DEFAULT_EXERCISES[0])
+                stages["feature_extraction"][round_index] += time.perf_counter() - step
+                
+                if model is not None and feature_row is not None:
+                    step = time.perf_counter()
+                    self._inference_model(model).predict(feature_row.reshape(1, -1))
+                    stages["inference"][round_index] += time.perf_counter() - step
+                
+                # Profondeurs "exercise" et "full"
+                step = time.perf_counter()
+                self.plateau_detector.detect_plateaus(history, DEFAULT_EXERCISES[0])
+                self.plateau_detector.detect_plateaus(history)
+                stages["plateau_detection"][round_index] += time.perf_counter() - step
         
+        return {
+            "rounds": rounds,
+            "sessions": list(sessions),
+            "model_warmed": model is not None,
+            "stages": {
+                stage: {"first_round_ms": round(timings[0] * 1000, 3), "last_round_ms": round(timings[-1] * 1000, 3)}
+                for stage, timings in stages.items()
+            }
+        }
+    
+    async def refresh_model(self):
+        """Charge une version plus récente publiée par un autre processus (sans redémarrage)"""
+        if self.model_registry is None or self._reloading:
+            return
+        if time.monotonic() - self._registry_checked_at < self.registry_poll_interval:
+            return
+        
+        self._registry_checked_at = time.monotonic()
+        self._reloading = True
+        try:
+            latest = await self.executor.run_inference(self.model_registry.latest_version)
+            if latest is not None and (self.model_version is None or latest > self.model_version):
+                model, manifest = await self.executor.run_inference(
+                    self.model_registry.load, latest, self.config.get("registry_mmap", True)
+                )
+                await self.executor.run_inference(self._compile_model, model)
+                self._install_model(model, manifest)
+        except Exception as e:
+            logger.warning(f"Rechargement du modèle impossible: {e}")
+        finally:
+            self._reloading = False
+    
+    def _install_model(self, model: AdvancedEnsembleModel, manifest: Dict):
+        """Met en service un modèle chargé du registre"""
+        expected = list(self.feature_engineer.feature_names)
+        if manifest["feature_names"] != expected:
+            raise ValueError(f"Features du modèle v{manifest['version']} incompatibles: {manifest['feature_names']}")
+        
+        self.ensemble_model = model
+        self.feature_names = manifest["feature_names"]
+        self.model_version = manifest["version"]
+        self.is_trained = True
+        self._invalidate_prediction_cache()
+        logger.info(f"Modèle v{self.model_version} en service ({manifest['load_ms']} ms de chargement)")
+    
     async def initialize(self, workout_data: List[Dict], user_profile: Dict = None):
         """Initialise le pipeline avec les données utilisateur"""
         try:
@@ -34,15 +296,14 @@ class MLPipeline:
             if not workout_data:
                 return {"success": False, "error": "Aucune donnée d'entraînement fournie"}
             
-            # Feature engineering
-            features = self.feature_engineer.extract_features(workout_data, user_profile or {})
+            # Features et targets calculés hors de la boucle d'événements
+            features, targets = await self.executor.run_inference(
+                self._prepare_training_data, workout_data, user_profile or {}
+            )
             
             if features.empty:
                 return {"success": False, "error": "Impossible d'extraire des features"}
             
-            # Préparer les targets (poids futurs)
-            targets = self._prepare_targets(workout_data)
-            
             if len(targets) == 0:
                 return {"success": False, "error": "Impossible de préparer les targets"}
             
@@ -59,76 +320,362 @@ class MLPipeline:
             self.is_initialized = True
             logger.info("Pipeline ML initialisé avec succès")
             return {"success": True, "message": "Pipeline initialisé avec succès", "training_result": training_result}
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation: {e}")
             return {"success": False, "error": str(e)}
     
-    async def predict(self, exercise_name: str, user_data: Dict, workout_history: List[Dict]) -> Dict:
-        """Prédiction de poids avec pipeline ML avancé"""
+    async def predict(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                      analysis_depth: Optional[str] = None) -> Dict:
+        """Prédiction de poids avec pipeline ML avancé.
+        
+        ``analysis_depth`` (``ANALYSIS_DEPTHS``) choisit les analyses qui
+        accompagnent le poids prédit ; par défaut celle de la configuration.
+        """
         try:
             logger.info(f"Prédiction pour l'exercice: {exercise_name}")
+            depth = self._analysis_depth(analysis_depth or self.analysis_depth)
+            await self.refresh_model()
             
-            # Vérifier que nous avons des données d'historique
-            if not workout_history:
-                return self._fallback_prediction(exercise_name, user_data, "Aucun historique d'entraînement")
+            if self.single_flight is None:
+                return await self._compute_prediction(exercise_name, user_data, workout_history, None, depth)
             
-            # Feature engineering
-            features = self.feature_engineer.extract_features(workout_history, user_data)
+            # Requêtes identiques simultanées (relances, onglets) : un seul calcul partagé.
+            # L'empreinte de l'historique est calculée hors de la boucle, puis réutilisée par le cache
+            request_key = await self.executor.run_inference(self._request_key, exercise_name, user_data, workout_history, depth)
+            if request_key is None:
+                return await self._compute_prediction(exercise_name, user_data, workout_history, None, depth)
+            return await self.single_flight.run(
+                request_key,
+                lambda: self._compute_prediction(exercise_name, user_data, workout_history, request_key, depth)
+            )
+        
+        except Exception as e:
+            logger.error(f"Erreur lors de la prédiction: {e}")
+            return self._fallback_prediction(exercise_name, user_data, str(e))
+    
+    async def _compute_prediction(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                                  request_key: Optional[str], analysis_depth: str) -> Dict:
+        """Calcul d'une prédiction dans le pool d'inférence, regroupé avec
+        les prédictions concurrentes quand le micro-batching est actif"""
+        if self.micro_batcher is None:
+            # Features, inférence et plateaux en un seul passage dans le pool
+            return await self.executor.run_inference(self._predict_sync, exercise_name, user_data, workout_history, request_key, analysis_depth)
+        
+        # Features hors de la boucle, inférence dans le lot en cours, puis plateaux et recommandations.
+        # La prédiction est annoncée au lot dès maintenant : il l'attend le temps de ses features
+        self.micro_batcher.expect()
+        try:
+            context = await self.executor.run_inference(
+                self._begin_prediction, exercise_name, user_data, workout_history, request_key, analysis_depth
+            )
+        except BaseException:
+            self.micro_batcher.withdraw()
+            raise
+        if "result" in context:
+            self.micro_batcher.withdraw()
+            return context["result"]
+        try:
+            predicted_weight = await self.micro_batcher.predict(context["model"], context["feature_row"], expected=True)
+        except Exception as e:
+            logger.error(f"Erreur lors de la prédiction avec l'ensemble: {e}")
+            return self._fallback_prediction(exercise_name, user_data, str(e))
+        return await self.executor.run_inference(self._complete_prediction, context, predicted_weight)
+    
+    def _run_inference_batch(self, model, X: np.ndarray):
+        """Lot du micro-batching : un seul ``predict`` dans le pool d'inférence"""
+        return self.executor.run_inference(self._predict_rows, model, X)
+    
+    def _predict_rows(self, model, X: np.ndarray) -> np.ndarray:
+        with observe_stage("inference"):
+            return self._inference_model(model).predict(X)
+    
+    def _predict_sync(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                      request_key: Optional[str] = None, analysis_depth: Optional[str] = None) -> Dict:
+        """Corps synchrone de ``predict``, exécuté hors de la boucle d'événements"""
+        context = self._begin_prediction(exercise_name, user_data, workout_history, request_key, analysis_depth)
+        if "result" in context:
+            return context["result"]
+        
+        # Prédiction avec l'ensemble (de la partition ou global)
+        try:
+            with observe_stage("inference"):
+                raw_prediction = self._inference_model(context["model"]).predict(context["feature_row"].reshape(1, -1))
+            predicted_weight = raw_prediction[0] if len(raw_prediction) > 0 else 0
+        except Exception as e:
+            logger.error(f"Erreur lors de la prédiction avec l'ensemble: {e}")
+            return self._fallback_prediction(exercise_name, user_data, str(e))
+        
+        return self._complete_prediction(context, predicted_weight)
+    
+    def _begin_prediction(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                          request_key: Optional[str] = None, analysis_depth: Optional[str] = None) -> Dict:
+        """Cache puis ``_prepare_prediction`` : contexte à inférer, ou ``{"result": ...}``"""
+        analysis_depth = analysis_depth or self.analysis_depth
+        route = self._select_model(exercise_name, user_data)
+        cache_key = self._prediction_cache_key(exercise_name, user_data, workout_history, route, request_key, analysis_depth)
+        if cache_key is not None:
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return {"result": cached}
+        
+        context = self._prepare_prediction(exercise_name, user_data, workout_history, route)
+        if "result" not in context:
+            context["cache_key"] = cache_key
+            context["analysis_depth"] = analysis_depth
+        return context
+    
+    def _complete_prediction(self, context: Dict, predicted_weight: float) -> Dict:
+        """Finalisation d'une prédiction de ``_begin_prediction``, puis mise en cache"""
+        result = self._finalize_prediction(context, predicted_weight, context["analysis_depth"])
+        if context["cache_key"] is not None:
+            # Seules les prédictions du modèle sont mises en cache, jamais les fallbacks
+            self.prediction_cache.put(context["cache_key"], result)
+        return result
+    
+    def _prediction_cache_key(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                              route: Tuple, request_key: Optional[str] = None, analysis_depth: Optional[str] = None) -> Optional[str]:
+        """Clé de cache de la requête, ou None si le cache ne s'applique pas"""
+        model, _, model_version = route
+        if self.prediction_cache is None or model is None or not workout_history:
+            return None
+        
+        if request_key is None:
+            request_key = self._request_key(exercise_name, user_data, workout_history, analysis_depth)
+        return PredictionCache.versioned_key(request_key, model_version) if request_key is not None else None
+    
+    def _request_key(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                     analysis_depth: Optional[str] = None) -> Optional[str]:
+        """Empreinte de la requête (single-flight et cache), ou None si non sérialisable"""
+        # L'empreinte porte sur l'historique brut, sans matérialiser le WorkoutFrame ;
+        # un historique reçu en flux n'a plus que l'empreinte de ses lignes
+        records = workout_history
+        if isinstance(workout_history, WorkoutFrame):
+            records = workout_history.source if workout_history.fingerprint is None else workout_history.fingerprint
+        try:
+            return PredictionCache.request_key(exercise_name, user_data, records, analysis_depth or self.analysis_depth)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Requête sans empreinte (ni cache ni regroupement): {e}")
+            return None
+    
+    def _inference_model(self, model):
+        """Forme compilée de ``model`` pour l'inférence, sinon le modèle lui-même"""
+        if self._compiled_models is None:
+            return model
+        try:
+            compiled = self._compiled_models[model]
+        except KeyError:
+            compiled = self._compile_model(model)
+        except TypeError:
+            return model
+        return compiled if compiled is not None else model
+    
+    def _compile_model(self, model, probe: Optional[np.ndarray] = None):
+        """Compile ``model`` une fois (vérifié sur ``probe``) ; None s'il n'a pas d'équivalent compilé"""
+        if self._compiled_models is None:
+            return None
+        with self._compile_lock:
+            try:
+                if model in self._compiled_models:
+                    return self._compiled_models[model]
+            except TypeError:
+                return None
             
-            if features.empty:
-                return self._fallback_prediction(exercise_name, user_data, "Impossible d'extraire les features")
+            try:
+                compiled = compile_ensemble(model, probe[:256] if probe is not None else None)
+                self.compile_stats["compiled"] += 1
+                logger.info(f"Ensemble compilé pour l'inférence ({compiled.compile_ms} ms, écart max {compiled.max_error:.3g})")
+            except Exception as e:
+                # UnsupportedModelError : membre sans équivalent compilé ou écart à la vérification
+                compiled = None
+                self.compile_stats["unsupported"] += 1
+                self.compile_stats["last_error"] = str(e)
+                log = logger.warning if isinstance(e, UnsupportedModelError) else logger.error
+                log(f"Inférence non compilée, modèle scikit-learn conservé: {e}")
+            self._compiled_models[model] = compiled
+            return compiled
+    
+    def _invalidate_prediction_cache(self):
+        if self.prediction_cache is not None:
+            self.prediction_cache.clear()
+    
+    def _select_model(self, exercise_name: str, user_data: Dict) -> Tuple:
+        """Modèle qui sert la requête : (modèle, partition, version).
+        
+        Partition exercice + cohorte, puis exercice seul, puis modèle global ;
+        la version (propre à la partition) entre dans la clé du cache.
+        ``(None, None, None)`` si aucun modèle n'est entraîné.
+        """
+        if self.model_partitions is not None:
+            for key in self._partition_keys(exercise_name, user_data):
+                partition = self.model_partitions.get(key)
+                if partition is not None:
+                    model, manifest = partition
+                    return model, key, f"{key}@v{manifest['version']}"
+        
+        if self.is_trained and self.ensemble_model.is_trained:
+            return self.ensemble_model, None, self.model_version
+        return None, None, None
+    
+    def _partition_keys(self, exercise_name: str, user_data: Dict) -> List[str]:
+        """Partitions candidates, de la plus spécifique à la plus générale"""
+        keys = [partition_key(exercise_name)]
+        cohort = user_data.get(self.partition_cohort_field) if self.partition_cohort_field else None
+        if cohort is not None:
+            keys.insert(0, partition_key(exercise_name, str(cohort)))
+        return keys
+    
+    async def predict_batch(self, requests: List[Dict]) -> List[Dict]:
+        """Prédictions groupées (plusieurs exercices et/ou utilisateurs).
+        
+        Les features de chaque requête sont empilées et l'ensemble n'est
+        appelé qu'une fois pour tout le lot. Les résultats sont renvoyés dans
+        l'ordre des requêtes ; une requête en erreur obtient sa prédiction de
+        fallback sans affecter les autres.
+        """
+        logger.info(f"Prédiction groupée pour {len(requests)} requêtes")
+        await self.refresh_model()
+        try:
+            return await self.executor.run_inference(self._predict_batch_sync, requests)
+        except Exception as e:
+            logger.error(f"Erreur lors de la prédiction groupée: {e}")
+            return [
+                self._fallback_prediction(request.get("exercise_name", ""), request.get("user_data") or {}, str(e))
+                for request in requests
+            ]
+    
+    def _predict_batch_sync(self, requests: List[Dict]) -> List[Dict]:
+        """Corps synchrone de ``predict_batch``, exécuté hors de la boucle d'événements"""
+        results: List[Optional[Dict]] = [None] * len(requests)
+        pending = []
+        
+        for i, request in enumerate(requests):
+            exercise_name = request.get("exercise_name", "")
+            user_data = request.get("user_data") or {}
+            try:
+                self._analysis_depth(request.get("analysis_depth") or self.analysis_depth)
+                context = self._prepare_prediction(exercise_name, user_data, request.get("workout_history") or [])
+            except Exception as e:
+                logger.error(f"Erreur lors de la préparation de la requête {i}: {e}")
+                context = {"result": self._fallback_prediction(exercise_name, user_data, str(e))}
             
-            # Prédiction avec ensemble si disponible
-            if self.is_trained and self.ensemble_model.is_trained:
-                try:
-                    raw_prediction = self.ensemble_model.predict(features.values)
-                    predicted_weight = raw_prediction[0] if len(raw_prediction) > 0 else 0
-                except Exception as e:
-                    logger.error(f"Erreur lors de la prédiction avec l'ensemble: {e}")
-                    return self._fallback_prediction(exercise_name, user_data, str(e))
+            if "result" in context:
+                results[i] = context["result"]
             else:
-                return self._fallback_prediction(exercise_name, user_data, "Modèles non entraînés")
-            
-            # Détection de plateau
+                pending.append((i, context))
+        
+        # Un appel ``predict`` par modèle (global ou partition) pour tout le lot
+        groups: Dict[int, List[Tuple[int, Dict]]] = {}
+        for i, context in pending:
+            groups.setdefault(id(context["model"]), []).append((i, context))
+        
+        for group in groups.values():
             try:
-                plateau_analysis = self.plateau_detector.detect_plateaus(workout_history)
+                with observe_stage("inference"):
+                    raw_predictions = self._inference_model(group[0][1]["model"]).predict(
+                        np.vstack([context["feature_row"] for _, context in group])
+                    )
             except Exception as e:
-                logger.warning(f"Erreur lors de la détection de plateau: {e}")
-                plateau_analysis = {"detected": False, "error": str(e)}
+                logger.error(f"Erreur lors de la prédiction groupée avec l'ensemble: {e}")
+                raw_predictions = None
             
-            # Post-traitement et validation
-            current_weight = user_data.get('current_weight', 0)
-            validated_prediction = self._validate_prediction(predicted_weight, current_weight)
-            
-            # Calculer la confiance
-            confidence = self._calculate_confidence(features, validated_prediction, current_weight)
-            
-            # Log to MLflow
+            for position, (i, context) in enumerate(group):
+                try:
+                    if raw_predictions is None:
+                        raise ValueError("Prédiction de l'ensemble indisponible")
+                    results[i] = self._finalize_prediction(context, raw_predictions[position], requests[i].get("analysis_depth"))
+                except Exception as e:
+                    results[i] = self._fallback_prediction(context["exercise_name"], context["user_data"], str(e))
+        
+        return results
+    
+    def _prepare_prediction(self, exercise_name: str, user_data: Dict, workout_history: Union[List[Dict], WorkoutFrame],
+                            route: Optional[Tuple] = None) -> Dict:
+        """Étapes avant l'inférence : historique, features et choix du modèle.
+        
+        Retourne le contexte de la prédiction, ou ``{"result": ...}`` quand
+        une prédiction de fallback s'impose déjà.
+        """
+        # Vérifier que nous avons des données d'historique
+        if not workout_history:
+            return {"result": self._fallback_prediction(exercise_name, user_data, "Aucun historique d'entraînement")}
+        
+        # Historique parsé une seule fois puis partagé par tous les services
+        workout_history = WorkoutFrame.ensure(workout_history)
+        
+        # Features de la dernière série de l'exercice
+        with observe_stage("feature_extraction"):
+            feature_row = self._latest_features(exercise_name, user_data, workout_history)
+        
+        if feature_row is None:
+            return {"result": self._fallback_prediction(exercise_name, user_data, "Impossible d'extraire les features")}
+        
+        model, partition, _ = route if route is not None else self._select_model(exercise_name, user_data)
+        if model is None:
+            return {"result": self._fallback_prediction(exercise_name, user_data, "Modèles non entraînés")}
+        
+        return {
+            "exercise_name": exercise_name,
+            "user_data": user_data,
+            "workout_history": workout_history,
+            "feature_row": feature_row,
+            "model": model,
+            "partition": partition
+        }
+    
+    def _finalize_prediction(self, context: Dict, predicted_weight: float, analysis_depth: Optional[str] = None) -> Dict:
+        """Étapes après l'inférence : validation, puis selon la profondeur plateau, confiance et recommandations"""
+        if self.startup_report["first_prediction_ms"] is None:
+            self.startup_report["first_prediction_ms"] = round((time.perf_counter() - self._created_at) * 1000, 3)
+        
+        analysis_depth = analysis_depth or self.analysis_depth
+        exercise_name = context["exercise_name"]
+        user_data = context["user_data"]
+        feature_row = context["feature_row"]
+        
+        # Post-traitement et validation
+        current_weight = user_data.get('current_weight', 0)
+        validated_prediction = self._validate_prediction(predicted_weight, current_weight)
+        
+        result = {
+            "exercise_name": exercise_name,
+            "predicted_weight": validated_prediction,
+            "confidence": None,
+            "plateau_analysis": None,
+            "model_used": "partition_ensemble" if context["partition"] else "python_ensemble",
+            "model_partition": context["partition"],
+            "features_used": len(feature_row),
+            "analysis_depth": analysis_depth,
+            "recommendations": []
+        }
+        
+        if analysis_depth != "weight":
+            # Détection de plateau, restreinte à l'exercice demandé sauf en profondeur "full"
             try:
-                if self.mlflow_tracker.is_available():
-                    self.mlflow_tracker.log_prediction({
-                        "exercise_name": exercise_name,
-                        "prediction": validated_prediction,
-                        "confidence": confidence,
-                        "raw_prediction": predicted_weight
-                    })
+                with observe_stage("plateau_detection"):
+                    result["plateau_analysis"] = self._detect_plateaus(exercise_name, user_data, context["workout_history"], analysis_depth)
             except Exception as e:
-                logger.warning(f"Erreur lors du logging MLflow: {e}")
-            
-            return {
-                "exercise_name": exercise_name,
-                "predicted_weight": validated_prediction,
-                "confidence": confidence,
-                "plateau_analysis": plateau_analysis,
-                "model_used": "python_ensemble",
-                "features_used": len(features.columns),
-                "recommendations": self._generate_recommendations(validated_prediction, current_weight, plateau_analysis)
-            }
+                logger.warning(f"Erreur lors de la détection de plateau: {e}")
+                result["plateau_analysis"] = {"detected": False, "error": str(e)}
             
+            # Calculer la confiance
+            result["confidence"] = self._calculate_confidence(int(feature_row[-1]), validated_prediction, current_weight)
+            result["recommendations"] = self._generate_recommendations(
+                validated_prediction, current_weight, result["plateau_analysis"]
+            )
+        
+        # Log to MLflow
+        try:
+            if self.mlflow_tracker.is_available():
+                with observe_stage("mlflow_logging"):
+                    logged = {"exercise_name": exercise_name, "prediction": validated_prediction, "raw_prediction": predicted_weight}
+                    if result["confidence"] is not None:
+                        logged["confidence"] = result["confidence"]
+                    self.mlflow_tracker.log_prediction(logged)
         except Exception as e:
-            logger.error(f"Erreur lors de la prédiction: {e}")
-            return self._fallback_prediction(exercise_name, user_data, str(e))
+            logger.warning(f"Erreur lors du logging MLflow: {e}")
+        
+        return result
     
     async def train_models(self, features: pd.DataFrame, targets: np.ndarray, retrain: bool = False):
         """Entraînement des modèles avec nouvelles données"""
@@ -142,48 +689,113 @@ class MLPipeline:
             # Vérifier et nettoyer les données
             features_clean = features.fillna(0)
             targets_clean = np.nan_to_num(targets)
+            async with self._training_turn():
+                # Mode décidé à son tour : il dépend des entraînements précédents
+                mode = self._training_mode(retrain)
+                params = {
+                    "n_samples": len(features_clean),
+                    "n_features": len(features_clean.columns),
+                    "retrain": retrain,
+                    "training_mode": mode
+                }
+                try:
+                    training_result = await self._fit_models(features_clean, targets_clean, mode)
+                except ExecutorOverloadedError:
+                    raise
+                except Exception:
+                    await self._log_training_run(params, None, "FAILED")
+                    raise
+                self.is_trained = True
+            await self._log_training_run(params, training_result)
             
-            # Utiliser MLflow si disponible
-            if self.mlflow_tracker.is_available():
-                with self.mlflow_tracker.start_run("model_training"):
-                    # Log des paramètres
-                    self.mlflow_tracker.log_params({
-                        "n_samples": len(features_clean),
-                        "n_features": len(features_clean.columns),
-                        "retrain": retrain
-                    })
-                    
-                    # Entraîner l'ensemble
-                    training_result = self.ensemble_model.train(
-                        features_clean.values, 
-                        targets_clean,
-                        feature_names=list(features_clean.columns)
-                    )
-                    
-                    # Log des métriques
-                    if training_result:
-                        metrics = {}
-                        for model_name, scores in training_result.items():
-                            metrics[f"{model_name}_mse"] = scores.get("mse", 0)
-                            metrics[f"{model_name}_r2"] = scores.get("r2", 0)
-                        self.mlflow_tracker.log_metrics(metrics)
-            else:
-                # Entraînement sans MLflow
-                training_result = self.ensemble_model.train(
-                    features_clean.values, 
-                    targets_clean,
-                    feature_names=list(features_clean.columns)
-                )
-            
-            self.is_trained = True
             logger.info("Entraînement terminé avec succès")
             return training_result
-            
+        
+        except ExecutorOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Erreur lors de l'entraînement: {e}")
             raise Exception(f"Erreur lors de l'entraînement: {str(e)}")
     
-    async def train(self, user_id: str, new_data: List[Dict], retrain: bool = False):
+    @contextlib.asynccontextmanager
+    async def _training_turn(self):
+        """Attend son tour d'entraînement (verrou asyncio du pipeline).
+        
+        Deux entraînements concurrents partiraient sinon du même modèle et le
+        dernier remplacerait l'autre (lot perdu en mode incrémental). Les
+        entraînements en attente comptent dans ``training_max_pending`` :
+        au-delà, refus immédiat comme pour la voie d'entraînement.
+        """
+        max_pending = self.executor.config["training_max_pending"]
+        if self._trainings_queued >= max_pending:
+            raise self.executor.reject("training")
+        self._trainings_queued += 1
+        try:
+            async with self._training_lock:
+                yield
+        finally:
+            self._trainings_queued -= 1
+    
+    async def _log_training_run(self, params: Dict, training_result: Optional[Dict], status: str = "FINISHED"):
+        """Run MLflow d'un entraînement, écrit dans l'exécuteur sous son propre id.
+        
+        Aucun appel MLflow sur la boucle d'événements, et aucun run courant
+        partagé entre deux entraînements qui se chevauchent.
+        """
+        if not self.mlflow_tracker.is_available():
+            return
+        metrics = {}
+        for model_name, scores in (training_result or {}).items():
+            metrics[f"{model_name}_mse"] = scores.get("mse", 0)
+            metrics[f"{model_name}_r2"] = scores.get("r2", 0)
+        try:
+            await self.executor.run_inference(self.mlflow_tracker.log_run, "model_training", params, metrics, status)
+        except ExecutorOverloadedError:
+            logger.warning("Pool d'inférence saturé : run MLflow de l'entraînement non enregistré")
+    
+    async def _fit_models(self, features: pd.DataFrame, targets: np.ndarray, mode: str = "full"):
+        """Entraîne une copie de l'ensemble dans l'exécuteur puis la met en service.
+        
+        Les prédictions concurrentes continuent d'utiliser l'ancien ensemble
+        jusqu'au remplacement, qui est une simple affectation. Appelée à son
+        tour (``_training_turn``) : aucun autre entraînement entre la lecture
+        du modèle et sa mise en service.
+        """
+        model = self.ensemble_model
+        fresh = mode != "full" and not hasattr(model, "partial_fit")
+        if fresh:
+            # Ensemble complet chargé du registre : l'ensemble incrémental repart de ces données
+            model = self._new_online_model()
+        
+        if mode == "full":
+            fit, extra = _fit_ensemble, ()
+        else:
+            fit, extra = _update_ensemble, (mode == "full_refit",)
+        job = (fit, model, features.values, targets, list(features.columns), self.model_registry, *extra)
+        if not fresh and not self.executor.uses_processes("training"):
+            # En mode processus, le pickle fait déjà office de copie
+            job = (_fit_copy, *job)
+        start = time.perf_counter()
+        with observe_stage("training_update" if mode == "incremental" else "training_fit"):
+            trained_model, training_result, version = await self.executor.run_training(*job)
+        self._updates_since_refit = self._updates_since_refit + 1 if mode == "incremental" else 0
+        self.last_training = {
+            "mode": mode, "samples": len(targets), "fit_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+        try:
+            # Compilé et vérifié sur les données d'entraînement avant la mise en service
+            await self.executor.run_inference(self._compile_model, trained_model, features.values)
+        except ExecutorOverloadedError:
+            logger.warning("Pool d'inférence saturé : ensemble compilé à sa première prédiction")
+        self.ensemble_model = trained_model
+        self.feature_names = list(features.columns)
+        # Sans registre, la version est un simple compteur local d'entraînements
+        self.model_version = version if version is not None else (self.model_version or 0) + 1
+        self._invalidate_prediction_cache()
+        return training_result
+    
+    async def train(self, user_id: str, new_data: Union[List[Dict], WorkoutFrame], retrain: bool = False,
+                    user_profile: Dict = None):
         """Interface pour l'entraînement via API"""
         try:
             logger.info(f"Entraînement pour l'utilisateur {user_id}")
@@ -191,32 +803,90 @@ class MLPipeline:
             if not new_data:
                 return {"error": "Aucune nouvelle donnée fournie"}
             
-            # Extraire les features des nouvelles données
-            features = self.feature_engineer.extract_features(new_data, {})
+            # Features et targets calculés hors de la boucle d'événements
+            features, targets = await self.executor.run_inference(self._prepare_training_data, new_data, {})
             
             if features.empty:
                 return {"error": "Impossible d'extraire les features des nouvelles données"}
             
-            # Préparer les targets
-            targets = self._prepare_targets(new_data)
-            
             if len(targets) == 0:
                 return {"error": "Impossible de préparer les targets"}
             
             # Entraîner
             training_result = await self.train_models(features, targets, retrain)
             
-            return {
+            result = {
                 "success": True,
                 "user_id": user_id,
                 "samples_trained": len(features),
+                "training_mode": (self.last_training or {}).get("mode"),
                 "training_result": training_result
             }
-            
+            if self.model_partitions is not None:
+                result["partitions"] = await self._train_partitions(new_data, user_profile or {})
+            return result
+        
+        except ExecutorOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Erreur lors de l'entraînement utilisateur: {e}")
             return {"error": str(e)}
     
+    async def _train_partitions(self, workout_data: Union[List[Dict], WorkoutFrame], user_profile: Dict) -> Dict:
+        """Entraîne un ensemble par exercice (et cohorte) ayant assez d'échantillons.
+        
+        Chaque modèle est publié dans le registre de sa partition ; les
+        partitions trop petites sont ignorées et restent servies par le
+        modèle global.
+        """
+        datasets = await self.executor.run_inference(self._prepare_partition_data, workout_data, user_profile)
+        results = {}
+        for key, (features, targets) in datasets.items():
+            if len(targets) < self.model_partitions.min_samples:
+                results[key] = {"skipped": "Pas assez d'échantillons", "samples": len(targets)}
+                continue
+            
+            with observe_stage("training_fit"):
+                _, training_result, version = await self.executor.run_training(
+                    _fit_ensemble, AdvancedEnsembleModel(), features.values, targets,
+                    list(features.columns), self.model_partitions.registry(key)
+                )
+            self.model_partitions.evict(key)
+            results[key] = {"samples": len(targets), "version": version, "training_result": training_result}
+        return results
+    
+    def _prepare_partition_data(self, workout_data: Union[List[Dict], WorkoutFrame], user_profile: Dict) -> Dict[str, Tuple[pd.DataFrame, np.ndarray]]:
+        """Features et targets de chaque exercice, sans mélanger les séquences de poids"""
+        with observe_stage("training_features"):
+            frame = WorkoutFrame.ensure(workout_data)
+            datasets = {}
+            for exercise_name in frame.exercise_names:
+                features = self.feature_engineer.extract_exercise_features(frame, user_profile, exercise_name)
+                if features.empty:
+                    continue
+                weights, _ = frame.complete_sets(frame.exercise_set_indices(exercise_name))
+                key = self._partition_keys(exercise_name, user_profile)[0]
+                datasets[key] = (features, weights[1:])
+            return datasets
+    
+    def _prepare_training_data(self, workout_data: Union[List[Dict], WorkoutFrame], user_profile: Dict) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Features et targets d'entraînement, sur un seul parcours de l'historique"""
+        with observe_stage("training_features"):
+            workout_data = WorkoutFrame.ensure(workout_data)
+            features = self.feature_engineer.extract_features(workout_data, user_profile)
+            if features.empty:
+                return features, np.array([])
+            return features, self._prepare_targets(workout_data)
+    
+    def build_workout_frame(self, workout_history: List[Dict]) -> WorkoutFrame:
+        """Parse l'historique une fois pour l'ensemble des services de la requête"""
+        return WorkoutFrame.from_history(workout_history)
+    
+    def shutdown(self):
+        """Vide le sink MLflow et libère les pools d'exécution (arrêt de l'application)"""
+        self.executor.shutdown(wait=False)
+        self.mlflow_tracker.close()
+    
     def get_performance_metrics(self) -> Dict:
         """Récupère les métriques de performance"""
         if not self.is_trained:
@@ -280,37 +950,130 @@ class MLPipeline:
             "is_initialized": self.is_initialized,
             "model_count": len(self.ensemble_model.models) if hasattr(self.ensemble_model, 'models') else 0,
             "mlflow_available": self.mlflow_tracker.is_available(),
-            "features_available": hasattr(self.feature_engineer, 'feature_config')
+            "features_available": hasattr(self.feature_engineer, 'feature_config'),
+            "model_version": self.model_version,
+            "startup": self.get_startup_report(),
+            "executor": self.executor.get_stats(),
+            "mlflow_sink": self.mlflow_tracker.get_sink_stats(),
+            "prediction_cache": self.get_cache_stats(),
+            "model_partitions": self.get_partition_stats(),
+            "online_training": self.get_online_training_stats(),
+            "single_flight": self.get_single_flight_stats(),
+            "micro_batching": self.get_micro_batching_stats(),
+            "compiled_inference": self.get_compiled_inference_stats()
+        }
+    
+    def get_startup_report(self) -> Dict:
+        """Durées du démarrage (imports, initialisation, modèle, première prédiction)
+        et des imports différés payés depuis (pandas, scipy, mlflow...)"""
+        return {
+            **self.startup_report,
+            "lazy_imports": get_import_timings(),
+            "mlflow_setup_ms": self.mlflow_tracker.setup_ms
+        }
+    
+    def get_cache_stats(self) -> Dict:
+        """Compteurs du cache de prédictions (hits, misses, évictions...)"""
+        if self.prediction_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.prediction_cache.get_stats()}
+    
+    def get_online_training_stats(self) -> Dict:
+        """Mode incrémental : mises à jour depuis le dernier réentraînement complet, fenêtre"""
+        if self.online_training is None:
+            return {"enabled": False, "last_training": self.last_training}
+        stats = {
+            "enabled": True,
+            "full_refit_every": self.online_training.get("full_refit_every", 20),
+            "updates_since_refit": self._updates_since_refit,
+            "last_training": self.last_training
+        }
+        if hasattr(self.ensemble_model, "partial_fit"):
+            stats["model"] = self.ensemble_model.get_training_history()
+        return stats
+    
+    def get_single_flight_stats(self) -> Dict:
+        """Prédictions identiques simultanées : calculs lancés, appels regroupés, échéances"""
+        if self.single_flight is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.single_flight.get_stats()}
+    
+    def get_micro_batching_stats(self) -> Dict:
+        """Inférences regroupées : lots, déclencheurs (taille ou délai), histogramme des tailles"""
+        if self.micro_batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.micro_batcher.get_stats()}
+    
+    def get_compiled_inference_stats(self) -> Dict:
+        """Inférence compilée : modèles compilés ou laissés à scikit-learn, forme du modèle global"""
+        if self._compiled_models is None:
+            return {"enabled": False}
+        compiled = self._compiled_models.get(self.ensemble_model) if self.is_trained else None
+        return {
+            "enabled": True,
+            **self.compile_stats,
+            "active": compiled.get_stats() if compiled is not None else None
         }
     
-    def _prepare_targets(self, workout_data: List[Dict]) -> np.ndarray:
+    def get_partition_stats(self) -> Dict:
+        """Modèles par partition : résidents, mémoire, chargements à froid, fallbacks"""
+        if self.model_partitions is None:
+            return {"enabled": False}
+        return {"enabled": True, "cohort_field": self.partition_cohort_field, **self.model_partitions.get_stats()}
+    
+    def _prepare_targets(self, workout_data: Union[List[Dict], WorkoutFrame]) -> np.ndarray:
         """Prépare les targets pour l'entraînement"""
         try:
-            weights = []
-            
-            for workout in workout_data:
-                for exercise in workout.get('exercises', []):
-                    for set_data in exercise.get('sets', []):
-                        weight = set_data.get('weight')
-                        if weight is not None and weight > 0:
-                            weights.append(float(weight))
+            weights = WorkoutFrame.ensure(workout_data).positive_weights()
             
             if len(weights) < 2:
                 return np.array([])
             
-            # Créer des targets basés sur la progression
-            targets = []
-            for i in range(len(weights) - 1):
-                targets.append(weights[i + 1])  # Le poids suivant comme target
-            
-            targets_array = np.array(targets)
+            # Le poids suivant comme target
+            targets_array = weights[1:]
             logger.info(f"Targets préparés: {len(targets_array)} valeurs, shape: {targets_array.shape}")
             return targets_array
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors de la préparation des targets: {e}")
             return np.array([])
     
+    def _latest_features(self, exercise_name: str, user_data: Dict, workout_history: WorkoutFrame) -> Optional[np.ndarray]:
+        """Ligne de features servant à prédire la prochaine série de l'exercice.
+        
+        Si l'utilisateur est identifié et le store activé, les agrégats sont mis
+        à jour de façon incrémentale (seules les nouvelles séances sont
+        agrégées) ; sinon ils sont
+        recalculés sur tout l'historique. Les deux chemins donnent la même ligne.
+        """
+        user_id = user_data.get('user_id')
+        
+        # Historique reçu en flux : pas de séances brutes pour vérifier le préfixe déjà intégré
+        if user_id is not None and self.feature_store is not None and workout_history.fingerprint is None:
+            state = self.feature_store.update(user_id, exercise_name, workout_history)
+            if state.n_sets == 0:
+                return None
+            return state.feature_row(user_data.get('weight', 70))
+        
+        return self.feature_engineer.extract_latest_features(workout_history, user_data, exercise_name)
+    
+    def _detect_plateaus(self, exercise_name: str, user_data: Dict, workout_history: WorkoutFrame, analysis_depth: str) -> Dict:
+        """Analyse de plateau de la prédiction.
+        
+        En profondeur "exercise" et pour un utilisateur identifié, l'état de
+        plateau de l'exercice est mis à jour avec les seules nouvelles séances ;
+        le résultat est celui de la détection sur tout l'historique.
+        """
+        if analysis_depth == "full":
+            return self.plateau_detector.detect_plateaus(workout_history)
+        
+        user_id = user_data.get('user_id')
+        if user_id is not None and self.plateau_store is not None and workout_history.fingerprint is None:
+            return self.plateau_detector.detect_exercise_plateau_incremental(
+                workout_history, exercise_name, self.plateau_store, user_id
+            )
+        return self.plateau_detector.detect_plateaus(workout_history, exercise_name)
+    
     def _validate_prediction(self, prediction: float, current_weight: float) -> float:
         """Valide et ajuste la prédiction selon les contraintes de musculation"""
         try:
@@ -335,18 +1098,18 @@ class MLPipeline:
             closest_plateau = min(weight_plateaus, key=lambda x: abs(x - increment))
             
             return current_weight + closest_plateau
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors de la validation de la prédiction: {e}")
             return current_weight + 2.5  # Incrément par défaut
     
-    def _calculate_confidence(self, features: pd.DataFrame, prediction: float, current_weight: float) -> float:
+    def _calculate_confidence(self, n_samples: int, prediction: float, current_weight: float) -> float:
         """Calcule la confiance de la prédiction"""
         try:
             confidence_factors = []
             
-            # Facteur basé sur la quantité de données
-            data_quality = min(1.0, len(features) / 10)
+            # Facteur basé sur la quantité de données (séries de l'exercice)
+            data_quality = min(1.0, n_samples / 10)
             confidence_factors.append(data_quality)
             
             # Facteur basé sur la cohérence de la prédiction
@@ -365,7 +1128,7 @@ class MLPipeline:
                 confidence_factors.append(0.3)
             
             return max(0.1, min(0.95, np.mean(confidence_factors)))
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors du calcul de la confiance: {e}")
             return 0.5
@@ -391,7 +1154,7 @@ class MLPipeline:
                 recommendations.append("⚠️ Progression ralentie - Revoir la programmation")
             
             return recommendations
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors de la génération des recommandations: {e}")
             return [f"Poids recommandé: {prediction:.1f}kg"]
@@ -419,7 +1182,7 @@ class MLPipeline:
                     "Prédiction de fallback - Collecter plus de données"
                 ]
             }
-            
+        
         except Exception as e:
             logger.error(f"Erreur dans le fallback: {e}")
             return {
@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from services.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+def partition_key(exercise_name: str, cohort: Optional[str] = None) -> str:
+    """Clé de partition : l'exercice (normalisé), et la cohorte si elle est donnée"""
+    key = f"exercise={' '.join(exercise_name.lower().split())}"
+    return f"{key}/cohort={cohort}" if cohort else key
+
+class PartitionedModelStore:
+    """Modèles par partition (exercice, éventuellement cohorte d'utilisateurs).
+    
+    Chaque partition a son propre ``ModelRegistry`` versionné sous ``root``.
+    Un modèle n'est chargé qu'à la première requête de sa partition, puis
+    reste résident dans un LRU borné en mémoire : la taille d'un modèle est
+    celle de son fichier sérialisé, et les moins récemment utilisés sont
+    déchargés au-delà de ``max_resident_bytes``.
+    
+    ``get`` retourne None quand la partition n'a pas de modèle ou qu'il a
+    été entraîné sur moins de ``min_samples`` échantillons : l'appelant
+    utilise alors le modèle global. Ce refus est mémorisé ``recheck_seconds``
+    pour ne pas relire le disque à chaque requête, et un modèle résident est
+    remplacé si une version plus récente a été publiée entre-temps.
+    """
+    
+    def __init__(self, root: str, max_resident_bytes: int = 256 * 1024 * 1024, min_samples: int = 30,
+                 keep_versions: int = 2, recheck_seconds: float = 30.0, mmap: bool = True):
+        self.root = root
+        self.max_resident_bytes = max_resident_bytes
+        self.min_samples = min_samples
+        self.keep_versions = keep_versions
+        self.recheck_seconds = recheck_seconds
+        self.mmap = mmap
+        os.makedirs(self.root, exist_ok=True)
+        
+        self._resident: "OrderedDict[str, Tuple[Any, Dict, float]]" = OrderedDict()
+        self._resident_bytes = 0
+        self._unavailable: Dict[str, float] = {}
+        self._partitions: Dict[str, Dict] = {}
+        self.missing = 0
+        self._lock = threading.Lock()
+    
+    def _directory(self, key: str) -> str:
+        """Dossier de la partition : nom lisible et empreinte de la clé"""
+        ascii_key = unicodedata.normalize("NFKD", key).encode("ascii", "ignore").decode("ascii")
+        slug = re.sub(r"[^a-z0-9]+", "_", ascii_key.lower()).strip("_")[:60]
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).hexdigest()
+        return os.path.join(self.root, f"{slug}-{digest}")
+    
+    def registry(self, key: str) -> ModelRegistry:
+        """Registre de la partition (créé si besoin), pour y publier un modèle"""
+        return ModelRegistry(self._directory(key), keep_versions=self.keep_versions)
+    
+    def _stats(self, key: str) -> Dict:
+        stats = self._partitions.get(key)
+        if stats is None:
+            stats = self._partitions[key] = {
+                "requests": 0, "hits": 0, "cold_loads": 0, "fallbacks": 0, "evictions": 0,
+                "resident": False, "bytes": 0, "version": None, "n_samples": None,
+                "last_cold_load_ms": None, "total_cold_load_ms": 0.0
+            }
+        return stats
+    
+    def get(self, key: str) -> Optional[Tuple[Any, Dict]]:
+        """(modèle, manifeste) de la partition, ou None pour utiliser le modèle global"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is not None and now - entry[2] < self.recheck_seconds:
+                self._resident.move_to_end(key)
+                self._count(key, "hits")
+                return entry[0], entry[1]
+            checked_at = self._unavailable.get(key)
+            if entry is None and checked_at is not None and now - checked_at < self.recheck_seconds:
+                self._count(key, "fallbacks")
+                return None
+        
+        # Lecture du disque hors du verrou : les autres partitions restent servies
+        directory = self._directory(key)
+        if entry is None and not os.path.isdir(directory):
+            # Partition jamais entraînée : pas de statistiques par clé (clés libres des requêtes)
+            with self._lock:
+                self.missing += 1
+            return None
+        
+        try:
+            manifest = self.registry(key).manifest()
+        except (FileNotFoundError, OSError, ValueError):
+            manifest = None
+        
+        if entry is not None and (manifest is None or manifest["version"] == entry[1]["version"]):
+            # Toujours la dernière version : le modèle résident reste servi
+            with self._lock:
+                if key in self._resident:
+                    self._resident[key] = (entry[0], entry[1], now)
+                    self._resident.move_to_end(key)
+                self._count(key, "hits")
+            return entry[0], entry[1]
+        
+        if manifest is None or manifest.get("n_samples", 0) < self.min_samples:
+            with self._lock:
+                self._unavailable[key] = now
+                self._count(key, "fallbacks")
+                self._stats(key)["n_samples"] = manifest.get("n_samples") if manifest else None
+            return None
+        
+        try:
+            model, manifest = self.registry(key).load(manifest["version"], self.mmap)
+        except Exception as e:
+            logger.warning(f"Chargement de la partition {key} impossible: {e}")
+            with self._lock:
+                self._unavailable[key] = now
+                self._count(key, "fallbacks")
+            return None
+        
+        with self._lock:
+            self._install(key, model, manifest, now)
+            stats = self._count(key, "cold_loads")
+            stats["last_cold_load_ms"] = manifest["load_ms"]
+            stats["total_cold_load_ms"] += manifest["load_ms"]
+        logger.info(f"Partition {key} v{manifest['version']} chargée ({manifest['load_ms']} ms)")
+        return model, manifest
+    
+    def _count(self, key: str, counter: str) -> Dict:
+        stats = self._stats(key)
+        stats["requests"] += 1
+        stats[counter] += 1
+        return stats
+    
+    def _install(self, key: str, model: Any, manifest: Dict, now: float):
+        """Rend le modèle résident puis décharge les plus anciens au-delà du plafond"""
+        if key in self._resident:
+            self._remove(key)
+        self._unavailable.pop(key, None)
+        self._resident[key] = (model, manifest, now)
+        self._resident_bytes += manifest["model_bytes"]
+        
+        stats = self._stats(key)
+        stats.update({"resident": True, "bytes": manifest["model_bytes"],
+                      "version": manifest["version"], "n_samples": manifest["n_samples"]})
+        
+        # Le modèle qui vient d'être chargé reste résident même s'il dépasse seul le plafond
+        while self._resident_bytes > self.max_resident_bytes and len(self._resident) > 1:
+            oldest = next(iter(self._resident))
+            self._remove(oldest)
+            self._stats(oldest)["evictions"] += 1
+    
+    def _remove(self, key: str):
+        _, manifest, _ = self._resident.pop(key)
+        self._resident_bytes -= manifest["model_bytes"]
+        self._stats(key).update({"resident": False, "bytes": 0})
+    
+    def evict(self, key: str):
+        """Oublie la partition (nouvelle version publiée) : rechargée à la prochaine requête"""
+        with self._lock:
+            if key in self._resident:
+                self._remove(key)
+            self._unavailable.pop(key, None)
+    
+    def clear(self):
+        """Décharge tous les modèles résidents"""
+        with self._lock:
+            for key in list(self._resident):
+                self._remove(key)
+            self._unavailable.clear()
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resident": len(self._resident),
+                "missing_partition_requests": self.missing,
+                "resident_bytes": self._resident_bytes,
+                "max_resident_bytes": self.max_resident_bytes,
+                "min_samples": self.min_samples,
+                "partitions": {key: dict(stats) for key, stats in self._partitions.items()}
+            }
+    
+    def __len__(self) -> int:
+        return len(self._resident)
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import joblib
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Registre versionné des modèles entraînés, sur disque.
+    
+    Chaque version est un dossier ``v000001``, ``v000002``... contenant :
+    
+    - ``ensemble.joblib`` : l'ensemble complet (modèles, scalers, poids),
+      sérialisé sans compression pour que ses tableaux NumPy puissent être
+      chargés en mémoire mappée (``mmap_mode='r'``)
+    - ``manifest.json`` : version, date, noms des features, métriques
+      d'entraînement et nombre d'échantillons
+    
+    L'écriture se fait dans un dossier temporaire du registre, renommé en
+    une fois : une version visible est toujours complète, y compris si
+    plusieurs processus publient en même temps (le renommage échoue si le
+    numéro est déjà pris et la version suivante est tentée).
+    """
+    
+    MODEL_FILE = "ensemble.joblib"
+    MANIFEST_FILE = "manifest.json"
+    _VERSION_PATTERN = re.compile(r"^v(\d{6})$")
+    
+    def __init__(self, root: str, keep_versions: int = 5):
+        self.root = root
+        self.keep_versions = keep_versions
+        os.makedirs(self.root, exist_ok=True)
+    
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version:06d}")
+    
+    def list_versions(self) -> List[int]:
+        versions = []
+        for name in os.listdir(self.root):
+            match = self._VERSION_PATTERN.match(name)
+            if match:
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+    
+    def latest_version(self) -> Optional[int]:
+        versions = self.list_versions()
+        return versions[-1] if versions else None
+    
+    def save(self, model: Any, feature_names: List[str], metrics: Dict = None, n_samples: int = 0) -> int:
+        """Publie une nouvelle version et retourne son numéro"""
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            joblib.dump(model, os.path.join(staging, self.MODEL_FILE))
+            
+            version = (self.latest_version() or 0) + 1
+            while True:
+                manifest = {
+                    "version": version,
+                    "created_at": datetime.now().isoformat(),
+                    "feature_names": list(feature_names),
+                    "metrics": metrics or {},
+                    "n_samples": int(n_samples)
+                }
+                with open(os.path.join(staging, self.MANIFEST_FILE), "w") as f:
+                    json.dump(manifest, f, default=float)
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                try:
+                    os.rename(staging, self._version_dir(version))
+                    break
+                except OSError:
+                    # Numéro pris entre-temps par un autre processus
+                    version += 1
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        
+        logger.info(f"Modèle publié dans le registre: version {version}")
+        self._prune()
+        return version
+    
+    def manifest(self, version: Optional[int] = None) -> Dict:
+        """Manifeste d'une version (la dernière par défaut), sans charger le modèle"""
+        if version is None:
+            version = self.latest_version()
+            if version is None:
+                raise FileNotFoundError(f"Aucun modèle dans le registre {self.root}")
+        
+        with open(os.path.join(self._version_dir(version), self.MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        manifest["model_bytes"] = os.path.getsize(os.path.join(self._version_dir(version), self.MODEL_FILE))
+        return manifest
+    
+    def load(self, version: Optional[int] = None, mmap: bool = True) -> Tuple[Any, Dict]:
+        """Charge une version (la dernière par défaut) : (modèle, manifeste)"""
+        manifest = self.manifest(version)
+        version_dir = self._version_dir(manifest["version"])
+        
+        start = time.perf_counter()
+        model = joblib.load(os.path.join(version_dir, self.MODEL_FILE), mmap_mode="r" if mmap else None)
+        manifest["load_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return model, manifest
+    
+    def _prune(self):
+        """Ne garde que les ``keep_versions`` dernières versions"""
+        versions = self.list_versions()
+        for version in versions[:-self.keep_versions] if self.keep_versions > 0 else []:
+            shutil.rmtree(self._version_dir(version), ignore_errors=True)
@@ -0,0 +1,232 @@
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+def _member_estimators(random_state: int) -> Dict[str, SGDRegressor]:
+    """Membres linéaires entraînables par ``partial_fit`` (target standardisée)"""
+    return {
+        "sgd_squared": SGDRegressor(loss="squared_error", alpha=1e-4, eta0=0.01, random_state=random_state),
+        "sgd_huber": SGDRegressor(loss="huber", epsilon=0.5, alpha=1e-4, eta0=0.01, random_state=random_state),
+        "sgd_adaptive": SGDRegressor(loss="squared_error", alpha=1e-5, learning_rate="adaptive", eta0=0.005,
+                                     random_state=random_state)
+    }
+
+class OnlineEnsembleModel:
+    """Ensemble incrémental : même interface que ``AdvancedEnsembleModel``,
+    plus ``partial_fit`` et ``refit``.
+    
+    Les features sont standardisées par des statistiques courantes
+    (``StandardScaler.partial_fit``) et la target par sa moyenne et son
+    écart-type courants. Quand ces statistiques bougent, les coefficients des
+    membres (tous linéaires) sont réexprimés dans la nouvelle échelle : la
+    fonction apprise ne change pas, seule la descente de gradient sur les
+    nouveaux échantillons la modifie. Une mise à jour coûte donc un passage
+    sur les nouveaux échantillons, quel que soit l'historique déjà vu.
+    
+    Les poids de l'ensemble sont l'inverse de l'erreur prequential de chaque
+    membre (évalué sur chaque lot avant d'apprendre dessus), lissée
+    exponentiellement. Les ``buffer_size`` derniers échantillons sont gardés
+    pour ``refit``, un réentraînement complet (plusieurs passes mélangées) qui
+    corrige périodiquement la dérive de l'apprentissage en ligne.
+    """
+    
+    def __init__(self, buffer_size: int = 20000, epochs: int = 5, decay: float = 0.999, random_state: int = 42):
+        self.buffer_size = buffer_size
+        self.epochs = epochs
+        self.decay = decay
+        self.random_state = random_state
+        self.feature_names: List[str] = []
+        self.training_history = {"n_samples_seen": 0, "updates": 0, "refits": 0}
+        self._buffer_X: Optional[np.ndarray] = None
+        self._buffer_y: Optional[np.ndarray] = None
+        self._buffer_rows = 0
+        self._buffer_next = 0
+        self._reset()
+    
+    def _reset(self):
+        self.models = _member_estimators(self.random_state)
+        self.scaler = StandardScaler()
+        self._target_count = 0
+        self._target_mean = 0.0
+        self._target_m2 = 0.0
+        self._member_mse = {name: None for name in self.models}
+        self.ensemble_weights = {name: 1.0 / len(self.models) for name in self.models}
+        self.is_trained = False
+    
+    def _target_std(self) -> float:
+        std = np.sqrt(self._target_m2 / self._target_count) if self._target_count else 0.0
+        return float(std) if std > 0 else 1.0
+    
+    def _update_target_statistics(self, y: np.ndarray):
+        """Moyenne et variance courantes de la target (fusion de Chan par lot)"""
+        count, mean = len(y), float(np.mean(y))
+        m2 = float(np.sum((y - mean) ** 2))
+        total = self._target_count + count
+        delta = mean - self._target_mean
+        self._target_mean += delta * count / total
+        self._target_m2 += m2 + delta ** 2 * self._target_count * count / total
+        self._target_count = total
+    
+    def _update_statistics(self, X: np.ndarray, y: np.ndarray):
+        """Met à jour les échelles et réexprime les coefficients (prédictions inchangées)"""
+        old_mean, old_scale = self.scaler.mean_.copy(), self.scaler.scale_.copy()
+        old_target_mean, old_target_std = self._target_mean, self._target_std()
+        self.scaler.partial_fit(X)
+        self._update_target_statistics(y)
+        new_mean, new_scale = self.scaler.mean_, self.scaler.scale_
+        target_mean, target_std = self._target_mean, self._target_std()
+        
+        for model in self.models.values():
+            intercept = model.intercept_[0] + np.dot(model.coef_ / old_scale, new_mean - old_mean)
+            coef = model.coef_ * new_scale / old_scale
+            model.coef_ = coef * old_target_std / target_std
+            model.intercept_ = np.array([(old_target_std * intercept + old_target_mean - target_mean) / target_std])
+    
+    def _append_buffer(self, X: np.ndarray, y: np.ndarray):
+        """Fenêtre circulaire des derniers échantillons, pour ``refit``"""
+        if self._buffer_X is None or self._buffer_X.shape[1] != X.shape[1]:
+            self._buffer_X = np.empty((self.buffer_size, X.shape[1]))
+            self._buffer_y = np.empty(self.buffer_size)
+            self._buffer_rows = self._buffer_next = 0
+        
+        X, y = X[-self.buffer_size:], y[-self.buffer_size:]
+        positions = (self._buffer_next + np.arange(len(X))) % self.buffer_size
+        self._buffer_X[positions] = X
+        self._buffer_y[positions] = y
+        self._buffer_next = (self._buffer_next + len(X)) % self.buffer_size
+        self._buffer_rows = min(self._buffer_rows + len(X), self.buffer_size)
+    
+    def buffered_samples(self):
+        """(X, y) de la fenêtre, dans l'ordre chronologique"""
+        if not self._buffer_rows:
+            return np.empty((0, len(self.feature_names))), np.empty(0)
+        if self._buffer_rows < self.buffer_size:
+            return self._buffer_X[:self._buffer_rows].copy(), self._buffer_y[:self._buffer_rows].copy()
+        order = np.roll(np.arange(self.buffer_size), -self._buffer_next)
+        return self._buffer_X[order], self._buffer_y[order]
+    
+    def _scores(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Dict[str, float]]:
+        """MSE et R² de chaque membre, en unités de la target"""
+        variance = float(np.var(y))
+        scores = {}
+        for name, model in self.models.items():
+            mse = float(np.mean((self._member_predict(model, X) - y) ** 2))
+            scores[name] = {"mse": mse, "r2": 1.0 - mse / variance if variance > 0 else 0.0}
+        return scores
+    
+    def _set_weights(self):
+        inverse = {name: 1.0 / (mse + 1e-6) for name, mse in self._member_mse.items()}
+        total = sum(inverse.values())
+        self.ensemble_weights = {name: value / total for name, value in inverse.items()}
+    
+    def _record(self, new_samples: int, scores: Dict):
+        self.is_trained = True
+        self._set_weights()
+        self.training_history.update({
+            "n_samples_seen": self.training_history["n_samples_seen"] + new_samples,
+            "n_samples": self._buffer_rows,
+            "ensemble_mse": sum(self.ensemble_weights[name] * mse for name, mse in self._member_mse.items()),
+            "ensemble_r2": sum(self.ensemble_weights[name] * score["r2"] for name, score in scores.items())
+        })
+    
+    def train(self, X, y, feature_names: List[str] = None) -> Dict:
+        """Réentraînement complet : nouvelles échelles et ``epochs`` passes mélangées"""
+        return self._fit(X, y, feature_names, len(X))
+    
+    def _fit(self, X, y, feature_names: Optional[List[str]], new_samples: int) -> Dict:
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        self._reset()
+        self.feature_names = list(feature_names or [])
+        self.scaler.fit(X)
+        self._update_target_statistics(y)
+        
+        X_scaled = self.scaler.transform(X)
+        z = (y - self._target_mean) / self._target_std()
+        rng = np.random.default_rng(self.random_state)
+        for _ in range(self.epochs):
+            order = rng.permutation(len(X))
+            for model in self.models.values():
+                model.partial_fit(X_scaled[order], z[order])
+        
+        self._buffer_rows = self._buffer_next = 0
+        self._append_buffer(X, y)
+        scores = self._scores(X, y)
+        self._member_mse = {name: score["mse"] for name, score in scores.items()}
+        self.training_history["refits"] += 1
+        self._record(new_samples, scores)
+        return scores
+    
+    def partial_fit(self, X, y, feature_names: List[str] = None) -> Dict:
+        """Mise à jour sur les nouveaux échantillons seulement (un passage).
+        
+        Retourne les scores prequential des membres : mesurés sur le lot
+        avant de l'apprendre. Le premier lot déclenche un ``train`` complet.
+        """
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        if not self.is_trained or (feature_names and list(feature_names) != self.feature_names):
+            return self.train(X, y, feature_names)
+        
+        scores = self._scores(X, y)
+        retained = self.decay ** len(X)
+        for name, score in scores.items():
+            self._member_mse[name] = retained * self._member_mse[name] + (1 - retained) * score["mse"]
+        
+        self._update_statistics(X, y)
+        X_scaled = self.scaler.transform(X)
+        z = (y - self._target_mean) / self._target_std()
+        for model in self.models.values():
+            model.partial_fit(X_scaled, z)
+        
+        self._append_buffer(X, y)
+        self.training_history["updates"] += 1
+        self._record(len(X), scores)
+        return scores
+    
+    def refit(self) -> Dict:
+        """Réentraînement complet sur la fenêtre des derniers échantillons"""
+        X, y = self.buffered_samples()
+        if len(X) == 0:
+            return {}
+        return self._fit(X, y, self.feature_names, 0)
+    
+    def _member_predict(self, model: SGDRegressor, X: np.ndarray) -> np.ndarray:
+        return model.predict(self.scaler.transform(X)) * self._target_std() + self._target_mean
+    
+    def target_transform(self):
+        """(échelle, décalage) de la target : ``predict`` est ``z * échelle + décalage``,
+        ``z`` étant la somme pondérée des membres"""
+        return self._target_std(), self._target_mean
+    
+    def predict(self, X) -> np.ndarray:
+        if not self.is_trained:
+            raise ValueError("Le modèle doit être entraîné avant de faire des prédictions")
+        
+        X_scaled = self.scaler.transform(np.asarray(X, dtype=np.float64))
+        z = sum(weight * self.models[name].predict(X_scaled) for name, weight in self.ensemble_weights.items())
+        scale, offset = self.target_transform()
+        return z * scale + offset
+    
+    def get_r2_score(self) -> float:
+        return self.training_history.get("ensemble_r2", 0.0)
+    
+    def get_mse_score(self) -> float:
+        return self.training_history.get("ensemble_mse", 0.0)
+    
+    def get_feature_importance(self) -> Dict[str, float]:
+        """|coefficients| pondérés par l'ensemble, sur features standardisées"""
+        if not self.is_trained:
+            return {}
+        importance = sum(weight * np.abs(self.models[name].coef_) for name, weight in self.ensemble_weights.items())
+        total = float(np.sum(importance)) or 1.0
+        names = self.feature_names or [f"feature_{i}" for i in range(len(importance))]
+        return {name: float(value / total) for name, value in zip(names, importance)}
+    
+    def get_ensemble_weights(self) -> Dict[str, float]:
+        return dict(self.ensemble_weights)
+    
+    def get_training_history(self) -> Dict:
+        return dict(self.training_history)
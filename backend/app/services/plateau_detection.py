@@ -1,13 +1,14 @@
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Tuple, Optional
-try:
-    from scipy import stats
-    from scipy.signal import savgol_filter
-    SCIPY_AVAILABLE = True
-except ImportError:
-    SCIPY_AVAILABLE = False
+from typing import Dict, List, Tuple, Optional, Union
 import warnings
+from services.workout_frame import WorkoutFrame
+from services.plateau_engine import ExerciseSeries, interval_stats, kendall_trend, linear_trend, weight_progression
+from utils.lazy_imports import is_available, lazy_import
+
+# pandas et scipy ne servent qu'à l'analyse scalaire (séries courtes, références)
+pd = lazy_import("pandas")
+stats = lazy_import("scipy.stats")
+SCIPY_AVAILABLE = is_available("scipy")
 warnings.filterwarnings('ignore')
 
 class AdvancedPlateauDetector:
@@ -20,25 +21,25 @@ class AdvancedPlateauDetector:
             "progression_tolerance": 0.5       # Tolérance de progression en kg
         }
     
-    def detect_plateaus(self, workout_history: List[Dict]) -> Dict:
-        """Détection avancée des plateaux dans la progression"""
+    def detect_plateaus(self, workout_history: Union[List[Dict], WorkoutFrame], exercise_name: Optional[str] = None) -> Dict:
+        """Détection avancée des plateaux dans la progression.
+        
+        Avec ``exercise_name``, seul cet exercice est analysé : son entrée
+        dans ``exercise_plateaus`` est celle de l'analyse complète, et
+        l'analyse globale ne porte que sur lui.
+        """
         try:
             if not workout_history or len(workout_history) < self.config["min_sessions_for_plateau"]:
                 return self._empty_plateau_analysis()
             
-            # Extraire les données de poids par exercice
-            exercise_data = self._extract_exercise_data(workout_history)
-            
-            plateau_analysis = {}
+            # Séries par exercice (CSR), analysées en une passe vectorisée
+            series = ExerciseSeries.from_frame(WorkoutFrame.ensure(workout_history), exercise_name)
+            eligible = series.select(series.lengths >= self.config["min_sessions_for_plateau"])
             
-            for exercise_name, weights_data in exercise_data.items():
-                if len(weights_data) >= self.config["min_sessions_for_plateau"]:
-                    plateau_analysis[exercise_name] = self._analyze_exercise_plateau(
-                        exercise_name, weights_data
-                    )
+            plateau_analysis, weight_analyses = self._analyze_exercises_batched(eligible)
             
             # Analyse globale
-            global_analysis = self._analyze_global_plateau(exercise_data)
+            global_analysis = self._global_plateau_from_batch(len(series), eligible, weight_analyses)
             
             return {
                 "exercise_plateaus": plateau_analysis,
@@ -46,55 +47,212 @@ class AdvancedPlateauDetector:
                 "recommendations": self._generate_plateau_recommendations(plateau_analysis, global_analysis),
                 "severity_score": self._calculate_overall_severity(plateau_analysis)
             }
-            
+        
         except Exception as e:
+            return self._error_analysis(e)
+    
+    def detect_exercise_plateau_incremental(self, workout_history: Union[List[Dict], WorkoutFrame], exercise_name: str,
+                                            plateau_store, user_id: str) -> Dict:
+        """``detect_plateaus(workout_history, exercise_name)`` à partir de l'état
+        incrémental de (``user_id``, ``exercise_name``) dans ``plateau_store``
+        (``IncrementalPlateauStore``) : seules les nouvelles séances sont lues.
+        
+        Sans état possible (séance sans date) ou avec un seuil
+        ``min_sessions_for_plateau`` inférieur à trois (analyse scalaire des
+        séries courtes), l'analyse est recalculée sur tout l'historique.
+        """
+        if self.config["min_sessions_for_plateau"] < 3:
+            return self.detect_plateaus(workout_history, exercise_name)
+        
+        try:
+            if not workout_history or len(workout_history) < self.config["min_sessions_for_plateau"]:
+                return self._empty_plateau_analysis()
+            
+            state = plateau_store.update(user_id, exercise_name, workout_history)
+            if state is None:
+                return self.detect_plateaus(workout_history, exercise_name)
+            
+            plateau_analysis = {}
+            weight_analyses = []
+            recent_progression = []
+            if state.n_sessions >= self.config["min_sessions_for_plateau"]:
+                plateau_analysis[exercise_name], weight_analysis = self._exercise_analysis_from_summary(exercise_name, state.summary())
+                weight_analyses.append(weight_analysis)
+                recent_progression.append(state.recent_progression)
+            
+            global_analysis = self._global_plateau_summary(
+                1 if state.exercise_seen else 0, weight_analyses, np.array(recent_progression)
+            )
+            
             return {
-                "error": f"Erreur lors de la détection de plateau: {str(e)}",
-                "exercise_plateaus": {},
-                "global_analysis": {},
-                "recommendations": [],
-                "severity_score": 0.0
+                "exercise_plateaus": plateau_analysis,
+                "global_analysis": global_analysis,
+                "recommendations": self._generate_plateau_recommendations(plateau_analysis, global_analysis),
+                "severity_score": self._calculate_overall_severity(plateau_analysis)
             }
+        
+        except Exception as e:
+            return self._error_analysis(e)
     
-    def _extract_exercise_data(self, workout_history: List[Dict]) -> Dict[str, List[Tuple]]:
+    def _extract_exercise_data(self, workout_history: Union[List[Dict], WorkoutFrame]) -> Dict[str, List[Tuple]]:
         """Extrait les données de poids par exercice avec timestamps"""
-        exercise_data = {}
-        
-        for workout in workout_history:
-            workout_date = pd.to_datetime(workout.get('date', pd.Timestamp.now()))
+        series = ExerciseSeries.from_frame(WorkoutFrame.ensure(workout_history))
+        return {
+            exercise_name: self._series_tuples(series, g)
+            for g, exercise_name in enumerate(series.names)
+        }
+    
+    @staticmethod
+    def _series_tuples(series: ExerciseSeries, g: int) -> List[Tuple]:
+        """(date, poids max, volume, nombre de séries) des séances d'un exercice"""
+        start, end = series.offsets[g], series.offsets[g + 1]
+        return [
+            (pd.Timestamp(series.dates[i]), float(series.weights[i]), float(series.volumes[i]), int(series.n_sets[i]))
+            for i in range(start, end)
+        ]
+    
+    def _analyze_exercises_batched(self, series: ExerciseSeries) -> Tuple[Dict, List[Dict]]:
+        """Analyse de tous les exercices en une passe vectorisée.
+        
+        Progressions, régression du volume, tau de Kendall et intervalles sont
+        calculés pour tous les exercices à la fois (``plateau_engine``) ; seule
+        la mise en forme reste par exercice. Le résultat est celui de
+        ``_analyze_exercise_plateau`` appelée sur chaque exercice. Les séries
+        de moins de trois séances (seuil ``min_sessions_for_plateau`` abaissé)
+        passent par l'analyse scalaire.
+        """
+        if len(series) == 0:
+            return {}, []
+        
+        lengths = series.lengths
+        offsets = series.offsets
+        progression = weight_progression(series.weights, offsets, self.config["progression_tolerance"])
+        trend = linear_trend(series.volumes, offsets)
+        kendall = kendall_trend(series.weights, offsets)
+        intervals = interval_stats(series.dates, offsets)
+        
+        plateau_analysis = {}
+        weight_analyses = []
+        for g, exercise_name in enumerate(series.names):
+            if lengths[g] < 3:
+                weights_data = self._series_tuples(series, g)
+                plateau_analysis[exercise_name] = self._analyze_exercise_plateau(exercise_name, weights_data)
+                weight_analyses.append(self._analyze_weight_progression(np.array([w[1] for w in weights_data])))
+                continue
             
-            for exercise in workout.get('exercises', []):
-                exercise_name = exercise.get('name')
-                if not exercise_name:
-                    continue
-                
-                if exercise_name not in exercise_data:
-                    exercise_data[exercise_name] = []
-                
-                # Extraire le poids maximum de la séance
-                max_weight = 0
-                total_volume = 0
-                
-                for set_data in exercise.get('sets', []):
-                    weight = float(set_data.get('weight', 0))
-                    reps = int(set_data.get('reps', 0))
-                    
-                    max_weight = max(max_weight, weight)
-                    total_volume += weight * reps
-                
-                if max_weight > 0:
-                    exercise_data[exercise_name].append((
-                        workout_date,
-                        max_weight,
-                        total_volume,
-                        len(exercise.get('sets', []))
-                    ))
-        
-        # Trier par date pour chaque exercice
-        for exercise_name in exercise_data:
-            exercise_data[exercise_name].sort(key=lambda x: x[0])
-        
-        return exercise_data
+            start, end = offsets[g], offsets[g + 1]
+            summary = {
+                "n_sessions": int(lengths[g]),
+                "plateau_duration": int(progression["plateau_duration"][g]),
+                "last_progression": progression["last_progression"][g] if progression["has_significant_progression"][g] else 0,
+                "volume_slope": trend["slope"][g],
+                "volume_p_value": trend["p_value"][g],
+                "volume_r_squared": 0.0 if trend["r_is_zero"][g] else trend["r_squared"][g],
+                "first_volume": series.volumes[start],
+                "last_volume": series.volumes[end - 1],
+                "avg_interval_days": intervals["avg_interval_days"][g],
+                "interval_std": intervals["interval_std"][g],
+                "total_period_days": int(intervals["total_period_days"][g]),
+                "kendall_tau": kendall["tau"][g],
+                "kendall_p_value": kendall["p_value"][g]
+            }
+            plateau_analysis[exercise_name], weight_analysis = self._exercise_analysis_from_summary(exercise_name, summary)
+            weight_analyses.append(weight_analysis)
+        
+        return plateau_analysis, weight_analyses
+    
+    def _exercise_analysis_from_summary(self, exercise_name: str, summary: Dict) -> Tuple[Dict, Dict]:
+        """Mise en forme de l'analyse d'un exercice (au moins trois séances).
+        
+        ``summary`` rassemble les statistiques de la série, qu'elles viennent
+        de la passe vectorisée ou d'un ``ExercisePlateauState`` tenu à jour
+        séance par séance. Retourne l'analyse et l'analyse des poids utilisée
+        par l'analyse globale.
+        """
+        plateau_duration = summary["plateau_duration"]
+        weight_analysis = {
+            "plateau_detected": plateau_duration >= (self.config["min_sessions_for_plateau"] - 1),
+            "plateau_duration": plateau_duration,
+            "last_progression": summary["last_progression"]
+        }
+        
+        slope = summary["volume_slope"]
+        if summary["volume_p_value"] < 0.05:  # Tendance significative
+            volume_trend = "increasing" if slope > 0 else "decreasing"
+        else:
+            volume_trend = "stable"
+        first_volume, last_volume = summary["first_volume"], summary["last_volume"]
+        volume_analysis = {
+            "trend": volume_trend,
+            "slope": slope,
+            "r_squared": summary["volume_r_squared"],
+            "progression": last_volume - first_volume,
+            "relative_change": (last_volume - first_volume) / max(1, first_volume) * 100
+        }
+        
+        avg_interval = summary["avg_interval_days"]
+        temporal_analysis = {
+            "frequency": 7 / avg_interval,
+            "consistency": 1 / (1 + summary["interval_std"]),
+            "avg_interval_days": avg_interval,
+            "total_period_days": summary["total_period_days"]
+        }
+        
+        if summary["n_sessions"] < self.config["min_sessions_for_plateau"]:
+            statistical_plateau = {"plateau_detected": False, "confidence": 0}
+        else:
+            p_value = summary["kendall_p_value"]
+            statistical_plateau = {
+                "plateau_detected": bool(p_value > (1 - self.config["statistical_confidence"])),
+                "confidence": 1 - p_value,
+                "kendall_tau": summary["kendall_tau"],
+                "p_value": p_value
+            }
+        
+        severity_score = self._calculate_plateau_severity(weight_analysis, volume_analysis, statistical_plateau)
+        
+        analysis = {
+            "exercise_name": exercise_name,
+            "weight_plateau": {
+                "detected": weight_analysis["plateau_detected"],
+                "severity": severity_score,
+                "duration": weight_analysis["plateau_duration"],
+                "last_progression": weight_analysis["last_progression"]
+            },
+            "volume_analysis": volume_analysis,
+            "temporal_patterns": temporal_analysis,
+            "statistical_analysis": statistical_plateau,
+            "recommendations": self._generate_exercise_recommendations(
+                exercise_name, weight_analysis, volume_analysis, severity_score
+            )
+        }
+        return analysis, weight_analysis
+    
+    def _global_plateau_from_batch(self, total_exercises: int, eligible: ExerciseSeries, weight_analyses: List[Dict]) -> Dict:
+        """``_analyze_global_plateau`` à partir des progressions déjà calculées"""
+        # Score de sévérité simplifié : progression sur les trois dernières séances
+        ends = eligible.offsets[1:][eligible.lengths >= 3]
+        return self._global_plateau_summary(
+            total_exercises, weight_analyses, eligible.weights[ends - 1] - eligible.weights[ends - 3]
+        )
+    
+    def _global_plateau_summary(self, total_exercises: int, weight_analyses: List[Dict], recent_progression: np.ndarray) -> Dict:
+        """Analyse globale à partir des analyses de poids et des progressions récentes des exercices éligibles"""
+        if total_exercises == 0:
+            return {"global_plateau": False, "affected_exercises": 0}
+        
+        plateau_exercises = sum(1 for analysis in weight_analyses if analysis["plateau_detected"])
+        severity_scores = np.where(np.abs(recent_progression) < 1.0, 1.0, 0.5)
+        
+        plateau_percentage = plateau_exercises / max(1, total_exercises)
+        
+        return {
+            "global_plateau": plateau_percentage > 0.5,  # Plus de 50% des exercices en plateau
+            "affected_exercises": plateau_exercises,
+            "total_exercises": total_exercises,
+            "plateau_percentage": plateau_percentage * 100,
+            "avg_severity": np.mean(severity_scores) if len(severity_scores) else 0.0
+        }
     
     def _analyze_exercise_plateau(self, exercise_name: str, weights_data: List[Tuple]) -> Dict:
         """Analyse détaillée du plateau pour un exercice spécifique"""
@@ -233,7 +391,7 @@ class AdvancedPlateauDetector:
             tau, p_value = kendalltau(x, weights)
             
             # Plateau détecté si pas de tendance significative
-            plateau_detected = p_value > (1 - self.config["statistical_confidence"])
+            plateau_detected = bool(p_value > (1 - self.config["statistical_confidence"]))
             
             return {
                 "plateau_detected": plateau_detected,
@@ -246,7 +404,7 @@ class AdvancedPlateauDetector:
             recent_weights = weights[-5:]
             if len(recent_weights) >= 3:
                 variation = np.std(recent_weights) / np.mean(recent_weights)
-                plateau_detected = variation < self.config["weight_plateau_threshold"]
+                plateau_detected = bool(variation < self.config["weight_plateau_threshold"])
                 return {
                     "plateau_detected": plateau_detected,
                     "confidence": 1 - variation,
@@ -297,7 +455,7 @@ class AdvancedPlateauDetector:
                 
                 if weight_analysis["plateau_detected"]:
                     plateau_exercises += 1
-                    
+                
                 # Calculer un score de sévérité simplifié
                 if len(weights) >= 3:
                     recent_progression = weights[-1] - weights[-3]
@@ -373,6 +531,16 @@ class AdvancedPlateauDetector:
         
         return np.mean(severities) if severities else 0.0
     
+    def _error_analysis(self, error: Exception) -> Dict:
+        """Analyse vide accompagnée de l'erreur rencontrée"""
+        return {
+            "error": f"Erreur lors de la détection de plateau: {str(error)}",
+            "exercise_plateaus": {},
+            "global_analysis": {},
+            "recommendations": [],
+            "severity_score": 0.0
+        }
+    
     def _empty_plateau_analysis(self) -> Dict:
         """Retourne une analyse vide quand il n'y a pas assez de données"""
         return {
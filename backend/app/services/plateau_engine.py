@@ -0,0 +1,314 @@
+import math
+import numpy as np
+from typing import Dict, List, Optional
+from services.workout_frame import WorkoutFrame
+from utils.lazy_imports import is_available, lazy_import
+
+# scipy n'est importé qu'au premier calcul de p-value
+special = lazy_import("scipy.special")
+stats = lazy_import("scipy.stats")
+SCIPY_AVAILABLE = is_available("scipy")
+
+# Jusqu'à cette taille, scipy calcule la p-value exacte de Kendall (sans ex aequo)
+KENDALL_EXACT_MAX_N = 33
+
+class ExerciseSeries:
+    """Séries par exercice de la détection de plateau, au format CSR.
+    
+    Une ligne par bloc exercice d'une séance dont le poids max est positif :
+    ``dates``, ``weights`` (poids max), ``volumes`` et ``n_sets``, groupées
+    par exercice (``offsets``) et triées par date dans chaque exercice, dans
+    l'ordre de l'ancienne extraction (première apparition de l'exercice,
+    puis tri stable par date). Un exercice dont aucun bloc n'a de poids
+    positif garde son rang, avec une série vide.
+    """
+    
+    def __init__(self, names: List[str], offsets: np.ndarray, dates: np.ndarray,
+                 weights: np.ndarray, volumes: np.ndarray, n_sets: np.ndarray):
+        self.names = names
+        self.offsets = offsets
+        self.dates = dates
+        self.weights = weights
+        self.volumes = volumes
+        self.n_sets = n_sets
+    
+    @classmethod
+    def from_frame(cls, frame: WorkoutFrame, exercise_name: Optional[str] = None) -> "ExerciseSeries":
+        """Séries de tous les exercices du frame, ou du seul ``exercise_name``"""
+        max_weights, volumes = frame.entry_aggregates()
+        if exercise_name is None:
+            listed = np.flatnonzero(frame.entry_exercise >= 0)
+        else:
+            exercise_id = frame.exercise_id(exercise_name)
+            listed = np.flatnonzero((frame.entry_exercise == exercise_id) & (exercise_id >= 0))
+        
+        # Rang de chaque exercice = ordre de sa première entrée, poids nul compris
+        present, first_entry = np.unique(frame.entry_exercise[listed], return_index=True)
+        present = present[np.argsort(first_entry, kind='stable')]
+        rank = np.empty(len(frame.exercise_names), dtype=np.int64)
+        rank[present] = np.arange(len(present))
+        
+        kept = listed[max_weights[listed] > 0]
+        entry_dates = frame.dates[frame.entry_workout[kept]]
+        if np.isnat(entry_dates).any():
+            raise ValueError("Date de séance invalide dans l'historique")
+        exercise_rank = rank[frame.entry_exercise[kept]]
+        
+        # Tri par exercice puis par date ; lexsort est stable (ordre de l'historique en cas d'égalité)
+        order = np.lexsort((entry_dates.astype(np.int64), exercise_rank))
+        kept = kept[order]
+        counts = np.bincount(exercise_rank, minlength=len(present))
+        
+        return cls(
+            names=[frame.exercise_names[i] for i in present],
+            offsets=np.concatenate(([0], np.cumsum(counts))),
+            dates=entry_dates[order],
+            weights=max_weights[kept],
+            volumes=volumes[kept],
+            n_sets=frame.entry_n_sets[kept].astype(np.int64)
+        )
+    
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def select(self, mask: np.ndarray) -> "ExerciseSeries":
+        """Sous-ensemble des exercices de ``mask``"""
+        starts, ends = self.offsets[:-1][mask], self.offsets[1:][mask]
+        rows = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(starts) else np.empty(0, dtype=np.int64)
+        return ExerciseSeries(
+            names=[name for name, keep in zip(self.names, mask) if keep],
+            offsets=np.concatenate(([0], np.cumsum(ends - starts))),
+            dates=self.dates[rows],
+            weights=self.weights[rows],
+            volumes=self.volumes[rows],
+            n_sets=self.n_sets[rows]
+        )
+
+def _group_ids(offsets: np.ndarray) -> np.ndarray:
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+def _positions(offsets: np.ndarray) -> np.ndarray:
+    """Position de chaque ligne dans son groupe (0, 1, 2...)"""
+    return np.arange(offsets[-1]) - np.repeat(offsets[:-1], np.diff(offsets))
+
+def weight_progression(weights: np.ndarray, offsets: np.ndarray, tolerance: float) -> Dict[str, np.ndarray]:
+    """Durée du plateau en cours et dernière progression significative, par groupe.
+    
+    Équivalent vectorisé des boucles inverses de ``_analyze_weight_progression``
+    (groupes d'au moins deux valeurs).
+    """
+    n_groups = len(offsets) - 1
+    progressions = np.diff(weights)
+    # Différences à cheval sur deux groupes exclues : une par frontière
+    within = np.ones(len(progressions), dtype=bool)
+    within[offsets[1:-1] - 1] = False
+    diff_group = _group_ids(offsets)[:-1][within]
+    progressions = progressions[within]
+    diff_offsets = offsets - np.arange(n_groups + 1)
+    
+    significant = np.abs(progressions) >= tolerance
+    index = np.arange(len(progressions))
+    last_significant = np.full(n_groups, -1, dtype=np.int64)
+    np.maximum.at(last_significant, diff_group[significant], index[significant])
+    
+    has_significant = last_significant >= 0
+    # Séances sans progression depuis la dernière progression significative
+    plateau_duration = np.where(has_significant, diff_offsets[1:] - 1 - last_significant, np.diff(diff_offsets))
+    last_progression = np.zeros(n_groups)
+    last_progression[has_significant] = progressions[last_significant[has_significant]]
+    
+    return {
+        "plateau_duration": plateau_duration,
+        "last_progression": last_progression,
+        "has_significant_progression": has_significant
+    }
+
+def linear_trend(values: np.ndarray, offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """Régression linéaire de chaque groupe sur 0..n-1, comme ``stats.linregress``.
+    
+    Retourne pente, r (0 si variance nulle), r² et p-value bilatérale du
+    test de Student sur la pente (groupes d'au moins trois valeurs).
+    """
+    lengths = np.diff(offsets).astype(np.float64)
+    groups = _group_ids(offsets)
+    x = _positions(offsets).astype(np.float64)
+    
+    y_mean = np.bincount(groups, weights=values, minlength=len(lengths)) / lengths
+    x_centered = x - (lengths[groups] - 1) / 2
+    y_centered = values - y_mean[groups]
+    
+    ssxm = np.bincount(groups, weights=x_centered * x_centered, minlength=len(lengths)) / lengths
+    ssym = np.bincount(groups, weights=y_centered * y_centered, minlength=len(lengths)) / lengths
+    ssxym = np.bincount(groups, weights=x_centered * y_centered, minlength=len(lengths)) / lengths
+    
+    return linear_trend_from_moments(lengths, ssxm, ssym, ssxym)
+
+def linear_trend_from_moments(lengths: np.ndarray, ssxm: np.ndarray, ssym: np.ndarray, ssxym: np.ndarray) -> Dict[str, np.ndarray]:
+    """Fin de ``linear_trend`` à partir des moments centrés (divisés par n) de chaque groupe"""
+    degenerate = (ssxm == 0) | (ssym == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(degenerate, 0.0, ssxym / np.sqrt(ssxm * ssym))
+        r = np.clip(r, -1.0, 1.0)
+        slope = ssxym / ssxm
+        
+        df = lengths - 2
+        tiny = 1.0e-20
+        t = r * np.sqrt(df / ((1.0 - r + tiny) * (1.0 + r + tiny)))
+    p_value = 2 * stats.t.sf(np.abs(t), df)
+    
+    return {"slope": slope, "r": r, "r_is_zero": degenerate, "r_squared": r ** 2, "p_value": p_value}
+
+def _kendall_exact_cdf(max_n: int) -> np.ndarray:
+    """Fonction de répartition du nombre d'inversions d'une permutation de n éléments.
+    
+    ``table[n, c]`` = P(inversions <= c), pour n <= ``max_n`` (même récurrence
+    que la p-value exacte de scipy).
+    """
+    max_c = max_n * (max_n - 1) // 2
+    table = np.zeros((max_n + 1, max_c + 1))
+    counts = np.zeros(max_c + 1)
+    counts[0] = 1.0
+    table[0:2, :] = 1.0
+    for n in range(2, max_n + 1):
+        # Nombres de Mahonian : ajout du n-ième élément à une position quelconque
+        cumulative = np.cumsum(counts)
+        shifted = np.zeros_like(cumulative)
+        shifted[n:] = cumulative[:-n]
+        counts = cumulative - shifted
+        table[n] = np.cumsum(counts) / math.factorial(n)
+    return table
+
+_KENDALL_EXACT_CDF = None
+
+def _inversions(ranks: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Paires i < j d'un même groupe avec ranks[i] > ranks[j], par groupe.
+    
+    Tri fusion ascendant vectorisé sur tous les groupes à la fois : à chaque
+    niveau, les éléments du bloc droit comptent, par recherche dichotomique,
+    ceux du bloc gauche voisin qui leur sont strictement supérieurs.
+    O(N log² N) en temps et O(N) en mémoire.
+    """
+    lengths = np.diff(offsets)
+    counts = np.zeros(len(lengths))
+    if len(ranks) == 0:
+        return counts
+    groups = _group_ids(offsets)
+    positions = _positions(offsets)
+    # Rangs < base : (paire de blocs, rang) se code dans un seul entier
+    base = np.int64(ranks.max() + 1)
+    width = 1
+    while width < lengths.max():
+        blocks = positions // width
+        pairs = groups.astype(np.int64) * (int(lengths.max()) // (2 * width) + 1) + blocks // 2
+        left = blocks % 2 == 0
+        left_keys = np.sort(pairs[left] * base + ranks[left])
+        right = ~left
+        right_pairs = pairs[right] * base
+        greater = (np.searchsorted(left_keys, right_pairs + base - 1, side='right')
+                   - np.searchsorted(left_keys, right_pairs + ranks[right], side='right'))
+        counts += np.bincount(groups[right], weights=greater, minlength=len(lengths))
+        width *= 2
+    return counts
+
+def kendall_trend(values: np.ndarray, offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """Tau-b de Kendall de chaque groupe contre 0..n-1 et p-value, comme ``kendalltau``.
+    
+    Sans ex aequo sur 0..n-1, S = paires - paires ex aequo - 2 × inversions :
+    les ex aequo viennent des effectifs des valeurs distinctes et les
+    inversions d'un tri fusion (``_inversions``), en O(n log² n) et mémoire
+    linéaire même pour un exercice de plusieurs milliers de séances. La
+    p-value est exacte (table des inversions) sans ex aequo pour n <= 33, et
+    sinon asymptotique avec la correction de variance de scipy.
+    """
+    lengths = np.diff(offsets)
+    n_groups = len(lengths)
+    groups = _group_ids(offsets)
+    
+    # Rangs denses des valeurs (croissants dans chaque groupe)
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    sorted_groups = groups[order]
+    new_value = np.ones(len(values), dtype=bool)
+    new_value[1:] = (sorted_values[1:] != sorted_values[:-1]) | (sorted_groups[1:] != sorted_groups[:-1])
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.cumsum(new_value) - 1
+    
+    # Effectifs c des valeurs ex aequo de chaque groupe
+    starts = np.flatnonzero(new_value)
+    tie_counts = np.diff(np.append(starts, len(values))).astype(np.float64)
+    tie_groups = sorted_groups[starts]
+    tied_pairs = np.bincount(tie_groups, weights=tie_counts * (tie_counts - 1) / 2, minlength=n_groups)
+    tie_y1 = np.bincount(tie_groups, weights=tie_counts * (tie_counts - 1) * (2 * tie_counts + 5), minlength=n_groups)
+    
+    total_pairs = lengths * (lengths - 1) / 2
+    s_stat = total_pairs - tied_pairs - 2 * _inversions(ranks, offsets)
+    return kendall_from_counts(lengths, s_stat, tied_pairs, tie_y1)
+
+def kendall_from_counts(lengths: np.ndarray, s_stat: np.ndarray, tied_pairs: np.ndarray, tie_y1: np.ndarray) -> Dict[str, np.ndarray]:
+    """Tau-b et p-value de chaque groupe à partir de ses décomptes de paires.
+    
+    ``s_stat`` = concordants - discordants, ``tied_pairs`` = paires ex aequo
+    et ``tie_y1`` = somme de t(t-1)(2t+5) sur les groupes d'ex aequo.
+    """
+    global _KENDALL_EXACT_CDF
+    if _KENDALL_EXACT_CDF is None:
+        _KENDALL_EXACT_CDF = _kendall_exact_cdf(KENDALL_EXACT_MAX_N)
+    
+    n = lengths.astype(np.float64)
+    total_pairs = n * (n - 1) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = np.clip(s_stat / np.sqrt(total_pairs) / np.sqrt(total_pairs - tied_pairs), -1.0, 1.0)
+        
+        # Asymptotique : S ~ N(0, var) avec correction des ex aequo (aucun sur x)
+        m = n * (n - 1)
+        variance = (m * (2 * n + 5) - tie_y1) / 18
+        p_value = 2 * special.ndtr(-np.abs(s_stat / np.sqrt(variance)))
+    
+    discordant = (total_pairs - tied_pairs - s_stat) / 2
+    concordant = total_pairs - discordant
+    exact = (tied_pairs == 0) & ((lengths <= KENDALL_EXACT_MAX_N) | (np.minimum(discordant, concordant) <= 1))
+    for g in np.flatnonzero(exact):
+        p_value[g] = _kendall_exact_p_value(int(lengths[g]), int(round(concordant[g])))
+    
+    all_tied = tied_pairs == total_pairs
+    tau[all_tied] = np.nan
+    p_value[all_tied] = np.nan
+    return {"tau": tau, "p_value": p_value}
+
+def _kendall_exact_p_value(n: int, concordant: int) -> float:
+    """p-value bilatérale exacte de Kendall sans ex aequo"""
+    c = min(concordant, n * (n - 1) // 2 - concordant)
+    if n <= 2:
+        return 1.0
+    if 4 * c == n * (n - 1):
+        return 1.0
+    if n <= KENDALL_EXACT_MAX_N:
+        return float(min(1.0, 2.0 * _KENDALL_EXACT_CDF[n, c]))
+    # Au-delà de la table, seuls c = 0 ou 1 sont calculés exactement (queues extrêmes)
+    if c == 0:
+        return 2.0 / math.factorial(n) if n < 171 else 0.0
+    return 2.0 / math.factorial(n - 1) if n < 172 else 0.0
+
+def interval_stats(dates: np.ndarray, offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """Intervalle moyen et écart-type (jours entiers) entre séances, et durée totale"""
+    days = np.diff(dates).astype('timedelta64[ns]').astype(np.int64) // (86400 * 10 ** 9)
+    within = np.ones(len(days), dtype=bool)
+    within[offsets[1:-1] - 1] = False
+    days = days[within].astype(np.float64)
+    
+    n_groups = len(offsets) - 1
+    diff_offsets = offsets - np.arange(n_groups + 1)
+    counts = np.diff(diff_offsets).astype(np.float64)
+    groups = _group_ids(diff_offsets)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(groups, weights=days, minlength=n_groups) / counts
+        centered = days - mean[groups]
+        std = np.sqrt(np.bincount(groups, weights=centered * centered, minlength=n_groups) / counts)
+    
+    total_days = (dates[offsets[1:] - 1] - dates[offsets[:-1]]).astype('timedelta64[ns]').astype(np.int64) // (86400 * 10 ** 9)
+    return {"avg_interval_days": mean, "interval_std": std, "total_period_days": total_days}
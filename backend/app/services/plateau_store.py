@@ -0,0 +1,237 @@
+import numpy as np
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple, Union
+from services.workout_frame import WorkoutFrame
+from services.feature_store import IncrementalFeatureStore
+from services.plateau_engine import kendall_from_counts, linear_trend_from_moments
+
+_DAY_NS = 86400 * 10 ** 9
+
+class ExercisePlateauState:
+    """Statistiques de plateau d'un couple (utilisateur, exercice), tenues à jour séance par séance.
+    
+    Une séance ajoutée (poids max, volume, date) coûte O(log n) comparaisons,
+    plus l'insertion dans la liste triée des poids (décalage mémoire en O(n),
+    mais un simple memmove, négligeable devant le reste jusqu'à des dizaines
+    de milliers de séances) :
+    
+    - plateau en cours : compteur des progressions non significatives
+      depuis la dernière progression significative
+    - régression du volume sur 0..n-1 : moyennes et co-moments de Welford
+      (la variance de x = 0..n-1 est exacte, (n² - 1) / 12)
+    - Kendall contre 0..n-1 : liste triée des poids ; la recherche
+      dichotomique donne le nombre de poids antérieurs inférieurs, égaux et
+      supérieurs, d'où S = concordants - discordants et les ex aequo
+    - intervalles entre séances : sommes entières des jours et de leurs carrés
+    
+    ``summary`` retourne les mêmes statistiques que la passe vectorisée de
+    ``plateau_engine`` sur la série complète.
+    """
+    
+    __slots__ = (
+        'progression_tolerance', 'n_sessions', 'first_date', 'last_date', 'first_volume', 'last_volume',
+        'recent_weights', 'plateau_duration', 'last_progression', 'volume_mean', 'volume_m2', 'volume_comoment',
+        'sorted_weights', 's_stat', 'tied_pairs', 'tie_y1', 'interval_sum', 'interval_sq_sum',
+        'exercise_seen', 'workouts_consumed', 'history_digest'
+    )
+    
+    def __init__(self, progression_tolerance: float = 0.5):
+        self.progression_tolerance = progression_tolerance
+        self.n_sessions = 0
+        self.first_date = None
+        self.last_date = None
+        self.first_volume = 0.0
+        self.last_volume = 0.0
+        self.recent_weights = []
+        self.plateau_duration = 0
+        self.last_progression = None
+        self.volume_mean = 0.0
+        self.volume_m2 = 0.0
+        self.volume_comoment = 0.0
+        self.sorted_weights = []
+        self.s_stat = 0
+        self.tied_pairs = 0
+        self.tie_y1 = 0
+        self.interval_sum = 0
+        self.interval_sq_sum = 0
+        self.exercise_seen = False  # l'exercice apparaît dans l'historique, même sans poids positif
+        self.workouts_consumed = 0
+        self.history_digest = None
+    
+    def append(self, date: int, weight: float, volume: float):
+        """Intègre une séance : date (ns depuis l'epoch), poids max et volume de l'exercice"""
+        n = self.n_sessions
+        if n == 0:
+            self.first_date = date
+            self.first_volume = volume
+        else:
+            progression = weight - self.recent_weights[-1]
+            if abs(progression) >= self.progression_tolerance:
+                self.plateau_duration = 0
+                self.last_progression = progression
+            else:
+                self.plateau_duration += 1
+            
+            days = (date - self.last_date) // _DAY_NS
+            self.interval_sum += days
+            self.interval_sq_sum += days * days
+        
+        # Welford : x = n (rang de la séance), moyenne de x avant ajout = (n - 1) / 2
+        x_delta = n - (n - 1) / 2
+        y_delta = volume - self.volume_mean
+        self.volume_mean += y_delta / (n + 1)
+        self.volume_m2 += y_delta * (volume - self.volume_mean)
+        self.volume_comoment += x_delta * (volume - self.volume_mean)
+        
+        # Paires (i, nouvelle séance) : concordantes si poids_i < poids, discordantes si poids_i > poids
+        below = bisect_left(self.sorted_weights, weight)
+        equal = bisect_right(self.sorted_weights, weight) - below
+        self.s_stat += below - (n - below - equal)
+        self.tied_pairs += equal
+        # Groupe d'ex aequo de taille t -> t + 1 : t(t-1)(2t+5) devient (t+1)t(2t+7)
+        self.tie_y1 += (equal + 1) * equal * (2 * equal + 7) - equal * (equal - 1) * (2 * equal + 5)
+        insort(self.sorted_weights, weight)
+        
+        self.recent_weights = (self.recent_weights + [weight])[-3:]
+        self.last_date = date
+        self.last_volume = volume
+        self.n_sessions = n + 1
+    
+    @property
+    def recent_progression(self) -> float:
+        """Progression du poids max sur les trois dernières séances (au moins trois séances)"""
+        return self.recent_weights[-1] - self.recent_weights[0]
+    
+    def summary(self) -> Dict:
+        """Statistiques de la série au format de ``AdvancedPlateauDetector._exercise_analysis_from_summary``"""
+        n = self.n_sessions
+        lengths = np.array([float(n)])
+        
+        trend = linear_trend_from_moments(
+            lengths,
+            np.array([(n * n - 1) / 12]),
+            np.array([self.volume_m2 / n]),
+            np.array([self.volume_comoment / n])
+        )
+        kendall = kendall_from_counts(
+            np.array([n]),
+            np.array([float(self.s_stat)]),
+            np.array([float(self.tied_pairs)]),
+            np.array([float(self.tie_y1)])
+        )
+        
+        n_intervals = n - 1
+        interval_variance = (n_intervals * self.interval_sq_sum - self.interval_sum ** 2) / n_intervals ** 2
+        
+        return {
+            "n_sessions": n,
+            "plateau_duration": self.plateau_duration,
+            "last_progression": np.float64(self.last_progression) if self.last_progression is not None else 0,
+            "volume_slope": trend["slope"][0],
+            "volume_p_value": trend["p_value"][0],
+            "volume_r_squared": 0.0 if trend["r_is_zero"][0] else trend["r_squared"][0],
+            "first_volume": np.float64(self.first_volume),
+            "last_volume": np.float64(self.last_volume),
+            "avg_interval_days": np.float64(self.interval_sum) / np.float64(n_intervals),
+            "interval_std": np.sqrt(np.float64(interval_variance)),
+            "total_period_days": int((self.last_date - self.first_date) // _DAY_NS),
+            "kendall_tau": kendall["tau"][0],
+            "kendall_p_value": kendall["p_value"][0]
+        }
+
+class IncrementalPlateauStore(IncrementalFeatureStore):
+    """États de plateau incrémentaux par (utilisateur, exercice).
+    
+    Même contrôle de préfixe que le store de features : seules les séances
+    ajoutées depuis la dernière requête sont lues. Une nouvelle séance datée
+    avant la dernière intégrée change l'ordre par date de la série, et
+    l'état est alors recalculé depuis le début. Un historique dont une
+    séance de l'exercice n'a pas de date (datée à l'instant de la requête
+    par la détection complète) n'a pas d'état : ``update`` retourne None.
+    
+    Comme pour les features, le contrôle de préfixe relit tout l'historique
+    déjà intégré : le store est désactivé par défaut (``incremental_plateau``).
+    """
+    
+    def __init__(self, max_entries: int = 10000, progression_tolerance: float = 0.5):
+        super().__init__(max_entries)
+        self.progression_tolerance = progression_tolerance
+        self.stats["unsupported"] = 0
+    
+    def _update(self, user_id: str, exercise_name: str,
+                workout_history: Union[List[Dict], WorkoutFrame]) -> Optional[ExercisePlateauState]:
+        frame = WorkoutFrame.ensure(workout_history)
+        history = frame.source
+        key = (str(user_id), exercise_name)
+        
+        state = self._states.get(key)
+        start = 0
+        prefix = self._consumed_prefix(state, history) if state is not None else None
+        if prefix is not None:
+            start = state.workouts_consumed
+        else:
+            state = None
+        
+        sessions = self._new_sessions(frame, exercise_name, start)
+        # État sans séance (exercice demandé avant sa première séance de poids positif) : pas d'ordre à préserver
+        if (sessions is not None and state is not None and state.last_date is not None
+                and len(sessions[0]) and sessions[0][0] < state.last_date):
+            state, prefix, sessions = None, None, self._new_sessions(frame, exercise_name, 0)
+        
+        if sessions is None:
+            self._states.pop(key, None)
+            self.stats["unsupported"] += 1
+            return None
+        
+        if state is None:
+            state = ExercisePlateauState(self.progression_tolerance)
+            self.stats["full_rebuilds"] += 1
+        else:
+            self.stats["incremental_updates"] += 1
+        
+        dates, weights, volumes, seen = sessions
+        for date, weight, volume in zip(dates, weights, volumes):
+            state.append(date, weight, volume)
+        state.exercise_seen = state.exercise_seen or seen
+        if start < len(history):
+            self._mark_consumed(state, history, prefix)
+        
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+            self.stats["evictions"] += 1
+        
+        return state
+    
+    @staticmethod
+    def _new_sessions(frame: WorkoutFrame, exercise_name: str,
+                      start: int) -> Optional[Tuple[List[int], List[float], List[float], bool]]:
+        """(dates en ns, poids max, volumes) de l'exercice dans les séances ``start`` et suivantes, triés par date,
+        et si l'exercice y apparaît (poids nul compris)"""
+        if start >= len(frame):
+            return [], [], [], False
+        if not frame.is_materialized and start > 0:
+            # Seule la fin de l'historique est parsée
+            frame = WorkoutFrame.from_history(frame.source[start:])
+            start = 0
+        
+        exercise_id = frame.exercise_id(exercise_name)
+        if exercise_id < 0:
+            return [], [], [], False
+        
+        max_weights, volumes = frame.entry_aggregates()
+        listed = np.flatnonzero((frame.entry_exercise == exercise_id) & (frame.entry_workout >= start))
+        kept = listed[max_weights[listed] > 0]
+        workouts = frame.entry_workout[kept]
+        if any(frame._raw_dates[w] is None for w in workouts):
+            return None
+        
+        dates = frame.dates[workouts]
+        if np.isnat(dates).any():
+            raise ValueError("Date de séance invalide dans l'historique")
+        
+        # Tri stable par date, comme ``ExerciseSeries.from_frame``
+        dates = dates.astype(np.int64)
+        order = np.argsort(dates, kind='stable')
+        return dates[order].tolist(), max_weights[kept][order].tolist(), volumes[kept][order].tolist(), len(listed) > 0
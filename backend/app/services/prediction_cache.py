@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import marshal
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PredictionCache:
+    """Cache LRU/TTL des résultats de ``MLPipeline.predict``.
+    
+    La clé est l'empreinte (blake2b) de la requête (exercice et données
+    utilisateur en JSON à clés triées, historique brut sérialisé par ``marshal``)
+    et de la version du modèle en service. Le cache est borné en nombre d'entrées
+    et en taille approximative (JSON des résultats), les entrées expirent
+    après ``ttl_seconds`` et tout est vidé quand un nouveau modèle est mis
+    en service. Les résultats renvoyés sont partagés : ne pas les modifier.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+    
+    @staticmethod
+    def request_key(exercise_name: str, user_data: Dict, workout_history: List[Dict],
+                    analysis_depth: Optional[str] = None) -> str:
+        """Empreinte de la requête seule (aussi la clé du single-flight).
+        
+        La profondeur d'analyse en fait partie : une prédiction sans plateau
+        ne doit pas servir une requête qui en demande un.
+        
+        L'historique passe par ``marshal`` au format 2 (sans références
+        partagées), environ 6x plus rapide que JSON sur un long historique ;
+        JSON reste le repli pour les types que marshal ne connaît pas. La
+        clé est exacte à l'octet près sur l'historique brut : les mêmes
+        séances avec des clés de dictionnaire dans un autre ordre donnent
+        une autre clé (un miss, jamais un mauvais hit).
+        """
+        head = json.dumps([exercise_name, user_data, analysis_depth], sort_keys=True, separators=(",", ":"), default=str)
+        try:
+            body = marshal.dumps(workout_history, 2)
+        except ValueError:
+            body = json.dumps(workout_history, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        digest = hashlib.blake2b(head.encode("utf-8"), digest_size=16)
+        digest.update(body)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def versioned_key(request_key: str, model_version: Any) -> str:
+        """Clé de cache d'une requête déjà empreinte, pour une version du modèle"""
+        return hashlib.blake2b(f"{request_key}@{model_version}".encode("utf-8"), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def make_key(exercise_name: str, user_data: Dict, workout_history: List[Dict], model_version: Any,
+                 analysis_depth: Optional[str] = None) -> str:
+        return PredictionCache.versioned_key(
+            PredictionCache.request_key(exercise_name, user_data, workout_history, analysis_depth), model_version
+        )
+    
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            
+            result, size, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+    
+    def put(self, key: str, result: Dict):
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+    
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def clear(self):
+        """Invalide tout le cache (nouveau modèle en service)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.stats["invalidations"] += 1
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+            }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,7 +1,12 @@
+from __future__ import annotations
 import numpy as np
-import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 import logging
+from services.workout_frame import WorkoutFrame
+from utils.lazy_imports import lazy_import
+
+# pandas n'est importé qu'à la construction d'un DataFrame (entraînement)
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
@@ -9,84 +14,116 @@ class SimpleFeatureEngineer:
     def __init__(self):
         self.feature_names = [
             'current_weight', 'previous_weight', 'weight_progression',
-            'avg_reps', 'max_weight', 'min_weight', 'total_volume', 
+            'avg_reps', 'max_weight', 'min_weight', 'total_volume',
             'progression_rate', 'user_weight_ratio', 'session_number'
         ]
     
-    def extract_features(self, workout_data: List[Dict], user_profile: Dict) -> pd.DataFrame:
+    def extract_features(self, workout_data: Union[List[Dict], WorkoutFrame], user_profile: Dict) -> pd.DataFrame:
         """Extrait des features simples et efficaces"""
         try:
-            features_list = []
-            
-            # Extraire tous les poids des exercices
-            all_weights = []
-            all_reps = []
-            
-            for workout in workout_data:
-                for exercise in workout.get('exercises', []):
-                    for set_data in exercise.get('sets', []):
-                        weight = set_data.get('weight')
-                        reps = set_data.get('reps')
-                        if weight is not None and reps is not None:
-                            all_weights.append(float(weight))
-                            all_reps.append(int(reps))
+            # Séries où poids et répétitions sont renseignés, dans l'ordre de l'historique
+            frame = WorkoutFrame.ensure(workout_data)
+            all_weights, all_reps = frame.complete_sets()
             
             if len(all_weights) < 2:
                 logger.warning("Pas assez de données de poids pour extraire des features")
                 return pd.DataFrame()
             
-            # Créer une ligne de features par poids (sauf le dernier qui est la target)
-            for i in range(len(all_weights) - 1):
-                current_weight = all_weights[i]
-                current_reps = all_reps[i]
-                
-                # Features de base - calculées uniquement avec les données jusqu'à i
-                avg_reps = np.mean(all_reps[:i+1])
-                max_weight = max(all_weights[:i+1])
-                min_weight = min(all_weights[:i+1])
-                total_volume = current_weight * current_reps
-                
-                # Progression par rapport au poids précédent
-                if i > 0:
-                    previous_weight = all_weights[i-1]
-                    weight_progression = current_weight - previous_weight
-                    progression_rate = weight_progression / previous_weight if previous_weight > 0 else 0
-                else:
-                    previous_weight = current_weight
-                    weight_progression = 0
-                    progression_rate = 0
-                
-                # Features utilisateur
-                user_weight = user_profile.get('weight', 70)
-                relative_weight = current_weight / user_weight if user_weight > 0 else 0
-                
-                features = {
-                    'current_weight': current_weight,
-                    'previous_weight': previous_weight,
-                    'weight_progression': weight_progression,
-                    'avg_reps': avg_reps,
-                    'max_weight': max_weight,
-                    'min_weight': min_weight,
-                    'total_volume': total_volume,
-                    'progression_rate': progression_rate,
-                    'user_weight_ratio': relative_weight,
-                    'session_number': i + 1
-                }
-                
-                features_list.append(features)
+            # Une ligne de features par poids (sauf le dernier qui est la target)
+            user_weight = user_profile.get('weight', 70)
+            columns = self._compute_feature_columns(all_weights[:-1], all_reps[:-1], user_weight)
             
-            if not features_list:
-                logger.warning("Aucune feature extraite")
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(features_list)
+            df = pd.DataFrame(columns, columns=self.feature_names)
             logger.info(f"Features extraites: {len(df)} échantillons avec {len(df.columns)} features")
             return df
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des features: {e}")
             return pd.DataFrame()
     
+    def extract_exercise_features(self, workout_data: Union[List[Dict], WorkoutFrame], user_profile: Dict,
+                                  exercise_name: str) -> pd.DataFrame:
+        """Comme ``extract_features``, restreint aux séries d'un seul exercice.
+        
+        Sert à l'entraînement des modèles par exercice : les poids des autres
+        exercices ne se mélangent pas à la séquence.
+        """
+        frame = WorkoutFrame.ensure(workout_data)
+        weights, reps = frame.complete_sets(frame.exercise_set_indices(exercise_name))
+        if len(weights) < 2:
+            return pd.DataFrame()
+        
+        columns = self._compute_feature_columns(weights[:-1], reps[:-1], user_profile.get('weight', 70))
+        return pd.DataFrame(columns, columns=self.feature_names)
+    
+    def extract_latest_features(self, workout_data: Union[List[Dict], WorkoutFrame], user_profile: Dict,
+                                exercise_name: Optional[str] = None) -> Optional[np.ndarray]:
+        """Features de la dernière série (celle qui sert à prédire la suivante).
+        
+        Calcul complet sur l'historique, restreint à ``exercise_name`` s'il est
+        fourni. C'est la référence de ``IncrementalFeatureStore``.
+        """
+        try:
+            frame = WorkoutFrame.ensure(workout_data)
+            indices = frame.exercise_set_indices(exercise_name) if exercise_name is not None else None
+            weights, reps = frame.complete_sets(indices)
+            
+            if len(weights) == 0:
+                return None
+            
+            columns = self._compute_feature_columns(weights, reps, user_profile.get('weight', 70))
+            return np.array([columns[name][-1] for name in self.feature_names], dtype=np.float64)
+        
+        except Exception as e:
+            logger.error(f"Erreur lors de l'extraction des dernières features: {e}")
+            return None
+    
+    def _compute_feature_columns(self, weights: np.ndarray, reps: np.ndarray, user_weight) -> Dict[str, np.ndarray]:
+        """Calcule les colonnes de features de manière vectorisée.
+        
+        La ligne i n'utilise que les séries jusqu'à l'indice i inclus (moyenne,
+        max et min cumulés), ce qui reproduit exactement l'ancienne boucle
+        Python en O(n) au lieu de O(n²). Les dtypes sont aussi ceux que
+        produisait ``pd.DataFrame`` sur la liste de dicts : les colonnes dont
+        toutes les valeurs étaient l'entier ``0`` restent en int64.
+        """
+        n_rows = len(weights)
+        
+        # Progression par rapport au poids précédent (la première ligne n'en a pas)
+        previous_weights = np.empty(n_rows, dtype=np.float64)
+        previous_weights[0] = weights[0]
+        previous_weights[1:] = weights[:-1]
+        
+        weight_progression = weights - previous_weights
+        weight_progression[0] = 0.0
+        
+        has_previous = previous_weights > 0
+        has_previous[0] = False
+        progression_rate = np.zeros(n_rows, dtype=np.float64)
+        np.divide(weight_progression, previous_weights, out=progression_rate, where=has_previous)
+        
+        # Moyenne cumulée exacte : somme entière puis division, comme np.mean
+        avg_reps = np.cumsum(reps) / np.arange(1, n_rows + 1, dtype=np.float64)
+        
+        # Features utilisateur
+        if user_weight > 0:
+            user_weight_ratio = weights / user_weight
+        else:
+            user_weight_ratio = np.zeros(n_rows, dtype=np.int64)
+        
+        return {
+            'current_weight': weights,
+            'previous_weight': previous_weights,
+            'weight_progression': weight_progression if n_rows > 1 else weight_progression.astype(np.int64),
+            'avg_reps': avg_reps,
+            'max_weight': np.maximum.accumulate(weights),
+            'min_weight': np.minimum.accumulate(weights),
+            'total_volume': weights * reps,
+            'progression_rate': progression_rate if has_previous.any() else progression_rate.astype(np.int64),
+            'user_weight_ratio': user_weight_ratio,
+            'session_number': np.arange(1, n_rows + 1, dtype=np.int64)
+        }
+    
     def get_feature_names(self) -> List[str]:
         """Retourne les noms des features"""
         return self.feature_names
\ No newline at end of file
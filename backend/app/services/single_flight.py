@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+class SingleFlightTimeout(asyncio.TimeoutError):
+    """Le calcul partagé d'une clé n'a pas abouti avant son échéance"""
+
+class SingleFlight:
+    """Regroupe les appels concurrents de même clé sur un seul calcul en cours.
+    
+    Le premier appel d'une clé lance le calcul dans une tâche ; les appels
+    suivants, tant qu'il est en cours, attendent cette même tâche et
+    partagent son résultat (ou son exception). Rien n'est gardé une fois le
+    calcul terminé : c'est le rôle du cache de prédictions.
+    
+    Chaque clé a son échéance, fixée au lancement du calcul (``timeout``
+    de l'appel, sinon ``timeout_seconds``) : les appels qui la rejoignent
+    n'attendent que le temps restant. À l'échéance, la clé est libérée (un
+    nouvel appel relance un calcul au lieu d'attendre un calcul bloqué) et
+    les appelants reçoivent ``SingleFlightTimeout``. L'annulation d'un
+    appelant n'annule pas le calcul partagé.
+    """
+    
+    def __init__(self, timeout_seconds: float = 10.0):
+        self.timeout_seconds = timeout_seconds
+        self._flights: Dict[str, Tuple[asyncio.Future, float]] = {}
+        self.stats = {"executions": 0, "coalesced": 0, "timeouts": 0}
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Résultat du calcul ``factory()`` de ``key``, lancé ou rejoint"""
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(factory())
+            deadline = loop.time() + (self.timeout_seconds if timeout is None else timeout)
+            flight = self._flights[key] = (task, deadline)
+            task.add_done_callback(lambda done, key=key: self._release(key, done))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+            metrics.count_coalesced()
+        
+        task, deadline = flight
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=max(deadline - loop.time(), 0.0))
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            self.stats["timeouts"] += 1
+            self._release(key, task)
+            raise SingleFlightTimeout(f"Calcul en cours pour {key[:12]} au-delà de son échéance")
+    
+    def _release(self, key: str, task: asyncio.Future):
+        if self._flights.get(key, (None,))[0] is task:
+            del self._flights[key]
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            # Exception déjà transmise aux appelants : pas d'avertissement « never retrieved »
+            logger.debug(f"Calcul partagé en erreur: {task.exception()}")
+    
+    def get_stats(self) -> Dict:
+        calls = self.stats["executions"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "in_flight": len(self._flights),
+            "timeout_seconds": self.timeout_seconds,
+            "coalesced_rate": self.stats["coalesced"] / calls if calls else 0.0
+        }
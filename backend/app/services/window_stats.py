@@ -0,0 +1,191 @@
+"""
+Statistiques glissantes et cumulées pour les features avancées par séance.
+
+Chaque fonction prend la série complète (une valeur par séance) et renvoie,
+pour chaque préfixe ``values[:m]``, la statistique qu'aurait donnée le calcul
+direct sur ce préfixe : sommes cumulées (décalées pour limiter les erreurs
+d'arrondi), fenêtres glissantes de taille fixe ou tas pour les quantiles.
+Un NaN se propage à tous les préfixes qui le contiennent, comme avec NumPy.
+"""
+import heapq
+import math
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.lazy_imports import lazy_import
+
+# scipy n'est importé qu'au premier calcul de p-value
+special = lazy_import("scipy.special")
+
+# Savitzky-Golay (fenêtre 5, degré 2, mode 'interp') : projection des 5 points
+# d'une fenêtre sur leur polynôme ajusté. La ligne du milieu est le noyau de
+# l'intérieur (``savgol_coeffs(5, 2)``), les premières/dernières servent aux bords
+SAVGOL_WINDOW = 5
+_SAVGOL_VANDER = np.vander(np.arange(SAVGOL_WINDOW, dtype=np.float64), 3)
+SAVGOL_EDGES = _SAVGOL_VANDER @ np.linalg.pinv(_SAVGOL_VANDER)
+SAVGOL_KERNEL = SAVGOL_EDGES[SAVGOL_WINDOW // 2]
+
+# Constante de ``scipy.stats.linregress`` pour éviter la division par zéro
+_LINREGRESS_TINY = 1.0e-20
+_RESOLUTION = np.finfo(np.float64).resolution
+
+def savgol_smooth(values: np.ndarray) -> np.ndarray:
+    """``savgol_filter(values, 5, 2)`` avec des coefficients précalculés (len >= 5)"""
+    half = SAVGOL_WINDOW // 2
+    smoothed = np.empty_like(values)
+    smoothed[half:-half] = np.convolve(values, SAVGOL_KERNEL[::-1], mode='valid')
+    smoothed[:half] = SAVGOL_EDGES[:half] @ values[:SAVGOL_WINDOW]
+    smoothed[-half:] = SAVGOL_EDGES[-half:] @ values[-SAVGOL_WINDOW:]
+    return smoothed
+
+def skew_kurtosis(values: np.ndarray, mean: float) -> Tuple[float, float]:
+    """``stats.skew`` et ``stats.kurtosis`` (biaisés, Fisher) sur les mêmes moments centrés"""
+    deviations = values - mean
+    squared = deviations * deviations
+    m2 = squared.mean()
+    m3 = (squared * deviations).mean()
+    m4 = (squared * squared).mean()
+    # Variance nulle (à la précision près) : NaN, comme scipy
+    if m2 <= (_RESOLUTION * mean) ** 2:
+        return np.nan, np.nan
+    return m3 / m2 ** 1.5, m4 / m2 ** 2 - 3.0
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    """Valeurs décalées de la première valeur finie (sommes cumulées plus précises)"""
+    finite = np.flatnonzero(np.isfinite(values))
+    return values - values[finite[0]] if len(finite) else values
+
+def expanding_moments(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Moyenne, écart-type (ddof=0), skewness et kurtosis de chaque préfixe"""
+    shifted = _shift(values)
+    counts = np.arange(1, len(values) + 1, dtype=np.float64)
+    squared = shifted * shifted
+    s1 = np.cumsum(shifted) / counts
+    s2 = np.cumsum(squared) / counts
+    s3 = np.cumsum(squared * shifted) / counts
+    s4 = np.cumsum(squared * squared) / counts
+    
+    with np.errstate(all='ignore'):
+        m2 = np.maximum(s2 - s1 * s1, 0.0)
+        m3 = s3 - 3 * s1 * s2 + 2 * s1 ** 3
+        m4 = s4 - 4 * s1 * s3 + 6 * s1 * s1 * s2 - 3 * s1 ** 4
+        mean = s1 + (values - shifted)
+        zero_variance = m2 <= (_RESOLUTION * mean) ** 2
+        skew = np.where(zero_variance, np.nan, m3 / m2 ** 1.5)
+        kurtosis = np.where(zero_variance, np.nan, m4 / m2 ** 2 - 3.0)
+    
+    return {"mean": mean, "std": np.sqrt(m2), "skew": skew, "kurtosis": kurtosis}
+
+def expanding_nanmean(values: np.ndarray) -> np.ndarray:
+    """``np.nanmean`` de chaque préfixe (NaN tant qu'aucune valeur n'est renseignée)"""
+    valid = ~np.isnan(values)
+    counts = np.cumsum(valid)
+    with np.errstate(all='ignore'):
+        return np.where(counts > 0, np.cumsum(np.where(valid, values, 0.0)) / counts, np.nan)
+
+def expanding_sample_std(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Écart-type (ddof=1) des valeurs valides de chaque préfixe, et leur nombre"""
+    x = np.where(valid, values, 0.0)
+    if valid.any():
+        x = np.where(valid, x - x[np.flatnonzero(valid)[0]], 0.0)
+    counts = np.cumsum(valid).astype(np.float64)
+    sums = np.cumsum(x)
+    with np.errstate(all='ignore'):
+        variance = (np.cumsum(x * x) - sums * sums / counts) / (counts - 1)
+        std = np.where(counts > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+    return std, counts
+
+def _lerp(a: float, b: float, t: float) -> float:
+    """Interpolation linéaire de ``np.percentile`` (méthode 'linear')"""
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+def expanding_quantiles(values: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """``np.percentile(values[:m], 100 * q)`` pour chaque préfixe, en O(n log n).
+    
+    Pour chaque quantile, un tas max garde les ``r + 1`` plus petites valeurs
+    (``r = floor(q * (m - 1))`` ne fait que croître) et un tas min les autres :
+    les deux valeurs à interpoler sont au sommet des tas.
+    """
+    n = len(values)
+    result = np.full((n, len(quantiles)), np.nan)
+    heaps = [([], []) for _ in quantiles]
+    
+    for m, value in enumerate(values.tolist(), start=1):
+        if math.isnan(value):
+            break  # NaN : tous les préfixes suivants valent NaN
+        for column, q in enumerate(quantiles):
+            lower, upper = heaps[column]
+            if lower and value < -lower[0]:
+                heapq.heappush(lower, -value)
+            else:
+                heapq.heappush(upper, value)
+            
+            position = q * (m - 1)
+            rank = int(position)
+            while len(lower) > rank + 1:
+                heapq.heappush(upper, -heapq.heappop(lower))
+            while len(lower) < rank + 1:
+                heapq.heappush(lower, -heapq.heappop(upper))
+            
+            below = -lower[0]
+            above = upper[0] if upper else below
+            result[m - 1, column] = _lerp(below, above, position - rank)
+    
+    return result
+
+def expanding_linregress(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Pente, r² et p-value de ``stats.linregress(arange(m), values[:m])`` pour chaque préfixe"""
+    n = len(values)
+    shifted = _shift(values)
+    m = np.arange(1, n + 1, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    
+    with np.errstate(all='ignore'):
+        y_mean = np.cumsum(shifted) / m
+        ssxm = (m * m - 1) / 12  # variance (biaisée) de 0..m-1
+        ssym = np.cumsum(shifted * shifted) / m - y_mean * y_mean
+        ssym = np.where(ssym < 0, 0.0, ssym)
+        ssxym = np.cumsum(x * shifted) / m - (m - 1) / 2 * y_mean
+        
+        degenerate = (ssxm == 0.0) | (ssym == 0.0)
+        r = np.clip(np.where(degenerate, 0.0, ssxym / np.sqrt(ssxm * ssym)), -1.0, 1.0)
+        slope = ssxym / ssxm
+        
+        df = m - 2
+        t = r * np.sqrt(df / ((1.0 - r + _LINREGRESS_TINY) * (1.0 + r + _LINREGRESS_TINY)))
+        p_value = special.stdtr(df, -np.abs(t)) * 2
+    
+    return {"slope": slope, "r_squared": r ** 2, "p_value": p_value}
+
+def expanding_savgol_residual(values: np.ndarray) -> np.ndarray:
+    """``mean(|v - savgol_filter(v, 5, 2)|)`` pour chaque préfixe ``v`` d'au moins 5 valeurs.
+    
+    L'intérieur du filtre ne dépend pas de la fin du préfixe (somme cumulée) ;
+    seuls les deux derniers points sont recalculés sur les 5 dernières valeurs.
+    """
+    n = len(values)
+    result = np.full(n, np.nan)
+    if n < SAVGOL_WINDOW:
+        return result
+    
+    half = SAVGOL_WINDOW // 2
+    windows = sliding_window_view(values, SAVGOL_WINDOW)  # windows[k] = values[k:k+5]
+    
+    # Résidus intérieurs : point k + 2 de la fenêtre k
+    interior = np.abs(values[half:-half] - windows @ SAVGOL_KERNEL[::-1])
+    interior_cumsum = np.concatenate(([0.0], np.cumsum(interior)))
+    
+    start_edge = np.abs(values[:half] - SAVGOL_EDGES[:half] @ values[:SAVGOL_WINDOW]).sum()
+    end_edges = np.abs(windows[:, -half:] - windows @ SAVGOL_EDGES[-half:].T).sum(axis=1)
+    
+    # Préfixe de longueur m : bords [0, 2) et [m-2, m), intérieur [2, m-2)
+    lengths = np.arange(SAVGOL_WINDOW, n + 1)
+    totals = start_edge + interior_cumsum[lengths - 2 * half] + end_edges[lengths - SAVGOL_WINDOW]
+    result[SAVGOL_WINDOW - 1:] = totals / lengths
+    return result
+
+def rolling_any(flags: np.ndarray, window: int) -> np.ndarray:
+    """Vrai si l'un des ``window`` derniers drapeaux (préfixe compris) est vrai"""
+    padded = np.concatenate((np.zeros(window - 1, dtype=bool), flags))
+    return sliding_window_view(padded, window).any(axis=1)
@@ -0,0 +1,269 @@
+import numpy as np
+from typing import Dict, List, Optional, Union
+from utils.lazy_imports import lazy_import
+
+# pandas n'est importé qu'au premier parsing des dates
+pd = lazy_import("pandas")
+
+class WorkoutFrame:
+    """Historique d'entraînement aplati en colonnes NumPy typées.
+    
+    L'historique JSON (séances → exercices → séries) est parcouru une seule
+    fois par requête ; tous les services travaillent ensuite sur ces
+    tableaux. Trois niveaux coexistent :
+    
+    - séries (``n_sets``) : ``workout_index``, ``entry_index``,
+      ``exercise_ids``, ``set_index``, ``weights`` (NaN si absent),
+      ``reps`` et ``has_reps``
+    - blocs exercice d'une séance (``n_entries``) : ``entry_workout``,
+      ``entry_exercise``, ``entry_n_sets``
+    - séances (``n_workouts``) : ``dates``, parsées en une fois à la demande
+    
+    ``exercise_offsets`` / ``exercise_order`` donnent pour chaque exercice
+    la liste de ses séries dans l'ordre de l'historique (format CSR).
+    
+    Le parcours n'a lieu qu'au premier accès à une colonne : un service qui
+    n'a besoin que de la fin de l'historique (``source``) ne paie pas le
+    parsing complet. Un historique reçu en flux (``WorkoutFrameBuilder``)
+    est déjà matérialisé et n'a pas de ``source`` : ``fingerprint``
+    identifie alors son contenu.
+    """
+    
+    _COLUMNS = (
+        'exercise_names', 'exercise_lookup', 'workout_index', 'entry_index', 'exercise_ids',
+        'set_index', 'weights', 'reps', 'has_reps', 'entry_workout', 'entry_exercise',
+        'entry_n_sets', 'exercise_order', 'exercise_offsets', '_raw_dates'
+    )
+    
+    def __init__(self, workout_history: Optional[List[Dict]] = None):
+        self.source = workout_history or []
+        self.n_workouts = len(self.source)
+        self.is_materialized = False
+        self.fingerprint = None
+        self._dates = None
+    
+    def __getattr__(self, name: str):
+        # Appelé uniquement pour les attributs absents : les colonnes avant parsing
+        if name in WorkoutFrame._COLUMNS and not self.__dict__.get('is_materialized', True):
+            self._materialize()
+            return self.__dict__[name]
+        raise AttributeError(name)
+    
+    @classmethod
+    def from_history(cls, workout_history: Optional[List[Dict]]) -> "WorkoutFrame":
+        """Crée le frame d'un historique JSON (parsé au premier accès)"""
+        return cls(workout_history)
+    
+    @classmethod
+    def ensure(cls, workout_data: Union["WorkoutFrame", List[Dict], None]) -> "WorkoutFrame":
+        """Retourne ``workout_data`` s'il s'agit déjà d'un frame, sinon le construit"""
+        if isinstance(workout_data, cls):
+            return workout_data
+        return cls.from_history(workout_data)
+    
+    def _materialize(self):
+        """Parcourt l'historique une seule fois et construit les colonnes"""
+        builder = WorkoutFrameBuilder()
+        for workout in self.source:
+            builder.add(workout)
+        builder.fill(self)
+    
+    def __len__(self) -> int:
+        """Nombre de séances, pour rester compatible avec ``len(workout_history)``"""
+        return self.n_workouts
+    
+    @property
+    def n_sets(self) -> int:
+        return len(self.weights)
+    
+    @property
+    def n_entries(self) -> int:
+        return len(self.entry_workout)
+    
+    @property
+    def dates(self) -> np.ndarray:
+        """Dates des séances (datetime64[ns]), parsées une seule fois.
+        
+        Une date absente vaut l'instant présent, comme auparavant dans la
+        détection de plateau ; une date illisible vaut NaT.
+        """
+        if self._dates is None:
+            raw = pd.Series(self._raw_dates, dtype=object)
+            missing = raw.isna()
+            raw[missing] = pd.Timestamp.now()
+            
+            parsed = pd.to_datetime(raw, errors='coerce', format='ISO8601')
+            unparsed = parsed.isna()
+            if unparsed.any():
+                # Formats non ISO : parsing élément par élément, uniquement pour ceux-là
+                parsed[unparsed] = pd.to_datetime(raw[unparsed], errors='coerce', format='mixed')
+            
+            self._dates = parsed.to_numpy(dtype='datetime64[ns]')
+        return self._dates
+    
+    def exercise_id(self, exercise_name: str) -> int:
+        """Identifiant de l'exercice, -1 s'il est absent de l'historique"""
+        return self.exercise_lookup.get(exercise_name, -1)
+    
+    def exercise_set_indices(self, exercise_name: str) -> np.ndarray:
+        """Indices des séries d'un exercice, dans l'ordre de l'historique"""
+        exercise_id = self.exercise_id(exercise_name)
+        if exercise_id < 0:
+            return np.empty(0, dtype=self.exercise_order.dtype)
+        return self.exercise_order[self.exercise_offsets[exercise_id]:self.exercise_offsets[exercise_id + 1]]
+    
+    def complete_sets(self, set_indices: Optional[np.ndarray] = None):
+        """Poids et répétitions des séries où les deux valeurs sont renseignées"""
+        mask = ~np.isnan(self.weights) & self.has_reps
+        if set_indices is not None:
+            selected = set_indices[mask[set_indices]]
+            return self.weights[selected], self.reps[selected]
+        return self.weights[mask], self.reps[mask]
+    
+    def positive_weights(self) -> np.ndarray:
+        """Poids strictement positifs de toutes les séries, dans l'ordre"""
+        weights = self.weights[~np.isnan(self.weights)]
+        return weights[weights > 0]
+    
+    def recent_exercise_weights(self, exercise_name: str, last_workouts: int) -> np.ndarray:
+        """Poids non nuls d'un exercice sur les ``last_workouts`` dernières séances"""
+        indices = self.exercise_set_indices(exercise_name)
+        indices = indices[self.workout_index[indices] >= self.n_workouts - last_workouts]
+        weights = self.weights[indices]
+        return weights[~np.isnan(weights) & (weights != 0)]
+    
+    def entry_aggregates(self):
+        """Agrégats par bloc exercice : (poids max, volume total).
+        
+        Le poids max part de 0 et un poids absent compte pour 0, comme dans
+        l'ancienne boucle de la détection de plateau.
+        """
+        weights = np.nan_to_num(self.weights, nan=0.0)
+        
+        max_weight = np.zeros(self.n_entries, dtype=np.float64)
+        np.maximum.at(max_weight, self.entry_index, weights)
+        
+        volume = np.bincount(self.entry_index, weights=weights * self.reps, minlength=self.n_entries)
+        return max_weight, volume
+
+class WorkoutFrameBuilder:
+    """Construit les colonnes d'un ``WorkoutFrame`` séance par séance.
+    
+    Chaque séance est réduite dès son ajout à quelques valeurs par série :
+    le dict de la séance peut être libéré aussitôt. Avec ``flush_every``,
+    les listes en attente sont converties en tableaux NumPy tous les
+    ``flush_every`` séries (environ 37 octets par série au lieu des objets
+    Python) : c'est ce qui permet de lire un historique en flux (NDJSON)
+    sans jamais le garder en entier.
+    """
+    
+    _SET_COLUMNS = (
+        ('workout_index', np.int32), ('entry_index', np.int32), ('exercise_ids', np.int32),
+        ('set_index', np.int32), ('weights', np.float64), ('reps', np.int64), ('has_reps', bool)
+    )
+    _ENTRY_COLUMNS = (('entry_workout', np.int32), ('entry_exercise', np.int32), ('entry_n_sets', np.int32))
+    
+    def __init__(self, flush_every: Optional[int] = None):
+        self.flush_every = flush_every
+        self.n_workouts = 0
+        self.n_entries = 0
+        self.raw_dates = []
+        self.exercise_lookup = {}
+        self.exercise_names = []
+        
+        self._columns = self._SET_COLUMNS + self._ENTRY_COLUMNS
+        self._pending = {name: [] for name, _ in self._columns}
+        self._chunks = {name: [] for name, _ in self._columns}
+    
+    def add(self, workout: Dict):
+        """Ajoute une séance (format de l'API) à la fin de l'historique"""
+        pending = self._pending
+        workout_index = pending['workout_index']
+        entry_index = pending['entry_index']
+        exercise_ids = pending['exercise_ids']
+        set_index = pending['set_index']
+        weights = pending['weights']
+        reps = pending['reps']
+        has_reps = pending['has_reps']
+        
+        w = self.n_workouts
+        self.raw_dates.append(workout.get('date'))
+        
+        for exercise in workout.get('exercises', []):
+            name = exercise.get('name')
+            if name:
+                exercise_id = self.exercise_lookup.get(name)
+                if exercise_id is None:
+                    exercise_id = self.exercise_lookup[name] = len(self.exercise_names)
+                    self.exercise_names.append(name)
+            else:
+                exercise_id = -1
+            
+            entry = self.n_entries
+            sets = exercise.get('sets', [])
+            pending['entry_workout'].append(w)
+            pending['entry_exercise'].append(exercise_id)
+            pending['entry_n_sets'].append(len(sets))
+            self.n_entries += 1
+            
+            for s, set_data in enumerate(sets):
+                weight = set_data.get('weight')
+                rep_count = set_data.get('reps')
+                
+                workout_index.append(w)
+                entry_index.append(entry)
+                exercise_ids.append(exercise_id)
+                set_index.append(s)
+                weights.append(np.nan if weight is None else float(weight))
+                reps.append(0 if rep_count is None else int(rep_count))
+                has_reps.append(rep_count is not None)
+        
+        self.n_workouts += 1
+        if self.flush_every is not None and len(weights) >= self.flush_every:
+            self._flush()
+    
+    def _flush(self):
+        """Convertit les listes en attente en tableaux typés"""
+        for name, dtype in self._columns:
+            if self._pending[name]:
+                self._chunks[name].append(np.array(self._pending[name], dtype=dtype))
+                self._pending[name] = []
+    
+    def _column(self, name: str, dtype) -> np.ndarray:
+        chunks = self._chunks[name]
+        if not chunks:
+            return np.array([], dtype=dtype)
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+    
+    def fill(self, frame: WorkoutFrame):
+        """Installe les colonnes dans ``frame``"""
+        self._flush()
+        for name, dtype in self._columns:
+            setattr(frame, name, self._column(name, dtype))
+        frame.exercise_names = self.exercise_names
+        frame.exercise_lookup = self.exercise_lookup
+        
+        # Index CSR par exercice (les séries sans nom d'exercice sont exclues)
+        order = np.argsort(frame.exercise_ids, kind='stable')
+        frame.exercise_order = order[np.count_nonzero(frame.exercise_ids < 0):]
+        frame.exercise_offsets = np.searchsorted(
+            frame.exercise_ids[frame.exercise_order], np.arange(len(self.exercise_names) + 1)
+        )
+        
+        frame._raw_dates = self.raw_dates
+        frame.is_materialized = True
+    
+    def build(self, fingerprint: Optional[str] = None) -> WorkoutFrame:
+        """Frame de l'historique reçu en flux.
+        
+        Il n'a pas de ``source`` (les séances brutes n'ont pas été gardées) ;
+        ``fingerprint`` identifie alors son contenu pour le cache et le
+        single-flight.
+        """
+        frame = WorkoutFrame()
+        frame.n_workouts = self.n_workouts
+        frame.fingerprint = fingerprint
+        self.fill(frame)
+        return frame
\ No newline at end of file
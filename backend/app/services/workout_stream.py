@@ -0,0 +1,85 @@
+import hashlib
+import logging
+from typing import AsyncIterable, AsyncIterator, Dict, Tuple
+from services.workout_frame import WorkoutFrame, WorkoutFrameBuilder
+from utils.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale d'une ligne (une séance) : au-delà, le flux est refusé
+MAX_LINE_BYTES = 1024 * 1024
+
+# Séries converties en tableaux NumPy par paquet pendant la lecture
+FLUSH_EVERY_SETS = 65536
+
+class WorkoutStreamError(ValueError):
+    """Corps NDJSON invalide ; ``line`` est le numéro de la ligne fautive"""
+    
+    def __init__(self, message: str, line: int = 0):
+        super().__init__(f"Ligne {line}: {message}" if line else message)
+        self.line = line
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes],
+                            max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, bytes]]:
+    """Lignes non vides d'un corps NDJSON reçu par morceaux : (numéro, octets).
+    
+    Seule la ligne en cours de réception est gardée entre deux morceaux ;
+    la taille des morceaux (chunked ou non) est indifférente.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise WorkoutStreamError(f"ligne de plus de {max_line_bytes} octets", line_number)
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > max_line_bytes:
+            raise WorkoutStreamError(f"ligne de plus de {max_line_bytes} octets", line_number + 1)
+    
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+async def read_workout_stream(chunks: AsyncIterable[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> Tuple[Dict, WorkoutFrame]:
+    """En-tête et historique d'un corps NDJSON : ``(en-tête, frame)``.
+    
+    La première ligne est l'en-tête de la requête (objet JSON), chaque
+    ligne suivante une séance au format de l'API. Les séances sont réduites
+    aux colonnes du ``WorkoutFrame`` au fil de la réception puis oubliées :
+    la mémoire ne dépend que du nombre de séries, pas de la taille du JSON.
+    L'empreinte du frame est celle des lignes reçues.
+    """
+    header = None
+    builder = WorkoutFrameBuilder(flush_every=FLUSH_EVERY_SETS)
+    digest = hashlib.blake2b(digest_size=16)
+    
+    async for line_number, line in iter_ndjson_lines(chunks, max_line_bytes):
+        try:
+            document = loads(line)
+        except ValueError as e:
+            raise WorkoutStreamError(f"JSON invalide ({e})", line_number)
+        if not isinstance(document, dict):
+            raise WorkoutStreamError("objet JSON attendu", line_number)
+        
+        if header is None:
+            header = document
+            continue
+        
+        try:
+            builder.add(document)
+        except (AttributeError, TypeError, ValueError) as e:
+            raise WorkoutStreamError(f"séance invalide ({e})", line_number)
+        digest.update(line.strip())
+        digest.update(b"\n")
+    
+    if header is None:
+        raise WorkoutStreamError("corps vide : en-tête attendu en première ligne")
+    
+    logger.info(f"Historique reçu en flux: {builder.n_workouts} séances")
+    return header, builder.build(fingerprint=digest.hexdigest())
@@ -0,0 +1,143 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ExecutorOverloadedError(RuntimeError):
+    """File d'attente d'une voie pleine : la tâche est refusée (backpressure)"""
+    
+    def __init__(self, lane: str, max_pending: int):
+        super().__init__(f"Voie '{lane}' saturée ({max_pending} tâches en attente ou en cours)")
+        self.lane = lane
+        self.max_pending = max_pending
+
+class _Lane:
+    """Un pool dédié et son compteur de tâches en attente ou en cours"""
+    
+    def __init__(self, name: str, backend: str, max_workers: int, max_pending: int):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Backend d'exécution inconnu: {backend}")
+        
+        self.name = name
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "max_pending_seen": 0}
+        self._pool: Optional[Executor] = None
+    
+    @property
+    def pool(self) -> Executor:
+        # Pool créé au premier usage : pas de processus lancés au démarrage
+        if self._pool is None:
+            if self.backend == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"ml-{self.name}")
+        return self._pool
+    
+    def shutdown(self, wait: bool):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._pool = None
+
+class MLExecutor:
+    """Exécute le travail CPU du pipeline hors de la boucle asyncio.
+    
+    Deux voies indépendantes :
+    
+    - ``inference`` : pool de threads (features, plateaux, ``predict``),
+      NumPy et scikit-learn relâchent le GIL sur l'essentiel du calcul
+    - ``training`` : pool de threads ou de processus (``fit`` des modèles)
+    
+    Chaque voie borne le nombre de tâches en attente ou en cours : au-delà,
+    ``run`` lève ``ExecutorOverloadedError`` immédiatement au lieu de laisser
+    la file grossir. Une prédiction peut ainsi basculer sur le fallback et un
+    entraînement être refusé (HTTP 503) sans bloquer ``/health``.
+    """
+    
+    DEFAULT_CONFIG = {
+        "inference_workers": 4,
+        "inference_max_pending": 64,
+        "training_backend": "thread",
+        "training_workers": 1,
+        "training_max_pending": 2
+    }
+    
+    def __init__(self, config: Dict = None):
+        self.config = {**self.DEFAULT_CONFIG, **(config or {})}
+        self.lanes = {
+            "inference": _Lane("inference", "thread", self.config["inference_workers"], self.config["inference_max_pending"]),
+            "training": _Lane(
+                "training",
+                self.config["training_backend"],
+                self.config["training_workers"],
+                self.config["training_max_pending"]
+            )
+        }
+    
+    async def run(self, lane_name: str, func: Callable, *args, **kwargs) -> Any:
+        """Exécute ``func(*args, **kwargs)`` dans la voie demandée et attend le résultat"""
+        lane = self.lanes[lane_name]
+        if lane.pending >= lane.max_pending:
+            lane.stats["rejected"] += 1
+            raise ExecutorOverloadedError(lane_name, lane.max_pending)
+        
+        lane.pending += 1
+        lane.stats["submitted"] += 1
+        lane.stats["max_pending_seen"] = max(lane.stats["max_pending_seen"], lane.pending)
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(lane.pool, functools.partial(func, *args, **kwargs))
+            lane.stats["completed"] += 1
+            return result
+        except Exception:
+            lane.stats["failed"] += 1
+            raise
+        finally:
+            lane.pending -= 1
+    
+    async def run_inference(self, func: Callable, *args, **kwargs) -> Any:
+        return await self.run("inference", func, *args, **kwargs)
+    
+    async def run_training(self, func: Callable, *args, **kwargs) -> Any:
+        return await self.run("training", func, *args, **kwargs)
+    
+    def is_saturated(self, lane_name: str) -> bool:
+        lane = self.lanes[lane_name]
+        return lane.pending >= lane.max_pending
+    
+    def reject(self, lane_name: str) -> ExecutorOverloadedError:
+        """Compte un refus décidé en amont de la voie (file d'attente de l'appelant) et retourne l'erreur à lever"""
+        lane = self.lanes[lane_name]
+        lane.stats["rejected"] += 1
+        return ExecutorOverloadedError(lane_name, lane.max_pending)
+    
+    def uses_processes(self, lane_name: str) -> bool:
+        """Vrai si la voie s'exécute dans d'autres processus (arguments copiés par pickle)"""
+        return self.lanes[lane_name].backend == "process"
+    
+    def get_stats(self) -> Dict:
+        return {
+            name: {
+                "backend": lane.backend,
+                "workers": lane.max_workers,
+                "max_pending": lane.max_pending,
+                "pending": lane.pending,
+                **lane.stats
+            }
+            for name, lane in self.lanes.items()
+        }
+    
+    def shutdown(self, wait: bool = True):
+        """Arrête les pools (appelé à l'arrêt de l'application)"""
+        for lane in self.lanes.values():
+            lane.shutdown(wait)
+        logger.info("Exécuteurs ML arrêtés")
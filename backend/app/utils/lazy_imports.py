@@ -0,0 +1,75 @@
+"""
+Imports différés des dépendances lourdes.
+
+pandas, scipy.stats, sklearn ou mlflow coûtent chacun plusieurs centaines
+de millisecondes à l'import. ``lazy_import`` retourne un module vide qui
+n'importe le vrai module qu'au premier accès à un de ses attributs : un
+module de service peut garder ``pd.DataFrame`` ou ``stats.linregress``
+dans son code sans que son import paie celui de pandas ou de scipy.
+
+Les annotations de type qui citent ces modules doivent rester des chaînes
+(``from __future__ import annotations``), sinon la définition de la
+fonction déclenche l'import.
+
+Chaque import différé est chronométré (``get_import_timings``) pour le
+rapport de démarrage.
+"""
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+import types
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_import_timings: Dict[str, float] = {}
+_lock = threading.Lock()
+
+class LazyModule(types.ModuleType):
+    """Module importé au premier accès à l'un de ses attributs"""
+    
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+    
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            # Le verrou d'import de Python sérialise déjà les imports concurrents ;
+            # celui-ci ne protège que le chronométrage
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _import_timings[self.__name__] = round((time.perf_counter() - start) * 1000, 3)
+                    logger.debug(f"Import différé de {self.__name__} ({_import_timings[self.__name__]} ms)")
+                    self.__dict__["_lazy_module"] = module
+        return module
+    
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+    
+    def __dir__(self):
+        return dir(self._load())
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+def lazy_import(name: str) -> LazyModule:
+    """Module ``name`` importé au premier accès à l'un de ses attributs"""
+    return LazyModule(name)
+
+def is_available(name: str) -> bool:
+    """Vérifie qu'un module est installé, sans l'importer"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def get_import_timings() -> Dict[str, float]:
+    """Durée (ms) de chaque import différé déjà effectué"""
+    return dict(_import_timings)
@@ -0,0 +1,154 @@
+import functools
+import logging
+import time
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Try to import prometheus_client, but make it optional
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    logger.info("prometheus_client non disponible - métriques désactivées")
+
+# Étapes chronométrées de ``MLPipeline.predict`` et ``train_models``
+PREDICTION_STAGES = ("feature_extraction", "inference", "plateau_detection", "mlflow_logging")
+TRAINING_STAGES = ("training_features", "training_fit", "training_update")
+
+# Coût maximal de l'instrumentation par requête de prédiction (mesuré par
+# ``benchmarks/bench_metrics_overhead.py`` et vérifié par les tests)
+OVERHEAD_BUDGET_SECONDS = 50e-6
+
+# Les étapes de prédiction durent de quelques dixièmes de ms à quelques ms
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Lignes par appel ``predict`` du micro-batching
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_DURATION = Histogram(
+        "ml_stage_duration_seconds", "Durée de chaque étape du pipeline ML", ["stage"], buckets=_BUCKETS
+    )
+    REQUEST_DURATION = Histogram(
+        "ml_request_duration_seconds", "Durée des requêtes de l'API ML", ["endpoint"], buckets=_BUCKETS
+    )
+    REQUESTS_IN_FLIGHT = Gauge("ml_requests_in_flight", "Requêtes de l'API ML en cours", ["endpoint"])
+    PREDICTIONS = Counter("ml_predictions_total", "Prédictions servies, par modèle ou fallback", ["model_used"])
+    COALESCED = Counter(
+        "ml_predictions_coalesced_total", "Prédictions servies par un calcul identique déjà en cours"
+    )
+    BATCH_SIZE = Histogram(
+        "ml_inference_batch_size", "Lignes par inférence regroupée (micro-batching)", buckets=_BATCH_SIZE_BUCKETS
+    )
+    
+    # Enfants pré-liés : pas de résolution de labels sur le chemin chaud
+    _stage_children = {stage: STAGE_DURATION.labels(stage=stage) for stage in PREDICTION_STAGES + TRAINING_STAGES}
+else:
+    _stage_children = {}
+_request_children = {}
+_prediction_children = {}
+
+_enabled = PROMETHEUS_AVAILABLE
+
+class _Timer:
+    """Chronomètre ``with`` vers un histogramme (plus léger qu'un ``@contextmanager``)"""
+    __slots__ = ("histogram", "in_flight", "start")
+    
+    def __init__(self, histogram, in_flight=None):
+        self.histogram = histogram
+        self.in_flight = in_flight
+        self.start = 0.0
+    
+    def __enter__(self):
+        if self.in_flight is not None:
+            self.in_flight.inc()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        if self.in_flight is not None:
+            self.in_flight.dec()
+        return False
+
+class _NoopTimer:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+def set_enabled(enabled: bool):
+    """Active ou coupe l'instrumentation (mesure de son surcoût)"""
+    global _enabled
+    _enabled = enabled and PROMETHEUS_AVAILABLE
+
+def is_enabled() -> bool:
+    return _enabled
+
+def observe_stage(stage: str):
+    """Chronomètre une étape du pipeline dans ``ml_stage_duration_seconds``"""
+    if not _enabled:
+        return _NOOP_TIMER
+    
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_DURATION.labels(stage=stage)
+    return _Timer(child)
+
+def track_request(endpoint: str):
+    """Jauge des requêtes en cours et durée totale d'un endpoint"""
+    if not _enabled:
+        return _NOOP_TIMER
+    
+    children = _request_children.get(endpoint)
+    if children is None:
+        children = _request_children[endpoint] = (
+            REQUEST_DURATION.labels(endpoint=endpoint), REQUESTS_IN_FLIGHT.labels(endpoint=endpoint)
+        )
+    return _Timer(*children)
+
+def instrument_endpoint(endpoint: str):
+    """Décorateur d'endpoint FastAPI : ``track_request`` autour de l'appel"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_request(endpoint):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count_prediction(model_used: str):
+    """Compte une prédiction servie (``python_ensemble``, ``fallback``, ``simple_fallback``...)"""
+    if not _enabled:
+        return
+    
+    model_used = model_used or "unknown"
+    child = _prediction_children.get(model_used)
+    if child is None:
+        child = _prediction_children[model_used] = PREDICTIONS.labels(model_used=model_used)
+    child.inc()
+
+def count_coalesced():
+    """Compte un appel regroupé sur un calcul en cours (single-flight)"""
+    if not _enabled:
+        return
+    COALESCED.inc()
+
+def observe_batch_size(size: int):
+    """Taille d'un lot d'inférence du micro-batching"""
+    if not _enabled:
+        return
+    BATCH_SIZE.observe(size)
+
+def render_latest() -> Tuple[bytes, str]:
+    """Exposition texte Prometheus du registre par défaut : (contenu, content-type)"""
+    if not PROMETHEUS_AVAILABLE:
+        return b"", CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
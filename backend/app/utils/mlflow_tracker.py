@@ -1,28 +1,164 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional
 import logging
 import os
 import json
+import itertools
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
+from utils.lazy_imports import is_available, lazy_import
+
 logger = logging.getLogger(__name__)
 
-# Try to import MLflow, but make it optional
-try:
-    import mlflow
-    import mlflow.sklearn
-    MLFLOW_AVAILABLE = True
-except ImportError:
-    MLFLOW_AVAILABLE = False
+# MLflow est optionnel, et n'est importé qu'au premier usage (plusieurs
+# centaines de millisecondes, à ne pas payer au démarrage de l'application)
+mlflow = lazy_import("mlflow")
+mlflow_sklearn = lazy_import("mlflow.sklearn")
+MLFLOW_AVAILABLE = is_available("mlflow")
+if not MLFLOW_AVAILABLE:
     logger.info("MLflow non disponible - utilisation d'un tracker local")
 
+# Limites d'un appel MlflowClient.log_batch
+MLFLOW_BATCH_MAX_METRICS = 1000
+MLFLOW_BATCH_MAX_TAGS = 100
+
+class BufferedPredictionSink:
+    """File en mémoire des événements de prédiction, écrits en lot par un thread.
+    
+    ``submit`` ne fait jamais d'I/O : l'événement est ajouté à la file et le
+    thread d'écriture appelle ``writer(events)`` dès que ``max_batch_size``
+    événements sont en attente ou au plus tard toutes les ``flush_interval``
+    secondes. En surcharge (écriture plus lente que les prédictions), au-delà
+    de ``sample_threshold`` de la capacité seul un événement sur
+    ``overload_sample_every`` est gardé, et tout est rejeté quand la file est
+    pleine : la latence des prédictions ne dépend pas de la base MLflow.
+    """
+    
+    def __init__(self, writer: Callable[[List[Dict]], None], max_batch_size: int = 200,
+                 flush_interval: float = 2.0, max_queue_size: int = 10000,
+                 sample_threshold: float = 0.5, overload_sample_every: int = 10):
+        self.writer = writer
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.sample_threshold = sample_threshold
+        self.overload_sample_every = overload_sample_every
+        
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "sampled_out": 0, "flushes": 0, "write_errors": 0}
+        self._buffer = deque()
+        self._condition = threading.Condition()
+        self._overload_counter = 0
+        self._writing = False
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mlflow-prediction-sink", daemon=True)
+        self._thread.start()
+    
+    def submit(self, event: Dict) -> bool:
+        """Ajoute un événement ; retourne False s'il a été rejeté ou échantillonné"""
+        with self._condition:
+            size = len(self._buffer)
+            if self._closed or size >= self.max_queue_size:
+                self.stats["dropped"] += 1
+                return False
+            
+            if size >= self.sample_threshold * self.max_queue_size:
+                self._overload_counter += 1
+                if self._overload_counter % self.overload_sample_every:
+                    self.stats["sampled_out"] += 1
+                    return False
+            
+            self._buffer.append(event)
+            self.stats["queued"] += 1
+            if len(self._buffer) >= self.max_batch_size:
+                self._condition.notify_all()
+            return True
+    
+    def _run(self):
+        """Boucle du thread d'écriture"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._flush_requested or len(self._buffer) >= self.max_batch_size,
+                    timeout=self.flush_interval
+                )
+                if self._closed and not self._buffer:
+                    self._condition.notify_all()
+                    return
+                batch = [self._buffer.popleft() for _ in range(min(self.max_batch_size, len(self._buffer)))]
+                if not self._buffer:
+                    self._flush_requested = False
+                self._writing = bool(batch)
+            
+            if batch:
+                try:
+                    self.writer(batch)
+                    self.stats["written"] += len(batch)
+                    self.stats["flushes"] += 1
+                except Exception as e:
+                    self.stats["write_errors"] += 1
+                    logger.error(f"Erreur lors de l'écriture d'un lot de prédictions MLflow: {e}")
+            
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Demande l'écriture immédiate de la file et attend qu'elle soit vide"""
+        with self._condition:
+            # Réveille le thread même si le lot n'est pas complet
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._buffer and not self._writing, timeout=timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """Écrit les événements restants puis arrête le thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Sink MLflow arrêté avec {len(self._buffer)} événements non écrits")
+    
+    def __len__(self) -> int:
+        return len(self._buffer)
+
 class MLflowTracker:
-    def __init__(self, experiment_name: str = "ici-ca-pousse-ml"):
+    def __init__(self, experiment_name: str = "ici-ca-pousse-ml", buffered: bool = False, sink_config: Dict = None):
         self.experiment_name = experiment_name
         self.current_run = None
         self.local_logs = []
+        self.prediction_sink: Optional[BufferedPredictionSink] = None
+        self._prediction_run_id = None
+        self._prediction_steps = itertools.count()
+        
+        # Base SQLite et expérience configurées au premier usage (``_ensure_experiment``)
+        self.mlflow_available = MLFLOW_AVAILABLE
+        self.setup_ms = None
+        self._experiment_ready = False
+        self._setup_lock = threading.Lock()
+        
+        if buffered and self.mlflow_available:
+            self.prediction_sink = BufferedPredictionSink(self._write_prediction_batch, **(sink_config or {}))
+    
+    def _ensure_experiment(self) -> bool:
+        """Configure MLflow au premier usage et indique s'il est disponible.
         
-        if MLFLOW_AVAILABLE:
-            # Configuration MLflow
+        L'import de mlflow, la base SQLite et ``create_experiment`` ne sont
+        plus payés par le démarrage de l'application mais par le premier
+        run, log ou lot du sink de prédictions. En cas d'échec, le tracker
+        passe définitivement en mode dégradé.
+        """
+        if self._experiment_ready or not self.mlflow_available:
+            return self.mlflow_available
+        
+        with self._setup_lock:
+            if self._experiment_ready or not self.mlflow_available:
+                return self.mlflow_available
+            
+            start = time.perf_counter()
             try:
                 # Utiliser une base de données SQLite locale pour le tracking
                 mlflow_db_path = os.path.join(os.getcwd(), "mlflow.db")
@@ -30,23 +166,24 @@ class MLflowTracker:
                 
                 # Créer ou récupérer l'expérience
                 try:
-                    experiment_id = mlflow.create_experiment(experiment_name)
+                    experiment_id = mlflow.create_experiment(self.experiment_name)
                 except mlflow.exceptions.MlflowException:
-                    experiment = mlflow.get_experiment_by_name(experiment_name)
+                    experiment = mlflow.get_experiment_by_name(self.experiment_name)
                     experiment_id = experiment.experiment_id
                 
-                mlflow.set_experiment(experiment_name)
-                logger.info(f"MLflow configuré avec l'expérience: {experiment_name}")
-                self.mlflow_available = True
+                mlflow.set_experiment(self.experiment_name)
+                logger.info(f"MLflow configuré avec l'expérience: {self.experiment_name}")
+                self._experiment_ready = True
             except Exception as e:
                 logger.warning(f"Impossible de configurer MLflow: {e}. Fonctionnement en mode dégradé.")
                 self.mlflow_available = False
-        else:
-            self.mlflow_available = False
+            self.setup_ms = round((time.perf_counter() - start) * 1000, 3)
+        
+        return self.mlflow_available
     
     def start_run(self, run_name: Optional[str] = None):
         """Démarre un nouveau run MLflow"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return self
         
         try:
@@ -80,7 +217,7 @@ class MLflowTracker:
     
     def log_param(self, key: str, value: Any):
         """Log un paramètre"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
@@ -90,7 +227,7 @@ class MLflowTracker:
     
     def log_params(self, params: Dict[str, Any]):
         """Log plusieurs paramètres"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
@@ -100,7 +237,7 @@ class MLflowTracker:
     
     def log_metric(self, key: str, value: float, step: Optional[int] = None):
         """Log une métrique"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
@@ -110,7 +247,7 @@ class MLflowTracker:
     
     def log_metrics(self, metrics: Dict[str, float], step: Optional[int] = None):
         """Log plusieurs métriques"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
@@ -121,7 +258,7 @@ class MLflowTracker:
     
     def log_artifact(self, local_path: str, artifact_path: Optional[str] = None):
         """Log un artefact"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
@@ -131,19 +268,68 @@ class MLflowTracker:
     
     def log_model(self, model, artifact_path: str, **kwargs):
         """Log un modèle scikit-learn"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
-            mlflow.sklearn.log_model(model, artifact_path, **kwargs)
+            mlflow_sklearn.log_model(model, artifact_path, **kwargs)
         except Exception as e:
             logger.error(f"Erreur lors du log du modèle: {e}")
     
+    def log_run(self, run_name: str, params: Dict[str, Any], metrics: Dict[str, float] = None,
+                status: str = "FINISHED") -> Optional[str]:
+        """Enregistre un run complet (paramètres, métriques, statut) et retourne son id.
+        
+        Le run est créé, rempli (``log_batch``) puis terminé par son
+        identifiant avec ``MlflowClient``, sans ``mlflow.start_run`` ni
+        ``current_run`` : des entraînements concurrents, chacun loggé depuis
+        un thread de l'exécuteur, ne mélangent pas leurs runs.
+        """
+        if not self._ensure_experiment():
+            return None
+        
+        try:
+            from mlflow.tracking import MlflowClient
+            from mlflow.entities import Metric, Param
+            
+            client = MlflowClient()
+            experiment = client.get_experiment_by_name(self.experiment_name)
+            run_id = client.create_run(experiment.experiment_id, run_name=run_name).info.run_id
+            timestamp = int(time.time() * 1000)
+            try:
+                client.log_batch(
+                    run_id,
+                    metrics=[Metric(key, float(value), timestamp, 0) for key, value in (metrics or {}).items()],
+                    params=[Param(key, str(value)) for key, value in params.items()]
+                )
+            except Exception:
+                client.set_terminated(run_id, "FAILED")
+                raise
+            client.set_terminated(run_id, status)
+            logger.info(f"Run MLflow enregistré: {run_name} ({status})")
+            return run_id
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement du run MLflow {run_name}: {e}")
+            return None
+    
     def log_prediction(self, prediction_data: Dict[str, Any]):
         """Log des données de prédiction"""
         if not self.mlflow_available:
             return
         
+        if self.prediction_sink is not None:
+            # Mode tamponné : aucune écriture SQLite sur le chemin de la prédiction
+            self.prediction_sink.submit({
+                "timestamp": int(time.time() * 1000),
+                "step": next(self._prediction_steps),
+                "data": prediction_data
+            })
+            return
+        
+        # Mode synchrone : l'expérience est configurée avant la première écriture
+        if not self._ensure_experiment():
+            return
+        
         try:
             # Log comme métriques si possible
             for key, value in prediction_data.items():
@@ -154,9 +340,61 @@ class MLflowTracker:
         except Exception as e:
             logger.error(f"Erreur lors du log de la prédiction: {e}")
     
+    def _write_prediction_batch(self, events: List[Dict]):
+        """Écrit un lot d'événements de prédiction avec ``MlflowClient.log_batch``"""
+        if not self._ensure_experiment():
+            raise RuntimeError("MLflow indisponible")
+        from mlflow.tracking import MlflowClient
+        from mlflow.entities import Metric, RunTag
+        
+        client = MlflowClient()
+        if self._prediction_run_id is None:
+            experiment = client.get_experiment_by_name(self.experiment_name)
+            run = client.create_run(experiment.experiment_id, run_name="predictions")
+            self._prediction_run_id = run.info.run_id
+        
+        metrics = []
+        tags = {}
+        for event in events:
+            for key, value in event["data"].items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metrics.append(Metric(f"prediction_{key}", float(value), event["timestamp"], event["step"]))
+                else:
+                    # Les paramètres MLflow sont immuables : dernière valeur en tag
+                    tags[f"prediction_{key}"] = str(value)[:5000]
+        
+        run_tags = [RunTag(key, value) for key, value in list(tags.items())[:MLFLOW_BATCH_MAX_TAGS]]
+        for start in range(0, max(len(metrics), 1), MLFLOW_BATCH_MAX_METRICS):
+            client.log_batch(
+                self._prediction_run_id,
+                metrics=metrics[start:start + MLFLOW_BATCH_MAX_METRICS],
+                tags=run_tags if start == 0 else []
+            )
+    
+    def get_sink_stats(self) -> Dict:
+        """Compteurs du sink de prédictions (vide en mode synchrone)"""
+        if self.prediction_sink is None:
+            return {}
+        return {**self.prediction_sink.stats, "pending": len(self.prediction_sink)}
+    
+    def close(self):
+        """Vide le sink de prédictions et termine son run (arrêt de l'application)"""
+        if self.prediction_sink is not None:
+            self.prediction_sink.close()
+        
+        if self._prediction_run_id is None:
+            return
+        try:
+            from mlflow.tracking import MlflowClient
+            MlflowClient().set_terminated(self._prediction_run_id, "FINISHED")
+            logger.info("Run MLflow des prédictions terminé")
+        except Exception as e:
+            logger.error(f"Erreur lors de la fin du run des prédictions: {e}")
+        self._prediction_run_id = None
+    
     def get_experiment_runs(self, max_results: int = 100):
         """Récupère les runs de l'expérience"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return []
         
         try:
@@ -174,7 +412,7 @@ class MLflowTracker:
     
     def get_best_run(self, metric_name: str, ascending: bool = False):
         """Récupère le meilleur run selon une métrique"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return None
         
         try:
@@ -193,19 +431,19 @@ class MLflowTracker:
     
     def load_model(self, run_id: str, artifact_path: str = "model"):
         """Charge un modèle depuis MLflow"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return None
         
         try:
             model_uri = f"runs:/{run_id}/{artifact_path}"
-            return mlflow.sklearn.load_model(model_uri)
+            return mlflow_sklearn.load_model(model_uri)
         except Exception as e:
             logger.error(f"Erreur lors du chargement du modèle: {e}")
             return None
     
     def get_run_metrics(self, run_id: str):
         """Récupère les métriques d'un run"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return {}
         
         try:
@@ -217,7 +455,7 @@ class MLflowTracker:
     
     def cleanup_old_runs(self, keep_last_n: int = 50):
         """Nettoie les anciens runs pour économiser l'espace"""
-        if not self.mlflow_available:
+        if not self._ensure_experiment():
             return
         
         try:
@@ -237,6 +475,10 @@ class MLflowTracker:
         except Exception as e:
             logger.error(f"Erreur lors du nettoyage des runs: {e}")
     
+    def prepare(self) -> bool:
+        """Configure MLflow sans attendre le premier log (préchauffage du démarrage)"""
+        return self._ensure_experiment()
+    
     def is_available(self) -> bool:
         """Vérifie si MLflow est disponible"""
         return self.mlflow_available
\ No newline at end of file
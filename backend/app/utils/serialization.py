@@ -0,0 +1,71 @@
+import json
+import logging
+import math
+from typing import Any
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# orjson est optionnel : sans lui, repli sur json après conversion des types NumPy
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.info("orjson non disponible - sérialisation JSON standard")
+
+def _default(obj: Any) -> Any:
+    """Types que l'encodeur ne connaît pas (orjson sérialise déjà NumPy nativement)"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+def to_builtin(obj: Any) -> Any:
+    """Copie en types Python natifs, NaN/inf en None (repli sans orjson)"""
+    if isinstance(obj, dict):
+        return {key if isinstance(key, str) else str(key): to_builtin(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset, np.ndarray)):
+        return [to_builtin(value) for value in obj]
+    if isinstance(obj, (bool, int, str)) or obj is None:
+        return obj
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if math.isfinite(obj) else None
+    return to_builtin(_default(obj))
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(content: Any) -> bytes:
+        """JSON UTF-8 ; scalaires et tableaux NumPy natifs, NaN/inf en null"""
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    
+    loads = orjson.loads
+else:
+    def dumps(content: Any) -> bytes:
+        """JSON UTF-8 ; scalaires et tableaux NumPy natifs, NaN/inf en null"""
+        return json.dumps(to_builtin(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    def loads(data: bytes) -> Any:
+        """Document JSON depuis des octets UTF-8"""
+        return json.loads(data)
+
+class NumpyJSONResponse(JSONResponse):
+    """Réponse JSON sans ``jsonable_encoder`` : les dicts du pipeline (avec
+    scalaires ``np.float64``, ``np.bool_``, tableaux...) sont encodés en un
+    seul passage par orjson.
+    
+    Les endpoints la retournent directement, ce qui évite aussi la
+    revalidation par leur ``response_model`` (qui ne sert qu'au schéma
+    OpenAPI et aux tests).
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,149 @@
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime, timedelta
+import numpy as np
+
+DEFAULT_EXERCISES = [
+    "Développé couché", "Squat", "Soulevé de terre", "Développé militaire",
+    "Rowing barre", "Tractions", "Curl biceps", "Extension triceps"
+]
+
+# Profils de progression du poids de travail :
+# - "linear" : progression lente et régulière
+# - "periodized" : cycles de 4 semaines (3 séances par semaine), intensité
+#   croissante puis semaine de décharge, répétitions inversement liées à l'intensité
+# - "plateau" : progression sur les 60 premiers % des séances, puis poids constant
+# - "mixed" : un des trois profils tiré au hasard pour chaque exercice
+PROGRESSION_PATTERNS = ("linear", "periodized", "plateau", "mixed")
+
+_PERIODIZED_INTENSITY = np.array([0.9, 0.95, 1.0, 0.75])
+
+def generate_workout_history(
+    n_sessions: int = 50,
+    exercises: Optional[List[str]] = None,
+    sets_per_exercise: int = 3,
+    start_date: str = "2023-01-02",
+    seed: int = 42,
+    pattern: str = "linear"
+) -> List[Dict]:
+    """Génère un historique d'entraînement synthétique au format de l'API.
+    
+    Chaque séance contient tous les exercices, avec une progression du poids
+    de travail selon ``pattern`` (``PROGRESSION_PATTERNS``) et un peu de
+    bruit. Le générateur est déterministe pour une graine donnée.
+    """
+    if pattern not in PROGRESSION_PATTERNS:
+        raise ValueError(f"Profil de progression inconnu: {pattern} (attendu: {', '.join(PROGRESSION_PATTERNS)})")
+    
+    rng = np.random.default_rng(seed)
+    exercises = exercises or DEFAULT_EXERCISES[:2]
+    start = datetime.fromisoformat(start_date)
+    
+    base_weights = rng.uniform(20, 120, size=len(exercises))
+    increments = rng.choice([0.0, 1.25, 2.5], size=(n_sessions, len(exercises)), p=[0.5, 0.3, 0.2])
+    working_weights = base_weights + np.cumsum(increments, axis=0)
+    reps = rng.integers(4, 13, size=(n_sessions, len(exercises), sets_per_exercise))
+    
+    if pattern != "linear":
+        patterns = rng.choice(PROGRESSION_PATTERNS[:3], size=len(exercises)) if pattern == "mixed" else [pattern] * len(exercises)
+        for e, exercise_pattern in enumerate(patterns):
+            if exercise_pattern == "periodized":
+                week = np.arange(n_sessions) // 3
+                intensity = _PERIODIZED_INTENSITY[week % 4]
+                working_weights[:, e] = base_weights[e] * (1 + 0.025 * (week // 4)) * intensity
+                reps[:, e, :] = np.clip(np.rint(20 - 16 * intensity)[:, None] + rng.integers(-1, 2, size=(n_sessions, sets_per_exercise)), 3, 15)
+            elif exercise_pattern == "plateau":
+                plateau_start = int(n_sessions * 0.6)
+                working_weights[plateau_start:, e] = working_weights[max(plateau_start - 1, 0), e]
+    
+    history = []
+    for session in range(n_sessions):
+        date = start + timedelta(days=2 * session + int(session // 3))
+        history.append({
+            "date": date.strftime("%Y-%m-%d"),
+            "exercises": [
+                {
+                    "name": name,
+                    "sets": [
+                        {"weight": float(round(working_weights[session, e] * 4) / 4), "reps": int(reps[session, e, s])}
+                        for s in range(sets_per_exercise)
+                    ]
+                }
+                for e, name in enumerate(exercises)
+            ]
+        })
+    
+    return history
+
+def generate_user_histories(
+    n_users: int,
+    n_exercises: int = 2,
+    n_sessions: int = 50,
+    sets_per_exercise: int = 3,
+    pattern: str = "mixed",
+    seed: int = 42
+) -> List[Dict]:
+    """Utilisateurs synthétiques ``{"user_id", "user_profile", "workout_history"}``.
+    
+    Chaque utilisateur a ``n_exercises`` exercices (noms de
+    ``DEFAULT_EXERCISES``, puis numérotés au-delà) et sa propre graine ;
+    le tout est déterministe pour ``seed``.
+    """
+    exercises = DEFAULT_EXERCISES[:n_exercises] + [f"Exercice {i}" for i in range(len(DEFAULT_EXERCISES), n_exercises)]
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "user_id": f"user_{user:07d}",
+            "user_profile": {"weight": float(round(rng.uniform(50, 110), 1))},
+            "workout_history": generate_workout_history(
+                n_sessions, exercises, sets_per_exercise, seed=int(rng.integers(2**31)), pattern=pattern
+            )
+        }
+        for user in range(n_users)
+    ]
+
+def flatten_history(history: List[Dict]) -> List[Dict]:
+    """Une ligne par exercice et par séance (poids max, répétitions moyennes,
+    nombre de séries), au format à plat de ``AdvancedFeatureEngineer``"""
+    return [
+        {
+            "date": session["date"],
+            "exercise_name": exercise["name"],
+            "weight": max(s["weight"] for s in exercise["sets"]),
+            "reps": float(np.mean([s["reps"] for s in exercise["sets"]])),
+            "sets": len(exercise["sets"])
+        }
+        for session in history
+        for exercise in session["exercises"]
+        if exercise["sets"]
+    ]
+
+def history_for_set_count(n_sets: int, exercises: Optional[List[str]] = None, sets_per_exercise: int = 3, seed: int = 42) -> List[Dict]:
+    """Historique synthétique contenant environ ``n_sets`` séries au total"""
+    exercises = exercises or DEFAULT_EXERCISES[:2]
+    sets_per_session = len(exercises) * sets_per_exercise
+    n_sessions = max(1, int(np.ceil(n_sets / sets_per_session)))
+    return generate_workout_history(n_sessions, exercises, sets_per_exercise, seed=seed)
+
+def iter_user_documents(n_users: int, sets_per_user: int, exercises_per_user: int = 3,
+                        sets_per_exercise: int = 3, seed: int = 42) -> Iterator[Dict]:
+    """Utilisateurs synthétiques, un par un (mémoire constante quel que soit ``n_users``).
+    
+    Chaque document a le format d'une ligne de dump JSONL :
+    ``{"user_id", "user_profile", "workout_history"}``, avec environ
+    ``sets_per_user`` séries réparties sur ``exercises_per_user`` exercices.
+    """
+    rng = np.random.default_rng(seed)
+    levels = ("beginner", "intermediate", "advanced")
+    for user in range(n_users):
+        picked = rng.choice(len(DEFAULT_EXERCISES), size=min(exercises_per_user, len(DEFAULT_EXERCISES)), replace=False)
+        exercises = [DEFAULT_EXERCISES[i] for i in sorted(picked)]
+        yield {
+            "user_id": f"user_{user:07d}",
+            "user_profile": {
+                "weight": float(round(rng.uniform(50, 110), 1)),
+                "level": levels[int(rng.integers(len(levels)))]
+            },
+            "workout_history": history_for_set_count(
+                sets_per_user, exercises, sets_per_exercise, seed=int(rng.integers(2**31))
+            )
+        }
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Microbenchmark de AdvancedFeatureEngineer
+
+Temps par appel de ``extract_features`` (DataFrame d'une ligne) et de
+``extract_feature_vector`` (vecteur float64, sans pandas en sortie) pour
+des historiques de 2 à 1000 séances. ``--compare-with`` mesure aussi une
+autre version du module (par exemple l'ancienne implémentation à base de
+DataFrames concaténés, extraite avec ``git show``) sur les mêmes données.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_advanced_feature_engineering.py [--calls 200]
+    git show <commit>:backend/app/services/feature_engineering.py > /tmp/fe_before.py
+    python benchmarks/bench_advanced_feature_engineering.py --compare-with /tmp/fe_before.py
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.feature_engineering import AdvancedFeatureEngineer
+
+USER_PROFILE = {"level": "intermediate", "goals": ["strength", "hypertrophy"]}
+
+def flat_history(n_sessions: int, seed: int = 42):
+    """Historique à plat (une ligne par séance), au format attendu par AdvancedFeatureEngineer"""
+    rng = random.Random(seed)
+    weight = 60.0
+    history = []
+    for i in range(n_sessions):
+        weight += rng.choice([0, 0, 1.25, 2.5, -2.5])
+        history.append({
+            "date": f"2024-{(i // 28) % 12 + 1:02d}-{i % 28 + 1:02d} {rng.randint(6, 21):02d}:00:00",
+            "weight": weight,
+            "reps": rng.randint(3, 12),
+            "sets": rng.randint(2, 5),
+            "duration": rng.randint(30, 90),
+            "exercise_type": "compound",
+            "muscle_group": "legs",
+            "equipment": "barbell"
+        })
+    return history
+
+def per_call_us(func, history, calls: int) -> float:
+    """Meilleur temps moyen par appel sur 3 séries"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(history, USER_PROFILE)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return round(best * 1e6, 1)
+
+def load_engineer(path: str):
+    spec = importlib.util.spec_from_file_location("feature_engineering_compared", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.AdvancedFeatureEngineer()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--compare-with", help="Fichier d'une autre version de feature_engineering.py")
+    args = parser.parse_args()
+    
+    engineer = AdvancedFeatureEngineer()
+    compared = load_engineer(args.compare_with) if args.compare_with else None
+    
+    for n_sessions in (2, 10, 100, 1000):
+        history = flat_history(n_sessions)
+        calls = max(10, args.calls // max(1, n_sessions // 100))
+        result = {
+            "n_sessions": n_sessions,
+            "n_features": len(engineer.feature_names),
+            "extract_features_us": per_call_us(engineer.extract_features, history, calls),
+            "extract_feature_vector_us": per_call_us(engineer.extract_feature_vector, history, calls)
+        }
+        if compared is not None:
+            try:
+                result["compared_extract_features_us"] = per_call_us(compared.extract_features, history, calls)
+                result["speedup"] = round(result["compared_extract_features_us"] / result["extract_features_us"], 2)
+            except Exception as e:
+                result["compared_error"] = f"{type(e).__name__}: {e}"
+        print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark de la latence de prédiction selon la profondeur d'analyse
+
+Pour des historiques de tailles et de nombres d'exercices variés, mesure
+``MLPipeline.predict`` (cache de prédictions désactivé) à chaque
+profondeur :
+- ``weight`` : poids prédit seul
+- ``exercise`` : plus plateau de l'exercice demandé, confiance et recommandations (défaut)
+- ``full`` : plateau de tous les exercices de l'historique
+
+Usage (depuis backend/) :
+    python benchmarks/bench_analysis_depth.py [--sessions 50,200,1000] [--exercises 2,8,30] [--rounds 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+from services.ml_pipeline import ANALYSIS_DEPTHS, MLPipeline
+from utils.synthetic_data import generate_workout_history
+
+async def bench_depths(pipeline: MLPipeline, history, exercise_name: str, rounds: int) -> dict:
+    """Latence p50 et moyenne (ms) de chaque profondeur ; historique reparsé à chaque appel, comme par l'API"""
+    timings = {}
+    for depth in ANALYSIS_DEPTHS:
+        result = await pipeline.predict(exercise_name, {"current_weight": 80}, history, analysis_depth=depth)
+        assert result["model_used"] == "python_ensemble", result
+        
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await pipeline.predict(exercise_name, {"current_weight": 80}, history, analysis_depth=depth)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[depth] = {"p50_ms": round(float(np.median(samples)), 3), "mean_ms": round(float(np.mean(samples)), 3)}
+    return timings
+
+async def run(sessions_list, exercises_list, rounds: int):
+    pipeline = MLPipeline({"prediction_cache": {"enabled": False}, "single_flight": {"enabled": False}})
+    await pipeline.train("bench_user", generate_workout_history(100))
+    
+    for n_exercises in exercises_list:
+        names = [f"Exercice {i}" for i in range(n_exercises)]
+        for n_sessions in sessions_list:
+            history = generate_workout_history(n_sessions, exercises=names, seed=n_sessions)
+            timings = await bench_depths(pipeline, history, names[0], rounds)
+            print(json.dumps({
+                "sessions": n_sessions,
+                "exercises": n_exercises,
+                **timings,
+                "exercise_vs_full_speedup": round(timings["full"]["p50_ms"] / timings["exercise"]["p50_ms"], 2),
+                "weight_vs_full_speedup": round(timings["full"]["p50_ms"] / timings["weight"]["p50_ms"], 2)
+            }))
+    pipeline.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="50,200,1000")
+    parser.add_argument("--exercises", default="2,8,30")
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+    
+    asyncio.run(run(
+        [int(n) for n in args.sessions.split(",")],
+        [int(n) for n in args.exercises.split(",")],
+        args.rounds
+    ))
+
+if __name__ == "__main__":
+    main()
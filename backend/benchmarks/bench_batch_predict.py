@@ -0,0 +1,118 @@
+"""
+Benchmark des prédictions groupées
+
+Compare, pour un même lot de requêtes, des appels successifs à
+``MLPipeline.predict`` et un seul appel à ``MLPipeline.predict_batch``
+(un seul passage dans l'ensemble pour tout le lot), puis le débit obtenu
+par HTTP avec ``/api/ml/predict`` et ``/api/ml/predict/batch``.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_batch_predict.py [--batch-size 10] [--rounds 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.ml_pipeline import MLPipeline
+from utils.synthetic_data import DEFAULT_EXERCISES, generate_workout_history
+
+def build_requests(history, batch_size: int):
+    """Lot de requêtes réparties sur les exercices de l'historique"""
+    return [
+        {
+            "exercise_name": DEFAULT_EXERCISES[i % len(DEFAULT_EXERCISES)],
+            "user_data": {"current_weight": 60 + i, "user_id": f"bench_user_{i}"},
+            "workout_history": history
+        }
+        for i in range(batch_size)
+    ]
+
+async def bench_pipeline(pipeline: MLPipeline, requests, rounds: int) -> dict:
+    """Temps moyen par lot : appels successifs vs un appel groupé"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for request in requests:
+            await pipeline.predict(**request)
+    sequential = (time.perf_counter() - start) / rounds
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await pipeline.predict_batch(requests)
+    batched = (time.perf_counter() - start) / rounds
+    
+    return {
+        "mode": "pipeline",
+        "batch_size": len(requests),
+        "sequential_ms_per_batch": round(sequential * 1000, 3),
+        "batched_ms_per_batch": round(batched * 1000, 3),
+        "sequential_predictions_per_s": round(len(requests) / sequential, 1),
+        "batched_predictions_per_s": round(len(requests) / batched, 1),
+        "speedup": round(sequential / batched, 2)
+    }
+
+def bench_http(pipeline: MLPipeline, requests, rounds: int) -> dict:
+    """Même comparaison à travers l'API, avec le pipeline déjà entraîné"""
+    from fastapi.testclient import TestClient
+    import app.main as main_module
+    
+    items = [
+        {
+            "exercise_name": r["exercise_name"],
+            "user_data": {"current_weight": r["user_data"]["current_weight"]},
+            "user_id": r["user_data"]["user_id"],
+            "workout_history": r["workout_history"]
+        }
+        for r in requests
+    ]
+    
+    with TestClient(main_module.app) as client:
+        main_module.ml_pipeline = pipeline
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for item in items:
+                client.post("/api/ml/predict", json=item).raise_for_status()
+        sequential = (time.perf_counter() - start) / rounds
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            client.post("/api/ml/predict/batch", json={"items": items}).raise_for_status()
+        batched = (time.perf_counter() - start) / rounds
+    
+    return {
+        "mode": "http",
+        "batch_size": len(items),
+        "sequential_ms_per_batch": round(sequential * 1000, 3),
+        "batched_ms_per_batch": round(batched * 1000, 3),
+        "sequential_predictions_per_s": round(len(items) / sequential, 1),
+        "batched_predictions_per_s": round(len(items) / batched, 1),
+        "speedup": round(sequential / batched, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--skip-http", action="store_true")
+    args = parser.parse_args()
+    
+    history = generate_workout_history(args.sessions)
+    pipeline = MLPipeline()
+    asyncio.run(pipeline.train("bench_user", history))
+    
+    requests = build_requests(history, args.batch_size)
+    print(json.dumps(asyncio.run(bench_pipeline(pipeline, requests, args.rounds))))
+    if not args.skip_http:
+        print(json.dumps(bench_http(pipeline, requests, args.rounds)))
+
+if __name__ == "__main__":
+    main()
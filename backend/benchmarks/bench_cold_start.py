@@ -0,0 +1,143 @@
+"""
+Benchmark du démarrage à froid de l'API ML
+
+Pour chaque mode, lance ``--runs`` processus neufs et mesure :
+- ``import_main_ms`` : import de ``main`` seul (``python -c "import main"``)
+- ``first_health_ms`` : délai entre le lancement d'un serveur uvicorn neuf
+  (modèle chargé depuis un registre temporaire) et la première réponse 200
+  de ``/health``
+- ``first_ready_ms`` : même délai jusqu'à la première réponse 200 de
+  ``/health/ready`` (fin du préchauffage, ``ML_WARMUP``)
+- ``first_predict_ms`` : latence de la première ``/api/ml/predict`` réelle
+  ensuite (imports différés déjà payés par le préchauffage s'il est actif)
+- ``startup`` : rapport de démarrage du serveur (``/api/ml/status``)
+
+Modes :
+- ``lazy`` : l'application telle quelle (pandas, scipy.stats, mlflow importés au premier usage)
+- ``eager`` : les mêmes modules importés avant l'application, comme quand
+  ils étaient importés au chargement des modules de service
+
+Usage (depuis backend/) :
+    python benchmarks/bench_cold_start.py [--runs 5] [--modes lazy,eager] [--no-warmup]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BACKEND_DIR, "app")
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, APP_DIR)
+
+from utils.lazy_imports import is_available
+from utils.synthetic_data import generate_workout_history
+
+# Modules importés au chargement des services avant les imports différés
+EAGER_MODULES = ["pandas", "scipy.stats", "scipy.signal", "sklearn.ensemble", "mlflow", "mlflow.sklearn"]
+
+def preload_code(mode: str) -> str:
+    modules = [m for m in EAGER_MODULES if is_available(m.split(".")[0])] if mode == "eager" else []
+    return "".join(f"import {module}\n" for module in modules)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def import_main_ms(mode: str) -> float:
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        + preload_code(mode) +
+        "import main\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def cold_start(mode: str, model_path: str, history: list, warmup: bool) -> dict:
+    port = free_port()
+    code = preload_code(mode) + (
+        "import uvicorn\n"
+        f"uvicorn.run('main:app', app_dir={APP_DIR!r}, port={port}, log_level='warning')\n"
+    )
+    env = {**os.environ, "ML_MODEL_PATH": model_path, "ML_PREDICTION_CACHE": "false", "ML_WARMUP": str(warmup).lower()}
+    
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", code], cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                if time.time() > deadline:
+                    raise RuntimeError("Le serveur n'a pas démarré")
+                time.sleep(0.01)
+        first_health_ms = (time.perf_counter() - start) * 1000
+        
+        while httpx.get(f"http://127.0.0.1:{port}/health/ready").status_code == 503:
+            time.sleep(0.01)
+        first_ready_ms = (time.perf_counter() - start) * 1000
+        
+        predict_start = time.perf_counter()
+        response = httpx.post(f"http://127.0.0.1:{port}/api/ml/predict", timeout=60, json={
+            "exercise_name": "Squat", "user_data": {"current_weight": 80}, "workout_history": history
+        }).json()
+        first_predict_ms = (time.perf_counter() - predict_start) * 1000
+        assert response["prediction"]["model_used"] == "python_ensemble", response
+        
+        startup = httpx.get(f"http://127.0.0.1:{port}/api/ml/status").json()["startup"]
+    finally:
+        server.terminate()
+        server.wait()
+    
+    return {"first_health_ms": first_health_ms, "first_ready_ms": first_ready_ms, "first_predict_ms": first_predict_ms, "startup": startup}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", default="lazy,eager")
+    parser.add_argument("--no-warmup", action="store_true", help="démarre sans préchauffage (ML_WARMUP=false)")
+    args = parser.parse_args()
+    
+    from services.ml_pipeline import MLPipeline
+    
+    workdir = tempfile.mkdtemp(prefix="cold-start-bench-")
+    try:
+        # Modèle publié dans un registre : chaque serveur le charge au démarrage
+        history = generate_workout_history(60)
+        pipeline = MLPipeline({"model_registry_path": os.path.join(workdir, "registry")})
+        asyncio.run(pipeline.train("bench_user", history))
+        pipeline.shutdown()
+        
+        for mode in args.modes.split(","):
+            imports = [import_main_ms(mode) for _ in range(args.runs)]
+            runs = [cold_start(mode, workdir, history, not args.no_warmup) for _ in range(args.runs)]
+            print(json.dumps({
+                "mode": mode,
+                "runs": args.runs,
+                "warmup": not args.no_warmup,
+                "import_main_ms": round(statistics.median(imports), 1),
+                "first_health_ms": round(statistics.median(run["first_health_ms"] for run in runs), 1),
+                "first_ready_ms": round(statistics.median(run["first_ready_ms"] for run in runs), 1),
+                "first_predict_ms": round(statistics.median(run["first_predict_ms"] for run in runs), 1),
+                "startup": runs[-1]["startup"]
+            }))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de l'inférence compilée de l'ensemble
+
+Entraîne l'ensemble du pipeline (``--training-mode full`` :
+AdvancedEnsembleModel, ``incremental`` : OnlineEnsembleModel) sur un
+historique synthétique, le compile (``compile_ensemble``) puis compare,
+pour chaque taille de lot de ``--batch-sizes``, ``model.predict``
+(scikit-learn) et ``CompiledEnsemble.predict`` (NumPy) : p50 et p99 en µs,
+gain et écart maximal entre les deux. Mesure aussi ``MLPipeline.predict``
+de bout en bout (profondeur ``weight``), avec et sans inférence compilée.
+
+Sortie : un document JSON ``{model, batches, pipeline}``.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_compiled_inference.py [--batch-sizes 1,8,32,256] [--rounds 200]
+        [--training-mode full] [--sessions 100]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+from services.compiled_ensemble import compile_ensemble
+from services.ml_pipeline import MLPipeline
+from utils.synthetic_data import DEFAULT_EXERCISES, generate_workout_history
+
+def timings_us(call, rounds: int) -> np.ndarray:
+    samples = np.empty(rounds)
+    for i in range(rounds):
+        start = time.perf_counter()
+        call()
+        samples[i] = time.perf_counter() - start
+    return samples * 1e6
+
+def compare(reference, compiled, rows: np.ndarray, rounds: int) -> dict:
+    """Latences de ``reference.predict`` et ``compiled.predict`` sur ``rows``"""
+    sklearn = timings_us(lambda: reference.predict(rows), rounds)
+    numpy = timings_us(lambda: compiled.predict(rows), rounds)
+    return {
+        "batch_size": len(rows),
+        "sklearn_p50_us": round(float(np.median(sklearn)), 1),
+        "sklearn_p99_us": round(float(np.percentile(sklearn, 99)), 1),
+        "compiled_p50_us": round(float(np.median(numpy)), 1),
+        "compiled_p99_us": round(float(np.percentile(numpy, 99)), 1),
+        "speedup": round(float(np.median(sklearn) / np.median(numpy)), 2),
+        "max_abs_error": float(np.max(np.abs(reference.predict(rows) - compiled.predict(rows))))
+    }
+
+async def pipeline_latency(pipeline: MLPipeline, history, rounds: int) -> dict:
+    samples = np.empty(rounds)
+    for i in range(rounds):
+        start = time.perf_counter()
+        await pipeline.predict(DEFAULT_EXERCISES[i % 3], {"current_weight": 60 + i % 40}, history, analysis_depth="weight")
+        samples[i] = time.perf_counter() - start
+    samples *= 1000
+    return {"p50_ms": round(float(np.median(samples)), 3), "p99_ms": round(float(np.percentile(samples, 99)), 3)}
+
+async def run(args) -> dict:
+    config = {
+        "prediction_cache": {"enabled": False},
+        "single_flight": {"enabled": False},
+        "online_training": {"enabled": args.training_mode == "incremental"}
+    }
+    pipeline = MLPipeline(config)
+    history = generate_workout_history(args.sessions, seed=args.seed)
+    await pipeline.train("bench_user", history)
+    model = pipeline.ensemble_model
+    
+    features, _ = pipeline._prepare_training_data(history, {})
+    X = features.values
+    compiled = compile_ensemble(model, X)
+    rows = X[np.random.default_rng(args.seed).integers(0, len(X), max(int(n) for n in args.batch_sizes.split(",")))]
+    batches = [compare(model, compiled, rows[:int(n)], args.rounds) for n in args.batch_sizes.split(",")]
+    
+    reference = MLPipeline({**config, "compiled_inference": {"enabled": False}})
+    reference.ensemble_model, reference.is_trained = model, True
+    end_to_end = {}
+    for name, target in (("sklearn", reference), ("compiled", pipeline)):
+        await pipeline_latency(target, history, 10)
+        end_to_end[name] = await pipeline_latency(target, history, args.rounds)
+    pipeline.shutdown()
+    reference.shutdown()
+    
+    return {
+        "model": {"class": type(model).__name__, **compiled.get_stats()},
+        "batches": batches,
+        "pipeline": end_to_end
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", default="1,8,32,256")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--training-mode", default="full", choices=("full", "incremental"))
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
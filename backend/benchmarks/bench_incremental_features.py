@@ -0,0 +1,49 @@
+"""
+Benchmark du store de features incrémental
+
+Pour des historiques de plus en plus longs, compare le coût d'obtention de la
+dernière ligne de features quand une séance est ajoutée :
+- recalcul complet (SimpleFeatureEngineer.extract_latest_features)
+- mise à jour incrémentale (IncrementalFeatureStore.update)
+
+Usage (depuis backend/) :
+    python benchmarks/bench_incremental_features.py
+"""
+import json
+import os
+import sys
+import time
+
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.feature_store import IncrementalFeatureStore
+from services.simple_feature_engineering import SimpleFeatureEngineer
+from services.workout_frame import WorkoutFrame
+from utils.synthetic_data import generate_workout_history
+
+def main():
+    engineer = SimpleFeatureEngineer()
+    profile = {"weight": 80}
+    
+    for n_sessions in (100, 1_000, 10_000, 50_000):
+        history = generate_workout_history(n_sessions + 1)
+        
+        start = time.perf_counter()
+        engineer.extract_latest_features(WorkoutFrame.from_history(history), profile, "Squat")
+        full_seconds = time.perf_counter() - start
+        
+        store = IncrementalFeatureStore()
+        store.update("bench_user", "Squat", history[:-1])
+        start = time.perf_counter()
+        store.update("bench_user", "Squat", WorkoutFrame.from_history(history))
+        incremental_seconds = time.perf_counter() - start
+        
+        print(json.dumps({
+            "n_sessions": n_sessions,
+            "full_recompute_ms": round(full_seconds * 1000, 3),
+            "incremental_ms": round(incremental_seconds * 1000, 3)
+        }))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Benchmark de l'état de plateau incrémental
+
+Pour des historiques de plus en plus longs, compare le coût de l'analyse de
+plateau d'un exercice quand une séance est ajoutée :
+- recalcul complet (AdvancedPlateauDetector.detect_plateaus)
+- mise à jour incrémentale (detect_exercise_plateau_incremental)
+
+Usage (depuis backend/) :
+    python benchmarks/bench_incremental_plateau.py [--sessions 100,1000,3000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.plateau_detection import AdvancedPlateauDetector
+from services.plateau_store import IncrementalPlateauStore
+from services.workout_frame import WorkoutFrame
+from utils.synthetic_data import generate_workout_history
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="100,1000,3000")
+    args = parser.parse_args()
+    
+    detector = AdvancedPlateauDetector()
+    for n_sessions in [int(n) for n in args.sessions.split(",")]:
+        history = generate_workout_history(n_sessions + 1)
+        
+        start = time.perf_counter()
+        detector.detect_plateaus(WorkoutFrame.from_history(history), "Squat")
+        full_seconds = time.perf_counter() - start
+        
+        store = IncrementalPlateauStore()
+        detector.detect_exercise_plateau_incremental(history[:-1], "Squat", store, "bench_user")
+        start = time.perf_counter()
+        detector.detect_exercise_plateau_incremental(WorkoutFrame.from_history(history), "Squat", store, "bench_user")
+        incremental_seconds = time.perf_counter() - start
+        
+        print(json.dumps({
+            "n_sessions": n_sessions,
+            "full_recompute_ms": round(full_seconds * 1000, 3),
+            "incremental_ms": round(incremental_seconds * 1000, 3)
+        }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Générateur de charge de l'API ML : débit et percentiles de latence par endpoint
+
+Trafic mixte tiré au hasard (graine fixe) selon ``--mix`` :
+- ``predict_short`` : /api/ml/predict, historique de 10 à 30 séances
+- ``predict_long`` : /api/ml/predict, historique complet (``--long-sessions``)
+- ``train`` : /api/ml/train sur 60 séances
+- ``analytics`` : /api/ml/analytics
+- ``health`` : /health
+
+Les requêtes sont construites à l'avance à partir de ``--pool``
+utilisateurs synthétiques (profils mélangés) et portent un ``user_id``.
+
+Cibles :
+- ``asgi`` (défaut) : l'application en processus via httpx.ASGITransport,
+  démarrée par son lifespan (modèle du registre, préchauffage). Le
+  générateur partage alors la boucle et le CPU du serveur.
+- ``uvicorn`` : un serveur uvicorn local lancé pour l'occasion
+- ``--url`` : un serveur déjà démarré (son modèle et sa configuration)
+
+Modes :
+- ``closed`` : ``--concurrency`` clients envoient chacun une requête dès la
+  réponse précédente reçue. Une liste (``1,4,16``) donne une courbe
+  débit / latence ; la saturation est le dernier niveau avant que le
+  débit ne progresse plus de 10 %.
+- ``open`` : arrivées de Poisson à ``--rate`` requêtes/s, indépendantes des
+  réponses ; la latence part de l'instant d'arrivée prévu (pas
+  d'omission coordonnée). Au-delà de ``--max-in-flight`` requêtes en
+  cours, les arrivées sont abandonnées et comptées comme erreurs. La
+  saturation est le dernier débit offert tenu (débit servi d'au moins 95 %
+  de l'offre, p99 sous ``--slo-ms``).
+
+Une ligne JSON par niveau : débit, p50/p95/p99/max, taux d'erreur et codes
+de statut par endpoint, taux de fallback des prédictions ; puis une ligne
+``{"saturation": ...}``.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_load.py --mode closed --concurrency 1,4,16,64 --duration 10
+    python benchmarks/bench_load.py --mode open --rate 5,20,50 --duration 10 --target uvicorn
+    python benchmarks/bench_load.py --url http://127.0.0.1:8000 --mix predict_short=80,health=20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BACKEND_DIR, "app")
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, APP_DIR)
+
+from utils.synthetic_data import generate_user_histories, generate_workout_history
+
+DEFAULT_MIX = "predict_short=50,predict_long=15,train=5,analytics=10,health=20"
+
+class TrafficMix:
+    """Requêtes pré-construites par type, tirées selon les poids du mélange"""
+    
+    def __init__(self, mix: str, pool: int, long_sessions: int, seed: int):
+        weights = dict(item.split("=") for item in mix.split(","))
+        users = generate_user_histories(pool, n_exercises=3, n_sessions=long_sessions, pattern="mixed", seed=seed)
+        rng = random.Random(seed)
+        
+        def predict(user, n_sessions):
+            return ("POST", "/api/ml/predict", {
+                "exercise_name": user["workout_history"][0]["exercises"][0]["name"],
+                "user_data": {"current_weight": 80, "user_id": user["user_id"], **user["user_profile"]},
+                "workout_history": user["workout_history"][:n_sessions]
+            })
+        
+        builders = {
+            "predict_short": lambda user: predict(user, rng.randint(10, 30)),
+            "predict_long": lambda user: predict(user, long_sessions),
+            "train": lambda user: ("POST", "/api/ml/train", {
+                "user_id": user["user_id"], "new_data": user["workout_history"][:60], "user_profile": user["user_profile"]
+            }),
+            "analytics": lambda user: ("GET", "/api/ml/analytics", None),
+            "health": lambda user: ("GET", "/health", None)
+        }
+        unknown = set(weights) - set(builders)
+        if unknown:
+            raise ValueError(f"Types de requêtes inconnus: {', '.join(sorted(unknown))} (attendu: {', '.join(builders)})")
+        
+        self.kinds = list(weights)
+        self.weights = [float(weights[kind]) for kind in self.kinds]
+        self.requests = {kind: [builders[kind](user) for user in users] for kind in self.kinds}
+    
+    def pick(self, rng: random.Random):
+        kind = rng.choices(self.kinds, weights=self.weights)[0]
+        return kind, rng.choice(self.requests[kind])
+
+async def send(client: httpx.AsyncClient, kind: str, request, scheduled: float, timeout: float) -> tuple:
+    """(type, statut, latence ms, fallback) d'une requête ; statut = nom de l'exception en cas d'échec réseau"""
+    method, path, body = request
+    fallback = None
+    try:
+        response = await client.request(method, path, json=body, timeout=timeout)
+        status = response.status_code
+        if kind.startswith("predict") and status == 200:
+            fallback = not response.json()["prediction"]["model_used"].endswith("ensemble")
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    return kind, status, (time.perf_counter() - scheduled) * 1000, fallback
+
+async def closed_loop(client, traffic: TrafficMix, concurrency: int, duration: float, seed: int, timeout: float) -> list:
+    results = []
+    deadline = time.perf_counter() + duration
+    
+    async def user_loop(rng: random.Random):
+        while time.perf_counter() < deadline:
+            kind, request = traffic.pick(rng)
+            results.append(await send(client, kind, request, time.perf_counter(), timeout))
+    
+    await asyncio.gather(*(user_loop(random.Random(seed + i)) for i in range(concurrency)))
+    return results
+
+async def open_loop(client, traffic: TrafficMix, rate: float, duration: float, seed: int, timeout: float,
+                    max_in_flight: int) -> list:
+    rng = random.Random(seed)
+    results, in_flight = [], set()
+    start = time.perf_counter()
+    arrival = start
+    
+    async def tracked(kind, request, scheduled):
+        results.append(await send(client, kind, request, scheduled, timeout))
+    
+    while True:
+        arrival += rng.expovariate(rate)
+        if arrival - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        kind, request = traffic.pick(rng)
+        if len(in_flight) >= max_in_flight:
+            results.append((kind, "dropped", 0.0, None))
+            continue
+        task = asyncio.create_task(tracked(kind, request, arrival))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    
+    await asyncio.gather(*in_flight)
+    return results
+
+def summarize(results: list, elapsed: float) -> dict:
+    """Débit, percentiles, erreurs et fallbacks par type de requête et au total"""
+    def stats(rows):
+        latencies = np.array([latency for _, status, latency, _ in rows if status != "dropped"])
+        errors = sum(1 for _, status, _, _ in rows if not (isinstance(status, int) and status < 400))
+        codes = {}
+        for _, status, _, _ in rows:
+            codes[str(status)] = codes.get(str(status), 0) + 1
+        summary = {
+            "requests": len(rows),
+            "throughput_rps": round((len(rows) - errors) / elapsed, 2),
+            "error_rate": round(errors / len(rows), 4),
+            "status_codes": codes
+        }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            summary.update({"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+                            "max_ms": round(float(latencies.max()), 2)})
+        predictions = [fallback for _, _, _, fallback in rows if fallback is not None]
+        if predictions:
+            summary["fallback_rate"] = round(sum(predictions) / len(predictions), 4)
+        return summary
+    
+    by_kind = {}
+    for row in results:
+        by_kind.setdefault(row[0], []).append(row)
+    return {"overall": stats(results), "endpoints": {kind: stats(rows) for kind, rows in sorted(by_kind.items())}}
+
+def saturation_point(levels: list, mode: str, slo_ms: float):
+    """Dernier niveau tenu : gain de débit d'au moins 10 % (closed) ou offre servie sous le SLO (open)"""
+    held = None
+    for i, level in enumerate(levels):
+        overall = level["overall"]
+        if mode == "closed":
+            if i > 0 and overall["throughput_rps"] < 1.1 * levels[i - 1]["overall"]["throughput_rps"]:
+                break
+        elif overall["throughput_rps"] < 0.95 * level["rate"] or overall.get("p99_ms", float("inf")) > slo_ms:
+            break
+        held = level
+    if held is None:
+        return None
+    key = "concurrency" if mode == "closed" else "rate"
+    return {key: held[key], "throughput_rps": held["overall"]["throughput_rps"], "p99_ms": held["overall"].get("p99_ms")}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def publish_model(model_path: str):
+    """Entraîne un modèle et le publie dans le registre chargé au démarrage du serveur"""
+    from services.ml_pipeline import MLPipeline
+    pipeline = MLPipeline({"model_registry_path": os.path.join(model_path, "registry")})
+    asyncio.run(pipeline.train("load_user", generate_workout_history(60)))
+    pipeline.shutdown()
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", APP_DIR,
+         "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready").status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+async def run_levels(client, traffic: TrafficMix, args) -> list:
+    levels = []
+    values = args.concurrency if args.mode == "closed" else args.rate
+    for value in [float(v) for v in values.split(",")]:
+        start = time.perf_counter()
+        if args.mode == "closed":
+            results = await closed_loop(client, traffic, int(value), args.duration, args.seed, args.timeout)
+            level = {"mode": "closed", "concurrency": int(value)}
+        else:
+            results = await open_loop(client, traffic, value, args.duration, args.seed, args.timeout, args.max_in_flight)
+            level = {"mode": "open", "rate": value}
+        level.update({"duration_s": round(time.perf_counter() - start, 2), **summarize(results, time.perf_counter() - start)})
+        print(json.dumps(level))
+        levels.append(level)
+    return levels
+
+async def run_in_process(traffic: TrafficMix, args) -> list:
+    """Application démarrée par son lifespan, appelée sans réseau"""
+    import main as api
+    async with api.lifespan(api.app):
+        while not api.readiness["ready"]:
+            await asyncio.sleep(0.05)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://load") as client:
+            return await run_levels(client, traffic, args)
+
+async def run_http(base_url: str, traffic: TrafficMix, args) -> list:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        return await run_levels(client, traffic, args)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", default="1,4,16", help="clients simultanés (mode closed), liste")
+    parser.add_argument("--rate", default="5,20,50", help="requêtes/s offertes (mode open), liste")
+    parser.add_argument("--duration", type=float, default=10.0, help="secondes par niveau")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--pool", type=int, default=64, help="utilisateurs synthétiques")
+    parser.add_argument("--long-sessions", type=int, default=400)
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--url", help="serveur déjà démarré (remplace --target)")
+    parser.add_argument("--no-cache", action="store_true", help="désactive le cache de prédictions du serveur lancé")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p99 maximal d'un débit tenu (mode open)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    traffic = TrafficMix(args.mix, args.pool, args.long_sessions, args.seed)
+    if args.url:
+        levels = asyncio.run(run_http(args.url, traffic, args))
+    else:
+        workdir = tempfile.mkdtemp(prefix="load-bench-")
+        os.environ["ML_MODEL_PATH"] = workdir
+        if args.no_cache:
+            os.environ["ML_PREDICTION_CACHE"] = "false"
+        try:
+            publish_model(workdir)
+            if args.target == "asgi":
+                levels = asyncio.run(run_in_process(traffic, args))
+            else:
+                port = free_port()
+                server = start_server(port)
+                try:
+                    levels = asyncio.run(run_http(f"http://127.0.0.1:{port}", traffic, args))
+                finally:
+                    server.terminate()
+                    server.wait()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    print(json.dumps({"saturation": saturation_point(levels, args.mode, args.slo_ms)}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark du surcoût de l'instrumentation Prometheus
+
+Mesure le coût de l'instrumentation d'une requête de prédiction seule
+(jauge en cours, durée de requête, quatre étapes chronométrées et compteur
+de prédictions), puis la latence de ``MLPipeline.predict`` avec et sans
+métriques, et la répartition moyenne du temps par étape relevée dans
+``ml_stage_duration_seconds``. Le surcoût doit rester sous
+``metrics.OVERHEAD_BUDGET_SECONDS``.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_metrics_overhead.py [--iterations 20000] [--predictions 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+sys.path.insert(0, BACKEND_DIR)
+
+from prometheus_client import REGISTRY
+from services.ml_pipeline import MLPipeline
+from utils import metrics
+from utils.synthetic_data import generate_workout_history
+
+def instrumentation_cost(iterations: int) -> float:
+    """Coût moyen (s) de l'instrumentation d'une requête, sans travail à mesurer"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.track_request("bench"):
+            for stage in metrics.PREDICTION_STAGES:
+                with metrics.observe_stage(stage):
+                    pass
+            metrics.count_prediction("bench")
+    return (time.perf_counter() - start) / iterations
+
+async def mean_latency(pipeline: MLPipeline, history, n_predictions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n_predictions):
+        await pipeline.predict("Squat", {"current_weight": 100}, history)
+    return (time.perf_counter() - start) / n_predictions
+
+def stage_totals() -> dict:
+    """(nombre, somme en s) par étape dans ``ml_stage_duration_seconds``"""
+    return {
+        stage: (
+            REGISTRY.get_sample_value("ml_stage_duration_seconds_count", {"stage": stage}) or 0,
+            REGISTRY.get_sample_value("ml_stage_duration_seconds_sum", {"stage": stage}) or 0
+        )
+        for stage in metrics.PREDICTION_STAGES
+    }
+
+def stage_means_ms(before: dict, after: dict) -> dict:
+    means = {}
+    for stage, (count, total) in after.items():
+        count -= before[stage][0]
+        total -= before[stage][1]
+        means[stage] = round(total / count * 1000, 4) if count else None
+    return means
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--predictions", type=int, default=200)
+    parser.add_argument("--workouts", type=int, default=100)
+    args = parser.parse_args()
+    
+    cost = instrumentation_cost(args.iterations)
+    print(json.dumps({
+        "mode": "instrumentation_only",
+        "overhead_us_per_request": round(cost * 1e6, 2),
+        "budget_us": metrics.OVERHEAD_BUDGET_SECONDS * 1e6,
+        "within_budget": cost < metrics.OVERHEAD_BUDGET_SECONDS
+    }))
+    
+    # Cache désactivé : chaque prédiction traverse toutes les étapes
+    pipeline = MLPipeline({"prediction_cache": {"enabled": False}})
+    history = generate_workout_history(args.workouts, seed=42)
+    await pipeline.train("bench_user", history)
+    await mean_latency(pipeline, history, 10)  # échauffement
+    totals_before = stage_totals()
+    
+    latencies = {True: [], False: []}
+    for _ in range(5):
+        for enabled in (True, False):
+            metrics.set_enabled(enabled)
+            latencies[enabled].append(await mean_latency(pipeline, history, args.predictions // 5))
+    metrics.set_enabled(True)
+    
+    with_metrics = min(latencies[True])
+    without_metrics = min(latencies[False])
+    print(json.dumps({
+        "mode": "pipeline_predict",
+        "workouts": args.workouts,
+        "with_metrics_ms": round(with_metrics * 1000, 4),
+        "without_metrics_ms": round(without_metrics * 1000, 4),
+        "overhead_pct": round((with_metrics - without_metrics) / without_metrics * 100, 2),
+        "stage_mean_ms": stage_means_ms(totals_before, stage_totals())
+    }))
+    pipeline.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
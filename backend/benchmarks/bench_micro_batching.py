@@ -0,0 +1,124 @@
+"""
+Benchmark du micro-batching des prédictions concurrentes
+
+Pour chaque niveau de ``--concurrency``, ``N`` clients appellent
+``MLPipeline.predict`` en boucle fermée pendant ``--duration`` secondes
+(requêtes toutes distinctes : cache et single-flight désactivés), sans
+micro-batching puis avec (``--max-delay-ms``, ``--max-batch-size``). Une
+ligne JSON par mode et par niveau : débit, p50/p95/p99 et, avec
+micro-batching, taille moyenne des lots, attente moyenne dans le lot,
+déclencheurs des lots (taille, délai, plus aucune requête en route) et
+histogramme des tailles.
+
+``--depth weight`` réduit la prédiction aux features et à l'inférence, là
+où le regroupement pèse le plus ; ``exercise`` ajoute l'analyse de plateau.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_micro_batching.py [--concurrency 1,4,16,64] [--duration 5]
+        [--max-delay-ms 2] [--max-batch-size 32] [--depth weight]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+from services.ml_pipeline import ANALYSIS_DEPTHS, MLPipeline
+from utils.synthetic_data import generate_user_histories, generate_workout_history
+
+def build_requests(pool: int, n_sessions: int, depth: str, seed: int) -> list:
+    """Une requête par utilisateur et par exercice, poids courant varié"""
+    requests = []
+    for i, user in enumerate(generate_user_histories(pool, 3, n_sessions, 3, seed=seed)):
+        for exercise in {exercise["name"] for session in user["workout_history"] for exercise in session["exercises"]}:
+            requests.append({
+                "exercise_name": exercise,
+                "user_data": {"current_weight": 60 + i % 40},
+                "workout_history": user["workout_history"],
+                "analysis_depth": depth
+            })
+    return requests
+
+async def closed_loop(pipeline: MLPipeline, requests: list, concurrency: int, duration: float) -> tuple:
+    """Latences (ms) des prédictions de ``concurrency`` clients et durée écoulée"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            result = await pipeline.predict(**requests[i % len(requests)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert result["model_used"] == "python_ensemble", result
+            i += concurrency
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[client(offset) for offset in range(concurrency)])
+    return latencies, time.perf_counter() - start
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3)
+    }
+
+async def run(args) -> list:
+    base_config = {
+        "prediction_cache": {"enabled": False},
+        "single_flight": {"enabled": False},
+        "executor": {"inference_max_pending": max(64, 4 * max(int(n) for n in args.concurrency.split(",")))}
+    }
+    trainer = MLPipeline(base_config)
+    await trainer.train("bench_user", generate_workout_history(100))
+    requests = build_requests(args.pool, args.sessions, args.depth, args.seed)
+    # Tour de chauffe (imports, premiers appels), non mesuré
+    await closed_loop(trainer, requests, 4, 1.0)
+    
+    lines = []
+    for concurrency in [int(n) for n in args.concurrency.split(",")]:
+        for batching in (False, True):
+            pipeline = MLPipeline({**base_config, "micro_batching": {
+                "enabled": batching, "max_delay_ms": args.max_delay_ms, "max_batch_size": args.max_batch_size
+            }})
+            pipeline.ensemble_model, pipeline.is_trained = trainer.ensemble_model, True
+            
+            latencies, elapsed = await closed_loop(pipeline, requests, concurrency, args.duration)
+            line = {"micro_batching": batching, "concurrency": concurrency, **summarize(latencies, elapsed)}
+            stats = pipeline.get_micro_batching_stats()
+            if stats["enabled"]:
+                line.update({key: stats[key] for key in ("mean_batch_size", "mean_wait_ms", "flush_size", "flush_delay", "flush_idle", "batch_size_histogram")})
+                line["mean_batch_size"] = round(line["mean_batch_size"], 2)
+                line["mean_wait_ms"] = round(line["mean_wait_ms"], 3)
+            pipeline.shutdown()
+            lines.append(line)
+            print(json.dumps(line), flush=True)
+    trainer.shutdown()
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--depth", default="weight", choices=ANALYSIS_DEPTHS)
+    parser.add_argument("--pool", type=int, default=16, help="utilisateurs synthétiques distincts")
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de l'entraînement incrémental face aux réentraînements complets
+
+Rejoue un flux de lots (quelques séances d'un utilisateur à la fois, comme
+``/api/ml/train``) et compare les modes de ``MLPipeline.train_models`` :
+- ``full`` : ensemble complet réentraîné sur le seul nouveau lot (mode par défaut)
+- ``full_cumulative`` : ensemble complet réentraîné sur tout le flux reçu (référence de précision)
+- ``incremental`` : ``partial_fit`` sur le nouveau lot, sans réentraînement périodique
+- ``incremental_refit`` : idem, avec réentraînement complet toutes les ``--refit-every`` mises à jour
+
+Les features de chaque lot sont calculées une fois en amont : la latence
+mesurée est celle de la mise à jour du modèle. La précision est mesurée en
+prequential (chaque lot est prédit avant d'être appris) et sur des
+utilisateurs tenus à l'écart du flux.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_online_training.py [--users 60] [--sessions-per-batch 5] [--refit-every 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+from services.ml_pipeline import MLPipeline
+from utils.synthetic_data import iter_user_documents
+
+def build_stream(args):
+    """Lots (features, targets) du flux, entrelacés par utilisateur, et lot tenu à l'écart"""
+    pipeline = MLPipeline()
+    documents = list(iter_user_documents(args.users + args.holdout_users, args.sets_per_user, seed=args.seed))
+    per_user = []
+    for document in documents[:args.users]:
+        history = document["workout_history"]
+        per_user.append([
+            pipeline._prepare_training_data(history[i:i + args.sessions_per_batch], {})
+            for i in range(0, len(history), args.sessions_per_batch)
+        ])
+    
+    batches = []
+    for round_batches in zip(*per_user):
+        batches.extend((features, targets) for features, targets in round_batches if len(targets) >= 2)
+    
+    holdout = [pipeline._prepare_training_data(document["workout_history"], {}) for document in documents[args.users:]]
+    holdout_X = pd.concat([features for features, _ in holdout]).fillna(0).values
+    holdout_y = np.concatenate([targets for _, targets in holdout])
+    pipeline.shutdown()
+    return batches, holdout_X, holdout_y
+
+async def run_mode(mode: str, batches, holdout_X, holdout_y, refit_every: int) -> dict:
+    config = {"prediction_cache": {"enabled": False}}
+    if mode.startswith("incremental"):
+        full_refit_every = refit_every if mode == "incremental_refit" else 10 ** 9
+        config["online_training"] = {"enabled": True, "full_refit_every": full_refit_every}
+    pipeline = MLPipeline(config)
+    
+    latencies, errors, modes = [], [], {}
+    seen_features, seen_targets = [], []
+    for features, targets in batches:
+        if pipeline.is_trained:
+            errors.append(np.abs(pipeline.ensemble_model.predict(features.fillna(0).values) - targets))
+        if mode == "full_cumulative":
+            seen_features.append(features)
+            seen_targets.append(targets)
+            features, targets = pd.concat(seen_features, ignore_index=True), np.concatenate(seen_targets)
+        
+        start = time.perf_counter()
+        await pipeline.train_models(features, targets)
+        latencies.append((time.perf_counter() - start) * 1000)
+        modes[pipeline.last_training["mode"]] = modes.get(pipeline.last_training["mode"], 0) + 1
+    
+    latencies = np.array(latencies)
+    residual = pipeline.ensemble_model.predict(holdout_X) - holdout_y
+    result = {
+        "mode": mode,
+        "updates": len(batches),
+        "update_modes": modes,
+        "mean_update_ms": round(float(latencies.mean()), 3),
+        "p95_update_ms": round(float(np.percentile(latencies, 95)), 3),
+        "last_update_ms": round(float(latencies[-1]), 3),
+        "total_training_s": round(float(latencies.sum()) / 1000, 3),
+        "prequential_mae": round(float(np.mean(np.concatenate(errors))), 3),
+        "holdout_mae": round(float(np.mean(np.abs(residual))), 3),
+        "holdout_r2": round(1.0 - float(np.mean(residual ** 2)) / float(np.var(holdout_y)), 4)
+    }
+    pipeline.shutdown()
+    return result
+
+async def main_async(args):
+    batches, holdout_X, holdout_y = build_stream(args)
+    print(json.dumps({
+        "batches": len(batches), "samples": int(sum(len(targets) for _, targets in batches)),
+        "mean_batch_samples": round(float(np.mean([len(targets) for _, targets in batches])), 1),
+        "holdout_samples": len(holdout_y)
+    }))
+    for mode in args.modes:
+        print(json.dumps(await run_mode(mode, batches, holdout_X, holdout_y, args.refit_every)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=60)
+    parser.add_argument("--holdout-users", type=int, default=10)
+    parser.add_argument("--sets-per-user", type=int, default=300)
+    parser.add_argument("--sessions-per-batch", type=int, default=5)
+    parser.add_argument("--refit-every", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", default=["full", "full_cumulative", "incremental", "incremental_refit"])
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
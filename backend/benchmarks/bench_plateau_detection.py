@@ -0,0 +1,80 @@
+"""
+Benchmark de la détection de plateau multi-exercices
+
+Compare, pour des utilisateurs de 10 à 200 exercices, l'analyse exercice par
+exercice (``_analyze_exercise_plateau`` : linregress, kendalltau et boucles
+Python pour chacun, puis ``_analyze_global_plateau``) et la passe vectorisée
+de ``detect_plateaus``. Les deux résultats sont comparés avant la mesure.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_plateau_detection.py [--sessions 60]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import numpy as np
+from services.plateau_detection import AdvancedPlateauDetector
+from services.workout_frame import WorkoutFrame
+from utils.synthetic_data import generate_workout_history
+
+def per_exercise_analysis(detector: AdvancedPlateauDetector, frame: WorkoutFrame) -> dict:
+    """Ancien chemin : une analyse scalaire par exercice"""
+    exercise_data = detector._extract_exercise_data(frame)
+    plateau_analysis = {
+        name: detector._analyze_exercise_plateau(name, data)
+        for name, data in exercise_data.items()
+        if len(data) >= detector.config["min_sessions_for_plateau"]
+    }
+    global_analysis = detector._analyze_global_plateau(exercise_data)
+    return {
+        "exercise_plateaus": plateau_analysis,
+        "global_analysis": global_analysis,
+        "severity_score": detector._calculate_overall_severity(plateau_analysis)
+    }
+
+def best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    detector = AdvancedPlateauDetector()
+    for n_exercises in (10, 50, 100, 200):
+        exercises = [f"Exercice {i}" for i in range(n_exercises)]
+        history = generate_workout_history(args.sessions, exercises=exercises, sets_per_exercise=3)
+        
+        # Frame parsé une fois (comme dans une requête) : seule l'analyse est mesurée
+        frame = WorkoutFrame.from_history(history)
+        frame.dates
+        
+        reference = per_exercise_analysis(detector, frame)
+        result = detector.detect_plateaus(frame)
+        assert list(reference["exercise_plateaus"]) == list(result["exercise_plateaus"])
+        assert np.isclose(reference["severity_score"], result["severity_score"])
+        
+        loop_seconds = best_time(lambda: per_exercise_analysis(detector, frame), args.repeat)
+        batched_seconds = best_time(lambda: detector.detect_plateaus(frame), args.repeat)
+        print(json.dumps({
+            "n_exercises": n_exercises,
+            "n_sessions": args.sessions,
+            "per_exercise_ms": round(loop_seconds * 1000, 3),
+            "batched_ms": round(batched_seconds * 1000, 3),
+            "speedup": round(loop_seconds / batched_seconds, 2)
+        }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark de l'encodage JSON des réponses de prédiction
+
+Construit la réponse de ``/api/ml/predict`` pour un historique de N
+exercices (``plateau_analysis`` complète, avec ses scalaires NumPy) et
+compare le temps d'encodage :
+- ``jsonable_encoder`` : chemin par défaut de FastAPI (dict retourné par l'endpoint)
+- ``response_model`` : validation par ``PredictionResponse`` puis sérialisation Pydantic
+- ``numpy_json_response`` : ``NumpyJSONResponse`` (orjson, NumPy natif)
+- ``json_fallback`` : repli de ``NumpyJSONResponse`` sans orjson
+
+Un chemin qui échoue sur un type NumPy est reporté avec son erreur.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_response_encoding.py [--exercises 50] [--sessions 60]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from main import PredictionResponse
+from services.plateau_detection import AdvancedPlateauDetector
+from utils import serialization
+from utils.serialization import NumpyJSONResponse
+from utils.synthetic_data import generate_workout_history
+
+def build_response(exercises: int, sessions: int) -> dict:
+    """Réponse de prédiction avec l'analyse de plateaux de ``exercises`` exercices"""
+    names = [f"Exercice {i}" for i in range(exercises)]
+    history = generate_workout_history(sessions, exercises=names)
+    plateau_analysis = AdvancedPlateauDetector().detect_plateaus(history)
+    prediction = {
+        "exercise_name": names[0],
+        "predicted_weight": 82.5,
+        "confidence": 0.8,
+        "plateau_analysis": plateau_analysis,
+        "model_used": "python_ensemble",
+        "model_partition": None,
+        "features_used": 10,
+        "recommendations": ["Poids recommandé: 82.5kg"]
+    }
+    return {"success": True, "prediction": prediction, "model_info": {"is_trained": True}, "confidence": 0.8}
+
+def encoders():
+    def jsonable(content):
+        return JSONResponse(content=jsonable_encoder(content)).body
+    
+    def response_model(content):
+        return json.dumps(PredictionResponse.model_validate(content).model_dump(mode="json")).encode("utf-8")
+    
+    def numpy_json_response(content):
+        return NumpyJSONResponse(content).body
+    
+    def json_fallback(content):
+        return json.dumps(serialization.to_builtin(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    return {
+        "jsonable_encoder": jsonable,
+        "response_model": response_model,
+        "numpy_json_response": numpy_json_response,
+        "json_fallback": json_fallback
+    }
+
+def bench(encode, content, rounds: int) -> dict:
+    try:
+        body = encode(content)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"[:200]}
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encode(content)
+    return {"mean_ms": round((time.perf_counter() - start) / rounds * 1000, 4), "bytes": len(body)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    
+    content = build_response(args.exercises, args.sessions)
+    print(json.dumps({"exercises": args.exercises, "orjson": serialization.ORJSON_AVAILABLE}))
+    for name, encode in encoders().items():
+        print(json.dumps({"encoder": name, **bench(encode, content, args.rounds)}))
+
+if __name__ == "__main__":
+    main()
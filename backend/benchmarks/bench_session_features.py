@@ -0,0 +1,70 @@
+"""
+Benchmark des features avancées par séance
+
+Compare ``extract_session_matrix`` (une passe, fenêtres cumulées et glissantes)
+aux n appels de ``extract_feature_vector`` sur chaque préfixe de l'historique,
+pour des historiques de tailles croissantes : le temps par séance doit rester
+à peu près constant pour la version par séance et croître linéairement pour
+la recomputation. La recomputation n'est mesurée que jusqu'à ``--naive-max``
+séances.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_session_features.py [--sizes 100 1000 10000] [--naive-max 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Les modules de l'application s'importent depuis le dossier app/
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "app"))
+sys.path.insert(0, BENCH_DIR)
+
+from services.feature_engineering import AdvancedFeatureEngineer
+from bench_advanced_feature_engineering import USER_PROFILE, flat_history
+
+def best_of(func, repeats: int = 3) -> float:
+    """Meilleur temps d'exécution (secondes) sur ``repeats`` essais"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--naive-max", type=int, default=2000)
+    args = parser.parse_args()
+    
+    engineer = AdvancedFeatureEngineer()
+    
+    for n_sessions in args.sizes:
+        history = flat_history(n_sessions)
+        streaming_s = best_of(lambda: engineer.extract_session_matrix(history, USER_PROFILE))
+        result = {
+            "n_sessions": n_sessions,
+            "session_matrix_ms": round(streaming_s * 1e3, 2),
+            "session_matrix_us_per_session": round(streaming_s * 1e6 / n_sessions, 2)
+        }
+        
+        if n_sessions <= args.naive_max:
+            naive = lambda: [engineer.extract_feature_vector(history[:i + 1], USER_PROFILE) for i in range(n_sessions)]
+            naive_s = best_of(naive, repeats=1)
+            result["prefix_recompute_ms"] = round(naive_s * 1e3, 2)
+            result["prefix_recompute_us_per_session"] = round(naive_s * 1e6 / n_sessions, 2)
+            result["speedup"] = round(naive_s / streaming_s, 1)
+            
+            # Même résultat que la recomputation (au bruit d'arrondi près)
+            matrix = engineer.extract_session_matrix(history, USER_PROFILE)
+            result["max_abs_diff"] = float(np.max(np.abs(matrix - np.vstack(naive()))))
+        
+        print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark de SimpleFeatureEngineer.extract_features
+
+Mesure le temps d'extraction pour des historiques de 1k à 1M séries et
+vérifie que le coût par série reste constant (passage à l'échelle linéaire).
+
+Usage (depuis backend/) :
+    python benchmarks/bench_simple_feature_engineering.py [--max-sets 1000000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from services.simple_feature_engineering import SimpleFeatureEngineer
+from utils.synthetic_data import history_for_set_count
+
+def time_extraction(engineer, history, user_profile, repeat: int = 3) -> float:
+    """Meilleur temps sur ``repeat`` exécutions"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engineer.extract_features(history, user_profile)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-sets", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    engineer = SimpleFeatureEngineer()
+    user_profile = {"weight": 80}
+    
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= args.max_sets]
+    results = []
+    for n_sets in sizes:
+        history = history_for_set_count(n_sets)
+        seconds = time_extraction(engineer, history, user_profile, args.repeat)
+        results.append({
+            "n_sets": n_sets,
+            "seconds": round(seconds, 6),
+            "ns_per_set": round(seconds / n_sets * 1e9, 1)
+        })
+        print(json.dumps(results[-1]))
+    
+    # Passage à l'échelle : rapport du coût par série entre la plus grande et la plus petite taille
+    if len(results) >= 2:
+        scaling = results[-1]["ns_per_set"] / results[0]["ns_per_set"]
+        print(json.dumps({"per_set_cost_ratio_largest_vs_smallest": round(scaling, 2)}))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
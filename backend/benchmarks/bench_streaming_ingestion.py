@@ -0,0 +1,181 @@
+"""
+Benchmark de l'ingestion des gros historiques : JSON complet vs NDJSON en flux
+
+Écrit un historique synthétique d'environ ``--megabytes`` Mo (une séance
+par ligne sur disque), puis pour chaque endpoint lance un serveur uvicorn
+neuf (modèle chargé depuis un registre temporaire) et lui envoie
+l'historique en upload chunked, lu par morceaux depuis le disque :
+- ``predict`` / ``train`` : ``/api/ml/predict`` et ``/api/ml/train``, tableau JSON
+- ``predict_stream`` / ``train_stream`` : mêmes endpoints en ``/stream``, NDJSON
+
+Mesures côté serveur (``/proc/<pid>/status``, Linux) : RSS au repos et
+RSS maximal après la requête (``request_peak_mb`` = différence) ; côté
+client : temps jusqu'au premier octet de la réponse (``ttfb_ms``).
+
+Usage (depuis backend/) :
+    python benchmarks/bench_streaming_ingestion.py [--megabytes 100] [--endpoints predict,predict_stream]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BACKEND_DIR, "app")
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, APP_DIR)
+
+from utils.synthetic_data import DEFAULT_EXERCISES, generate_workout_history
+
+ENDPOINTS = ("predict", "predict_stream", "train", "train_stream")
+CHUNK_BYTES = 64 * 1024
+# Une séance par jour depuis 1750 : ~100 000 séances restent dans les bornes de datetime64[ns]
+FIRST_DAY = date(1750, 1, 1)
+
+def write_sessions(path: str, megabytes: float, block_sessions: int = 1000) -> dict:
+    """Séances JSON séparées par des sauts de ligne (sans saut final), jusqu'à ``megabytes`` Mo"""
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    sessions = 0
+    with open(path, "wb") as f:
+        block = 0
+        while written < target:
+            # Générées par blocs de ``block_sessions`` séances pour ne pas tout garder en mémoire
+            for workout in generate_workout_history(block_sessions, exercises=DEFAULT_EXERCISES, seed=block):
+                workout["date"] = (FIRST_DAY + timedelta(days=sessions)).isoformat()
+                line = json.dumps(workout, separators=(",", ":")).encode("utf-8")
+                f.write(line if sessions == 0 else b"\n" + line)
+                written += len(line) + 1
+                sessions += 1
+                if written >= target:
+                    break
+            block += 1
+    return {"sessions": sessions, "body_mb": round(written / 1024 / 1024, 1)}
+
+def request_body(endpoint: str, sessions_path: str):
+    """Corps de la requête, lu par morceaux depuis le disque"""
+    if endpoint.startswith("predict"):
+        header = {"exercise_name": "Squat", "user_data": {"current_weight": 100}}
+        history_key = "workout_history"
+    else:
+        header = {"user_id": "bench_user"}
+        history_key = "new_data"
+    
+    if endpoint.endswith("_stream"):
+        yield json.dumps(header).encode("utf-8") + b"\n"
+        suffix = b""
+    else:
+        # Tableau JSON : les sauts de ligne entre séances deviennent des virgules
+        yield json.dumps(header).encode("utf-8")[:-1] + f', "{history_key}": ['.encode("utf-8")
+        suffix = b"]}"
+    
+    with open(sessions_path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk if endpoint.endswith("_stream") else chunk.replace(b"\n", b",")
+    if suffix:
+        yield suffix
+
+def read_status_mb(pid: int) -> dict:
+    with open(f"/proc/{pid}/status") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return {key: round(int(fields[key].split()[0]) / 1024, 1) for key in ("VmRSS", "VmHWM")}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(model_path: str, port: int) -> subprocess.Popen:
+    # Échéance du single-flight au-delà du temps de traitement d'un très gros historique
+    env = {**os.environ, "ML_MODEL_PATH": model_path, "ML_PREDICTION_CACHE": "false", "ML_SINGLE_FLIGHT_TIMEOUT": "3600"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", APP_DIR,
+         "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+def bench_endpoint(endpoint: str, sessions_path: str, model_path: str) -> dict:
+    port = free_port()
+    server = start_server(model_path, port)
+    try:
+        idle = read_status_mb(server.pid)
+        path = "/api/ml/" + endpoint.replace("_stream", "/stream")
+        headers = {"Content-Type": "application/x-ndjson" if endpoint.endswith("_stream") else "application/json"}
+        
+        start = time.perf_counter()
+        with httpx.stream("POST", f"http://127.0.0.1:{port}{path}", content=request_body(endpoint, sessions_path),
+                          headers=headers, timeout=None) as response:
+            first_byte = None
+            body = b""
+            for chunk in response.iter_raw():
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                body += chunk
+        total = time.perf_counter() - start
+        
+        peak = read_status_mb(server.pid)
+        data = json.loads(body)
+        return {
+            "endpoint": endpoint,
+            "status": response.status_code,
+            "ttfb_ms": round((first_byte - start) * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+            "idle_rss_mb": idle["VmRSS"],
+            "peak_rss_mb": peak["VmHWM"],
+            "request_peak_mb": round(peak["VmHWM"] - idle["VmHWM"], 1),
+            "model_used": data.get("prediction", {}).get("model_used"),
+            "samples_trained": data.get("training_result", {}).get("samples_trained")
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=100)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    args = parser.parse_args()
+    
+    from services.ml_pipeline import MLPipeline
+    
+    workdir = tempfile.mkdtemp(prefix="stream-bench-")
+    try:
+        sessions_path = os.path.join(workdir, "sessions.ndjson")
+        print(json.dumps(write_sessions(sessions_path, args.megabytes)))
+        
+        # Modèle de départ publié dans un registre, copié pour chaque serveur
+        template = os.path.join(workdir, "template")
+        pipeline = MLPipeline({"model_registry_path": os.path.join(template, "registry")})
+        asyncio.run(pipeline.train("bench_user", generate_workout_history(200, exercises=DEFAULT_EXERCISES)))
+        pipeline.shutdown()
+        
+        for endpoint in args.endpoints.split(","):
+            model_path = os.path.join(workdir, endpoint)
+            shutil.copytree(template, model_path)
+            print(json.dumps(bench_endpoint(endpoint, sessions_path, model_path)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Suite de benchmarks de l'API ML : courbes de passage à l'échelle en JSON
+
+Pour chaque nombre de séances de ``--sessions``, génère ``--users``
+utilisateurs synthétiques (``generate_user_histories`` : ``--exercises``
+exercices, ``--sets`` séries par exercice, profil de progression
+``--pattern``) et mesure sur leurs historiques :
+- ``simple_features.latest`` / ``.matrix`` : SimpleFeatureEngineer
+  (ligne de la prochaine série, matrice d'entraînement)
+- ``advanced_features.vector`` : AdvancedFeatureEngineer.extract_feature_vector
+  (historique à plat)
+- ``plateau_detection.exercise`` / ``.full`` : AdvancedPlateauDetector
+- ``pipeline.predict`` : MLPipeline.predict (cache et single-flight désactivés)
+- ``pipeline.train`` : MLPipeline.train sur l'historique d'un utilisateur
+- ``http.predict`` / ``http.train`` : endpoints de l'API en processus
+  (httpx.ASGITransport, sans réseau)
+
+Chaque mesure est répétée ``--rounds`` fois par utilisateur. La sortie est
+un document JSON ``{config, environment, benchmarks}`` : pour chaque
+benchmark, un point par taille (p50, moyenne et min en ms) et l'exposant
+de passage à l'échelle (pente de log(p50) selon log(séances)).
+``--baseline`` ajoute à chaque point le p50 d'un résultat précédent et le
+gain correspondant.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_suite.py [--sessions 25,100,400] [--users 4] [--exercises 4] [--sets 3]
+        [--pattern mixed] [--rounds 5] [--only plateau_detection,http]
+        [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+import main as api
+from services.feature_engineering import AdvancedFeatureEngineer
+from services.ml_pipeline import MLPipeline
+from services.plateau_detection import AdvancedPlateauDetector
+from services.simple_feature_engineering import SimpleFeatureEngineer
+from utils.synthetic_data import PROGRESSION_PATTERNS, flatten_history, generate_user_histories, generate_workout_history
+
+BENCHMARKS = (
+    "simple_features.latest", "simple_features.matrix", "advanced_features.vector",
+    "plateau_detection.exercise", "plateau_detection.full",
+    "pipeline.predict", "pipeline.train", "http.predict", "http.train"
+)
+
+def measure(call, users, rounds: int) -> list:
+    """Durées (ms) de ``call(user)`` pour chaque utilisateur, ``rounds`` fois"""
+    samples = []
+    for _ in range(rounds):
+        for user in users:
+            start = time.perf_counter()
+            call(user)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def measure_async(call, users, rounds: int) -> list:
+    """Comme ``measure``, pour une coroutine"""
+    samples = []
+    for _ in range(rounds):
+        for user in users:
+            start = time.perf_counter()
+            await call(user)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def exercise_of(user) -> str:
+    return user["workout_history"][0]["exercises"][0]["name"]
+
+def predict_payload(user) -> dict:
+    return {"exercise_name": exercise_of(user), "user_data": {"current_weight": 80}, "workout_history": user["workout_history"]}
+
+async def run_point(selected, users, rounds: int, pipeline: MLPipeline, client: httpx.AsyncClient) -> dict:
+    """Échantillons (ms) de chaque benchmark sélectionné pour un jeu d'utilisateurs"""
+    simple = SimpleFeatureEngineer()
+    advanced = AdvancedFeatureEngineer()
+    detector = AdvancedPlateauDetector()
+    flat = {id(user): flatten_history(user["workout_history"]) for user in users}
+    
+    calls = {
+        "simple_features.latest": lambda user: simple.extract_latest_features(
+            user["workout_history"], {"current_weight": 80}, exercise_of(user)),
+        "simple_features.matrix": lambda user: simple.extract_features(user["workout_history"], user["user_profile"]),
+        "advanced_features.vector": lambda user: advanced.extract_feature_vector(flat[id(user)], user["user_profile"]),
+        "plateau_detection.exercise": lambda user: detector.detect_plateaus(user["workout_history"], exercise_of(user)),
+        "plateau_detection.full": lambda user: detector.detect_plateaus(user["workout_history"])
+    }
+    
+    async def pipeline_predict(user):
+        result = await pipeline.predict(**predict_payload(user))
+        assert result["model_used"] == "python_ensemble", result
+    
+    async def http_predict(user):
+        response = await client.post("/api/ml/predict", json=predict_payload(user))
+        assert response.status_code == 200 and response.json()["prediction"]["model_used"] == "python_ensemble", response.text
+    
+    async def http_train(user):
+        response = await client.post("/api/ml/train", json={"user_id": user["user_id"], "new_data": user["workout_history"]})
+        assert response.status_code == 200, response.text
+    
+    async_calls = {
+        "pipeline.predict": pipeline_predict,
+        "pipeline.train": lambda user: pipeline.train(user["user_id"], user["workout_history"], user_profile=user["user_profile"]),
+        "http.predict": http_predict,
+        "http.train": http_train
+    }
+    
+    samples = {}
+    for name in selected:
+        if name in calls:
+            samples[name] = measure(calls[name], users, rounds)
+        elif name.endswith(".train"):
+            # Entraînement : un seul utilisateur, le plus coûteux
+            samples[name] = await measure_async(async_calls[name], users[:1], rounds)
+        else:
+            samples[name] = await measure_async(async_calls[name], users, rounds)
+    return samples
+
+def point_summary(n_sessions: int, n_sets: int, samples: list) -> dict:
+    return {
+        "sessions": n_sessions,
+        "sets": n_sets,
+        "samples": len(samples),
+        "p50_ms": round(float(np.median(samples)), 3),
+        "mean_ms": round(float(np.mean(samples)), 3),
+        "min_ms": round(float(np.min(samples)), 3)
+    }
+
+def scaling_exponent(points: list):
+    """Pente de log(p50) selon log(séances) : 1 pour un coût linéaire"""
+    if len(points) < 2:
+        return None
+    sessions = np.log([point["sessions"] for point in points])
+    p50 = np.log([max(point["p50_ms"], 1e-6) for point in points])
+    return round(float(np.polyfit(sessions, p50, 1)[0]), 3)
+
+def compare_with_baseline(benchmarks: dict, baseline: dict):
+    """Ajoute à chaque point le p50 du point de même taille dans ``baseline`` et le gain"""
+    for name, result in benchmarks.items():
+        previous = {point["sessions"]: point for point in baseline.get("benchmarks", {}).get(name, {}).get("points", [])}
+        for point in result["points"]:
+            if point["sessions"] in previous:
+                point["baseline_p50_ms"] = previous[point["sessions"]]["p50_ms"]
+                point["speedup"] = round(point["baseline_p50_ms"] / max(point["p50_ms"], 1e-6), 3)
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit
+    }
+
+async def run(args) -> dict:
+    sessions_list = [int(n) for n in args.sessions.split(",")]
+    selected = [name for name in BENCHMARKS if not args.only or any(name.startswith(prefix) for prefix in args.only.split(","))]
+    
+    # Pipeline entraîné une fois ; l'API en processus le sert directement (sans lifespan)
+    pipeline = MLPipeline({"prediction_cache": {"enabled": False}, "single_flight": {"enabled": False}})
+    await pipeline.train("bench_user", generate_workout_history(100))
+    api.ml_pipeline, api.ensemble_model = pipeline, pipeline.ensemble_model
+    
+    points = {name: [] for name in selected}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench") as client:
+        for n_sessions in sessions_list:
+            users = generate_user_histories(args.users, args.exercises, n_sessions, args.sets, args.pattern, seed=args.seed)
+            samples = await run_point(selected, users, args.rounds, pipeline, client)
+            for name, values in samples.items():
+                points[name].append(point_summary(n_sessions, n_sessions * args.exercises * args.sets, values))
+    pipeline.shutdown()
+    
+    return {
+        "config": {key: getattr(args, key) for key in ("sessions", "users", "exercises", "sets", "pattern", "rounds", "seed")},
+        "environment": environment(),
+        "benchmarks": {name: {"points": points[name], "scaling_exponent": scaling_exponent(points[name])} for name in selected}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="25,100,400")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--exercises", type=int, default=4)
+    parser.add_argument("--sets", type=int, default=3)
+    parser.add_argument("--pattern", default="mixed", choices=PROGRESSION_PATTERNS)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="préfixes de benchmarks séparés par des virgules (ex. plateau_detection,http)")
+    parser.add_argument("--output", help="écrit aussi le résultat dans ce fichier")
+    parser.add_argument("--baseline", help="résultat précédent à comparer, point par point")
+    args = parser.parse_args()
+    
+    result = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare_with_baseline(result["benchmarks"], json.load(f))
+    
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
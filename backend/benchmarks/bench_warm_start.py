@@ -0,0 +1,83 @@
+"""
+Benchmark du démarrage à chaud depuis le registre de modèles
+
+Entraîne un pipeline sur un historique synthétique et le publie dans un
+registre temporaire, puis lance des processus Python neufs qui mesurent le
+délai entre le démarrage et la première prédiction réelle (``python_ensemble``,
+pas le fallback) :
+- ``registry`` : ``warm_start`` charge la dernière version (mmap ou non)
+- ``retrain`` : sans registre, il faut réentraîner avant de prédire
+
+Usage (depuis backend/) :
+    python benchmarks/bench_warm_start.py [--sessions 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROCESS_START = time.perf_counter()
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de l'application s'importent depuis le dossier app/
+sys.path.insert(0, os.path.join(BACKEND_DIR, "app"))
+
+def elapsed_ms() -> float:
+    return round((time.perf_counter() - PROCESS_START) * 1000, 3)
+
+async def child(mode: str, registry_path: str, sessions: int, mmap: bool) -> dict:
+    """Processus neuf : imports, modèle prêt, première prédiction réelle"""
+    from services.ml_pipeline import MLPipeline
+    from utils.synthetic_data import generate_workout_history
+    timings = {"mode": mode, "mmap": mmap if mode == "registry" else None, "imports_ms": elapsed_ms()}
+    
+    history = generate_workout_history(sessions)
+    if mode == "registry":
+        pipeline = MLPipeline({"model_registry_path": registry_path, "registry_mmap": mmap})
+        assert await pipeline.warm_start()
+    else:
+        pipeline = MLPipeline()
+        await pipeline.train("bench_user", history)
+    timings["model_ready_ms"] = elapsed_ms()
+    
+    result = await pipeline.predict("Squat", {"current_weight": 80}, history)
+    assert result["model_used"] == "python_ensemble", result
+    timings["first_real_prediction_ms"] = elapsed_ms()
+    pipeline.shutdown()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--child", choices=["registry", "retrain"])
+    parser.add_argument("--registry")
+    parser.add_argument("--no-mmap", action="store_true")
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(asyncio.run(child(args.child, args.registry, args.sessions, not args.no_mmap))))
+        return
+    
+    from services.ml_pipeline import MLPipeline
+    from utils.synthetic_data import generate_workout_history
+    
+    registry_path = tempfile.mkdtemp(prefix="registry-")
+    pipeline = MLPipeline({"model_registry_path": registry_path})
+    asyncio.run(pipeline.train("bench_user", generate_workout_history(args.sessions)))
+    pipeline.shutdown()
+    
+    runs = [["--child", "registry"], ["--child", "registry", "--no-mmap"], ["--child", "retrain"]]
+    for extra in runs:
+        command = [sys.executable, os.path.abspath(__file__), "--registry", registry_path,
+                   "--sessions", str(args.sessions), *extra]
+        start = time.perf_counter()
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        timings["wall_clock_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        print(json.dumps(timings))
+
+if __name__ == "__main__":
+    main()
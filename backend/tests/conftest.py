@@ -9,6 +9,8 @@ from unittest.mock import Mock
 
 # Ajouter le dossier parent au PYTHONPATH pour les imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Les modules de l'application s'importent entre eux depuis app/ (services.*, models.*, utils.*)
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -131,6 +131,187 @@ class TestAPI:
         assert response.status_code == 200
         data = response.json()
         assert data["success"] == True
+    
+    def test_predict_batch_preserves_order(self):
+        """Test de prédiction groupée : un résultat par élément, dans l'ordre"""
+        payload = {
+            "items": [
+                {
+                    "exercise_name": exercise,
+                    "user_id": "test_user_123",
+                    "user_data": {"current_weight": weight},
+                    "workout_history": [{
+                        "date": "2024-01-01",
+                        "exercises": [{"name": exercise, "sets": [{"weight": weight, "reps": 8}]}]
+                    }]
+                }
+                for exercise, weight in [("Squat", 100), ("Développé couché", 80), ("Curl biceps", 15)]
+            ]
+        }
+        
+        response = client.post("/api/ml/predict/batch", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] == True
+        assert data["count"] == 3
+        assert [r["prediction"]["exercise_name"] for r in data["results"]] == ["Squat", "Développé couché", "Curl biceps"]
+        assert all("confidence" in r for r in data["results"])
+    
+    def test_predict_batch_empty(self):
+        """Test de prédiction groupée sans élément"""
+        response = client.post("/api/ml/predict/batch", json={"items": []})
+        assert response.status_code == 422
+    
+    def test_metrics_endpoint(self):
+        """Test de l'exposition Prometheus après une prédiction de fallback"""
+        client.post("/api/ml/predict", json={"exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": []})
+        
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'ml_predictions_total{model_used="simple_fallback"}' in response.text
+        assert 'ml_requests_in_flight{endpoint="predict"} 0.0' in response.text
+        assert 'ml_request_duration_seconds_count{endpoint="predict"}' in response.text
+        assert "ml_stage_duration_seconds_bucket" in response.text
+    
+    def test_predict_response_matches_model_with_numpy_values(self, monkeypatch):
+        """Réponse du pipeline (scalaires NumPy du plateau) encodée et conforme à ``PredictionResponse``"""
+        from app import main
+        from app.services.ml_pipeline import MLPipeline
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=12)
+        pipeline = MLPipeline()
+        asyncio.run(pipeline.train("test_user_123", history))
+        monkeypatch.setattr(main, "ml_pipeline", pipeline)
+        
+        response = client.post("/api/ml/predict", json={
+            "exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": history
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        
+        data = main.PredictionResponse.model_validate(response.json())
+        assert data.prediction.model_used == "python_ensemble"
+        assert "Squat" in data.prediction.plateau_analysis.exercise_plateaus
+        
+        schema = client.get("/openapi.json").json()
+        assert schema["paths"]["/api/ml/predict"]["post"]["responses"]["200"]["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/PredictionResponse"
+        }
+    
+    def test_predict_analysis_depth(self, monkeypatch):
+        """Option ``analysis_depth`` : poids seul sans plateau ni confiance ; valeur inconnue refusée"""
+        from app import main
+        from app.services.ml_pipeline import MLPipeline
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=14)
+        pipeline = MLPipeline()
+        asyncio.run(pipeline.train("test_user_123", history))
+        monkeypatch.setattr(main, "ml_pipeline", pipeline)
+        
+        payload = {"exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": history}
+        data = main.PredictionResponse.model_validate(client.post("/api/ml/predict", json={**payload, "analysis_depth": "weight"}).json())
+        assert data.prediction.analysis_depth == "weight" and data.prediction.model_used == "python_ensemble"
+        assert (data.prediction.plateau_analysis, data.confidence) == (None, None)
+        
+        assert client.post("/api/ml/predict", json={**payload, "analysis_depth": "deep"}).status_code == 422
+    
+    def test_train_overloaded_after_check_returns_503(self, monkeypatch):
+        """File d'entraînement remplie entre la vérification et la soumission : 503, pas 500"""
+        from app import main
+        from app.services.ml_pipeline import MLPipeline
+        
+        pipeline = MLPipeline()
+        
+        async def overloaded(**kwargs):
+            raise main.ExecutorOverloadedError("training", 2)
+        
+        monkeypatch.setattr(pipeline, "train", overloaded)
+        monkeypatch.setattr(main, "ml_pipeline", pipeline)
+        
+        response = client.post("/api/ml/train", json={"user_id": "u1", "new_data": [{"date": "2024-01-01", "exercises": []}]})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+        pipeline.shutdown()
+    
+    @pytest.mark.parametrize("warmup", [True, False])
+    def test_readiness_after_warmup(self, monkeypatch, tmp_path, warmup):
+        """Démarrage complet : /health/live répond, /health/ready passe à 200 après le préchauffage"""
+        import time
+        from app import main
+        from app.services.ml_pipeline import MLPipeline
+        from app.utils.synthetic_data import generate_workout_history
+        
+        pipeline = MLPipeline({"model_registry_path": str(tmp_path / "registry")})
+        asyncio.run(pipeline.train("test_user_123", generate_workout_history(30, seed=15)))
+        pipeline.shutdown()
+        
+        monkeypatch.setenv("ML_MODEL_PATH", str(tmp_path))
+        monkeypatch.setenv("ML_WARMUP", str(warmup).lower())
+        monkeypatch.setenv("ML_INCREMENTAL_FEATURES", "true")
+        monkeypatch.setenv("ML_INCREMENTAL_PLATEAU", "true")
+        monkeypatch.setattr(main, "ml_pipeline", None)
+        monkeypatch.setattr(main, "ensemble_model", None)
+        monkeypatch.setattr(main, "readiness", {"ready": False, "warmup": None})
+        
+        with TestClient(main.app) as lifespan_client:
+            assert lifespan_client.get("/health/live").json() == {"status": "alive"}
+            deadline = time.time() + 30
+            while lifespan_client.get("/health/ready").status_code == 503 and time.time() < deadline:
+                time.sleep(0.05)
+            
+            ready = lifespan_client.get("/health/ready")
+            assert ready.status_code == 200
+            assert ready.json()["warmup"] == ("done" if warmup else "disabled")
+            assert lifespan_client.get("/health").json()["ready"] is True
+            
+            startup = lifespan_client.get("/api/ml/status").json()["startup"]
+            if warmup:
+                assert startup["warmup"]["model_warmed"] is True
+                assert set(startup["warmup"]["stages"]) == {"feature_extraction", "inference", "plateau_detection"}
+                assert ready.json()["warmup_ms"] == startup["warmup"]["warmup_ms"] > 0
+            else:
+                assert "warmup" not in startup
+            
+            # Aucune donnée de préchauffage dans le cache ni dans les stores incrémentaux
+            assert main.ml_pipeline.get_cache_stats()["entries"] == 0
+            assert len(main.ml_pipeline.feature_store._states) == len(main.ml_pipeline.plateau_store._states) == 0
+    
+    def test_stream_endpoints_match_json_endpoints(self, monkeypatch):
+        """NDJSON envoyé par morceaux : même prédiction et même entraînement que les endpoints JSON"""
+        from app import main
+        from app.services.ml_pipeline import MLPipeline
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=13)
+        pipeline = MLPipeline({"prediction_cache": {"enabled": False}})
+        asyncio.run(pipeline.train("test_user_123", history))
+        monkeypatch.setattr(main, "ml_pipeline", pipeline)
+        
+        def ndjson(header):
+            body = "\n".join(json.dumps(line) for line in [header, *history]).encode("utf-8")
+            return (body[i:i + 1000] for i in range(0, len(body), 1000))
+        
+        user_data = {"current_weight": 100}
+        expected = client.post("/api/ml/predict", json={
+            "exercise_name": "Squat", "user_data": user_data, "workout_history": history
+        }).json()
+        response = client.post("/api/ml/predict/stream", content=ndjson({"exercise_name": "Squat", "user_data": user_data}),
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.json()["prediction"] == expected["prediction"]
+        
+        expected = client.post("/api/ml/train", json={"user_id": "u1", "new_data": history}).json()
+        response = client.post("/api/ml/train/stream", content=ndjson({"user_id": "u1"}))
+        assert response.status_code == 200
+        assert response.json()["training_result"]["samples_trained"] == expected["training_result"]["samples_trained"]
+        
+        # Ligne invalide : 400 avec son numéro ; en-tête incomplet : 422 comme les endpoints JSON
+        response = client.post("/api/ml/predict/stream", content=b'{"exercise_name": "Squat"}\n{"date": ')
+        assert response.status_code == 400 and "Ligne 2" in response.json()["detail"]
+        assert client.post("/api/ml/train/stream", content=b'{"retrain": true}\n').status_code == 422
 
 class TestAPIPerformance:
     """Tests de performance pour l'API"""
@@ -0,0 +1,79 @@
+import pytest
+import json
+import numpy as np
+from services import bulk_training
+from services.bulk_training import NpyAppender, build_training_matrix, load_training_rows
+from services.simple_feature_engineering import SimpleFeatureEngineer
+from utils.synthetic_data import iter_user_documents
+
+def expected_rows(documents):
+    engineer = SimpleFeatureEngineer()
+    rows = [bulk_training.user_training_rows(engineer, document) for document in documents]
+    return np.concatenate([X for X, _ in rows]), np.concatenate([y for _, y in rows])
+
+class TestBulkTraining:
+    """Tests de l'entraînement hors ligne sur dump"""
+    
+    def test_npy_appender_round_trip(self, tmp_path):
+        path = str(tmp_path / "rows.npy")
+        chunks = [np.arange(12, dtype=np.float64).reshape(4, 3), np.ones((2, 3))]
+        with NpyAppender(path, 3) as appender:
+            for chunk in chunks:
+                appender.append(chunk)
+            with pytest.raises(ValueError):
+                appender.append(np.ones((1, 2)))
+        
+        loaded = np.load(path, mmap_mode="r")
+        assert isinstance(loaded, np.memmap)
+        np.testing.assert_array_equal(loaded, np.concatenate(chunks))
+    
+    @pytest.mark.parametrize("workers", [0, 1])
+    def test_matrix_matches_per_user_features(self, tmp_path, workers):
+        """Même matrice qu'en concaténant les features de chaque utilisateur, dans l'ordre du dump"""
+        dump = str(tmp_path / "dump.jsonl")
+        documents = list(iter_user_documents(12, 60, seed=1))
+        documents.append({"user_id": "empty", "user_profile": {}, "workout_history": []})
+        bulk_training.write_workout_dump(dump, documents)
+        
+        stats = build_training_matrix(bulk_training.iter_dump_users(dump), str(tmp_path / "matrix"), workers=workers, chunk_users=5)
+        X, y = load_training_rows(stats["features_path"], stats["targets_path"])
+        expected_X, expected_y = expected_rows(documents)
+        
+        assert stats["users"] == 13 and stats["skipped_users"] == 1 and stats["chunks"] == 3
+        np.testing.assert_array_equal(X, expected_X)
+        np.testing.assert_array_equal(y, expected_y)
+    
+    def test_sampled_rows_are_a_subset(self, tmp_path):
+        features_path, targets_path = str(tmp_path / "features.npy"), str(tmp_path / "targets.npy")
+        with NpyAppender(features_path, 2) as features, NpyAppender(targets_path) as targets:
+            features.append(np.arange(2000, dtype=np.float64).reshape(1000, 2))
+            targets.append(np.arange(1000, dtype=np.float64))
+        
+        X, y = load_training_rows(features_path, targets_path, max_rows=100, block_rows=64)
+        
+        assert X.shape == (100, 2) and not isinstance(X, np.memmap)
+        assert len(np.unique(y)) == 100 and np.all(np.diff(y) > 0)
+        np.testing.assert_array_equal(X[:, 0], 2 * y)
+    
+    def test_train_publishes_to_registry(self, tmp_path):
+        from services.model_registry import ModelRegistry
+        
+        dump = str(tmp_path / "dump.jsonl")
+        bulk_training.write_workout_dump(dump, iter_user_documents(8, 40, seed=2))
+        stats = build_training_matrix(bulk_training.iter_dump_users(dump), str(tmp_path / "matrix"), workers=0)
+        result = bulk_training.train_from_matrix(
+            stats["features_path"], stats["targets_path"], registry_path=str(tmp_path / "registry"), max_train_rows=200
+        )
+        
+        assert result["version"] == 1 and result["train_rows"] == 200
+        _, manifest = ModelRegistry(str(tmp_path / "registry")).load()
+        assert manifest["feature_names"] == SimpleFeatureEngineer().feature_names
+        assert manifest["n_samples"] == 200
+    
+    def test_parquet_dump_round_trip(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        documents = list(iter_user_documents(5, 30, seed=3))
+        dump = str(tmp_path / "dump.parquet")
+        bulk_training.write_workout_dump(dump, documents, batch_rows=50)
+        
+        assert json.dumps(list(bulk_training.iter_dump_users(dump))) == json.dumps(documents)
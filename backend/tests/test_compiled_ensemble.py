@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from services.compiled_ensemble import UnsupportedModelError, compile_ensemble
+from services.online_model import OnlineEnsembleModel
+
+def make_data(n, seed=0):
+    """Target non linéaire sur des features d'échelles très différentes"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5)) * [1.0, 10.0, 100.0, 0.1, 5.0] + [0.0, 50.0, 1000.0, 2.0, 20.0]
+    y = X @ [2.0, 0.5, 0.05, 10.0, 1.0] + 3.0 * np.sin(X[:, 0]) + rng.normal(scale=0.5, size=n)
+    return X, y
+
+class SklearnEnsemble:
+    """Ensemble de la forme d'``AdvancedEnsembleModel`` : membres, scaler par membre, poids"""
+    
+    def __init__(self, members, scaler=StandardScaler):
+        self.models = members
+        self.scalers = {}
+        self.ensemble_weights = {}
+        self.is_trained = False
+        self.scaler_class = scaler
+    
+    def train(self, X, y):
+        for name, model in self.models.items():
+            self.scalers[name] = self.scaler_class().fit(X)
+            model.fit(self.scalers[name].transform(X), y)
+        self.ensemble_weights = {name: (i + 1) / 10 for i, name in enumerate(self.models)}
+        self.is_trained = True
+        return self
+    
+    def predict(self, X):
+        return sum(weight * self.models[name].predict(self.scalers[name].transform(X))
+                   for name, weight in self.ensemble_weights.items())
+
+def full_ensemble(scaler=StandardScaler):
+    return SklearnEnsemble({
+        "random_forest": RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0),
+        "gradient_boosting": GradientBoostingRegressor(n_estimators=10, max_depth=3, random_state=0),
+        "linear_regression": LinearRegression(),
+        "ridge": Ridge(alpha=1.0)
+    }, scaler)
+
+class TestCompiledEnsemble:
+    """Tests de la forme compilée (NumPy) des ensembles"""
+    
+    @pytest.mark.parametrize("scaler", [StandardScaler, MinMaxScaler])
+    def test_matches_sklearn_ensemble(self, scaler):
+        X, y = make_data(300)
+        model = full_ensemble(scaler).train(X, y)
+        compiled = compile_ensemble(model, X)
+        
+        X_test, _ = make_data(500, seed=1)
+        np.testing.assert_allclose(compiled.predict(X_test), model.predict(X_test), rtol=1e-9, atol=1e-9)
+        assert compiled.predict(X_test[0]).shape == (1,)
+        
+        stats = compiled.get_stats()
+        assert (stats["linear_members"], stats["trees"]) == (2, 20)
+        assert stats["depth"] <= 6 and stats["max_error"] < 1e-9
+    
+    def test_matches_online_ensemble(self):
+        X, y = make_data(300)
+        model = OnlineEnsembleModel()
+        model.train(X, y)
+        model.partial_fit(*make_data(50, seed=2))
+        compiled = compile_ensemble(model)
+        
+        # Tout est linéaire : un seul vecteur de coefficients
+        assert compiled.get_stats()["trees"] == 0
+        X_test, _ = make_data(100, seed=3)
+        np.testing.assert_allclose(compiled.predict(X_test), model.predict(X_test), rtol=1e-9)
+    
+    def test_ill_conditioned_linear_member_is_not_folded(self):
+        """Coefficients énormes qui se compensent (features colinéaires) : forme exacte conservée"""
+        X, y = make_data(300)
+        X[:, 1] = X[:, 0] * 3.0 + 7.0
+        model = full_ensemble().train(X, y)
+        model.models["linear_regression"].coef_ = np.array([1e14, -1e14, 0.5, 1.0, 2.0])
+        compiled = compile_ensemble(model, X)
+        
+        assert (compiled.get_stats()["linear_members"], compiled.get_stats()["exact_linear_members"]) == (1, 1)
+        np.testing.assert_allclose(compiled.predict(X[:50]), model.predict(X[:50]), rtol=1e-9)
+    
+    def test_unsupported_or_divergent_models_are_rejected(self):
+        X, y = make_data(100)
+        with pytest.raises(UnsupportedModelError):
+            compile_ensemble(full_ensemble())
+        
+        model = full_ensemble().train(X, y)
+        model.models["ridge"] = object()
+        with pytest.raises(UnsupportedModelError):
+            compile_ensemble(model, X)
+        
+        # Combinaison que la forme compilée ne reproduit pas : écart détecté à la vérification
+        clipped = full_ensemble().train(X, y)
+        clipped.predict = lambda rows: np.clip(SklearnEnsemble.predict(clipped, rows), None, np.median(y))
+        with pytest.raises(UnsupportedModelError):
+            compile_ensemble(clipped, X)
@@ -0,0 +1,580 @@
+import pytest
+import numpy as np
+import pandas as pd
+from services.simple_feature_engineering import SimpleFeatureEngineer
+from services.plateau_detection import AdvancedPlateauDetector
+from services.workout_frame import WorkoutFrame
+from services.feature_store import IncrementalFeatureStore
+from services.plateau_store import IncrementalPlateauStore
+from utils.synthetic_data import generate_workout_history
+import warnings
+warnings.filterwarnings('ignore')
+
+def reference_simple_features(workout_data, user_profile):
+    """Ancienne implémentation en boucle (O(n²)) servant de référence"""
+    all_weights = []
+    all_reps = []
+    for workout in workout_data:
+        for exercise in workout.get('exercises', []):
+            for set_data in exercise.get('sets', []):
+                weight = set_data.get('weight')
+                reps = set_data.get('reps')
+                if weight is not None and reps is not None:
+                    all_weights.append(float(weight))
+                    all_reps.append(int(reps))
+    
+    if len(all_weights) < 2:
+        return pd.DataFrame()
+    
+    features_list = []
+    for i in range(len(all_weights) - 1):
+        current_weight = all_weights[i]
+        if i > 0:
+            previous_weight = all_weights[i-1]
+            weight_progression = current_weight - previous_weight
+            progression_rate = weight_progression / previous_weight if previous_weight > 0 else 0
+        else:
+            previous_weight = current_weight
+            weight_progression = 0
+            progression_rate = 0
+        user_weight = user_profile.get('weight', 70)
+        features_list.append({
+            'current_weight': current_weight,
+            'previous_weight': previous_weight,
+            'weight_progression': weight_progression,
+            'avg_reps': np.mean(all_reps[:i+1]),
+            'max_weight': max(all_weights[:i+1]),
+            'min_weight': min(all_weights[:i+1]),
+            'total_volume': current_weight * all_reps[i],
+            'progression_rate': progression_rate,
+            'user_weight_ratio': current_weight / user_weight if user_weight > 0 else 0,
+            'session_number': i + 1
+        })
+    return pd.DataFrame(features_list)
+
+class TestSimpleFeatureEngineer:
+    """Tests de l'extraction vectorisée des features simples"""
+    
+    def setup_method(self):
+        """Setup pour chaque test"""
+        self.engineer = SimpleFeatureEngineer()
+    
+    @pytest.mark.parametrize("n_sessions", [1, 2, 5, 40])
+    def test_matches_reference_implementation(self, n_sessions):
+        """Les colonnes doivent être identiques (valeurs et dtypes) à l'ancienne boucle"""
+        history = generate_workout_history(n_sessions, seed=n_sessions)
+        profile = {"weight": 82.5}
+        
+        features = self.engineer.extract_features(history, profile)
+        expected = reference_simple_features(history, profile)
+        
+        pd.testing.assert_frame_equal(features, expected, check_exact=True)
+    
+    @pytest.mark.parametrize("profile", [{}, {"weight": 0}, {"weight": 75}])
+    def test_edge_cases_match_reference(self, profile):
+        """Cas limites : une seule ligne, poids nuls, séries incomplètes"""
+        histories = [
+            [{"exercises": [{"sets": [{"weight": 50, "reps": 5}, {"weight": 55, "reps": 5}]}]}],
+            [{"exercises": [{"sets": [{"weight": 0, "reps": 5}, {"weight": 0, "reps": 3}, {"weight": 10, "reps": 2}]}]}],
+            [{"exercises": [{"sets": [{"weight": 20, "reps": 5}, {"weight": None, "reps": 5},
+                                      {"weight": 25}, {"weight": 0, "reps": 4}, {"weight": 30, "reps": 1}]}]}],
+        ]
+        for history in histories:
+            features = self.engineer.extract_features(history, profile)
+            expected = reference_simple_features(history, profile)
+            pd.testing.assert_frame_equal(features, expected, check_exact=True)
+    
+    def test_insufficient_data(self):
+        """Moins de deux séries : DataFrame vide"""
+        history = [{"exercises": [{"sets": [{"weight": 50, "reps": 5}]}]}]
+        assert self.engineer.extract_features(history, {}).empty
+        assert self.engineer.extract_features([], {}).empty
+    
+    def test_invalid_values_return_empty(self):
+        """Des valeurs non numériques ne doivent pas lever d'exception"""
+        history = [{"exercises": [{"sets": [{"weight": "lourd", "reps": 5}, {"weight": 50, "reps": 5}]}]}]
+        assert self.engineer.extract_features(history, {}).empty
+
+def reference_exercise_data(workout_history):
+    """Ancienne extraction par exercice de la détection de plateau"""
+    exercise_data = {}
+    for workout in workout_history:
+        workout_date = pd.to_datetime(workout.get('date', pd.Timestamp.now()))
+        for exercise in workout.get('exercises', []):
+            exercise_name = exercise.get('name')
+            if not exercise_name:
+                continue
+            exercise_data.setdefault(exercise_name, [])
+            max_weight = 0
+            total_volume = 0
+            for set_data in exercise.get('sets', []):
+                weight = float(set_data.get('weight', 0))
+                reps = int(set_data.get('reps', 0))
+                max_weight = max(max_weight, weight)
+                total_volume += weight * reps
+            if max_weight > 0:
+                exercise_data[exercise_name].append((workout_date, max_weight, total_volume, len(exercise.get('sets', []))))
+    for exercise_name in exercise_data:
+        exercise_data[exercise_name].sort(key=lambda x: x[0])
+    return exercise_data
+
+class TestWorkoutFrame:
+    """Tests du frame columnaire partagé par les services"""
+    
+    def setup_method(self):
+        """Setup pour chaque test"""
+        self.history = generate_workout_history(12, exercises=["Squat", "Développé couché", "Tractions"], seed=3)
+        # Séances dans le désordre et blocs incomplets
+        self.history[4], self.history[7] = self.history[7], self.history[4]
+        self.history.append({"date": "2023-03-01", "exercises": [{"name": "Squat", "sets": []}, {"sets": [{"weight": 10, "reps": 5}]}]})
+    
+    def test_columns_and_offsets(self):
+        """Les séries de chaque exercice sont retrouvées dans l'ordre de l'historique"""
+        frame = WorkoutFrame.from_history(self.history)
+        
+        assert len(frame) == len(self.history)
+        assert frame.n_sets == 12 * 3 * 3 + 1
+        assert frame.exercise_names == ["Squat", "Développé couché", "Tractions"]
+        assert frame.exercise_offsets[-1] == frame.n_sets - 1  # la série sans nom est exclue
+        
+        squat_sets = frame.exercise_set_indices("Squat")
+        expected = [
+            float(s["weight"])
+            for w in self.history for e in w["exercises"] if e.get("name") == "Squat" for s in e["sets"]
+        ]
+        assert frame.weights[squat_sets].tolist() == expected
+        assert np.all(np.diff(squat_sets) > 0)
+        assert len(frame.exercise_set_indices("Inconnu")) == 0
+    
+    def test_dates_parsed_once(self):
+        """Les dates sont parsées à la première utilisation puis réutilisées"""
+        frame = WorkoutFrame.from_history(self.history)
+        dates = frame.dates
+        
+        assert dates.dtype == np.dtype('datetime64[ns]')
+        assert frame.dates is dates
+        assert pd.Timestamp(dates[0]) == pd.Timestamp(self.history[0]["date"])
+    
+    def test_plateau_exercise_data_matches_reference(self):
+        """La détection de plateau obtient les mêmes données qu'avec l'ancienne boucle"""
+        detector = AdvancedPlateauDetector()
+        
+        assert detector._extract_exercise_data(self.history) == reference_exercise_data(self.history)
+        assert detector._extract_exercise_data(WorkoutFrame.from_history(self.history)) == reference_exercise_data(self.history)
+    
+    def test_services_accept_frame(self):
+        """Un frame construit une fois donne les mêmes résultats que l'historique brut"""
+        frame = WorkoutFrame.from_history(self.history)
+        engineer = SimpleFeatureEngineer()
+        detector = AdvancedPlateauDetector()
+        
+        pd.testing.assert_frame_equal(
+            engineer.extract_features(frame, {"weight": 80}),
+            engineer.extract_features(self.history, {"weight": 80})
+        )
+        assert detector.detect_plateaus(frame)["severity_score"] == detector.detect_plateaus(self.history)["severity_score"]
+    
+    def test_targets_and_recent_weights(self):
+        """Poids positifs (targets) et poids récents du fallback"""
+        history = [
+            {"exercises": [{"name": "Squat", "sets": [{"weight": 0, "reps": 5}, {"weight": 100, "reps": 5}, {"weight": None}]}]},
+            {"exercises": [{"name": "Curl", "sets": [{"weight": 20, "reps": 10}]}]},
+            {"exercises": [{"name": "Squat", "sets": [{"weight": 105, "reps": 3}]}]},
+        ]
+        frame = WorkoutFrame.from_history(history)
+        
+        assert frame.positive_weights().tolist() == [100.0, 20.0, 105.0]
+        assert frame.recent_exercise_weights("Squat", last_workouts=5).tolist() == [100.0, 105.0]
+        assert frame.recent_exercise_weights("Squat", last_workouts=1).tolist() == [105.0]
+
+def assert_same_analysis(expected, actual, path=""):
+    """Même structure, mêmes décisions ; flottants égaux à l'arrondi près"""
+    if isinstance(expected, dict):
+        assert list(expected) == list(actual), path
+        for key in expected:
+            assert_same_analysis(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual), path
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            assert_same_analysis(e, a, f"{path}[{i}]")
+    elif isinstance(expected, (bool, np.bool_, str)):
+        assert expected == actual, path
+    else:
+        np.testing.assert_allclose(float(actual), float(expected), rtol=1e-9, atol=1e-12, err_msg=path)
+
+class TestVectorizedPlateauEngine:
+    """La passe vectorisée reproduit l'analyse exercice par exercice"""
+    
+    def reference_analysis(self, detector, history):
+        exercise_data = reference_exercise_data(history)
+        plateau_analysis = {
+            name: detector._analyze_exercise_plateau(name, data)
+            for name, data in exercise_data.items()
+            if len(data) >= detector.config["min_sessions_for_plateau"]
+        }
+        global_analysis = detector._analyze_global_plateau(exercise_data)
+        return {
+            "exercise_plateaus": plateau_analysis,
+            "global_analysis": global_analysis,
+            "recommendations": detector._generate_plateau_recommendations(plateau_analysis, global_analysis),
+            "severity_score": detector._calculate_overall_severity(plateau_analysis)
+        }
+    
+    @pytest.mark.parametrize("n_sessions", [6, 20, 33, 34, 80])
+    @pytest.mark.parametrize("pattern", ["progression", "flat", "rounded", "shuffled"])
+    def test_matches_per_exercise_analysis(self, n_sessions, pattern):
+        """p-value exacte (n <= 33) et asymptotique, ex aequo, séries constantes, dates dans le désordre"""
+        history = generate_workout_history(n_sessions, exercises=["Squat", "Développé couché", "Tractions"], seed=n_sessions)
+        for workout in history:
+            for exercise in workout["exercises"]:
+                for set_data in exercise["sets"]:
+                    if pattern == "flat":
+                        set_data["weight"] = 100.0
+                    elif pattern == "rounded":
+                        set_data["weight"] = round(set_data["weight"] / 5) * 5
+        if pattern == "shuffled":
+            np.random.default_rng(0).shuffle(history)
+        
+        detector = AdvancedPlateauDetector()
+        assert_same_analysis(self.reference_analysis(detector, history), detector.detect_plateaus(history))
+    
+    def test_many_exercises_and_short_series(self):
+        """50 exercices de longueurs variées, dont certaines sous le seuil d'analyse"""
+        exercises = [f"Exercice {i}" for i in range(50)]
+        history = generate_workout_history(40, exercises=exercises, seed=2)
+        for i, workout in enumerate(history):
+            workout["exercises"] = [e for j, e in enumerate(workout["exercises"]) if i % (j % 9 + 1) == 0]
+        
+        detector = AdvancedPlateauDetector()
+        result = detector.detect_plateaus(history)
+        
+        assert 0 < len(result["exercise_plateaus"]) < 50
+        assert_same_analysis(self.reference_analysis(detector, history), result)
+    
+    def test_exercise_scope_matches_full_analysis(self):
+        """Analyse restreinte à un exercice : même entrée que l'analyse complète"""
+        history = generate_workout_history(40, exercises=["Squat", "Développé couché", "Tractions"], seed=5)
+        detector = AdvancedPlateauDetector()
+        full = detector.detect_plateaus(history)
+        
+        for exercise_name in ("Squat", "Tractions"):
+            scoped = detector.detect_plateaus(history, exercise_name)
+            assert list(scoped["exercise_plateaus"]) == [exercise_name]
+            assert_same_analysis(full["exercise_plateaus"][exercise_name], scoped["exercise_plateaus"][exercise_name])
+            assert scoped["global_analysis"]["total_exercises"] == 1
+        
+        assert detector.detect_plateaus(history, "Curl")["exercise_plateaus"] == {}
+    
+    def test_zero_weight_exercises_keep_count_and_order(self):
+        """Exercice au poids de corps et premier bloc à vide : comptés et classés à leur première apparition"""
+        history = generate_workout_history(12, exercises=["Squat", "Développé couché"], seed=6)
+        for i, workout in enumerate(history):
+            workout["exercises"].insert(0, {"name": "Gainage", "sets": [{"weight": 0, "reps": 60}]})
+            workout["exercises"].insert(1, {"name": "Tractions", "sets": [{"weight": 0 if i < 4 else 5 + i, "reps": 8}]})
+        
+        detector = AdvancedPlateauDetector()
+        result = detector.detect_plateaus(history)
+        
+        assert list(result["exercise_plateaus"]) == ["Tractions", "Squat", "Développé couché"]
+        assert result["global_analysis"]["total_exercises"] == 4
+        assert_same_analysis(self.reference_analysis(detector, history), result)
+        
+        scoped = detector.detect_plateaus(history, "Gainage")
+        assert scoped["exercise_plateaus"] == {}
+        assert scoped["global_analysis"]["total_exercises"] == 1
+        store = IncrementalPlateauStore()
+        assert_same_analysis(scoped, detector.detect_exercise_plateau_incremental(history, "Gainage", store, "user_1"))
+    
+    def test_low_session_threshold_uses_scalar_path(self):
+        """Avec un seuil abaissé, les séries de deux séances gardent l'analyse scalaire"""
+        detector = AdvancedPlateauDetector({
+            "weight_plateau_threshold": 0.02,
+            "min_sessions_for_plateau": 2,
+            "trend_analysis_window": 10,
+            "statistical_confidence": 0.95,
+            "progression_tolerance": 0.5
+        })
+        history = generate_workout_history(8, seed=1)
+        history[3]["exercises"].append({"name": "Curl", "sets": [{"weight": 10, "reps": 5}]})
+        history[5]["exercises"].append({"name": "Curl", "sets": [{"weight": 12, "reps": 5}]})
+        
+        assert_same_analysis(self.reference_analysis(detector, history), detector.detect_plateaus(history))
+
+class TestIncrementalFeatureStore:
+    """Tests du store de features incrémental"""
+    
+    def setup_method(self):
+        """Setup pour chaque test"""
+        self.store = IncrementalFeatureStore()
+        self.engineer = SimpleFeatureEngineer()
+        self.history = generate_workout_history(60, exercises=["Squat", "Développé couché"], seed=11)
+        self.profile = {"weight": 78}
+    
+    def test_incremental_matches_full_recompute(self):
+        """Après chaque ajout de séances, l'état incrémental égale le recalcul complet"""
+        for end in [1, 2, 3, 10, 11, 25, 40, 60]:
+            history = self.history[:end]
+            state = self.store.update("user_1", "Squat", history)
+            
+            expected = self.engineer.extract_latest_features(history, self.profile, "Squat")
+            np.testing.assert_array_equal(state.feature_row(self.profile["weight"]), expected)
+        
+        assert self.store.stats["full_rebuilds"] == 1
+        assert self.store.stats["incremental_updates"] == 7
+    
+    def test_only_new_workouts_are_parsed(self):
+        """Un frame non parsé n'est lu qu'à partir des nouvelles séances"""
+        self.store.update("user_1", "Squat", self.history[:50])
+        
+        frame = WorkoutFrame.from_history(self.history)
+        state = self.store.update("user_1", "Squat", frame)
+        
+        assert not frame.is_materialized
+        np.testing.assert_array_equal(
+            state.feature_row(self.profile["weight"]),
+            self.engineer.extract_latest_features(self.history, self.profile, "Squat")
+        )
+    
+    def test_rewritten_history_triggers_rebuild(self):
+        """Une séance déjà intégrée modifiée force un recalcul complet"""
+        self.store.update("user_1", "Squat", self.history[:30])
+        
+        edited = [dict(w) for w in self.history[:40]]
+        edited[29] = {"date": edited[29]["date"], "exercises": [{"name": "Squat", "sets": [{"weight": 500, "reps": 1}]}]}
+        state = self.store.update("user_1", "Squat", edited)
+        
+        assert self.store.stats["full_rebuilds"] == 2
+        np.testing.assert_array_equal(
+            state.feature_row(self.profile["weight"]),
+            self.engineer.extract_latest_features(edited, self.profile, "Squat")
+        )
+    
+    def test_middle_session_edit_or_deletion_triggers_rebuild(self):
+        """Une séance du milieu modifiée ou supprimée : même résultat qu'un recalcul complet"""
+        self.store.update("user_1", "Squat", self.history[:30])
+        
+        edited = [dict(w) for w in self.history[:40]]
+        edited[12] = {"date": edited[12]["date"], "exercises": [{"name": "Squat", "sets": [{"weight": 500, "reps": 1}]}]}
+        state = self.store.update("user_1", "Squat", edited)
+        np.testing.assert_array_equal(
+            state.feature_row(self.profile["weight"]),
+            self.engineer.extract_latest_features(edited, self.profile, "Squat")
+        )
+        
+        # Séance du milieu supprimée, puis une séance ajoutée : même longueur intégrée qu'avant
+        deleted = edited[:12] + edited[13:] + [self.history[40]]
+        state = self.store.update("user_1", "Squat", deleted)
+        np.testing.assert_array_equal(
+            state.feature_row(self.profile["weight"]),
+            self.engineer.extract_latest_features(deleted, self.profile, "Squat")
+        )
+        assert self.store.stats["full_rebuilds"] == 3
+    
+    def test_users_and_exercises_are_isolated(self):
+        """Chaque (utilisateur, exercice) a son propre état, borné en nombre"""
+        store = IncrementalFeatureStore(max_entries=2)
+        store.update("user_1", "Squat", self.history)
+        store.update("user_1", "Développé couché", self.history)
+        store.update("user_2", "Squat", self.history[:5])
+        
+        assert len(store) == 2
+        assert store.get("user_1", "Squat") is None
+        assert store.get("user_2", "Squat").workouts_consumed == 5
+        assert store.stats["evictions"] == 1
+
+class TestIncrementalPlateauStore:
+    """Tests de l'état de plateau incrémental"""
+    
+    @pytest.mark.parametrize("pattern", ["progression", "flat", "rounded"])
+    def test_matches_batch_detection_after_each_workout(self, pattern):
+        """Ex aequo, séries constantes et p-value exacte puis asymptotique : même analyse qu'en recalcul complet"""
+        history = generate_workout_history(45, exercises=["Squat", "Développé couché"], seed=21)
+        for workout in history:
+            for exercise in workout["exercises"]:
+                for set_data in exercise["sets"]:
+                    if pattern == "flat":
+                        set_data["weight"] = 100.0
+                    elif pattern == "rounded":
+                        set_data["weight"] = round(set_data["weight"] / 5) * 5
+        
+        detector = AdvancedPlateauDetector()
+        store = IncrementalPlateauStore()
+        for end in range(1, len(history) + 1):
+            frame = WorkoutFrame.from_history(history[:end])
+            incremental = detector.detect_exercise_plateau_incremental(frame, "Squat", store, "user_1")
+            # Seul le premier appel avec assez de séances parse tout l'historique
+            assert frame.is_materialized == (end == detector.config["min_sessions_for_plateau"])
+            assert_same_analysis(detector.detect_plateaus(history[:end], "Squat"), incremental)
+        
+        assert store.stats["full_rebuilds"] == 1
+        assert store.get("user_1", "Squat").n_sessions == 45
+    
+    def test_out_of_order_and_undated_workouts(self):
+        """Séance datée avant la dernière intégrée : recalcul ; séance sans date : pas d'état"""
+        history = generate_workout_history(20, seed=22)
+        detector = AdvancedPlateauDetector()
+        store = IncrementalPlateauStore()
+        store.update("user_1", "Squat", history[:10])
+        
+        late = history[:10] + [history[2]]
+        state = store.update("user_1", "Squat", late)
+        assert store.stats["full_rebuilds"] == 2
+        assert_same_analysis(
+            detector.detect_plateaus(late, "Squat"),
+            detector.detect_exercise_plateau_incremental(late, "Squat", store, "user_1")
+        )
+        assert state.n_sessions == 11
+        
+        # Séance du milieu modifiée : l'empreinte chaînée force un recalcul
+        edited = [dict(w) for w in late]
+        edited[5] = {"date": edited[5]["date"], "exercises": [{"name": "Squat", "sets": [{"weight": 400, "reps": 1}]}]}
+        state = store.update("user_1", "Squat", edited + [history[11]])
+        assert store.stats["full_rebuilds"] == 3
+        assert_same_analysis(
+            detector.detect_plateaus(edited + [history[11]], "Squat"),
+            detector.detect_exercise_plateau_incremental(edited + [history[11]], "Squat", store, "user_1")
+        )
+        
+        undated = history[:12] + [{"exercises": history[12]["exercises"]}]
+        assert store.update("user_1", "Squat", undated) is None
+        assert store.get("user_1", "Squat") is None
+        assert detector.detect_exercise_plateau_incremental(undated, "Squat", store, "user_1")["exercise_plateaus"]
+    
+    def test_exercise_requested_before_its_first_session(self):
+        """Six séances de développé couché, puis le premier squat : l'état vide se prolonge sans erreur"""
+        bench = generate_workout_history(6, exercises=["Développé couché"], seed=23)
+        squat = generate_workout_history(10, exercises=["Squat"], start_date="2023-02-01", seed=24)
+        detector = AdvancedPlateauDetector()
+        store = IncrementalPlateauStore()
+        
+        assert detector.detect_exercise_plateau_incremental(bench, "Squat", store, "user_1")["exercise_plateaus"] == {}
+        assert store.get("user_1", "Squat").n_sessions == 0
+        for end in range(1, len(squat) + 1):
+            history = bench + squat[:end]
+            incremental = detector.detect_exercise_plateau_incremental(history, "Squat", store, "user_1")
+            assert "error" not in incremental
+            assert_same_analysis(detector.detect_plateaus(history, "Squat"), incremental)
+        assert store.get("user_1", "Squat").n_sessions == 10
+        assert store.stats["full_rebuilds"] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
+ADVANCED_FEATURE_NAMES = [
+    'current_weight', 'total_volume', 'avg_intensity', 'total_sessions', 'training_frequency',
+    'progression_7d', 'progression_14d', 'progression_30d', 'progression_90d', 'momentum_score', 'consistency_score',
+    'weight_mean', 'weight_std', 'weight_skew', 'weight_kurtosis', 'weight_p25', 'weight_p75', 'weight_iqr',
+    'weight_cv', 'smoothing_residual',
+    'trend_slope', 'trend_r_squared', 'trend_p_value', 'trend_changes', 'trend_stability',
+    'preferred_hour', 'day_regularity', 'avg_session_duration', 'experience_level',
+    'goal_strength', 'goal_hypertrophy', 'goal_endurance',
+    'exercise_compound', 'exercise_isolation', 'exercise_cardio', 'exercise_strength',
+    'muscle_chest', 'muscle_back', 'muscle_legs', 'muscle_shoulders', 'muscle_arms', 'muscle_core',
+    'equipment_barbell', 'equipment_dumbbell', 'equipment_machine', 'equipment_bodyweight', 'equipment_cable',
+    'seasonal_factor',
+    'weight_frequency_interaction', 'momentum_consistency_interaction', 'trend_experience_interaction'
+]
+
+def flat_history(n_sessions, seed=0):
+    """Historique à plat (une ligne par séance) pour AdvancedFeatureEngineer"""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "date": f"2024-{i // 28 % 12 + 1:02d}-{i % 28 + 1:02d} {rng.integers(6, 22):02d}:00:00",
+            "weight": 60 + 2.5 * (i // 3) + float(rng.normal(0, 1)),
+            "reps": int(rng.integers(3, 12)),
+            "sets": int(rng.integers(2, 5)),
+            "exercise_type": "compound",
+            "muscle_group": "legs"
+        }
+        for i in range(n_sessions)
+    ]
+
+class TestAdvancedFeatureEngineer:
+    """Tests du registre de features avancées (vecteur préalloué)"""
+    
+    def setup_method(self):
+        from services.feature_engineering import AdvancedFeatureEngineer
+        self.engineer = AdvancedFeatureEngineer()
+        self.profile = {"level": "intermediate", "goals": ["strength"]}
+    
+    def test_feature_set_and_order_are_unchanged(self):
+        """Mêmes features, même ordre qu'avant la réécriture"""
+        features = self.engineer.extract_features(flat_history(30), self.profile)
+        
+        assert list(features.columns) == ADVANCED_FEATURE_NAMES
+        assert self.engineer.feature_names == ADVANCED_FEATURE_NAMES
+        assert features.shape == (1, len(ADVANCED_FEATURE_NAMES))
+    
+    def test_vector_matches_dataframe(self):
+        history = flat_history(50)
+        vector = self.engineer.extract_feature_vector(history, self.profile)
+        features = self.engineer.extract_features(history, self.profile)
+        
+        assert vector.dtype == np.float64
+        np.testing.assert_array_equal(vector, features.values[0])
+        assert not np.isnan(vector).any()
+        assert self.engineer.extract_feature_vector([], self.profile) is None
+    
+    def test_values_match_pandas_and_scipy(self):
+        """Quelques features recalculées avec les fonctions d'origine"""
+        from scipy import stats
+        from scipy.signal import savgol_filter
+        
+        history = flat_history(40, seed=3)
+        weights = np.array([record["weight"] for record in history])
+        features = self.engineer.extract_features(history, self.profile).iloc[0]
+        
+        assert features['weight_skew'] == pytest.approx(stats.skew(weights), rel=1e-9)
+        assert features['weight_kurtosis'] == pytest.approx(stats.kurtosis(weights), rel=1e-9)
+        assert features['smoothing_residual'] == pytest.approx(
+            np.mean(np.abs(weights - savgol_filter(weights, 5, 2))), rel=1e-9
+        )
+        assert features['trend_slope'] == pytest.approx(stats.linregress(np.arange(40), weights).slope, rel=1e-9)
+        
+        dates = pd.to_datetime(pd.Series([record["date"] for record in history]))
+        assert features['preferred_hour'] == dates.dt.hour.mode().iloc[0]
+        assert features['consistency_score'] == pytest.approx(1 / (1 + dates.diff().dt.days.dropna().std()), rel=1e-9)
+        assert features['experience_level'] == 2
+        assert features['exercise_compound'] == 1 and features['muscle_chest'] == 0
+    
+    def test_disabled_groups_are_dropped(self):
+        """Groupe désactivé : colonnes absentes, interactions correspondantes à 0"""
+        self.engineer.feature_config["temporal_features"] = False
+        features = self.engineer.extract_features(flat_history(20), self.profile)
+        
+        assert 'momentum_score' not in features.columns
+        assert len(features.columns) == len(ADVANCED_FEATURE_NAMES) - 6
+        assert features['momentum_consistency_interaction'].iloc[0] == 0
+        assert features['weight_frequency_interaction'].iloc[0] != 0
+    
+    def test_invalid_values_do_not_raise(self):
+        """Poids non numériques et dates illisibles : valeurs par défaut, sans exception"""
+        history = [{"date": "invalid_date", "weight": "not_a_number"}] * 3 + [{"date": "invalid_date", "weight": 80}]
+        features = self.engineer.extract_features(history, {})
+        
+        assert features['current_weight'].iloc[0] == 80
+        assert features['training_frequency'].iloc[0] == 0
+        assert features['preferred_hour'].iloc[0] == 12
+        assert not features.isna().any().any()
+    
+    def test_session_rows_match_prefix_extraction(self):
+        """Ligne i du mode par séance = extraction sur les séances 0..i"""
+        history = flat_history(80, seed=5)
+        history[10]["weight"] = "n/a"
+        history[40]["date"] = None
+        del history[2]["muscle_group"]
+        matrix = self.engineer.extract_session_matrix(history, self.profile)
+        
+        assert matrix.shape == (80, len(ADVANCED_FEATURE_NAMES))
+        for i in range(len(history)):
+            expected = self.engineer.extract_feature_vector(history[:i + 1], self.profile)
+            np.testing.assert_allclose(matrix[i], expected, rtol=1e-7, atol=1e-9, err_msg=f"séance {i}")
+    
+    def test_session_features_respect_config(self):
+        self.engineer.feature_config["statistical_features"] = False
+        features = self.engineer.extract_session_features(flat_history(12), self.profile)
+        
+        assert features.shape == (12, len(ADVANCED_FEATURE_NAMES) - 9)
+        assert list(features.columns) == self.engineer.feature_names
+        assert list(features['total_sessions']) == list(range(1, 13))
+        assert self.engineer.extract_session_features([], self.profile).empty
@@ -89,6 +89,284 @@ class TestMLIntegration:
         # Peut réussir ou échouer selon la disponibilité des dépendances
         assert "success" in result or "error" in result
     
+    @pytest.mark.asyncio
+    async def test_batch_prediction_matches_single(self):
+        """Test des prédictions groupées : mêmes résultats, même ordre"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        pipeline = MLPipeline()
+        history = generate_workout_history(20, exercises=["Squat", "Développé couché"], seed=5)
+        await pipeline.train("test_user_123", history)
+        
+        requests = [
+            {"exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": history},
+            {"exercise_name": "Inconnu", "user_data": {"current_weight": 40}, "workout_history": history},
+            {"exercise_name": "Développé couché", "user_data": {"current_weight": 80}, "workout_history": history},
+            {"exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": []},
+        ]
+        
+        batch_results = await pipeline.predict_batch(requests)
+        single_results = [await pipeline.predict(**request) for request in requests]
+        
+        assert len(batch_results) == len(requests)
+        for batch_result, single_result in zip(batch_results, single_results):
+            assert batch_result["exercise_name"] == single_result["exercise_name"]
+            assert batch_result["model_used"] == single_result["model_used"]
+            assert batch_result["predicted_weight"] == pytest.approx(single_result["predicted_weight"])
+    
+    @pytest.mark.asyncio
+    async def test_micro_batching_matches_single(self):
+        """Prédictions concurrentes regroupées en lots : mêmes résultats qu'une à une"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(20, exercises=["Squat", "Développé couché"], seed=5)
+        pipeline = MLPipeline({"prediction_cache": {"enabled": False}, "single_flight": {"enabled": False}})
+        await pipeline.train("test_user_123", history)
+        batched = MLPipeline({
+            "prediction_cache": {"enabled": False}, "single_flight": {"enabled": False},
+            "micro_batching": {"enabled": True, "max_batch_size": 4, "max_delay_ms": 200}
+        })
+        batched.ensemble_model, batched.is_trained = pipeline.ensemble_model, True
+        
+        requests = [
+            {"exercise_name": name, "user_data": {"current_weight": weight}, "workout_history": history}
+            for name in ("Squat", "Développé couché") for weight in (60, 80, 100)
+        ] + [{"exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": []}]
+        
+        batched_results = await asyncio.gather(*[batched.predict(**request) for request in requests])
+        single_results = [await pipeline.predict(**request) for request in requests]
+        for batched_result, single_result in zip(batched_results, single_results):
+            assert batched_result["model_used"] == single_result["model_used"]
+            assert batched_result["predicted_weight"] == pytest.approx(single_result["predicted_weight"])
+        
+        # 6 inférences : un lot plein de 4, puis un lot de 2 dès qu'aucune autre prédiction
+        # n'est en route (sans attendre l'échéance) ; l'historique vide n'est pas inféré
+        stats = batched.get_micro_batching_stats()
+        assert (stats["batches"], stats["items"], stats["flush_size"], stats["flush_delay"], stats["flush_idle"]) == (2, 6, 1, 0, 1)
+        assert stats["expected"] == 0
+        assert stats["batch_size_histogram"] == {"2": 1, "4": 1}
+        assert pipeline.get_micro_batching_stats() == {"enabled": False}
+    
+    @pytest.mark.asyncio
+    async def test_compiled_inference_matches_sklearn(self):
+        """L'ensemble compilé sert les prédictions, avec les mêmes poids que scikit-learn"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, exercises=["Squat", "Développé couché"], seed=11)
+        pipeline = MLPipeline({"prediction_cache": {"enabled": False}})
+        await pipeline.train("test_user_123", history)
+        stats = pipeline.get_compiled_inference_stats()
+        assert stats["enabled"] and stats["compiled"] == 1 and stats["active"]["max_error"] < 1e-6
+        
+        reference = MLPipeline({"prediction_cache": {"enabled": False}, "compiled_inference": {"enabled": False}})
+        reference.ensemble_model, reference.is_trained = pipeline.ensemble_model, True
+        assert reference._inference_model(reference.ensemble_model) is reference.ensemble_model
+        assert reference.get_compiled_inference_stats() == {"enabled": False}
+        
+        for name, weight in (("Squat", 100), ("Développé couché", 70)):
+            compiled = await pipeline.predict(name, {"current_weight": weight}, history)
+            sklearn = await reference.predict(name, {"current_weight": weight}, history)
+            assert compiled["model_used"] == sklearn["model_used"] == "python_ensemble"
+            assert compiled["predicted_weight"] == pytest.approx(sklearn["predicted_weight"])
+    
+    @pytest.mark.asyncio
+    async def test_warm_start_and_hot_reload_from_registry(self, tmp_path):
+        """Un nouveau pipeline prédit avec le modèle publié, puis suit les nouvelles versions"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=8)
+        trainer = MLPipeline({"model_registry_path": str(tmp_path)})
+        await trainer.train("test_user_123", history)
+        assert trainer.model_version == 1
+        
+        # Nouveau processus simulé : modèle disponible dès le démarrage
+        server = MLPipeline({"model_registry_path": str(tmp_path), "registry_poll_interval": 0})
+        assert await server.warm_start()
+        assert server.model_version == 1
+        assert server.startup_report["model_source"] == "registry"
+        
+        result = await server.predict("Squat", {"current_weight": 100}, history)
+        assert result["model_used"] == "python_ensemble"
+        assert server.startup_report["first_prediction_ms"] is not None
+        
+        # Nouvelle version publiée ailleurs : rechargée sans redémarrage
+        await trainer.train("test_user_123", history, retrain=True)
+        await server.predict("Squat", {"current_weight": 100}, history)
+        assert server.model_version == 2
+        assert server.get_model_info()["model_version"] == 2
+        
+        # Sans registre, aucun modèle au démarrage
+        assert not await MLPipeline().warm_start()
+    
+    @pytest.mark.asyncio
+    async def test_prediction_cache_hits_until_retrain(self):
+        """Une requête répétée est servie par le cache, vidé par un nouvel entraînement"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=9)
+        pipeline = MLPipeline()
+        await pipeline.train("test_user_123", history)
+        
+        first = await pipeline.predict("Squat", {"current_weight": 100}, history)
+        second = await pipeline.predict("Squat", {"current_weight": 100}, pipeline.build_workout_frame(history))
+        assert second == first
+        stats = pipeline.get_cache_stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        
+        await pipeline.train("test_user_123", history, retrain=True)
+        assert pipeline.get_cache_stats()["entries"] == 0
+        
+        await pipeline.predict("Squat", {"current_weight": 100}, history)
+        assert pipeline.get_cache_stats()["misses"] == 2
+        
+        # Désactivé par configuration
+        uncached = MLPipeline({"prediction_cache": {"enabled": False}})
+        assert uncached.get_cache_stats() == {"enabled": False}
+    
+    @pytest.mark.asyncio
+    async def test_analysis_depths(self):
+        """Même poids à chaque profondeur ; plateau limité à l'exercice par défaut, absent en profondeur weight"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, exercises=["Squat", "Développé couché", "Tractions"], seed=10)
+        pipeline = MLPipeline({"incremental_plateau": True})
+        await pipeline.train("test_user_123", history)
+        
+        default = await pipeline.predict("Squat", {"current_weight": 100}, history)
+        weight = await pipeline.predict("Squat", {"current_weight": 100}, history, analysis_depth="weight")
+        full = await pipeline.predict("Squat", {"current_weight": 100}, history, analysis_depth="full")
+        
+        assert default["analysis_depth"] == "exercise"
+        assert default["predicted_weight"] == weight["predicted_weight"] == full["predicted_weight"]
+        assert list(default["plateau_analysis"]["exercise_plateaus"]) == ["Squat"]
+        assert default["plateau_analysis"]["exercise_plateaus"]["Squat"] == full["plateau_analysis"]["exercise_plateaus"]["Squat"]
+        assert len(full["plateau_analysis"]["exercise_plateaus"]) == 3
+        assert (weight["plateau_analysis"], weight["confidence"], weight["recommendations"]) == (None, None, [])
+        assert default["confidence"] == full["confidence"]
+        
+        # Une profondeur par entrée de cache ; profondeur inconnue : fallback
+        assert pipeline.get_cache_stats()["entries"] == 3
+        unknown = await pipeline.predict("Squat", {"current_weight": 100}, history, analysis_depth="deep")
+        assert unknown["model_used"] == "fallback"
+        
+        batch = await pipeline.predict_batch([
+            {"exercise_name": "Squat", "user_data": {"current_weight": 100}, "workout_history": history, "analysis_depth": depth}
+            for depth in ("weight", "full")
+        ])
+        assert [result["analysis_depth"] for result in batch] == ["weight", "full"]
+        assert batch[1]["plateau_analysis"] == full["plateau_analysis"]
+        
+        # Utilisateur identifié : état de plateau incrémental, mêmes décisions (flottants à l'arrondi près)
+        for end in (29, 30):
+            identified = await pipeline.predict("Squat", {"current_weight": 100, "user_id": "u1"}, history[:end])
+        expected, actual = default["plateau_analysis"], identified["plateau_analysis"]
+        assert actual["recommendations"] == expected["recommendations"]
+        assert actual["severity_score"] == pytest.approx(expected["severity_score"])
+        for key in ("weight_plateau", "statistical_analysis"):
+            assert actual["exercise_plateaus"]["Squat"][key] == pytest.approx(expected["exercise_plateaus"]["Squat"][key])
+        assert pipeline.plateau_store.stats["incremental_updates"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_incremental_training_with_periodic_full_refit(self, tmp_path):
+        """Mode incrémental : partial_fit sur les nouvelles séances, réentraînement complet périodique"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(40, seed=10)
+        pipeline = MLPipeline({
+            "model_registry_path": str(tmp_path),
+            "online_training": {"enabled": True, "full_refit_every": 3}
+        })
+        modes = []
+        for start in range(0, 40, 5):
+            result = await pipeline.train("test_user_123", history[start:start + 5])
+            modes.append(result["training_mode"])
+        
+        assert modes == ["full_refit", "incremental", "incremental", "full_refit",
+                         "incremental", "incremental", "full_refit", "incremental"]
+        result = await pipeline.train("test_user_123", history[:5], retrain=True)
+        assert result["training_mode"] == "full_refit"
+        
+        stats = pipeline.get_model_info()["online_training"]
+        assert stats["updates_since_refit"] == 0
+        assert stats["model"]["updates"] == 8 and stats["model"]["refits"] == 4
+        assert pipeline.model_version == 9
+        
+        prediction = await pipeline.predict("Squat", {"current_weight": 100}, history)
+        assert prediction["model_used"] == "python_ensemble"
+        
+        # Le modèle publié reprend ses mises à jour incrémentales dans un autre processus
+        server = MLPipeline({"model_registry_path": str(tmp_path), "online_training": {"enabled": True}})
+        assert await server.warm_start()
+        result = await server.train("test_user_123", history[-5:])
+        assert result["training_mode"] == "incremental"
+        
+        # Sans mode incrémental, chaque entraînement reste complet
+        assert (await MLPipeline().train("test_user_123", history))["training_mode"] == "full"
+    
+    @pytest.mark.asyncio
+    async def test_overlapping_incremental_trainings_keep_both_batches(self):
+        """Deux mises à jour incrémentales simultanées : le modèle final a vu les deux lots"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=10)
+        pipeline = MLPipeline({"online_training": {"enabled": True, "full_refit_every": 20}})
+        await pipeline.train("test_user_123", history[:10])
+        seen = pipeline.ensemble_model.get_training_history()["n_samples_seen"]
+        
+        run_training = pipeline.executor.run_training
+        
+        async def slow_training(*args):
+            # Les deux entraînements se chevauchent forcément
+            await asyncio.sleep(0.05)
+            return await run_training(*args)
+        
+        pipeline.executor.run_training = slow_training
+        results = await asyncio.gather(
+            pipeline.train("user_a", history[10:20]),
+            pipeline.train("user_b", history[20:])
+        )
+        pipeline.shutdown()
+        
+        assert [result["training_mode"] for result in results] == ["incremental", "incremental"]
+        training_history = pipeline.ensemble_model.get_training_history()
+        assert training_history["updates"] == 2
+        assert training_history["n_samples_seen"] == seen + sum(result["samples_trained"] for result in results)
+        assert pipeline.get_model_info()["online_training"]["updates_since_refit"] == 2
+        assert pipeline.model_version == 3
+    
+    @pytest.mark.asyncio
+    async def test_partition_models_with_global_fallback(self, tmp_path):
+        """Modèle par exercice chargé à la demande, modèle global pour les autres"""
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(30, seed=9)
+        for session in history[-5:]:
+            session["exercises"].append({"name": "Curl biceps", "sets": [{"weight": 20.0, "reps": 10}] * 3})
+        pipeline = MLPipeline({"model_partitions": {"enabled": True, "path": str(tmp_path), "min_samples": 50}})
+        result = await pipeline.train("test_user_123", history)
+        assert result["partitions"]["exercise=squat"]["version"] == 1
+        assert result["partitions"]["exercise=curl biceps"]["samples"] == 14
+        assert pipeline.get_partition_stats()["resident"] == 0
+        
+        squat = await pipeline.predict("Squat", {"current_weight": 100}, history)
+        assert squat["model_used"] == "partition_ensemble"
+        assert squat["model_partition"] == "exercise=squat"
+        
+        small = await pipeline.predict("Curl biceps", {"current_weight": 20}, history)
+        assert small["model_used"] == "python_ensemble"
+        assert small["model_partition"] is None
+        
+        stats = pipeline.get_partition_stats()
+        assert stats["partitions"]["exercise=squat"]["cold_loads"] == 1
+        assert stats["missing_partition_requests"] == 1
+        
+        # Les partitions sont publiées sur disque : un nouveau processus les retrouve
+        restarted = MLPipeline({"model_partitions": {"enabled": True, "path": str(tmp_path), "min_samples": 50}})
+        restarted.ensemble_model, restarted.is_trained = pipeline.ensemble_model, True
+        again = await restarted.predict("Squat", {"current_weight": 100}, history)
+        assert again["model_partition"] == "exercise=squat"
+        assert again["predicted_weight"] == squat["predicted_weight"]
+    
     def test_feature_engineering_integration(self):
         """Test d'intégration du feature engineering"""
         from app.services.feature_engineering import AdvancedFeatureEngineer
@@ -113,6 +391,57 @@ class TestMLIntegration:
         assert "severity_score" in result
         assert isinstance(result["severity_score"], (int, float))
     
+    def test_synthetic_progression_patterns(self):
+        """Profils du générateur synthétique : plateau détecté, cycles périodisés avec décharge, déterminisme"""
+        from app.services.plateau_detection import AdvancedPlateauDetector
+        from app.utils.synthetic_data import flatten_history, generate_user_histories, generate_workout_history
+        
+        detector = AdvancedPlateauDetector()
+        plateau = detector.detect_plateaus(generate_workout_history(40, exercises=["Squat"], pattern="plateau"), "Squat")
+        assert plateau["exercise_plateaus"]["Squat"]["weight_plateau"]["detected"]
+        
+        periodized = generate_workout_history(24, exercises=["Squat"], pattern="periodized", seed=3)
+        weights = [session["exercises"][0]["sets"][0]["weight"] for session in periodized]
+        assert weights[9] < weights[6] and weights[12] > weights[9]  # semaine 4 : décharge
+        
+        users = generate_user_histories(3, n_exercises=10, n_sessions=5, seed=7)
+        assert users == generate_user_histories(3, n_exercises=10, n_sessions=5, seed=7)
+        assert [user["user_id"] for user in users] == ["user_0000000", "user_0000001", "user_0000002"]
+        assert len(users[0]["workout_history"][0]["exercises"]) == 10
+        assert len(flatten_history(users[0]["workout_history"])) == 5 * 10
+        
+        with pytest.raises(ValueError):
+            generate_workout_history(5, pattern="random")
+    
+    def test_plateau_detection_long_exercise_memory(self):
+        """Un exercice de plus de 5 000 séances : Kendall en mémoire linéaire, identique à scipy"""
+        import tracemalloc
+        import numpy as np
+        from scipy.stats import kendalltau
+        from app.services.plateau_detection import AdvancedPlateauDetector
+        from app.services.workout_frame import WorkoutFrame
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(6000, exercises=["Squat"], pattern="plateau")
+        frame = WorkoutFrame.from_history(history)
+        detector = AdvancedPlateauDetector()
+        detector.detect_plateaus(history[:20], "Squat")
+        
+        tracemalloc.start()
+        try:
+            result = detector.detect_plateaus(history, "Squat")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # La matrice des paires (6 000² flottants) dépasserait 280 Mo
+        assert peak < 32 * 1024 * 1024
+        
+        weights = [max(s["weight"] for s in session["exercises"][0]["sets"]) for session in history]
+        expected = kendalltau(np.arange(len(weights)), weights)
+        statistical = result["exercise_plateaus"]["Squat"]["statistical_analysis"]
+        assert statistical["kendall_tau"] == pytest.approx(expected.statistic, abs=1e-12)
+        assert statistical["p_value"] == pytest.approx(expected.pvalue, abs=1e-12)
+    
     def test_mlflow_integration(self):
         """Test d'intégration MLflow"""
         from app.utils.mlflow_tracker import MLflowTracker
@@ -199,6 +528,117 @@ class TestPerformance:
         assert (end_time - start_time) < 2.0
         assert isinstance(result, dict)
     
+    @pytest.mark.asyncio
+    async def test_prediction_p99_with_mlflow_sink(self, monkeypatch):
+        """p99 des prédictions avec écritures MLflow synchrones puis via le sink tamponné"""
+        import time
+        import utils.mlflow_tracker as tracker_module
+        from utils.mlflow_tracker import BufferedPredictionSink
+        from app.utils.synthetic_data import generate_workout_history
+        
+        class SlowMlflow:
+            """Chaque appel simule une écriture SQLite dans mlflow.db"""
+            def log_metric(self, *args, **kwargs):
+                time.sleep(0.002)
+            
+            def log_param(self, *args, **kwargs):
+                time.sleep(0.002)
+        
+        written = []
+        
+        def slow_batch_writer(events):
+            time.sleep(0.002)
+            written.extend(events)
+        
+        # Cache désactivé : chaque prédiction doit passer par le modèle et MLflow
+        pipeline = MLPipeline({"mlflow_buffered": False, "prediction_cache": {"enabled": False}})
+        history = generate_workout_history(30, seed=4)
+        await pipeline.train("test_user", history)
+        
+        monkeypatch.setattr(tracker_module, "mlflow", SlowMlflow(), raising=False)
+        # Expérience considérée comme déjà configurée (configuration différée au premier usage)
+        pipeline.mlflow_tracker.mlflow_available = True
+        pipeline.mlflow_tracker._experiment_ready = True
+        
+        async def p99_latency(n_predictions=100):
+            latencies = []
+            for _ in range(n_predictions):
+                start = time.perf_counter()
+                result = await pipeline.predict("Squat", {"current_weight": 100}, history)
+                latencies.append(time.perf_counter() - start)
+                assert result["model_used"] == "python_ensemble"
+            return sorted(latencies)[int(0.99 * n_predictions) - 1]
+        
+        p99_without_sink = await p99_latency()
+        
+        pipeline.mlflow_tracker.prediction_sink = BufferedPredictionSink(
+            slow_batch_writer, max_batch_size=20, flush_interval=0.05
+        )
+        p99_with_sink = await p99_latency()
+        pipeline.shutdown()
+        
+        # 4 écritures synchrones par prédiction (≈8 ms) disparaissent du chemin critique
+        assert p99_with_sink < p99_without_sink
+        assert len(written) == 100
+        assert pipeline.mlflow_tracker.get_sink_stats()["dropped"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_overlapping_trainings_log_separate_mlflow_runs(self, monkeypatch):
+        """Deux entraînements qui se chevauchent : un run MLflow chacun, terminé, écrit hors de la boucle"""
+        import sys
+        import threading
+        import types
+        from collections import namedtuple
+        from app.utils.synthetic_data import generate_workout_history
+        
+        runs = {}
+        
+        class FakeClient:
+            def get_experiment_by_name(self, name):
+                return types.SimpleNamespace(experiment_id="0")
+            
+            def create_run(self, experiment_id, run_name=None):
+                run_id = f"run_{len(runs)}"
+                runs[run_id] = {"name": run_name, "thread": threading.get_ident(), "status": None}
+                return types.SimpleNamespace(info=types.SimpleNamespace(run_id=run_id))
+            
+            def log_batch(self, run_id, metrics=(), params=(), tags=()):
+                runs[run_id]["params"] = {param.key: param.value for param in params}
+                runs[run_id]["metrics"] = {metric.key for metric in metrics}
+            
+            def set_terminated(self, run_id, status=None):
+                assert runs[run_id]["status"] is None
+                runs[run_id]["status"] = status
+        
+        fake_mlflow = types.ModuleType("mlflow")
+        fake_mlflow.tracking = types.SimpleNamespace(MlflowClient=FakeClient)
+        fake_mlflow.entities = types.SimpleNamespace(
+            Metric=namedtuple("Metric", "key value timestamp step"), Param=namedtuple("Param", "key value")
+        )
+        monkeypatch.setitem(sys.modules, "mlflow", fake_mlflow)
+        monkeypatch.setitem(sys.modules, "mlflow.tracking", fake_mlflow.tracking)
+        monkeypatch.setitem(sys.modules, "mlflow.entities", fake_mlflow.entities)
+        
+        pipeline = MLPipeline({"mlflow_buffered": False})
+        pipeline.mlflow_tracker.mlflow_available = True
+        pipeline.mlflow_tracker._experiment_ready = True
+        
+        history = generate_workout_history(30, seed=4)
+        results = await asyncio.gather(
+            pipeline.train("user_a", history[:20]),
+            pipeline.train("user_b", history[10:])
+        )
+        pipeline.shutdown()
+        
+        assert all(result.get("success") for result in results)
+        assert len(runs) == 2
+        assert sorted(run["params"]["n_samples"] for run in runs.values()) == sorted(
+            str(result["samples_trained"]) for result in results
+        )
+        assert all(run["status"] == "FINISHED" and run["name"] == "model_training" for run in runs.values())
+        assert all(run["metrics"] and run["thread"] != threading.get_ident() for run in runs.values())
+        assert pipeline.mlflow_tracker.current_run is None
+    
     def test_feature_extraction_performance(self):
         """Test de performance de l'extraction de features"""
         import time
@@ -271,7 +711,7 @@ class TestConcurrency:
     """Tests de concurrence"""
     
     @pytest.mark.asyncio
-    async def test_concurrent_predictions(self):
+    async def test_concurrent_predictions(self, tmp_path):
         """Test de prédictions concurrentes"""
         import asyncio
         
@@ -296,6 +736,101 @@ class TestConcurrency:
         assert len(results) == 10
         assert all(isinstance(result, dict) for result in results)
         assert all("predicted_weight" in result for result in results)
+        
+        # Relances et onglets multiples : la même requête n'est calculée qu'une fois
+        from app.utils.synthetic_data import generate_workout_history
+        
+        history = generate_workout_history(60, seed=11)
+        executions = {}
+        
+        async def identical_predictions(name, config):
+            # Registre propre à chaque pipeline : aucun modèle d'un autre test ou de l'autre pipeline
+            pipeline = MLPipeline({
+                "prediction_cache": {"enabled": False},
+                "model_registry_path": str(tmp_path / name),
+                **config
+            })
+            await pipeline.train("test_user_123", history)
+            predict_sync = pipeline._predict_sync
+            
+            def counted(*args):
+                executions[key] = executions.get(key, 0) + 1
+                return predict_sync(*args)
+            
+            key = "single_flight" if pipeline.single_flight is not None else "independent"
+            pipeline._predict_sync = counted
+            results = await asyncio.gather(*[
+                pipeline.predict("Squat", {"current_weight": 100}, history) for _ in range(10)
+            ])
+            return pipeline, results
+        
+        coalesced_pipeline, coalesced = await identical_predictions("coalesced", {})
+        _, independent = await identical_predictions("independent", {"single_flight": {"enabled": False}})
+        
+        assert executions == {"single_flight": 1, "independent": 10}
+        # Sorties du modèle seulement : poids prédit et modèle utilisé
+        outputs = {(result["predicted_weight"], result["model_used"]) for result in coalesced + independent}
+        assert len(outputs) == 1
+        stats = coalesced_pipeline.get_single_flight_stats()
+        assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 9, 0)
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_predictions_latency_under_training(self):
+        """Latence des prédictions et de la boucle d'événements pendant des entraînements"""
+        import time
+        from app.utils.synthetic_data import generate_workout_history
+        
+        pipeline = MLPipeline({"executor": {"training_max_pending": 1}})
+        history = generate_workout_history(150, seed=9)
+        await pipeline.train("warmup_user", history[:20])
+        
+        loop_lags = []
+        prediction_latencies = []
+        running = True
+        
+        async def heartbeat():
+            # Un appel bloquant sur la boucle se voit comme un retard du réveil
+            while running:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                loop_lags.append(time.perf_counter() - start - 0.005)
+        
+        async def make_prediction(i):
+            start = time.perf_counter()
+            result = await pipeline.predict(
+                ["Squat", "Développé couché", "Soulevé de terre"][i % 3],
+                {"current_weight": 80, "user_id": f"user_{i % 4}"},
+                history
+            )
+            prediction_latencies.append(time.perf_counter() - start)
+            return result
+        
+        heartbeat_task = asyncio.create_task(heartbeat())
+        training_start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            pipeline.train("user_a", history),
+            pipeline.train("user_b", history),
+            *[make_prediction(i) for i in range(40)],
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - training_start
+        running = False
+        await heartbeat_task
+        
+        trainings, predictions = outcomes[:2], outcomes[2:]
+        
+        # Un seul entraînement admis, le second est refusé (backpressure)
+        assert sum(isinstance(t, dict) and t.get("success") for t in trainings) == 1
+        assert sum(type(t).__name__ == "ExecutorOverloadedError" for t in trainings) == 1
+        assert all("predicted_weight" in p for p in predictions)
+        
+        # La boucle n'est jamais bloquée pendant toute la durée d'un entraînement
+        assert max(loop_lags) < max(0.25, elapsed / 2)
+        assert sorted(prediction_latencies)[int(0.95 * len(prediction_latencies)) - 1] < 2.0
+        
+        stats = pipeline.executor.get_stats()
+        assert stats["training"]["rejected"] == 1
+        assert stats["inference"]["completed"] >= 40
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
\ No newline at end of file
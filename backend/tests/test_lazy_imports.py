@@ -0,0 +1,60 @@
+import pytest
+import os
+import subprocess
+import sys
+from utils import lazy_imports
+from utils.lazy_imports import LazyModule, is_available, lazy_import
+from utils.mlflow_tracker import MLflowTracker
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+class TestLazyImports:
+    """Tests des imports différés et du démarrage"""
+    
+    def test_module_loaded_on_first_attribute(self):
+        """Le module n'est importé qu'au premier accès, une seule fois, et chronométré"""
+        module = lazy_import("json.tool")
+        assert isinstance(module, LazyModule) and not module.is_loaded
+        
+        assert callable(module.main)
+        assert module.is_loaded
+        assert module.main is sys.modules["json.tool"].main
+        assert "json.tool" in lazy_imports.get_import_timings()
+        
+        assert is_available("json") and not is_available("module_inexistant")
+        with pytest.raises(ImportError):
+            lazy_import("module_inexistant").attribut
+    
+    def test_services_import_without_heavy_modules(self):
+        """Importer les services de features et de plateau ne charge ni pandas ni scipy"""
+        code = (
+            "import sys\n"
+            "import services.plateau_detection, services.plateau_store, services.feature_engineering\n"
+            "import services.simple_feature_engineering, utils.mlflow_tracker\n"
+            "print(sorted(m for m in ('pandas', 'scipy', 'sklearn', 'mlflow') if m in sys.modules))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True)
+        assert output.stdout.strip() == "[]"
+    
+    def test_mlflow_experiment_created_on_first_use(self, monkeypatch):
+        """``create_experiment`` n'est pas appelé à la construction du tracker mais au premier log"""
+        import utils.mlflow_tracker as tracker_module
+        
+        calls = []
+        
+        class FakeMlflow:
+            class exceptions:
+                MlflowException = Exception
+            
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append(name)
+        
+        monkeypatch.setattr(tracker_module, "mlflow", FakeMlflow())
+        monkeypatch.setattr(tracker_module, "MLFLOW_AVAILABLE", True)
+        tracker = MLflowTracker("test-experiment")
+        assert calls == [] and tracker.setup_ms is None
+        
+        tracker.log_metric("mse", 0.5)
+        tracker.log_metric("mse", 0.4)
+        assert calls == ["set_tracking_uri", "create_experiment", "set_experiment", "log_metric", "log_metric"]
+        assert tracker.setup_ms is not None
@@ -0,0 +1,67 @@
+import pytest
+import time
+from prometheus_client import REGISTRY
+from utils import metrics
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+class TestMetrics:
+    """Tests de l'instrumentation Prometheus du pipeline"""
+    
+    def test_stage_timer_records_duration(self):
+        """Chaque ``observe_stage`` ajoute une observation à l'histogramme de l'étape"""
+        labels = {"stage": "inference"}
+        count = sample("ml_stage_duration_seconds_count", labels)
+        total = sample("ml_stage_duration_seconds_sum", labels)
+        
+        with metrics.observe_stage("inference"):
+            time.sleep(0.01)
+        
+        assert sample("ml_stage_duration_seconds_count", labels) == count + 1
+        assert sample("ml_stage_duration_seconds_sum", labels) - total >= 0.009
+    
+    def test_in_flight_gauge_and_failures(self):
+        """La jauge revient à zéro même si la requête lève une exception"""
+        labels = {"endpoint": "test_endpoint"}
+        with metrics.track_request("test_endpoint"):
+            assert sample("ml_requests_in_flight", labels) == 1
+        
+        with pytest.raises(ValueError):
+            with metrics.track_request("test_endpoint"):
+                raise ValueError("échec")
+        
+        assert sample("ml_requests_in_flight", labels) == 0
+        assert sample("ml_request_duration_seconds_count", labels) == 2
+    
+    def test_disabled_metrics_record_nothing(self):
+        count = sample("ml_predictions_total", {"model_used": "test_disabled"})
+        metrics.set_enabled(False)
+        try:
+            metrics.count_prediction("test_disabled")
+            with metrics.observe_stage("test_disabled"):
+                pass
+        finally:
+            metrics.set_enabled(True)
+        
+        assert sample("ml_predictions_total", {"model_used": "test_disabled"}) == count
+        assert REGISTRY.get_sample_value("ml_stage_duration_seconds_count", {"stage": "test_disabled"}) is None
+    
+    def test_overhead_per_request_within_budget(self):
+        """Instrumentation d'une prédiction (jauge, requête, 4 étapes, compteur) sous le budget"""
+        def instrumented_request():
+            with metrics.track_request("test_overhead"):
+                for stage in metrics.PREDICTION_STAGES:
+                    with metrics.observe_stage(stage):
+                        pass
+                metrics.count_prediction("test_overhead")
+        
+        iterations = 2000
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                instrumented_request()
+            best = min(best, (time.perf_counter() - start) / iterations)
+        
+        assert best < metrics.OVERHEAD_BUDGET_SECONDS
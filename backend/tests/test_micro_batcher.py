@@ -0,0 +1,84 @@
+import pytest
+import asyncio
+import numpy as np
+from services.micro_batcher import MicroBatcher
+
+class DoubleModel:
+    def predict(self, X):
+        return X.sum(axis=1) * 2
+
+def make_batcher(calls, **kwargs):
+    async def run_batch(model, X):
+        calls.append(len(X))
+        await asyncio.sleep(0)
+        return model.predict(X)
+    return MicroBatcher(run_batch, **kwargs)
+
+class TestMicroBatcher:
+    """Tests du regroupement des inférences concurrentes"""
+    
+    @pytest.mark.asyncio
+    async def test_flush_on_size_then_on_delay(self):
+        calls = []
+        batcher = make_batcher(calls, max_batch_size=4, max_delay_ms=20)
+        model = DoubleModel()
+        
+        results = await asyncio.gather(*[batcher.predict(model, np.array([float(i), 1.0])) for i in range(6)])
+        
+        assert results == [2 * (i + 1) for i in range(6)]
+        assert calls == [4, 2]
+        stats = batcher.get_stats()
+        assert (stats["batches"], stats["items"], stats["flush_size"], stats["flush_delay"]) == (2, 6, 1, 1)
+        assert stats["batch_size_histogram"] == {"2": 1, "4": 1}
+        assert stats["mean_batch_size"] == 3.0 and stats["pending"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_one_batch_per_model(self):
+        calls = []
+        batcher = make_batcher(calls, max_batch_size=8, max_delay_ms=0)
+        first, second = DoubleModel(), DoubleModel()
+        
+        results = await asyncio.gather(*[
+            batcher.predict(model, np.array([1.0])) for model in (first, second, first, second, first)
+        ])
+        
+        assert results == [2.0] * 5
+        assert sorted(calls) == [2, 3]
+    
+    @pytest.mark.asyncio
+    async def test_flush_when_no_expected_caller_left(self):
+        calls = []
+        batcher = make_batcher(calls, max_batch_size=8, max_delay_ms=10000)
+        model = DoubleModel()
+        
+        async def caller(value, delay):
+            batcher.expect()
+            await asyncio.sleep(delay)
+            if value is None:
+                batcher.withdraw()
+                return None
+            return await batcher.predict(model, np.array([value]), expected=True)
+        
+        # Le lot attend les appelants annoncés, pas son échéance
+        results = await asyncio.wait_for(asyncio.gather(caller(1.0, 0), caller(2.0, 0.01), caller(None, 0.02)), timeout=1.0)
+        
+        assert results == [2.0, 4.0, None]
+        assert calls == [2]
+        stats = batcher.get_stats()
+        assert (stats["flush_idle"], stats["flush_delay"], stats["expected"]) == (1, 0, 0)
+    
+    @pytest.mark.asyncio
+    async def test_batch_error_reaches_every_caller(self):
+        async def fail(model, X):
+            raise RuntimeError("boom")
+        
+        batcher = MicroBatcher(fail, max_batch_size=3)
+        results = await asyncio.gather(
+            *[batcher.predict(DoubleModel(), np.array([1.0])) for _ in range(3)], return_exceptions=True
+        )
+        # Modèles distincts : un lot (et une erreur) par appel
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert batcher.get_stats()["errors"] == 3
+        
+        with pytest.raises(ValueError):
+            MicroBatcher(fail, max_batch_size=0)
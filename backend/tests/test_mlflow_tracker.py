@@ -0,0 +1,145 @@
+import pytest
+import sys
+import threading
+import time
+import types
+from collections import namedtuple
+from utils.mlflow_tracker import BufferedPredictionSink, MLflowTracker
+
+class RecordingWriter:
+    """Writer de test : mémorise les lots, peut être bloqué pour simuler une base lente"""
+    
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+    
+    def __call__(self, events):
+        self.release.wait(5)
+        self.batches.append(list(events))
+
+class TestBufferedPredictionSink:
+    """Tests du sink MLflow tamponné"""
+    
+    def test_flush_on_batch_size(self):
+        """Un lot complet est écrit sans attendre l'intervalle"""
+        writer = RecordingWriter()
+        sink = BufferedPredictionSink(writer, max_batch_size=5, flush_interval=60)
+        
+        for i in range(12):
+            assert sink.submit({"step": i})
+        
+        deadline = time.time() + 2
+        while len(writer.batches) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        
+        assert [len(batch) for batch in writer.batches] == [5, 5]
+        sink.close()
+        assert [event["step"] for batch in writer.batches for event in batch] == list(range(12))
+    
+    def test_flush_on_interval(self):
+        """Un lot incomplet est écrit après ``flush_interval``"""
+        writer = RecordingWriter()
+        sink = BufferedPredictionSink(writer, max_batch_size=100, flush_interval=0.05)
+        
+        sink.submit({"step": 0})
+        time.sleep(0.3)
+        
+        assert writer.batches == [[{"step": 0}]]
+        sink.close()
+    
+    def test_overload_samples_then_drops(self):
+        """Base bloquée : échantillonnage au-delà du seuil, rejet quand la file est pleine"""
+        writer = RecordingWriter()
+        writer.release.clear()
+        sink = BufferedPredictionSink(
+            writer, max_batch_size=1, flush_interval=60, max_queue_size=20,
+            sample_threshold=0.5, overload_sample_every=5
+        )
+        
+        # Le premier événement occupe le writer bloqué
+        sink.submit({"step": -1})
+        time.sleep(0.05)
+        accepted = sum(sink.submit({"step": i}) for i in range(200))
+        
+        assert len(sink) == 20
+        assert accepted == 20
+        assert sink.stats["sampled_out"] > 0
+        assert sink.stats["dropped"] > 0
+        assert sink.stats["queued"] + sink.stats["sampled_out"] + sink.stats["dropped"] == 201
+        
+        writer.release.set()
+        assert sink.flush()
+        sink.close()
+        assert sum(len(batch) for batch in writer.batches) == 21
+    
+    def test_close_flushes_and_rejects(self):
+        """L'arrêt écrit la file restante puis refuse les nouveaux événements"""
+        writer = RecordingWriter()
+        sink = BufferedPredictionSink(writer, max_batch_size=100, flush_interval=60)
+        
+        for i in range(30):
+            sink.submit({"step": i})
+        sink.close()
+        
+        assert sum(len(batch) for batch in writer.batches) == 30
+        assert not sink.submit({"step": 30})
+        assert sink.stats["dropped"] == 1
+    
+    def test_tracker_uses_sink_for_predictions(self):
+        """En mode tamponné, ``log_prediction`` ne fait que mettre en file"""
+        tracker = MLflowTracker("test-experiment")
+        writer = RecordingWriter()
+        tracker.mlflow_available = True
+        tracker.prediction_sink = BufferedPredictionSink(writer, flush_interval=60)
+        
+        tracker.log_prediction({"exercise_name": "Squat", "prediction": 102.5})
+        tracker.log_prediction({"exercise_name": "Squat", "prediction": 105.0})
+        tracker.close()
+        
+        events = writer.batches[0]
+        assert [event["step"] for event in events] == [0, 1]
+        assert events[1]["data"]["prediction"] == 105.0
+        assert tracker.get_sink_stats()["written"] == 2
+    
+    def test_close_terminates_prediction_run(self, monkeypatch):
+        """Le run "predictions" ouvert par le sink est terminé à la fermeture"""
+        statuses = {}
+        
+        class FakeClient:
+            def get_experiment_by_name(self, name):
+                return types.SimpleNamespace(experiment_id="0")
+            
+            def create_run(self, experiment_id, run_name=None):
+                statuses[run_name] = None
+                return types.SimpleNamespace(info=types.SimpleNamespace(run_id=run_name))
+            
+            def log_batch(self, run_id, metrics=(), tags=()):
+                assert statuses[run_id] is None
+            
+            def set_terminated(self, run_id, status=None):
+                statuses[run_id] = status
+        
+        fake_mlflow = types.ModuleType("mlflow")
+        fake_mlflow.tracking = types.SimpleNamespace(MlflowClient=FakeClient)
+        fake_mlflow.entities = types.SimpleNamespace(
+            Metric=namedtuple("Metric", "key value timestamp step"), RunTag=namedtuple("RunTag", "key value")
+        )
+        monkeypatch.setitem(sys.modules, "mlflow", fake_mlflow)
+        monkeypatch.setitem(sys.modules, "mlflow.tracking", fake_mlflow.tracking)
+        monkeypatch.setitem(sys.modules, "mlflow.entities", fake_mlflow.entities)
+        
+        tracker = MLflowTracker("test-experiment")
+        tracker.mlflow_available = True
+        tracker._experiment_ready = True
+        tracker.prediction_sink = BufferedPredictionSink(tracker._write_prediction_batch, flush_interval=60)
+        
+        tracker.log_prediction({"exercise_name": "Squat", "prediction": 102.5})
+        tracker.close()
+        
+        assert statuses == {"predictions": "FINISHED"}
+        assert tracker._prediction_run_id is None
+        assert tracker.get_sink_stats()["written"] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
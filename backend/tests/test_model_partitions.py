@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+from services.model_partitions import PartitionedModelStore, partition_key
+
+class DummyModel:
+    """Modèle picklable minimal : un tableau de poids"""
+    
+    def __init__(self, coefficients):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.is_trained = True
+    
+    def predict(self, X):
+        return np.asarray(X) @ self.coefficients
+
+def publish(store, key, size=100, n_samples=50, value=1.0):
+    return store.registry(key).save(DummyModel(np.full(size, value)), ["x"] * size, {}, n_samples)
+
+class TestPartitionedModelStore:
+    """Tests des modèles par partition (chargement paresseux, LRU, fallback)"""
+    
+    def test_partition_key(self):
+        assert partition_key("  Développé   Couché ") == "exercise=développé couché"
+        assert partition_key("Squat", "advanced") == "exercise=squat/cohort=advanced"
+    
+    def test_lazy_load_then_resident(self, tmp_path):
+        store = PartitionedModelStore(str(tmp_path))
+        key = partition_key("Squat")
+        publish(store, key)
+        assert len(store) == 0
+        
+        model, manifest = store.get(key)
+        assert manifest["version"] == 1 and len(store) == 1
+        assert store.get(key)[0] is model
+        
+        stats = store.get_stats()["partitions"][key]
+        assert (stats["requests"], stats["cold_loads"], stats["hits"]) == (2, 1, 1)
+        assert stats["resident"] and stats["bytes"] == manifest["model_bytes"] > 800
+        assert stats["last_cold_load_ms"] is not None
+    
+    def test_small_or_missing_partitions_fall_back(self, tmp_path):
+        store = PartitionedModelStore(str(tmp_path), min_samples=30)
+        small = partition_key("Curl biceps")
+        publish(store, small, n_samples=5)
+        
+        assert store.get(small) is None
+        assert store.get(partition_key("Inconnu")) is None
+        
+        stats = store.get_stats()
+        assert stats["partitions"][small]["fallbacks"] == 1
+        assert stats["partitions"][small]["n_samples"] == 5
+        assert stats["missing_partition_requests"] == 1
+        assert partition_key("Inconnu") not in stats["partitions"]
+    
+    def test_memory_cap_evicts_least_recently_used(self, tmp_path):
+        store = PartitionedModelStore(str(tmp_path))
+        keys = [partition_key(name) for name in ("Squat", "Développé couché", "Rowing barre")]
+        for key in keys:
+            publish(store, key, size=1000)
+        model_bytes = store.registry(keys[0]).manifest()["model_bytes"]
+        store.max_resident_bytes = int(model_bytes * 2.5)
+        
+        store.get(keys[0])
+        store.get(keys[1])
+        store.get(keys[0])  # keys[1] devient le moins récemment utilisé
+        store.get(keys[2])
+        
+        stats = store.get_stats()
+        assert stats["resident"] == 2 and stats["resident_bytes"] <= store.max_resident_bytes
+        assert stats["partitions"][keys[1]]["evictions"] == 1
+        assert not stats["partitions"][keys[1]]["resident"]
+        
+        store.get(keys[1])
+        assert store.get_stats()["partitions"][keys[1]]["cold_loads"] == 2
+    
+    def test_newer_version_replaces_resident_model(self, tmp_path):
+        store = PartitionedModelStore(str(tmp_path), recheck_seconds=0)
+        key = partition_key("Squat")
+        publish(store, key, size=2, value=1.0)
+        assert store.get(key)[0].predict([[1.0, 1.0]])[0] == 2.0
+        
+        # Publication par un autre processus : vue au prochain contrôle
+        publish(store, key, size=2, value=3.0)
+        model, manifest = store.get(key)
+        assert manifest["version"] == 2 and model.predict([[1.0, 1.0]])[0] == 6.0
+        assert store.get_stats()["resident_bytes"] == manifest["model_bytes"]
@@ -0,0 +1,77 @@
+import pytest
+import os
+import numpy as np
+from services.model_registry import ModelRegistry
+
+class DummyModel:
+    """Modèle picklable minimal : un tableau de poids"""
+    
+    def __init__(self, coefficients):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.is_trained = True
+    
+    def predict(self, X):
+        return np.asarray(X) @ self.coefficients
+
+class TestModelRegistry:
+    """Tests du registre de modèles versionné"""
+    
+    def test_versions_increment_and_latest_is_loaded(self, tmp_path):
+        """Chaque publication crée une version ; ``load`` prend la dernière"""
+        registry = ModelRegistry(str(tmp_path))
+        assert registry.latest_version() is None
+        
+        assert registry.save(DummyModel([1.0, 2.0]), ["a", "b"], {"ridge": {"r2": 0.5}}, 10) == 1
+        assert registry.save(DummyModel([3.0, 4.0]), ["a", "b"], {"ridge": {"r2": 0.7}}, 20) == 2
+        
+        model, manifest = registry.load()
+        assert manifest["version"] == 2
+        assert manifest["feature_names"] == ["a", "b"]
+        assert manifest["metrics"]["ridge"]["r2"] == 0.7
+        assert manifest["n_samples"] == 20
+        np.testing.assert_array_equal(model.predict([[1.0, 1.0]]), [7.0])
+        
+        model, manifest = registry.load(version=1)
+        np.testing.assert_array_equal(model.coefficients, [1.0, 2.0])
+    
+    def test_arrays_are_memory_mapped(self, tmp_path):
+        """Les tableaux sont chargés en mémoire mappée, en lecture seule"""
+        registry = ModelRegistry(str(tmp_path))
+        registry.save(DummyModel(np.arange(1000.0)), ["x"])
+        
+        model, _ = registry.load(mmap=True)
+        assert isinstance(model.coefficients, np.memmap)
+        assert not model.coefficients.flags.writeable
+        
+        model, _ = registry.load(mmap=False)
+        assert not isinstance(model.coefficients, np.memmap)
+    
+    def test_only_complete_versions_are_visible(self, tmp_path):
+        """Un dossier en cours d'écriture n'est pas une version ; un échec ne laisse rien"""
+        registry = ModelRegistry(str(tmp_path))
+        os.makedirs(tmp_path / ".staging-abandonne")
+        assert registry.list_versions() == []
+        
+        with pytest.raises(Exception):
+            registry.save(lambda x: x, ["x"])  # non picklable
+        assert registry.list_versions() == []
+        assert sorted(os.listdir(tmp_path)) == [".staging-abandonne"]
+    
+    def test_taken_version_number_is_skipped(self, tmp_path):
+        """Si un autre processus a publié le même numéro, la version suivante est utilisée"""
+        registry = ModelRegistry(str(tmp_path))
+        registry.save(DummyModel([1.0]), ["x"])
+        registry.latest_version = lambda: 0  # vue périmée du registre
+        
+        assert registry.save(DummyModel([2.0]), ["x"]) == 2
+    
+    def test_old_versions_are_pruned(self, tmp_path):
+        """Seules les ``keep_versions`` dernières versions sont conservées"""
+        registry = ModelRegistry(str(tmp_path), keep_versions=2)
+        for i in range(4):
+            registry.save(DummyModel([float(i)]), ["x"])
+        
+        assert registry.list_versions() == [3, 4]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
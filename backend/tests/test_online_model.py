@@ -0,0 +1,72 @@
+import pytest
+import pickle
+import numpy as np
+from services.online_model import OnlineEnsembleModel
+
+def make_data(n, seed=0):
+    """Target linéaire sur des features d'échelles très différentes"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4)) * [1.0, 10.0, 100.0, 0.1] + [0.0, 50.0, 1000.0, 2.0]
+    y = X @ [2.0, 0.5, 0.05, 10.0] + 20.0 + rng.normal(scale=0.5, size=n)
+    return X, y
+
+class TestOnlineEnsembleModel:
+    """Tests de l'ensemble incrémental (partial_fit, réentraînement sur fenêtre)"""
+    
+    def test_first_batch_is_a_full_fit(self):
+        X, y = make_data(200)
+        model = OnlineEnsembleModel()
+        with pytest.raises(ValueError):
+            model.predict(X)
+        
+        scores = model.partial_fit(X, y, feature_names=["a", "b", "c", "d"])
+        
+        assert set(scores) == set(model.get_ensemble_weights())
+        assert model.get_training_history()["refits"] == 1
+        assert np.mean(np.abs(model.predict(X) - y)) < 1.0
+        assert sum(model.get_ensemble_weights().values()) == pytest.approx(1.0)
+        assert set(model.get_feature_importance()) == {"a", "b", "c", "d"}
+    
+    def test_rescaling_keeps_the_learned_function(self):
+        """Les nouvelles statistiques d'échelle seules ne changent pas les prédictions"""
+        X, y = make_data(300)
+        model = OnlineEnsembleModel()
+        model.train(X[:100], y[:100])
+        before = model.predict(X[:20])
+        
+        model._update_statistics(X[100:] * 1.5 + 3.0, y[100:] * 2.0)
+        
+        np.testing.assert_allclose(model.predict(X[:20]), before, rtol=1e-9)
+    
+    def test_updates_learn_from_new_samples_only(self):
+        X, y = make_data(2100, seed=1)
+        model = OnlineEnsembleModel(buffer_size=500)
+        model.train(X[:100], y[:100])
+        initial_error = np.mean(np.abs(model.predict(X[-100:]) - y[-100:]))
+        
+        for start in range(100, 2000, 50):
+            model.partial_fit(X[start:start + 50], y[start:start + 50])
+        
+        history = model.get_training_history()
+        assert history["updates"] == 38 and history["n_samples_seen"] == 2000
+        assert np.mean(np.abs(model.predict(X[-100:]) - y[-100:])) < initial_error
+        
+        # Fenêtre circulaire : les 500 derniers échantillons, dans l'ordre
+        buffered_X, buffered_y = model.buffered_samples()
+        np.testing.assert_array_equal(buffered_X, X[1500:2000])
+        np.testing.assert_array_equal(buffered_y, y[1500:2000])
+    
+    def test_refit_on_buffer_and_pickle(self):
+        X, y = make_data(400, seed=2)
+        model = OnlineEnsembleModel(buffer_size=300)
+        model.train(X[:200], y[:200])
+        model.partial_fit(X[200:], y[200:])
+        
+        model.refit()
+        history = model.get_training_history()
+        assert (history["refits"], history["n_samples"], history["n_samples_seen"]) == (2, 300, 400)
+        
+        restored = pickle.loads(pickle.dumps(model))
+        np.testing.assert_array_equal(restored.predict(X[:10]), model.predict(X[:10]))
+        restored.partial_fit(X[:10], y[:10])
+        assert restored.get_training_history()["updates"] == 2
@@ -0,0 +1,65 @@
+import pytest
+import time
+from services.prediction_cache import PredictionCache
+
+HISTORY = [{"date": "2024-01-01", "exercises": [{"name": "Squat", "sets": [{"weight": 100, "reps": 5}]}]}]
+
+class TestPredictionCache:
+    """Tests du cache LRU/TTL des prédictions"""
+    
+    def test_key_is_stable_and_includes_model_version(self):
+        """Même requête, même clé (ordre des clés de user_data indifférent) ; nouvelle version, nouvelle clé"""
+        key = PredictionCache.make_key("Squat", {"current_weight": 100, "user_id": "u1"}, HISTORY, 1)
+        
+        assert key == PredictionCache.make_key("Squat", {"user_id": "u1", "current_weight": 100}, HISTORY, 1)
+        assert key != PredictionCache.make_key("Squat", {"current_weight": 100, "user_id": "u1"}, HISTORY, 2)
+        assert key != PredictionCache.make_key("Bench", {"current_weight": 100, "user_id": "u1"}, HISTORY, 1)
+        assert key != PredictionCache.make_key("Squat", {"current_weight": 100, "user_id": "u1"}, HISTORY * 2, 1)
+        
+        # Historique : clé exacte à l'octet près sur l'entrée brute
+        copy = [{"date": "2024-01-01", "exercises": [{"name": "Squat", "sets": [{"weight": 100, "reps": 5}]}]}]
+        reordered = [{"exercises": [{"name": "Squat", "sets": [{"reps": 5, "weight": 100}]}], "date": "2024-01-01"}]
+        assert key == PredictionCache.make_key("Squat", {"current_weight": 100, "user_id": "u1"}, copy, 1)
+        assert key != PredictionCache.make_key("Squat", {"current_weight": 100, "user_id": "u1"}, reordered, 1)
+    
+    def test_hits_misses_and_lru_eviction(self):
+        """Au-delà de ``max_entries``, l'entrée la moins récemment lue est évincée"""
+        cache = PredictionCache(max_entries=2)
+        cache.put("a", {"predicted_weight": 1.0})
+        cache.put("b", {"predicted_weight": 2.0})
+        assert cache.get("a") == {"predicted_weight": 1.0}  # "a" devient la plus récente
+        
+        cache.put("c", {"predicted_weight": 3.0})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+        assert stats["entries"] == 2
+    
+    def test_memory_bound_and_ttl(self):
+        """La taille totale reste sous ``max_bytes`` et les entrées expirent"""
+        cache = PredictionCache(max_bytes=200, ttl_seconds=0.05)
+        for i in range(20):
+            cache.put(str(i), {"recommendations": ["x" * 50]})
+        assert cache.get_stats()["bytes"] <= 200
+        assert len(cache) < 20
+        
+        cache.put("trop_gros", {"recommendations": ["x" * 500]})
+        assert cache.get("trop_gros") is None
+        
+        cache.put("court", {"predicted_weight": 1.0})
+        time.sleep(0.06)
+        assert cache.get("court") is None
+        assert cache.get_stats()["expirations"] >= 1
+    
+    def test_clear_invalidates_everything(self):
+        cache = PredictionCache()
+        cache.put("a", {"predicted_weight": 1.0})
+        cache.clear()
+        
+        assert cache.get("a") is None
+        stats = cache.get_stats()
+        assert stats["invalidations"] == 1
+        assert stats["entries"] == 0 and stats["bytes"] == 0
@@ -0,0 +1,31 @@
+import pytest
+import json
+import numpy as np
+from utils import serialization
+from utils.serialization import NumpyJSONResponse
+
+CONTENT = {
+    "slope": np.float64(1.25),
+    "duration": np.int64(3),
+    "detected": np.bool_(True),
+    "weights": np.array([80.0, 82.5]),
+    "missing": float("nan"),
+    "nested": [{"tau": np.float32(0.5), 1: "clé non textuelle"}]
+}
+EXPECTED = {
+    "slope": 1.25, "duration": 3, "detected": True, "weights": [80.0, 82.5], "missing": None,
+    "nested": [{"tau": 0.5, "1": "clé non textuelle"}]
+}
+
+class TestSerialization:
+    """Tests de l'encodage JSON des réponses (types NumPy)"""
+    
+    def test_numpy_types_are_encoded(self):
+        body = NumpyJSONResponse(CONTENT).body
+        assert json.loads(body) == EXPECTED
+    
+    def test_fallback_without_orjson_matches(self):
+        """Le repli json donne le même document qu'orjson"""
+        assert json.loads(json.dumps(serialization.to_builtin(CONTENT))) == EXPECTED
+        if serialization.ORJSON_AVAILABLE:
+            assert json.loads(serialization.dumps(CONTENT)) == json.loads(json.dumps(serialization.to_builtin(CONTENT)))
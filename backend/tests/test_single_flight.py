@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+from services.single_flight import SingleFlight, SingleFlightTimeout
+
+class TestSingleFlight:
+    """Tests du regroupement des appels concurrents identiques"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+        
+        async def compute(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {"value": value}
+        
+        results = await asyncio.gather(
+            *[flight.run("a", lambda: compute(1)) for _ in range(5)], flight.run("b", lambda: compute(2))
+        )
+        
+        assert calls == [1, 2]
+        assert all(result is results[0] for result in results[:5]) and results[5] == {"value": 2}
+        stats = flight.get_stats()
+        assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (2, 4, 0)
+        
+        # Calcul terminé : un nouvel appel relance le calcul
+        await flight.run("a", lambda: compute(3))
+        assert calls == [1, 2, 3]
+    
+    @pytest.mark.asyncio
+    async def test_exception_is_shared(self):
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        
+        results = await asyncio.gather(*[flight.run("a", fail) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.get_stats()["executions"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_deadline_is_per_key_and_releases_the_key(self):
+        flight = SingleFlight(timeout_seconds=1.0)
+        release = asyncio.Event()
+        
+        async def blocked():
+            await release.wait()
+            return "late"
+        
+        async def fast():
+            await asyncio.sleep(0.02)
+            return "fast"
+        
+        stuck = asyncio.ensure_future(flight.run("slow", blocked, timeout=0.05))
+        await asyncio.sleep(0.03)
+        joined = asyncio.ensure_future(flight.run("slow", blocked))
+        
+        # La clé voisine garde sa propre échéance
+        assert await flight.run("other", fast) == "fast"
+        for call in (stuck, joined):
+            with pytest.raises(SingleFlightTimeout):
+                await call
+        
+        # Échéance dépassée : la clé est libérée pour un nouveau calcul
+        assert flight.get_stats()["in_flight"] == 0 and flight.get_stats()["timeouts"] == 2
+        release.set()
+        assert await flight.run("slow", blocked) == "late"
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+        
+        async def compute():
+            await asyncio.sleep(0.02)
+            return 42
+        
+        first = asyncio.ensure_future(flight.run("a", compute))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.run("a", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        
+        assert await second == 42
+        assert flight.get_stats()["coalesced"] == 1
@@ -0,0 +1,66 @@
+import pytest
+import asyncio
+import json
+import numpy as np
+from services.workout_frame import WorkoutFrame, WorkoutFrameBuilder
+from services.workout_stream import WorkoutStreamError, iter_ndjson_lines, read_workout_stream
+from utils.synthetic_data import generate_workout_history
+
+async def _chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+def _ndjson(header, history) -> bytes:
+    return "\n".join(json.dumps(line) for line in [header, *history]).encode("utf-8")
+
+class TestWorkoutStream:
+    """Tests de la lecture en flux (NDJSON) des historiques"""
+    
+    def test_builder_with_flushes_matches_frame(self):
+        """Colonnes identiques au parcours de la liste, même converties par petits paquets"""
+        history = generate_workout_history(40, seed=3)
+        history[5]["exercises"][0]["sets"][0]["reps"] = None
+        history[7]["exercises"].append({"sets": [{"weight": 20, "reps": 10}]})
+        
+        builder = WorkoutFrameBuilder(flush_every=7)
+        for workout in history:
+            builder.add(workout)
+        streamed = builder.build(fingerprint="abc")
+        reference = WorkoutFrame.from_history(history)
+        
+        assert len(streamed) == len(reference) and streamed.source == []
+        assert streamed.exercise_names == reference.exercise_names
+        for column in ("workout_index", "entry_index", "exercise_ids", "set_index", "reps", "has_reps",
+                       "entry_workout", "entry_exercise", "entry_n_sets", "exercise_order", "exercise_offsets"):
+            np.testing.assert_array_equal(getattr(streamed, column), getattr(reference, column))
+            assert getattr(streamed, column).dtype == getattr(reference, column).dtype
+        np.testing.assert_array_equal(streamed.weights, reference.weights)
+        np.testing.assert_array_equal(streamed.dates, reference.dates)
+    
+    def test_lines_split_across_chunks(self):
+        """Les lignes coupées entre deux morceaux sont recomposées ; lignes vides ignorées"""
+        body = b'{"a": 1}\n\n{"b": 2}\r\n{"c": 3}'
+        
+        async def collect():
+            return [line async for line in iter_ndjson_lines(_chunks(body, 3))]
+        
+        assert asyncio.run(collect()) == [(1, b'{"a": 1}'), (3, b'{"b": 2}\r'), (4, b'{"c": 3}')]
+    
+    def test_read_stream_fingerprint_and_errors(self):
+        """Même contenu, même empreinte quel que soit le découpage ; erreurs avec numéro de ligne"""
+        history = generate_workout_history(10, seed=4)
+        body = _ndjson({"exercise_name": "Squat"}, history)
+        
+        header, frame = asyncio.run(read_workout_stream(_chunks(body, 5)))
+        _, same = asyncio.run(read_workout_stream(_chunks(body, 4096)))
+        _, shorter = asyncio.run(read_workout_stream(_chunks(_ndjson({}, history[:-1]), 4096)))
+        assert header == {"exercise_name": "Squat"} and len(frame) == 10
+        assert frame.fingerprint == same.fingerprint != shorter.fingerprint
+        
+        for body, line in ((b'{}\n{"date": "2024-01-01"}\nnot json', 3), (b'{}\n[1, 2]', 2), (b"", 0)):
+            with pytest.raises(WorkoutStreamError) as error:
+                asyncio.run(read_workout_stream(_chunks(body, 8)))
+            assert error.value.line == line
+        
+        with pytest.raises(WorkoutStreamError):
+            asyncio.run(read_workout_stream(_chunks(b"{}\n" + b"x" * 100, 10), max_line_bytes=50))